@@ -0,0 +1 @@
+"""Benchmarks do capivara-mcp (fora da suíte de testes; rodar com ``python -m benchmarks.<nome>``)."""
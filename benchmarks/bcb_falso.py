@@ -0,0 +1,324 @@
+"""BCB falso para testes de carga: SGS (JSON) e Olinda/OData (PTAX, Expectativas, TaxaJuros).
+
+Responde nos mesmos caminhos das APIs reais, com o suficiente delas para os
+tools do capivara-mcp: a janela ``dataInicial``/``dataFinal`` do SGS (dias
+úteis nas séries diárias, um ponto por mês nas demais), os parâmetros de
+função da PTAX e ``$filter`` (indicador, mês, modalidade), ``$top`` e
+``$select`` do OData. Os dados são determinísticos; a aleatoriedade fica na
+latência e nas falhas, controladas por ``Parametros``:
+
+- ``latencia_ms`` + até ``jitter_ms`` (uniforme) antes de cada resposta;
+- ``taxa_erro``: fração das requisições respondidas com ``status_erro``;
+- ``taxa_lentidao``: fração que espera ``lentidao_ms`` (cauda longa, timeouts);
+- ``linhas``: registros disponíveis nos recursos OData (a resposta traz até
+  ``$top``) e ``boletins``: boletins PTAX por dia útil (1 a 5).
+
+Para apontar o servidor para cá, ``CAPIVARA_BCB_URL=http://127.0.0.1:<porta>``.
+``GET /_estado`` devolve as requisições recebidas por upstream e status, e
+``POST /_parametros`` (JSON) troca os parâmetros com o servidor no ar::
+
+    python -m benchmarks.bcb_falso --porta 8765 --latencia-ms 80 --taxa-erro 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import anyio
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from capivara_mcp.tools._calendario import eh_dia_util
+
+
+@dataclass
+class Parametros:
+    latencia_ms: float = 50.0
+    jitter_ms: float = 20.0
+    taxa_erro: float = 0.0
+    status_erro: int = 503
+    taxa_lentidao: float = 0.0
+    lentidao_ms: float = 5000.0
+    linhas: int = 1000
+    boletins: int = 1
+
+
+# Séries do SGS com um ponto por dia útil; as demais têm um ponto por mês
+_SGS_DIARIAS = {1, 11, 12, 432}
+_SGS_BASE = {432: 10.5, 11: 10.4, 12: 0.04, 433: 0.4, 189: 0.5, 7478: 0.4, 188: 0.4, 4380: 900_000.0, 4513: 75.0}
+
+_TIPOS_BOLETIM = ("Abertura", "Intermediário", "Intermediário", "Intermediário", "Fechamento")
+_INSTITUICOES = ("CAIXA ECONOMICA FEDERAL", "BANCO DO BRASIL", "ITAU UNIBANCO", "BRADESCO", "SANTANDER")
+_FOCUS_DATA = date(2025, 1, 10)
+
+
+def _parametro_funcao(request: Request, nome: str) -> str:
+    return request.query_params.get(f"@{nome}", "").strip("'")
+
+
+def _filtro(request: Request, campo: str) -> str | None:
+    achado = re.search(rf"{campo} eq '((?:[^']|'')*)'", request.query_params.get("$filter", ""))
+    return achado.group(1).replace("''", "'") if achado else None
+
+
+def _dias(inicio: date, fim: date, diarios: bool) -> list[date]:
+    if diarios:
+        return [
+            inicio + timedelta(days=i)
+            for i in range((fim - inicio).days + 1)
+            if eh_dia_util(inicio + timedelta(days=i))
+        ]
+    meses = []
+    atual = inicio.replace(day=1) if inicio.day == 1 else (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    while atual <= fim:
+        meses.append(atual)
+        atual = (atual.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return meses
+
+
+def _variacao(d: date) -> float:
+    """Variação determinística por data (degraus de ~30 dias), para as séries não serem constantes."""
+    return 0.01 * ((d.toordinal() // 30) % 5)
+
+
+def _ptax(request: Request, n: int, parametros: Parametros) -> list[dict[str, Any]]:
+    moeda = _parametro_funcao(request, "moeda") or "USD"
+    inicio = datetime.strptime(_parametro_funcao(request, "dataInicial"), "%m-%d-%Y").date()
+    fim = datetime.strptime(_parametro_funcao(request, "dataFinalCotacao"), "%m-%d-%Y").date()
+    base = 5.1 if moeda == "USD" else 5.6
+    tipos = _TIPOS_BOLETIM[-max(1, min(parametros.boletins, len(_TIPOS_BOLETIM))) :]
+    registros = []
+    for d in _dias(inicio, fim, diarios=True):
+        for i, tipo in enumerate(tipos):
+            valor = base * (1 + _variacao(d)) + i * 0.001
+            hora = 13 if tipo == "Fechamento" else 10 + i
+            registros.append(
+                {
+                    "paridadeCompra": 1.0,
+                    "paridadeVenda": 1.0,
+                    "cotacaoCompra": round(valor, 4),
+                    "cotacaoVenda": round(valor + 0.0006, 4),
+                    "dataHoraCotacao": f"{d:%Y-%m-%d} {hora:02d}:{i * 3 + 1:02d}:27.563",
+                    "tipoBoletim": tipo,
+                }
+            )
+    return registros
+
+
+def _focus(campos: Callable[[int], dict[str, Any]]) -> Callable[[Request, int, Parametros], list[dict[str, Any]]]:
+    def gerar(request: Request, n: int, parametros: Parametros) -> list[dict[str, Any]]:
+        indicador = _filtro(request, "Indicador") or "IPCA"
+        registros = []
+        for i in range(n):
+            registro: dict[str, Any] = {
+                "Indicador": indicador,
+                "Data": f"{_FOCUS_DATA - timedelta(days=7 * (i % 1000)):%Y-%m-%d}",
+            }
+            registro.update(campos(i))
+            registro.update(
+                Media=round(4.5 + (i % 50) * 0.01, 4),
+                Mediana=round(4.48 + (i % 50) * 0.01, 4),
+                DesvioPadrao=0.21,
+                Minimo=3.8,
+                Maximo=5.2,
+                numeroRespondentes=40 + i % 80,
+                baseCalculo=0,
+            )
+            registros.append(registro)
+        return registros
+
+    return gerar
+
+
+def _taxa_juros(request: Request, n: int, parametros: Parametros) -> list[dict[str, Any]]:
+    mes = _filtro(request, "Mes") or "Jan-2025"
+    modalidade = _filtro(request, "Modalidade") or "FINANCIAMENTO IMOBILIARIO"
+    return [
+        {
+            "Mes": mes,
+            "Modalidade": modalidade,
+            "Posicao": i + 1,
+            "InstituicaoFinanceira": f"{_INSTITUICOES[i % len(_INSTITUICOES)]} {i // len(_INSTITUICOES) or ''}".strip(),
+            "TaxaJurosAoMes": round(0.39 + i * 0.01, 2),
+            "TaxaJurosAoAno": round(4.75 + i * 0.12, 2),
+            "cnpj8": f"{i:08d}",
+            "anoMes": "2025-01",
+        }
+        for i in range(n)
+    ]
+
+
+# (serviço, recurso) -> gerador; a PTAX ignora ``$top`` (a janela define o tamanho)
+_OLINDA: dict[tuple[str, str], Callable[[Request, int, Parametros], list[dict[str, Any]]]] = {
+    ("PTAX", "CotacaoMoedaPeriodo"): _ptax,
+    ("Expectativas", "ExpectativasMercadoAnuais"): _focus(lambda i: {"DataReferencia": str(2025 + i % 4)}),
+    ("Expectativas", "ExpectativaMercadoMensais"): _focus(lambda i: {"DataReferencia": f"{i % 12 + 1:02d}/2025"}),
+    ("Expectativas", "ExpectativasMercadoSelic"): _focus(lambda i: {"Reuniao": f"R{i % 8 + 1}/2025"}),
+    ("Expectativas", "ExpectativasMercadoInflacao12Meses"): _focus(lambda i: {"Suavizada": "S" if i % 2 else "N"}),
+    ("Expectativas", "ExpectativasMercadoTop5Anuais"): _focus(
+        lambda i: {"DataReferencia": str(2025 + i % 4), "tipoCalculo": "CLM"[i % 3]}
+    ),
+    ("taxaJuros", "TaxasJurosMensalPorMes"): _taxa_juros,
+}
+
+_UPSTREAM_OLINDA = {"PTAX": "ptax", "Expectativas": "expectativas", "taxaJuros": "taxa_juros"}
+
+
+class BcbFalso:
+    """Aplicação Starlette do BCB falso, com contagem das requisições recebidas."""
+
+    def __init__(self, parametros: Parametros | None = None, semente: int | None = None):
+        self.parametros = parametros or Parametros()
+        self.requisicoes: Counter[tuple[str, int]] = Counter()
+        self._lock = threading.Lock()
+        self._aleatorio = random.Random(semente)
+
+    def estado(self) -> dict[str, Any]:
+        """Requisições recebidas por upstream e status, e os parâmetros em uso."""
+        with self._lock:
+            contagem = sorted(self.requisicoes.items())
+        por_upstream: dict[str, dict[str, int]] = {}
+        for (upstream, status), n in contagem:
+            por_upstream.setdefault(upstream, {})[str(status)] = n
+        return {"requisicoes": por_upstream, "parametros": asdict(self.parametros)}
+
+    async def _responder(self, upstream: str, gerar: Callable[[], Any]) -> Response:
+        p = self.parametros
+        atraso = p.latencia_ms + self._aleatorio.uniform(0, p.jitter_ms)
+        if self._aleatorio.random() < p.taxa_lentidao:
+            atraso = p.lentidao_ms
+        await anyio.sleep(atraso / 1000)
+        if self._aleatorio.random() < p.taxa_erro:
+            status, resposta = p.status_erro, PlainTextResponse("Erro simulado", status_code=p.status_erro)
+        else:
+            try:
+                status, resposta = 200, JSONResponse(gerar())
+            except (KeyError, ValueError) as e:
+                status, resposta = 400, PlainTextResponse(f"Requisição inválida: {e}", status_code=400)
+        with self._lock:
+            self.requisicoes[(upstream, status)] += 1
+        return resposta
+
+    async def _sgs(self, request: Request) -> Response:
+        codigo = int(request.path_params["codigo"])
+
+        def gerar() -> list[dict[str, str]]:
+            inicio = datetime.strptime(request.query_params["dataInicial"], "%d/%m/%Y").date()
+            fim = datetime.strptime(request.query_params["dataFinal"], "%d/%m/%Y").date()
+            base = _SGS_BASE.get(codigo, 1.0)
+            return [
+                {"data": f"{d:%d/%m/%Y}", "valor": f"{base * (1 + _variacao(d)):.2f}"}
+                for d in _dias(inicio, fim, codigo in _SGS_DIARIAS)
+            ]
+
+        return await self._responder("sgs", gerar)
+
+    async def _olinda(self, request: Request) -> Response:
+        servico: str = request.path_params["servico"]
+        recurso = request.path_params["recurso"].split("(", 1)[0]
+        gerador = _OLINDA.get((servico, recurso))
+        upstream = _UPSTREAM_OLINDA.get(servico, servico)
+        if gerador is None:
+            with self._lock:
+                self.requisicoes[(upstream, 404)] += 1
+            return PlainTextResponse(f"Recurso não simulado: {servico}/{recurso}", status_code=404)
+
+        def gerar() -> dict[str, Any]:
+            n = min(int(request.query_params.get("$top", self.parametros.linhas)), self.parametros.linhas)
+            registros = gerador(request, n, self.parametros)
+            selecao = request.query_params.get("$select")
+            if selecao:
+                campos = selecao.split(",")
+                registros = [{c: r[c] for c in campos if c in r} for r in registros]
+            return {"@odata.context": f"{request.base_url}$metadata#{recurso}", "value": registros}
+
+        return await self._responder(upstream, gerar)
+
+    async def _estado(self, request: Request) -> Response:
+        return JSONResponse(self.estado())
+
+    async def _trocar_parametros(self, request: Request) -> Response:
+        novos = await request.json()
+        validos = {f.name for f in fields(Parametros)}
+        desconhecidos = set(novos) - validos
+        if desconhecidos:
+            return PlainTextResponse(f"Parâmetros desconhecidos: {', '.join(sorted(desconhecidos))}", status_code=400)
+        for nome, valor in novos.items():
+            setattr(self.parametros, nome, type(getattr(self.parametros, nome))(valor))
+        return JSONResponse(asdict(self.parametros))
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/dados/serie/bcdata.sgs.{codigo:int}/dados", self._sgs),
+                Route("/olinda/servico/{servico}/versao/{versao}/odata/{recurso:path}", self._olinda),
+                Route("/_estado", self._estado),
+                Route("/_parametros", self._trocar_parametros, methods=["POST"]),
+            ]
+        )
+
+
+class ServidorFalso:
+    """Roda um ``BcbFalso`` com uvicorn numa thread (``with ServidorFalso() as s: s.url``)."""
+
+    def __init__(self, bcb: BcbFalso | None = None, host: str = "127.0.0.1", porta: int = 0):
+        self.bcb = bcb or BcbFalso()
+        self._servidor = uvicorn.Server(
+            uvicorn.Config(self.bcb.app(), host=host, port=porta, log_level="warning", lifespan="off")
+        )
+        self._thread = threading.Thread(target=self._servidor.run, name="bcb-falso", daemon=True)
+        self.url = ""
+
+    def __enter__(self) -> ServidorFalso:
+        self._thread.start()
+        while not self._servidor.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("O BCB falso não subiu (porta em uso?).")
+            self._thread.join(0.01)
+        host, porta = self._servidor.servers[0].sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{porta}"
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._servidor.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def argumentos_parametros(parser: argparse.ArgumentParser) -> None:
+    """Opções de linha de comando para cada campo de ``Parametros`` (``--latencia-ms`` etc.)."""
+    for campo in fields(Parametros):
+        padrao = getattr(Parametros(), campo.name)
+        parser.add_argument(f"--{campo.name.replace('_', '-')}", type=type(padrao), default=padrao, dest=campo.name)
+
+
+def parametros_de(args: argparse.Namespace) -> Parametros:
+    return Parametros(**{f.name: getattr(args, f.name) for f in fields(Parametros)})
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.bcb_falso", description=(__doc__ or "").partition("\n")[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--semente", type=int, help="semente da latência e das falhas (reprodutível)")
+    argumentos_parametros(parser)
+    args = parser.parse_args(argv)
+    bcb = BcbFalso(parametros_de(args), args.semente)
+    print(f"BCB falso em http://{args.host}:{args.porta} (CAPIVARA_BCB_URL)", flush=True)
+    uvicorn.run(bcb.app(), host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
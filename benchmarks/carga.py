@@ -0,0 +1,339 @@
+"""Teste de carga ponta a ponta: muitas sessões MCP simultâneas contra um BCB falso.
+
+Sobe o BCB falso (``benchmarks/bcb_falso.py``) numa thread — ou usa um já no
+ar, com ``--upstream`` —, aponta o servidor para ele (``CAPIVARA_BCB_URL``) e
+abre ``--sessoes`` sessões MCP concorrentes:
+
+- ``stdio``: um processo ``capivara-mcp`` por sessão, como num cliente desktop;
+- ``http``: um único servidor ``--transporte http`` (com ``--workers``),
+  compartilhado por todas as sessões via Streamable HTTP.
+
+Depois que todas as sessões inicializam, cada uma faz ``--chamadas`` chamadas
+(ou chama até passar ``--duracao`` segundos), percorrendo uma mistura de tools
+(``MISTURA``). O relatório traz vazão, latência p50/p95/p99 geral e por tool,
+erros e as requisições que chegaram ao BCB falso por upstream e status; vai
+para a saída e, com ``--saida``, para um JSON::
+
+    python -m benchmarks.carga --transporte http --sessoes 50 --chamadas 20 --latencia-ms 80 --taxa-erro 0.02
+    python -m benchmarks.carga --transporte stdio --sessoes 8 --duracao 30 --cache memoria
+
+O cache do servidor fica desligado por padrão (``--cache nenhum``), para que
+toda chamada chegue ao upstream; outras variáveis ``CAPIVARA_*`` do ambiente
+seguem para o servidor (limites, hedge, timeouts).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import anyio
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
+
+from benchmarks.bcb_falso import BcbFalso, ServidorFalso, argumentos_parametros, parametros_de
+
+# Chamadas percorridas por cada sessão, a partir de um deslocamento diferente
+MISTURA: list[tuple[str, dict[str, Any]]] = [
+    ("get_ptax", {"moeda": "USD", "data_inicio": "2025-01-02", "data_fim": "2025-03-31"}),
+    ("get_selic", {"data_inicio": "2025-01-02", "data_fim": "2025-06-30"}),
+    ("get_inflacao", {"indice": "IPCA", "data_inicio": "2023-01-01", "data_fim": "2025-06-30"}),
+    ("get_atividade_economica", {"indicador": "PIB mensal", "data_inicio": "2023-01-01", "data_fim": "2025-06-30"}),
+    ("get_expectativas_mercado", {"indicador": "IPCA", "top": 20}),
+    ("get_expectativas_mensais", {"indicador": "IPCA", "top": 20}),
+    ("get_expectativas_selic", {"top": 20}),
+    ("get_expectativas_inflacao12m", {"indicador": "IPCA", "top": 20}),
+    ("get_expectativas_top5", {"indicador": "IPCA", "top": 20}),
+    ("get_taxa_juros", {"mes": "Jan-2025", "top": 50}),
+]
+
+
+@dataclass(frozen=True)
+class Amostra:
+    ferramenta: str
+    segundos: float
+    erro: bool
+
+
+def percentis(valores: list[float]) -> dict[str, float]:
+    """p50, p95, p99, média e máximo, em ms."""
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+    cortes = statistics.quantiles(ordenados, n=100, method="inclusive") if len(ordenados) > 1 else ordenados * 99
+    return {
+        "p50": round(cortes[49] * 1000, 3),
+        "p95": round(cortes[94] * 1000, 3),
+        "p99": round(cortes[98] * 1000, 3),
+        "media": round(statistics.fmean(ordenados) * 1000, 3),
+        "max": round(ordenados[-1] * 1000, 3),
+    }
+
+
+def _falhou(resultado: Any) -> bool:
+    """Erro de protocolo ou resposta de erro do tool (``{"erro": ...}``)."""
+    if resultado.isError:
+        return True
+    texto = "".join(getattr(c, "text", "") for c in resultado.content)
+    try:
+        return isinstance(dados := json.loads(texto), dict) and "erro" in dados
+    except ValueError:
+        return True
+
+
+class _Largada:
+    """Segura as sessões até todas terem inicializado, para medir só as chamadas."""
+
+    def __init__(self, sessoes: int):
+        self._faltam = sessoes
+        self._evento = anyio.Event()
+        self.inicio = 0.0
+
+    async def pronta(self) -> None:
+        self._faltam -= 1
+        if self._faltam <= 0:
+            self.inicio = time.perf_counter()
+            self._evento.set()
+        await self._evento.wait()
+
+
+async def _sessao(
+    indice: int,
+    abrir: Any,
+    largada: _Largada,
+    chamadas: int,
+    duracao: float | None,
+    amostras: list[Amostra],
+) -> None:
+    async with abrir() as (leitura, escrita), ClientSession(leitura, escrita) as sessao:
+        await sessao.initialize()
+        await largada.pronta()
+        feitas = 0
+        while (duracao is None and feitas < chamadas) or (
+            duracao is not None and time.perf_counter() - largada.inicio < duracao
+        ):
+            ferramenta, argumentos = MISTURA[(indice + feitas) % len(MISTURA)]
+            inicio = time.perf_counter()
+            try:
+                resultado = await sessao.call_tool(ferramenta, argumentos)
+                erro = _falhou(resultado)
+            except Exception:
+                erro = True
+            amostras.append(Amostra(ferramenta, time.perf_counter() - inicio, erro))
+            feitas += 1
+
+
+def _ambiente_servidor(upstream: str, cache: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "CAPIVARA_BCB_URL": upstream,
+        "CAPIVARA_CACHE": cache,
+        "CAPIVARA_CACHE_SNAPSHOT": "nenhum",
+        "CAPIVARA_SERIES_DIRETORIO": "",
+        "CAPIVARA_LOG_NIVEL": os.environ.get("CAPIVARA_LOG_NIVEL", "WARNING"),
+    }
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def servidor_http(ambiente: dict[str, str], workers: int = 1, espera: float = 30.0) -> Iterator[str]:
+    """Sobe ``capivara-mcp --transporte http`` num processo e devolve a URL do endpoint MCP."""
+    porta = _porta_livre()
+    comando = [sys.executable, "-m", "capivara_mcp.server", "--transporte", "http", "--porta", str(porta)]
+    processo = subprocess.Popen(
+        [*comando, "--workers", str(workers)], env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{porta}"
+    try:
+        limite = time.monotonic() + espera
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f"O servidor HTTP saiu com código {processo.returncode} antes de responder.")
+            try:
+                if httpx.get(f"{base}/metrics", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > limite:
+                raise RuntimeError(f"O servidor HTTP não respondeu em {espera:.0f} s.")
+            time.sleep(0.1)
+        yield f"{base}/mcp"
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+def _abridor_stdio(ambiente: dict[str, str], erros: Any) -> Any:
+    parametros = StdioServerParameters(command=sys.executable, args=["-m", "capivara_mcp.server"], env=ambiente)
+
+    def abrir() -> contextlib.AbstractAsyncContextManager[tuple[Any, Any]]:
+        return stdio_client(parametros, errlog=erros)
+
+    return abrir
+
+
+def _abridor_http(url: str) -> Any:
+    @contextlib.asynccontextmanager
+    async def abrir() -> AsyncIterator[tuple[Any, Any]]:
+        async with streamable_http_client(url) as (leitura, escrita, _):
+            yield leitura, escrita
+
+    return abrir
+
+
+async def _rodar_sessoes(abrir: Any, sessoes: int, chamadas: int, duracao: float | None) -> tuple[list[Amostra], float]:
+    amostras: list[Amostra] = []
+    largada = _Largada(sessoes)
+    async with anyio.create_task_group() as grupo:
+        for i in range(sessoes):
+            grupo.start_soon(_sessao, i, abrir, largada, chamadas, duracao, amostras)
+    return amostras, time.perf_counter() - largada.inicio
+
+
+def _estado_upstream(url: str, bcb: BcbFalso | None) -> dict[str, dict[str, int]]:
+    if bcb is not None:
+        return bcb.estado()["requisicoes"]
+    return httpx.get(f"{url}/_estado", timeout=5).json()["requisicoes"]
+
+
+def _diferenca(depois: dict[str, dict[str, int]], antes: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+    return {
+        upstream: {
+            status: n - antes.get(upstream, {}).get(status, 0)
+            for status, n in por_status.items()
+            if n - antes.get(upstream, {}).get(status, 0)
+        }
+        for upstream, por_status in depois.items()
+        if any(n - antes.get(upstream, {}).get(status, 0) for status, n in por_status.items())
+    }
+
+
+def relatorio(amostras: list[Amostra], duracao: float, upstream: dict[str, dict[str, int]]) -> dict[str, Any]:
+    """Vazão, latências e erros (geral e por tool) e as requisições ao upstream."""
+    por_tool: dict[str, list[Amostra]] = {}
+    for a in amostras:
+        por_tool.setdefault(a.ferramenta, []).append(a)
+    return {
+        "chamadas": len(amostras),
+        "erros": sum(a.erro for a in amostras),
+        "duracao_s": round(duracao, 3),
+        "vazao_por_s": round(len(amostras) / duracao, 3) if duracao > 0 else None,
+        "latencia_ms": percentis([a.segundos for a in amostras]),
+        "por_tool": {
+            tool: {
+                "chamadas": len(lista),
+                "erros": sum(a.erro for a in lista),
+                "latencia_ms": percentis([a.segundos for a in lista]),
+            }
+            for tool, lista in sorted(por_tool.items())
+        },
+        "upstream": upstream,
+        "upstream_total": sum(n for por_status in upstream.values() for n in por_status.values()),
+    }
+
+
+def executar(
+    transporte: str,
+    sessoes: int,
+    chamadas: int,
+    duracao: float | None = None,
+    cache: str = "nenhum",
+    workers: int = 1,
+    upstream: str | None = None,
+    bcb: BcbFalso | None = None,
+) -> dict[str, Any]:
+    """Roda a carga contra o upstream em ``upstream`` (ou sobe ``bcb``/um BCB falso padrão) e devolve o relatório."""
+    with contextlib.ExitStack() as pilha:
+        if upstream is None:
+            falso = pilha.enter_context(ServidorFalso(bcb))
+            upstream, bcb = falso.url, falso.bcb
+        ambiente = _ambiente_servidor(upstream, cache)
+        if transporte == "stdio":
+            abrir = _abridor_stdio(ambiente, pilha.enter_context(open(os.devnull, "w")))
+        else:
+            abrir = _abridor_http(pilha.enter_context(servidor_http(ambiente, workers)))
+        antes = _estado_upstream(upstream, bcb)
+        amostras, decorrido = anyio.run(_rodar_sessoes, abrir, sessoes, chamadas, duracao)
+        requisicoes = _diferenca(_estado_upstream(upstream, bcb), antes)
+    return {
+        "criado_em": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "parametros": {
+            "transporte": transporte,
+            "sessoes": sessoes,
+            "chamadas_por_sessao": None if duracao is not None else chamadas,
+            "duracao_s": duracao,
+            "cache": cache,
+            "workers": workers if transporte == "http" else None,
+            "upstream": (bcb.estado()["parametros"] if bcb is not None else upstream),
+        },
+        **relatorio(amostras, decorrido, requisicoes),
+    }
+
+
+def _imprimir(documento: dict[str, Any]) -> None:
+    p = documento["parametros"]
+    lat = documento["latencia_ms"]
+    print(
+        f"{p['transporte']}: {p['sessoes']} sessões, {documento['chamadas']} chamadas em {documento['duracao_s']} s "
+        f"({documento['vazao_por_s']}/s), {documento['erros']} erros"
+    )
+    print(f"latência (ms): p50 {lat.get('p50')}  p95 {lat.get('p95')}  p99 {lat.get('p99')}  máx {lat.get('max')}")
+    for tool, r in documento["por_tool"].items():
+        t = r["latencia_ms"]
+        print(
+            f"  {tool:<30} {r['chamadas']:>6} chamadas {r['erros']:>4} erros  "
+            f"p50 {t['p50']:>9}  p95 {t['p95']:>9}  p99 {t['p99']:>9}"
+        )
+    print(f"requisições ao upstream: {documento['upstream_total']} {json.dumps(documento['upstream'])}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.carga", description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--transporte", choices=["stdio", "http"], default="http")
+    parser.add_argument("--sessoes", type=int, default=10, help="sessões MCP simultâneas (padrão: 10)")
+    parser.add_argument("--chamadas", type=int, default=20, help="chamadas por sessão (padrão: 20)")
+    parser.add_argument("--duracao", type=float, help="em vez de --chamadas, chamar por tantos segundos")
+    parser.add_argument("--cache", default="nenhum", help="CAPIVARA_CACHE do servidor (padrão: nenhum)")
+    parser.add_argument("--workers", type=int, default=1, help="workers do servidor HTTP")
+    parser.add_argument("--upstream", help="URL de um BCB falso já no ar (senão sobe um nesta execução)")
+    parser.add_argument("--semente", type=int, help="semente da latência e das falhas do BCB falso")
+    parser.add_argument("--saida", help="grava o relatório em JSON neste arquivo")
+    argumentos_parametros(parser)
+    args = parser.parse_args(argv)
+
+    bcb = None if args.upstream else BcbFalso(parametros_de(args), args.semente)
+    documento = executar(
+        args.transporte, args.sessoes, args.chamadas, args.duracao, args.cache, args.workers, args.upstream, bcb
+    )
+    _imprimir(documento)
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
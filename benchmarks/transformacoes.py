@@ -0,0 +1,313 @@
+"""Microbenchmarks do caminho pós-busca dos tools.
+
+Cada caso chama o tool de verdade com o ``_fetch_*`` trocado por uma função
+que devolve dados já montados pelas fábricas de ``tests/conftest.py``; o que
+se mede é só o que vem depois da busca: seleção e renomeação de colunas,
+formatação de datas, ``to_dict``/``registros()`` e o ``json.dumps`` final.
+
+Para cada tool e tamanho (10 a 500 mil linhas, por padrão) são gravados o
+tempo por chamada (mínimo, mediana e média de até ``--repeticoes`` execuções),
+o pico de memória alocada durante uma chamada (``tracemalloc``, numa execução
+à parte) e o tamanho da resposta. Os resultados vão para um JSON com o
+ambiente (Python, pandas, commit) e podem ser comparados com uma execução
+anterior::
+
+    python -m benchmarks.transformacoes
+    python -m benchmarks.transformacoes --tools get_ptax,get_selic --tamanhos 10,100000
+    python -m benchmarks.transformacoes --comparar benchmarks/resultados/base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import ModuleType
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from tests.conftest import (
+    make_expectativas_df,
+    make_expectativas_inflacao12m_df,
+    make_expectativas_mensais_df,
+    make_expectativas_selic_df,
+    make_expectativas_top5_df,
+    make_ptax_df,
+    make_sgs_serie,
+    make_taxa_juros_df,
+)
+
+from capivara_mcp.tools import atividade, expectativas, inflacao, ptax, selic, taxa_juros
+
+TAMANHOS = (10, 1_000, 10_000, 100_000, 500_000)
+DIRETORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# As fábricas montam uma linha por vez e avançam a data a cada linha (um dia na
+# PTAX, uma semana no Focus): acima de ~10 mil linhas ficam lentas e estouram o
+# intervalo de datas do pandas. Os tamanhos maiores repetem um bloco.
+_BLOCO = 10_000
+
+
+def _escalar(fabrica: Callable[[int], pd.DataFrame]) -> Callable[[int], pd.DataFrame]:
+    def montar(n: int) -> pd.DataFrame:
+        bloco = fabrica(min(n, _BLOCO))
+        if n <= _BLOCO:
+            return bloco
+        return pd.concat([bloco] * -(-n // _BLOCO), ignore_index=True).iloc[:n].reset_index(drop=True)
+
+    return montar
+
+
+@dataclass(frozen=True)
+class Caso:
+    """Um tool, o ``_fetch_*`` que ele usa, como montar ``n`` linhas e onde ficam os registros na resposta."""
+
+    modulo: ModuleType
+    tool: str
+    busca: str
+    dados: Callable[[int], Any]
+    chave: str
+    argumentos: dict[str, Any] = field(default_factory=dict)
+
+    def chamar(self, dados: Any) -> str:
+        with patch.object(self.modulo, self.busca, lambda *args, **kwargs: dados):
+            return getattr(self.modulo, self.tool)(**self.argumentos)
+
+
+_PERIODO = {"data_inicio": "2025-01-02", "data_fim": "2025-12-30"}
+
+CASOS: dict[str, Caso] = {
+    c.tool: c
+    for c in (
+        Caso(ptax, "get_ptax", "_fetch_ptax", _escalar(make_ptax_df), "cotacoes", _PERIODO),
+        Caso(
+            selic,
+            "get_selic",
+            "_fetch_selic",
+            lambda n: make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4}, n),
+            "selic",
+            _PERIODO,
+        ),
+        Caso(
+            inflacao, "get_inflacao", "_fetch_inflacao", lambda n: make_sgs_serie({"IPCA": 0.4}, n), "valores", _PERIODO
+        ),
+        Caso(
+            atividade,
+            "get_atividade_economica",
+            "_fetch_atividade",
+            lambda n: make_sgs_serie({"PIB mensal": 900_000.0}, n),
+            "valores",
+            _PERIODO,
+        ),
+        Caso(taxa_juros, "get_taxa_juros", "_fetch_taxa_juros", make_taxa_juros_df, "taxas", {"mes": "Jan-2025"}),
+        Caso(
+            expectativas,
+            "get_expectativas_mercado",
+            "_fetch_expectativas",
+            _escalar(lambda n: make_expectativas_df("IPCA", n)),
+            "expectativas",
+            {"indicador": "IPCA"},
+        ),
+        Caso(
+            expectativas,
+            "get_expectativas_mensais",
+            "_fetch_expectativas_mensais",
+            _escalar(lambda n: make_expectativas_mensais_df("IPCA", n)),
+            "expectativas",
+            {"indicador": "IPCA"},
+        ),
+        Caso(
+            expectativas,
+            "get_expectativas_selic",
+            "_fetch_expectativas_selic",
+            _escalar(make_expectativas_selic_df),
+            "expectativas",
+        ),
+        Caso(
+            expectativas,
+            "get_expectativas_inflacao12m",
+            "_fetch_expectativas_inflacao12m",
+            _escalar(lambda n: make_expectativas_inflacao12m_df("IPCA", n)),
+            "expectativas",
+            {"indicador": "IPCA"},
+        ),
+        Caso(
+            expectativas,
+            "get_expectativas_top5",
+            "_fetch_expectativas_top5",
+            _escalar(lambda n: make_expectativas_top5_df("IPCA", n)),
+            "expectativas",
+            {"indicador": "IPCA"},
+        ),
+    )
+}
+
+
+def medir(caso: Caso, n: int, repeticoes: int = 5, orcamento: float = 10.0) -> dict[str, Any]:
+    """Mede uma chamada de ``caso`` com ``n`` linhas.
+
+    Executa até ``repeticoes`` vezes, parando antes se passar de ``orcamento``
+    segundos (ao menos uma execução). Falha se a resposta não trouxer as ``n``
+    linhas: um erro do tool não pode passar por medição.
+    """
+    dados = caso.dados(n)
+    resposta = caso.chamar(dados)  # aquecimento e conferência
+    registros = json.loads(resposta).get(caso.chave)
+    if not isinstance(registros, list) or len(registros) != n:
+        raise RuntimeError(f"{caso.tool} com {n} linhas não devolveu os registros esperados: {resposta[:200]}")
+
+    tempos: list[float] = []
+    while len(tempos) < repeticoes and (not tempos or sum(tempos) < orcamento):
+        gc.collect()
+        inicio = time.perf_counter()
+        caso.chamar(dados)
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        caso.chamar(dados)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    minimo = min(tempos)
+    return {
+        "tool": caso.tool,
+        "linhas": n,
+        "repeticoes": len(tempos),
+        "tempo_ms": {
+            "min": round(minimo * 1000, 4),
+            "mediana": round(statistics.median(tempos) * 1000, 4),
+            "media": round(statistics.fmean(tempos) * 1000, 4),
+        },
+        "us_por_linha": round(minimo * 1e6 / n, 4),
+        "pico_memoria_bytes": pico,
+        "bytes_resposta": len(resposta.encode()),
+    }
+
+
+def _commit() -> str | None:
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def ambiente() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": _commit(),
+    }
+
+
+def executar(
+    tools: list[str],
+    tamanhos: list[int],
+    repeticoes: int = 5,
+    orcamento: float = 10.0,
+    progresso: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Roda os casos pedidos e devolve o documento de resultados."""
+    resultados = []
+    for tool in tools:
+        for n in tamanhos:
+            resultado = medir(CASOS[tool], n, repeticoes, orcamento)
+            resultados.append(resultado)
+            if progresso is not None:
+                progresso(resultado)
+    return {
+        "versao": 1,
+        "criado_em": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "ambiente": ambiente(),
+        "parametros": {"repeticoes": repeticoes, "orcamento_s": orcamento},
+        "resultados": resultados,
+    }
+
+
+def comparar(base: dict[str, Any], atual: dict[str, Any]) -> list[dict[str, Any]]:
+    """Razões atual/base de tempo mínimo e pico de memória, por tool e tamanho presentes nos dois."""
+    anteriores = {(r["tool"], r["linhas"]): r for r in base["resultados"]}
+    comparacao = []
+    for r in atual["resultados"]:
+        anterior = anteriores.get((r["tool"], r["linhas"]))
+        if anterior is None:
+            continue
+        comparacao.append(
+            {
+                "tool": r["tool"],
+                "linhas": r["linhas"],
+                "tempo": round(r["tempo_ms"]["min"] / anterior["tempo_ms"]["min"], 3),
+                "memoria": round(r["pico_memoria_bytes"] / max(anterior["pico_memoria_bytes"], 1), 3),
+            }
+        )
+    return comparacao
+
+
+def _linha(r: dict[str, Any]) -> str:
+    return (
+        f"{r['tool']:<30} {r['linhas']:>8} linhas  {r['tempo_ms']['min']:>11.3f} ms  "
+        f"{r['us_por_linha']:>8.3f} us/linha  {r['pico_memoria_bytes'] / 2**20:>9.2f} MiB"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.transformacoes", description=(__doc__ or "").partition("\n")[0]
+    )
+    parser.add_argument("--tools", default=",".join(CASOS), help="tools separados por vírgula (padrão: todos)")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS)), help="nº de linhas, separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções medidas por caso (padrão: 5)")
+    parser.add_argument("--orcamento", type=float, default=10.0, help="segundos por caso antes de parar de repetir")
+    parser.add_argument("--saida", help=f"arquivo JSON de resultados (padrão: {DIRETORIO}/transformacoes-<data>.json)")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    desconhecidos = [t for t in tools if t not in CASOS]
+    if desconhecidos:
+        parser.error(f"tools sem benchmark: {', '.join(desconhecidos)}. Disponíveis: {', '.join(CASOS)}.")
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+
+    documento = executar(tools, tamanhos, args.repeticoes, args.orcamento, lambda r: print(_linha(r), flush=True))
+
+    saida = args.saida or os.path.join(DIRETORIO, f"transformacoes-{datetime.now():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        print(f"\nAtual / base ({base['ambiente'].get('commit')}): < 1 é melhor")
+        for c in comparar(base, documento):
+            print(f"{c['tool']:<30} {c['linhas']:>8} linhas  tempo {c['tempo']:>6.3f}x  memória {c['memoria']:>6.3f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Configuração do capivara-mcp via variáveis de ambiente.
+
+Todas as variáveis usam o prefixo ``CAPIVARA_``. Os valores são lidos a cada
+chamada, o que permite ajustá-los em testes com ``monkeypatch.setenv``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+
+logger = logging.getLogger("capivara-mcp.config")
+
+_VERDADEIROS = {"1", "true", "sim", "yes", "on"}
+
+
+def env_str(nome: str, padrao: str) -> str:
+    """Lê ``CAPIVARA_<nome>`` como string."""
+    return os.environ.get(f"CAPIVARA_{nome}", padrao)
+
+
+def env_float(nome: str, padrao: float) -> float:
+    """Lê ``CAPIVARA_<nome>`` como float, usando o padrão se o valor for inválido."""
+    bruto = os.environ.get(f"CAPIVARA_{nome}")
+    if bruto is None:
+        return padrao
+    try:
+        return float(bruto)
+    except ValueError:
+        logger.warning("Valor inválido para CAPIVARA_%s: %r. Usando %s.", nome, bruto, padrao)
+        return padrao
+
+
+def env_int(nome: str, padrao: int) -> int:
+    """Lê ``CAPIVARA_<nome>`` como inteiro, usando o padrão se o valor for inválido."""
+    bruto = os.environ.get(f"CAPIVARA_{nome}")
+    if bruto is None:
+        return padrao
+    try:
+        return int(bruto)
+    except ValueError:
+        logger.warning("Valor inválido para CAPIVARA_%s: %r. Usando %s.", nome, bruto, padrao)
+        return padrao
+
+
+def env_bool(nome: str, padrao: bool = False) -> bool:
+    """Lê ``CAPIVARA_<nome>`` como booleano (1/true/sim/yes/on)."""
+    bruto = os.environ.get(f"CAPIVARA_{nome}")
+    if bruto is None:
+        return padrao
+    return bruto.strip().lower() in _VERDADEIROS
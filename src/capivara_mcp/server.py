@@ -1,14 +1,57 @@
 """Capivara MCP — servidor MCP para dados do mercado financeiro brasileiro.
 
-Entry point do servidor. Registra os tools e inicia o transporte stdio.
+Entry point do servidor. Registra os tools e inicia o transporte stdio ou,
+com ``--transporte http``, o Streamable HTTP (uvicorn, opcionalmente com
+vários workers compartilhando o cache SQLite). Séries e conjuntos de dados
+também são expostos como resources assináveis (``sgs://``, ``ptax://``,
+``focus://``). Os subcomandos ``exportar`` e
+``importar`` movem os dados locais entre máquinas num pacote offline, e
+``--offline`` serve só a partir de um pacote (ver ``_pacote``).
 """
 
+import argparse
+import contextlib
+import functools
+import inspect
+import json
 import logging
-import sys
+import os
+import signal
+import time
+import typing
+from collections.abc import Callable
 from importlib.metadata import version
 
-from mcp.server.fastmcp import FastMCP
+import anyio
+import anyio.abc
+import anyio.from_thread
+import anyio.to_thread
+import mcp.types as types
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.transport_security import TransportSecuritySettings
+from mcp.shared.exceptions import McpError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
 
+from capivara_mcp.config import env_bool, env_float, env_int, env_str
+from capivara_mcp.tools import (
+    _agenda,
+    _armazem,
+    _cache,
+    _http,
+    _latencia,
+    _logs,
+    _metricas,
+    _pacote,
+    _perfil,
+    _rastreio,
+)
+from capivara_mcp.tools._assinaturas import Assinaturas
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._http import estado_hedge
+from capivara_mcp.tools._limites import estado_limites
+from capivara_mcp.tools._resiliencia import estado_upstreams
 from capivara_mcp.tools.atividade import get_atividade_economica
 from capivara_mcp.tools.expectativas import (
     get_expectativas_inflacao12m,
@@ -19,35 +62,337 @@ from capivara_mcp.tools.expectativas import (
 )
 from capivara_mcp.tools.inflacao import get_inflacao
 from capivara_mcp.tools.ptax import get_ptax
+from capivara_mcp.tools.recursos import ler_focus_anuais, ler_ptax, ler_sgs
 from capivara_mcp.tools.selic import get_selic
 from capivara_mcp.tools.taxa_juros import get_taxa_juros
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    stream=sys.stderr,
-)
+_logs.configurar()
 logger = logging.getLogger("capivara-mcp")
 
 mcp = FastMCP("capivara-mcp")
 
+
+def _notificador(ctx: Context) -> Callable[[float, float | None, str | None], None]:
+    """Encaminha progresso da thread de trabalho para o event loop como notificação MCP."""
+
+    def notificar(feito: float, total: float | None, mensagem: str | None) -> None:
+        try:
+            anyio.from_thread.run(ctx.report_progress, feito, total, mensagem)
+        except Exception:
+            logger.debug("Falha ao enviar progresso da chamada %s", ctx.request_id, exc_info=True)
+
+    return notificar
+
+
+def _executar(chamada: Chamada, fn: Callable[..., str], kwargs: dict[str, typing.Any]) -> str:
+    inicio = time.perf_counter()
+    erro: str | None = None
+    linhas = tamanho = None
+    try:
+        with _rastreio.rastrear(chamada.ferramenta, str(chamada.id)):
+            with em_chamada(chamada), _perfil.perfilando(chamada.ferramenta, str(chamada.id), kwargs):
+                resultado = fn(**kwargs)
+            # resposta_json/erro_json anotam na chamada o nº de registros (já com os
+            # avisos anexados à resposta) ou a mensagem de erro: nada de reler o JSON.
+            if chamada.erro_resposta is not None:
+                # Os tools convertem as exceções em {"erro": ...}: o tipo vem da falha no BCB, se houve
+                erro = chamada.erro_upstream or "RespostaDeErro"
+            elif chamada.linhas is not None:
+                linhas = chamada.linhas
+                _metricas.contar("capivara_linhas_total", linhas, ferramenta=chamada.ferramenta)
+            tamanho = len(resultado.encode())
+            _metricas.observar(
+                "capivara_resposta_bytes",
+                tamanho,
+                _metricas.BUCKETS_BYTES,
+                ferramenta=chamada.ferramenta,
+            )
+            return resultado
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        decorrido = time.perf_counter() - inicio
+        _logs.registrar_chamada(chamada, kwargs, decorrido * 1000, erro, linhas, tamanho)
+        _metricas.observar("capivara_chamada_segundos", decorrido, ferramenta=chamada.ferramenta)
+        _metricas.contar(
+            "capivara_chamadas_total", ferramenta=chamada.ferramenta, resultado="ok" if erro is None else "erro"
+        )
+        if erro is not None:
+            _metricas.contar("capivara_chamadas_erros_total", ferramenta=chamada.ferramenta, tipo=erro)
+
+
+def _registrar(fn: Callable[..., str]) -> None:
+    """Registra um tool síncrono executando-o numa thread, com progresso, prazo e cancelamento.
+
+    Os tools continuam funções síncronas e testáveis diretamente; aqui eles
+    ganham um ``Context`` do FastMCP (oculto do schema) e rodam fora do event
+    loop, para que chamadas concorrentes e notificações não fiquem bloqueadas.
+    """
+    assinatura = inspect.signature(fn, eval_str=True)
+
+    @functools.wraps(fn)
+    async def tool(ctx: Context, **kwargs: typing.Any) -> str:
+        chamada = Chamada(
+            ferramenta=fn.__name__,
+            id=ctx.request_id,
+            prazo=time.monotonic() + env_float("PRAZO_SEGUNDOS", 50.0),
+            notificar=_notificador(ctx),
+            executar_no_loop=anyio.from_thread.run,
+        )
+        try:
+            return await anyio.to_thread.run_sync(_executar, chamada, fn, kwargs, abandon_on_cancel=True)
+        except anyio.get_cancelled_exc_class():
+            # Cliente cancelou (notifications/cancelled): aborta as requisições em
+            # andamento; a thread do tool recebe ChamadaCancelada e termina sozinha.
+            chamada.cancelar()
+            raise
+
+    parametros = [*assinatura.parameters.values()]
+    parametros.append(inspect.Parameter("ctx", inspect.Parameter.KEYWORD_ONLY, annotation=Context))
+    tool.__signature__ = assinatura.replace(parameters=parametros)  # type: ignore[attr-defined]
+    tool.__annotations__ = {**typing.get_type_hints(fn), "ctx": Context}
+    mcp.tool()(tool)
+
+
+@mcp.resource("capivara://saude", name="saude", mime_type="application/json")
+def saude() -> str:
+    """Disjuntores, latências, hedges, filas por host, cache, armazém, offline, agenda, assinaturas e perfil."""
+    return json.dumps(
+        {
+            "upstreams": estado_upstreams(),
+            "latencias": _latencia.resumo(),
+            "hedge": estado_hedge(),
+            "limites": estado_limites(),
+            "cache": _cache.estatisticas(),
+            "series": _armazem.estatisticas(),
+            "offline": _pacote.pacote_offline(),
+            "agenda": _agenda.estado(),
+            "assinaturas": assinaturas.estado(),
+            "perfil": _perfil.estado(),
+        },
+        ensure_ascii=False,
+    )
+
+
+def _exportar_metricas() -> str:
+    # Com vários workers, cada coleta cai num processo: o PID separa as séries de cada um
+    return _metricas.exportar(worker=str(os.getpid()) if _varios_workers() else None)
+
+
+@mcp.resource("capivara://metricas", name="metricas", mime_type="text/plain")
+def metricas() -> str:
+    """Contagens, erros, latências por tool e por endpoint, cache, linhas e bytes (texto do Prometheus)."""
+    return _exportar_metricas()
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metricas_http(request: Request) -> Response:
+    """As mesmas métricas para o Prometheus, no modo HTTP."""
+    return PlainTextResponse(_exportar_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def _ler_em_thread(fn: Callable[..., str], **kwargs: typing.Any) -> str:
+    """Executa um leitor de resource síncrono numa thread, com o prazo das chamadas de tool."""
+    chamada = Chamada(
+        ferramenta=fn.__name__,
+        id=f"recurso:{fn.__name__}",
+        prazo=time.monotonic() + env_float("PRAZO_SEGUNDOS", 50.0),
+        executar_no_loop=anyio.from_thread.run,
+    )
+    return await anyio.to_thread.run_sync(_executar, chamada, fn, kwargs, abandon_on_cancel=True)
+
+
+@mcp.resource("sgs://{codigo}", name="serie_sgs", mime_type="application/json")
+async def recurso_sgs(codigo: str) -> str:
+    """Últimos pontos de uma série do SGS pelo código (ex: sgs://432 para a Selic meta). Assinável."""
+    return await _ler_em_thread(ler_sgs, codigo=codigo)
+
+
+@mcp.resource("ptax://{moeda}", name="ptax", mime_type="application/json")
+async def recurso_ptax(moeda: str) -> str:
+    """Cotações PTAX dos últimos 30 dias (ex: ptax://USD). Assinável."""
+    return await _ler_em_thread(ler_ptax, moeda=moeda)
+
+
+@mcp.resource("focus://anuais/{indicador}", name="focus_anuais", mime_type="application/json")
+async def recurso_focus_anuais(indicador: str) -> str:
+    """Expectativas anuais do boletim Focus (ex: focus://anuais/IPCA). Assinável."""
+    return await _ler_em_thread(ler_focus_anuais, indicador=indicador)
+
+
+async def _ler_recurso(uri: str) -> str:
+    conteudos = await mcp.read_resource(uri)
+    return "".join(c.content if isinstance(c.content, str) else c.content.decode() for c in conteudos)
+
+
+assinaturas = Assinaturas(_ler_recurso)
+_agenda.ao_renovar(lambda _tarefa: assinaturas.verificar())
+
+
+def _varios_workers() -> bool:
+    return env_int("HTTP_WORKERS", 1) > 1
+
+
+# O FastMCP não expõe assinaturas: os handlers vão direto no servidor de baixo
+# nível, e a capacidade ``resources.subscribe`` (fixa em False no SDK) é ligada.
+# Com vários workers a sessão não tem estado e a assinatura poderia ficar num
+# processo diferente do que a notificaria: a capacidade fica desligada.
+_capacidades_sdk = mcp._mcp_server.get_capabilities
+
+
+def _capacidades(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+    capacidades = _capacidades_sdk(*args, **kwargs)
+    if capacidades.resources is not None:
+        capacidades.resources.subscribe = not _varios_workers()
+    return capacidades
+
+
+mcp._mcp_server.get_capabilities = _capacidades  # type: ignore[method-assign]
+
+
+@mcp._mcp_server.subscribe_resource()
+async def _assinar(uri: typing.Any) -> None:
+    if _varios_workers():
+        raise McpError(
+            types.ErrorData(
+                code=types.INVALID_REQUEST,
+                message="Assinaturas de resources não são suportadas com vários workers HTTP "
+                "(CAPIVARA_HTTP_WORKERS > 1).",
+            )
+        )
+    await assinaturas.assinar(str(uri), mcp.get_context().session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def _cancelar_assinatura(uri: typing.Any) -> None:
+    assinaturas.cancelar(str(uri), mcp.get_context().session)
+
+
 # Registrar tools
-mcp.tool()(get_ptax)
-mcp.tool()(get_selic)
-mcp.tool()(get_inflacao)
-mcp.tool()(get_atividade_economica)
-mcp.tool()(get_expectativas_mercado)
-mcp.tool()(get_expectativas_mensais)
-mcp.tool()(get_expectativas_selic)
-mcp.tool()(get_expectativas_inflacao12m)
-mcp.tool()(get_expectativas_top5)
-mcp.tool()(get_taxa_juros)
-
-
-def main():
+_registrar(get_ptax)
+_registrar(get_selic)
+_registrar(get_inflacao)
+_registrar(get_atividade_economica)
+_registrar(get_expectativas_mercado)
+_registrar(get_expectativas_mensais)
+_registrar(get_expectativas_selic)
+_registrar(get_expectativas_inflacao12m)
+_registrar(get_expectativas_top5)
+_registrar(get_taxa_juros)
+if env_bool("ADMIN"):
+    _registrar(_perfil.perfilar_chamadas)
+
+
+_HOSTS_LOCAIS = {"127.0.0.1", "localhost", "::1"}
+
+
+def criar_app_http() -> Starlette:
+    """Aplicação ASGI do transporte Streamable HTTP (fábrica usada por cada worker do uvicorn).
+
+    Com mais de um worker o servidor roda sem estado de sessão (``stateless_http``),
+    para que qualquer processo atenda qualquer requisição.
+    """
+    mcp.settings.stateless_http = _varios_workers()
+    if env_str("HTTP_HOST", "127.0.0.1") not in _HOSTS_LOCAIS:
+        # Exposto na rede (normalmente atrás de um proxy): a proteção contra
+        # DNS rebinding com hosts locais recusaria os clientes legítimos.
+        mcp.settings.transport_security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+    app = mcp.streamable_http_app()
+    ciclo_original = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def ciclo(app: Starlette) -> typing.AsyncIterator[None]:
+        async with ciclo_original(app), _http.clientes_compartilhados(), anyio.create_task_group() as grupo:
+            _iniciar_segundo_plano(grupo)
+            yield
+            grupo.cancel_scope.cancel()
+
+    app.router.lifespan_context = ciclo
+    return app
+
+
+def _iniciar_segundo_plano(grupo: anyio.abc.TaskGroup) -> None:
+    """Tarefas do event loop do servidor: verificação das assinaturas e, se ligada, a agenda."""
+    grupo.start_soon(assinaturas.rodar)
+    if env_bool("AGENDA"):
+        grupo.start_soon(_agenda.rodar)
+
+
+async def _servir_stdio() -> None:
+    async with _http.clientes_compartilhados(), anyio.create_task_group() as grupo:
+        _iniciar_segundo_plano(grupo)
+        await mcp.run_stdio_async()
+        grupo.cancel_scope.cancel()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="capivara-mcp", description="Servidor MCP de dados do BCB.")
+    parser.add_argument("--transporte", choices=["stdio", "http"], default=env_str("TRANSPORTE", "stdio"))
+    parser.add_argument("--host", default=env_str("HTTP_HOST", "127.0.0.1"))
+    parser.add_argument("--porta", type=int, default=env_int("HTTP_PORTA", 8000))
+    parser.add_argument("--workers", type=int, default=env_int("HTTP_WORKERS", 1))
+    parser.add_argument(
+        "--offline",
+        metavar="PACOTE",
+        default=env_str("OFFLINE", ""),
+        help="Responde só a partir de um pacote gerado por 'exportar', sem acessar o BCB.",
+    )
+    subcomandos = parser.add_subparsers(dest="comando", metavar="{exportar,importar}")
+    exportar = subcomandos.add_parser(
+        "exportar", aliases=["export"], help="Grava as séries e o cache locais num pacote offline."
+    )
+    exportar.add_argument("arquivo")
+    importar = subcomandos.add_parser(
+        "importar", aliases=["import"], help="Carrega um pacote offline no armazém de séries e no cache locais."
+    )
+    importar.add_argument("arquivo")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando in ("exportar", "export"):
+            manifesto = _pacote.exportar(args.arquivo)
+            resumo = {"series": len(manifesto["series"]), "cache": manifesto["cache"]["entradas"]}
+            print(json.dumps({"arquivo": args.arquivo, **resumo}, ensure_ascii=False))
+            return
+        if args.comando in ("importar", "import"):
+            print(json.dumps({"arquivo": args.arquivo, **_pacote.importar(args.arquivo)}, ensure_ascii=False))
+            return
+        if args.offline:
+            manifesto = _pacote.ativar_offline(args.offline)
+            logger.info(
+                "Modo offline: pacote %s de %s (%d séries, %d entradas de cache)",
+                args.offline,
+                manifesto["criado_em"],
+                len(manifesto["series"]),
+                manifesto["cache"]["entradas"],
+            )
+    except _pacote.PacoteInvalido as e:
+        parser.exit(1, f"capivara-mcp: {e}\n")
+
     pkg_version = version("capivara-mcp")
-    logger.info("Iniciando capivara-mcp v%s", pkg_version)
-    mcp.run(transport="stdio")
+    logger.info("Iniciando capivara-mcp v%s (%s)", pkg_version, args.transporte)
+    if args.transporte == "stdio":
+        # SIGTERM encerra como Ctrl+C, passando pelo atexit (snapshot do cache em memória)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        anyio.run(_servir_stdio)
+        return
+
+    import uvicorn
+
+    # Os workers são processos novos: a configuração segue pelo ambiente
+    os.environ["CAPIVARA_HTTP_HOST"] = args.host
+    os.environ["CAPIVARA_HTTP_WORKERS"] = str(args.workers)
+    os.environ.setdefault("CAPIVARA_CACHE", "sqlite")
+    os.environ.setdefault("CAPIVARA_SERIES_DIRETORIO", os.path.join(_cache.diretorio_padrao(), "series"))
+    logger.info("Cache compartilhado: %s", _cache.estatisticas()["backend"])
+    uvicorn.run(
+        "capivara_mcp.server:criar_app_http",
+        factory=True,
+        host=args.host,
+        port=args.porta,
+        workers=args.workers,
+    )
 
 
 if __name__ == "__main__":
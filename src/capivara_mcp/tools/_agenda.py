@@ -0,0 +1,356 @@
+"""Agenda de renovação em segundo plano, alinhada aos horários de publicação do BCB.
+
+Com ``CAPIVARA_AGENDA`` ligada, o servidor roda no próprio event loop uma
+tarefa que renova os dados mais consultados logo depois de cada publicação
+esperada (horário de Brasília):
+
+- ``ptax``: boletim de fechamento (USD e EUR), em dias úteis, 13:20;
+- ``focus``: relatório Focus, no primeiro dia útil da semana, 08:45, para
+  todos os endpoints de Expectativas;
+- ``sgs_diario``: Selic meta e efetiva e CDI (séries 432, 11 e 12), em dias
+  úteis, 09:30;
+- ``ipca_inpc``: IPCA e INPC, em dias úteis entre os dias 8 e 15, 09:30;
+- ``igpm``: IGP-M, em dias úteis a partir do dia 26, 09:00.
+
+Cada renovação chama os tools com os parâmetros padrão (as consultas mais
+comuns) dentro de ``_cache.renovando``: o cache é ignorado na leitura e o
+resultado é gravado com validade até a próxima publicação, para que as
+chamadas interativas encontrem o dado pronto.
+
+- Jitter: cada horário recebe um atraso aleatório de até
+  ``AGENDA_JITTER_SEGUNDOS``, para que vários servidores não batam no BCB ao
+  mesmo tempo.
+- Publicação atrasada: se uma tarefa diária ou semanal devolver a mesma
+  observação mais recente da renovação anterior (o BCB ainda não publicou),
+  ou falhar,
+  ela é repetida com espera exponencial a partir de
+  ``AGENDA_RETENTATIVA_SEGUNDOS``, até ``AGENDA_TENTATIVAS`` vezes. As
+  mensais verificam uma vez por dia da janela até o dado novo aparecer.
+  Só os registros entram na comparação, nunca o cabeçalho da resposta: o
+  ``periodo`` padrão termina em ``date.today()`` e muda todo dia.
+- Janela do dia: PTAX, Selic e CDI com os parâmetros padrão consultam os
+  últimos 30 dias até hoje, e a chave do cache leva essas datas. A renovação
+  aquece só as consultas do próprio dia e a entrada vale até a meia-noite;
+  antes do horário da publicação seguinte, a primeira chamada do dia vai ao
+  BCB.
+- Contrapressão: as tarefas rodam uma de cada vez, uma chamada por vez, e antes
+  de cada chamada esperam (até ``AGENDA_ESPERA_MAX_SEGUNDOS``) enquanto algum
+  host do BCB estiver ocupado (``_limites.ocupado``): as chamadas
+  interativas passam na frente.
+
+Quem precisa saber de dado novo (as assinaturas de resources) se registra
+com ``ao_renovar``.
+
+Com um cache compartilhado entre processos (``sqlite``, ``arquivos``,
+``redis``), só o processo que obtiver a trava
+``<diretório padrão>/agenda-<hash do destino do cache>.lock`` roda a agenda;
+os demais leem o cache compartilhado. Com o cache ``memoria`` (um por
+processo, o padrão no stdio) cada processo roda a sua.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import random
+import time as relogio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import IO, Any
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+
+from capivara_mcp.config import env_float, env_int, env_str
+from capivara_mcp.tools import _cache, _limites
+from capivara_mcp.tools._calendario import eh_dia_util
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._pacote import pacote_offline
+from capivara_mcp.tools._validation import observacao
+
+logger = logging.getLogger("capivara-mcp.agenda")
+
+# Horário de Brasília (sem horário de verão desde 2019)
+BRT = timezone(timedelta(hours=-3), "BRT")
+
+_PAUSA_CONTRAPRESSAO = 1.0
+_REAVALIAR_SEGUNDOS = 300.0  # acorda periodicamente (relógio ajustado, suspensão da máquina)
+
+
+class FalhaRenovacao(Exception):
+    """Um tool chamado pela agenda respondeu com erro ou com aviso (resultado parcial)."""
+
+
+def _agora() -> datetime:
+    return datetime.now(BRT)
+
+
+def _jitter() -> timedelta:
+    return timedelta(seconds=random.uniform(0, env_float("AGENDA_JITTER_SEGUNDOS", 120.0)))
+
+
+def primeiro_dia_util_da_semana(d: date) -> bool:
+    """Dia da divulgação do Focus: segunda-feira ou, se feriado, o dia útil seguinte."""
+    return eh_dia_util(d) and not any(eh_dia_util(d - timedelta(days=k)) for k in range(1, d.weekday() + 1))
+
+
+@dataclass
+class Tarefa:
+    """Renovação de um grupo de consultas após uma publicação recorrente do BCB."""
+
+    nome: str
+    horario: time  # horário de Brasília
+    dias: Callable[[date], bool]
+    chamadas: list[tuple[Callable[..., str], dict[str, Any]]]
+    mensal: bool = False
+    janela_do_dia: bool = False  # parâmetros padrão terminam hoje: a chave do cache muda à meia-noite
+    proxima: datetime | None = None
+    tentativas: int = 0
+    resumo: str | None = None  # SHA-256 dos resultados da última renovação bem-sucedida
+    concluida_em: tuple[int, int] | None = None  # (ano, mês) em que a mensal já viu o dado novo
+    ultima_execucao: datetime | None = None
+    ultimo_resultado: str | None = None
+    renovacoes: int = 0
+
+    def publicacao(self, depois: datetime) -> datetime:
+        """Próximo horário de publicação esperado estritamente depois de ``depois``."""
+        d = depois.astimezone(BRT).date()
+        for _ in range(400):
+            if self.dias(d) and not (self.mensal and self.concluida_em == (d.year, d.month)):
+                quando = datetime.combine(d, self.horario, BRT)
+                if quando > depois:
+                    return quando
+            d += timedelta(days=1)
+        raise ValueError(f"Tarefa {self.nome} sem publicação prevista no próximo ano.")
+
+
+def tarefas_padrao() -> list[Tarefa]:
+    from capivara_mcp.tools.expectativas import (
+        get_expectativas_inflacao12m,
+        get_expectativas_mensais,
+        get_expectativas_mercado,
+        get_expectativas_selic,
+        get_expectativas_top5,
+    )
+    from capivara_mcp.tools.inflacao import get_inflacao
+    from capivara_mcp.tools.ptax import get_ptax
+    from capivara_mcp.tools.selic import get_selic
+
+    return [
+        Tarefa(
+            "ptax",
+            time(13, 20),
+            eh_dia_util,
+            [(get_ptax, {"moeda": "USD"}), (get_ptax, {"moeda": "EUR"})],
+            janela_do_dia=True,
+        ),
+        Tarefa(
+            "focus",
+            time(8, 45),
+            primeiro_dia_util_da_semana,
+            [
+                (get_expectativas_mercado, {}),
+                (get_expectativas_mensais, {}),
+                (get_expectativas_selic, {}),
+                (get_expectativas_inflacao12m, {}),
+                (get_expectativas_top5, {}),
+            ],
+        ),
+        Tarefa(
+            "sgs_diario",
+            time(9, 30),
+            eh_dia_util,
+            [(get_selic, {}), (get_inflacao, {"indice": "CDI"})],
+            janela_do_dia=True,
+        ),
+        Tarefa(
+            "ipca_inpc",
+            time(9, 30),
+            lambda d: eh_dia_util(d) and 8 <= d.day <= 15,
+            [(get_inflacao, {"indice": "IPCA"}), (get_inflacao, {"indice": "INPC"})],
+            mensal=True,
+        ),
+        Tarefa(
+            "igpm",
+            time(9, 0),
+            lambda d: eh_dia_util(d) and d.day >= 26,
+            [(get_inflacao, {"indice": "IGP-M"})],
+            mensal=True,
+        ),
+    ]
+
+
+def _chamar(
+    tarefa: str, fn: Callable[..., str], kwargs: dict[str, Any], ttl: float, executar_no_loop: Callable[..., Any]
+) -> str:
+    chamada = Chamada(
+        ferramenta=fn.__name__,
+        id=f"agenda:{tarefa}",
+        prazo=relogio.monotonic() + env_float("PRAZO_SEGUNDOS", 50.0),
+        executar_no_loop=executar_no_loop,
+    )
+    with em_chamada(chamada), _cache.renovando(ttl):
+        resultado = fn(**kwargs)
+    if chamada.erro_resposta is not None:
+        raise FalhaRenovacao(chamada.erro_resposta)
+    if chamada.avisos:
+        raise FalhaRenovacao(chamada.avisos[0])
+    return resultado
+
+
+_ouvintes: list[Callable[[str], Awaitable[Any]]] = []
+
+
+def ao_renovar(ouvinte: Callable[[str], Awaitable[Any]]) -> None:
+    """Registra ``ouvinte(nome_da_tarefa)``, aguardado no event loop após cada renovação com dado novo."""
+    _ouvintes.append(ouvinte)
+
+
+async def _ceder_vez() -> None:
+    """Contrapressão: espera as chamadas interativas liberarem os hosts do BCB."""
+    limite = relogio.monotonic() + env_float("AGENDA_ESPERA_MAX_SEGUNDOS", 60.0)
+    while _limites.ocupado() and relogio.monotonic() < limite:
+        await anyio.sleep(_PAUSA_CONTRAPRESSAO)
+
+
+class Agenda:
+    """Fila de tarefas por horário; ``rodar`` executa a mais próxima quando chega a hora."""
+
+    def __init__(self, tarefas: list[Tarefa]):
+        self.tarefas = tarefas
+
+    def planejar(self, agora: datetime) -> None:
+        for tarefa in self.tarefas:
+            if tarefa.proxima is None:
+                tarefa.proxima = tarefa.publicacao(agora) + _jitter()
+
+    async def renovar(self, tarefa: Tarefa) -> None:
+        """Executa as chamadas da tarefa e agenda a próxima execução."""
+        agora = _agora()
+        ttl = (tarefa.publicacao(agora) - agora + _jitter()).total_seconds()
+        if tarefa.janela_do_dia:
+            meia_noite = datetime.combine(agora.date() + timedelta(days=1), time(0), BRT)
+            ttl = min(ttl, (meia_noite - agora).total_seconds())
+        resumo = hashlib.sha256()
+        erro = None
+        for fn, kwargs in tarefa.chamadas:
+            await _ceder_vez()
+            try:
+                resultado = await anyio.to_thread.run_sync(
+                    _chamar, tarefa.nome, fn, kwargs, ttl, anyio.from_thread.run, abandon_on_cancel=True
+                )
+            except Exception as e:
+                logger.warning("Renovação %s falhou em %s: %s", tarefa.nome, fn.__name__, e)
+                erro = str(e) or type(e).__name__
+                break
+            resumo.update(observacao(resultado).encode())
+        self.concluir(tarefa, agora, erro, resumo.hexdigest())
+        if tarefa.ultimo_resultado == "novo":
+            for ouvinte in _ouvintes:
+                try:
+                    await ouvinte(tarefa.nome)
+                except Exception:
+                    logger.warning("Falha ao avisar a renovação de %s", tarefa.nome, exc_info=True)
+
+    def concluir(self, tarefa: Tarefa, agora: datetime, erro: str | None, resumo: str) -> None:
+        """Registra o resultado da renovação e decide quando a tarefa volta a rodar."""
+        tarefa.ultima_execucao = agora
+        novo = tarefa.resumo is None or resumo != tarefa.resumo
+        atrasada = erro is None and not novo and not tarefa.mensal
+        if erro is None:
+            if novo and tarefa.mensal and tarefa.resumo is not None:
+                tarefa.concluida_em = (agora.year, agora.month)
+            tarefa.resumo = resumo
+            tarefa.renovacoes += 1
+        tarefa.ultimo_resultado = erro or ("publicação atrasada" if atrasada else "novo" if novo else "sem novidade")
+
+        if (erro is not None or atrasada) and tarefa.tentativas < env_int("AGENDA_TENTATIVAS", 6):
+            tarefa.tentativas += 1
+            base = env_float("AGENDA_RETENTATIVA_SEGUNDOS", 300.0)
+            espera = base * 2 ** (tarefa.tentativas - 1)
+            tarefa.proxima = agora + timedelta(seconds=random.uniform(espera, 1.5 * espera))
+            logger.info("Renovação %s: %s; nova tentativa às %s", tarefa.nome, tarefa.ultimo_resultado, tarefa.proxima)
+            return
+        tarefa.tentativas = 0
+        tarefa.proxima = tarefa.publicacao(agora) + _jitter()
+        logger.info("Renovação %s: %s; próxima às %s", tarefa.nome, tarefa.ultimo_resultado, tarefa.proxima)
+
+    async def rodar(self) -> None:
+        if not self.tarefas:
+            return
+        self.planejar(_agora())
+        while True:
+            tarefa = min(self.tarefas, key=lambda t: t.proxima)  # type: ignore[arg-type,return-value]
+            assert tarefa.proxima is not None
+            espera = (tarefa.proxima - _agora()).total_seconds()
+            if espera > 0:
+                await anyio.sleep(min(espera, _REAVALIAR_SEGUNDOS))
+                continue
+            await self.renovar(tarefa)
+
+    def estado(self) -> dict[str, dict[str, Any]]:
+        return {
+            t.nome: {
+                "proxima": t.proxima.isoformat(timespec="seconds") if t.proxima else None,
+                "ultima_execucao": t.ultima_execucao.isoformat(timespec="seconds") if t.ultima_execucao else None,
+                "ultimo_resultado": t.ultimo_resultado,
+                "tentativas": t.tentativas,
+                "renovacoes": t.renovacoes,
+            }
+            for t in self.tarefas
+        }
+
+
+_atual: Agenda | None = None
+
+
+def _travar(destino: str) -> IO[str] | None:
+    """Trava exclusiva entre os processos que usam o cache ``destino``; None se outro processo já a tem."""
+    nome = hashlib.sha256(destino.encode()).hexdigest()[:16]
+    caminho = os.path.join(_cache.diretorio_padrao(), f"agenda-{nome}.lock")
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    arquivo = open(caminho, "a")  # noqa: SIM115 - mantido aberto enquanto a agenda roda
+    try:
+        import fcntl
+    except ImportError:  # sem flock (Windows): um único processo por máquina é o caso comum
+        return arquivo
+    try:
+        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return None
+    return arquivo
+
+
+async def rodar() -> None:
+    """Roda a agenda configurada até ser cancelada (tarefa do event loop do servidor)."""
+    global _atual
+    if pacote_offline() is not None:
+        logger.info("Agenda de renovação desligada no modo offline.")
+        return
+    trava = None
+    destino = _cache.destino_compartilhado()
+    if destino is not None:
+        trava = _travar(destino)
+        if trava is None:
+            logger.info("Agenda de renovação já roda em outro processo com o cache %s.", destino)
+            return
+    escolhidas = {n.strip() for n in env_str("AGENDA_TAREFAS", "").split(",") if n.strip()}
+    tarefas = [t for t in tarefas_padrao() if not escolhidas or t.nome in escolhidas]
+    _atual = Agenda(tarefas)
+    logger.info("Agenda de renovação iniciada: %s", ", ".join(t.nome for t in tarefas))
+    try:
+        await _atual.rodar()
+    finally:
+        _atual = None
+        if trava is not None:
+            trava.close()
+
+
+def estado() -> dict[str, Any]:
+    """Próxima execução e último resultado de cada tarefa (para o resource de saúde)."""
+    agenda = _atual
+    return {"ativa": False} if agenda is None else {"ativa": True, "tarefas": agenda.estado()}
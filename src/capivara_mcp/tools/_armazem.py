@@ -0,0 +1,362 @@
+"""Armazém persistente das séries do SGS em arquivos mapeados em memória.
+
+Cada série (por código do SGS) vive em ``<CAPIVARA_SERIES_DIRETORIO>/sgs-<codigo>.bin``,
+num layout fixo little-endian:
+
+- cabeçalho de 24 bytes (``_CABECALHO``): assinatura, versão, intervalo de
+  datas já consultado no BCB (``inicio``/``fim``, em dias desde 1970-01-01) e
+  número de pontos ``n``;
+- ``n`` datas ``int32`` (deslocamentos em dias), completadas até múltiplo de 8;
+- ``n`` valores ``float64`` (NaN para valor ausente).
+
+Os workers abrem os arquivos com ``mmap`` só para leitura: N processos
+compartilham uma única cópia física no page cache, e uma leitura de intervalo
+é busca binária nas datas mais uma fatia ``memoryview`` dos dois vetores, sem
+cópia. Para estender uma série, o conteúdo atual é copiado em bloco para um
+arquivo temporário, os pontos novos são acrescentados e o temporário substitui
+o original com ``os.replace`` (atômico): quem já tinha o arquivo antigo
+mapeado continua lendo a versão anterior até reabrir. A leitura, a extensão e
+a substituição acontecem sob uma trava exclusiva por série
+(``sgs-<codigo>.lock``, com ``flock``), para que dois workers estendendo a
+mesma série não percam os pontos um do outro.
+
+Séries que o BCB revisa depois de publicadas (PIB mensal, resultado primário,
+dívida/PIB) têm uma política de revisão (``Revisao``): só os últimos pontos,
+enquanto recentes, podem mudar. O resto do histórico fica gravado para sempre;
+a cauda mutável é reconsultada a cada ``CAPIVARA_REVISAO_INTERVALO_HORAS`` e
+comparada por SHA-256 com o que está gravado. A política, a última verificação
+e o histórico de revisões detectadas ficam ao lado da série, em
+``sgs-<codigo>.revisao.json``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from capivara_mcp.config import env_float, env_str
+from capivara_mcp.tools._serie import Serie, data, dia
+
+_ASSINATURA = b"CPSA"
+VERSAO_FORMATO = 1
+
+# Assinatura, versão, reservado, início e fim consultados, nº de pontos, preenchimento
+_CABECALHO = struct.Struct("<4sHHiiI4x")
+
+_NATIVO_LITTLE_ENDIAN = sys.byteorder == "little"
+
+try:
+    import fcntl
+except ImportError:  # sem flock (Windows): só a trava entre threads do processo
+    fcntl = None  # type: ignore[assignment]
+
+
+_NOME_ARQUIVO = re.compile(r"sgs-(\d+)\.bin")
+
+_MAX_REVISOES_REGISTRADAS = 50
+
+
+@dataclass(frozen=True)
+class Revisao:
+    """Política de revisão: os últimos ``pontos`` pontos podem mudar enquanto tiverem menos de ``dias`` dias."""
+
+    pontos: int
+    dias: int
+
+
+# Séries revistas pelo BCB após a publicação; as demais (IPCA, PTAX, Selic...) são imutáveis
+POLITICAS_REVISAO: dict[int, Revisao] = {
+    4380: Revisao(pontos=24, dias=730),  # PIB mensal: acompanha as revisões das contas nacionais
+    4513: Revisao(pontos=12, dias=365),  # dívida bruta/PIB: revista com o PIB e as estatísticas fiscais
+    5793: Revisao(pontos=12, dias=365),  # resultado primário
+}
+
+
+def _alinhar(tamanho: int) -> int:
+    return (tamanho + 7) & ~7
+
+
+def ler_cabecalho(dados: bytes | mmap.mmap, origem: str) -> tuple[int, int, int]:
+    """Valida o layout de um arquivo de série e retorna ``(inicio, fim, n)``.
+
+    Raises:
+        ValueError: se o conteúdo estiver truncado, inconsistente ou for de outra versão.
+    """
+    if len(dados) < _CABECALHO.size:
+        raise ValueError(f"Arquivo de série truncado: {origem}")
+    assinatura, versao, _, inicio, fim, n = _CABECALHO.unpack_from(dados)
+    if assinatura != _ASSINATURA or versao != VERSAO_FORMATO:
+        raise ValueError(f"Formato de série não reconhecido: {origem}")
+    if len(dados) != _alinhar(_CABECALHO.size + 4 * n) + 8 * n:
+        raise ValueError(f"Arquivo de série com tamanho inconsistente: {origem}")
+    return inicio, fim, n
+
+
+class ArquivoSerie:
+    """Visão somente leitura de um arquivo de série mapeado em memória."""
+
+    __slots__ = ("caminho", "identidade", "inicio", "fim", "dias", "valores")
+
+    dias: memoryview | array
+    valores: memoryview[Any] | array  # cast("d") devolve memoryview[float]
+
+    def __init__(self, caminho: str):
+        with open(caminho, "rb") as arquivo:
+            st = os.fstat(arquivo.fileno())
+            self.caminho = caminho
+            self.identidade = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if st.st_size < _CABECALHO.size:
+                raise ValueError(f"Arquivo de série truncado: {caminho}")
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        inicio, fim, n = ler_cabecalho(mapa, caminho)
+        inicio_valores = _alinhar(_CABECALHO.size + 4 * n)
+        self.inicio, self.fim = inicio, fim
+        bruto = memoryview(mapa)
+        dias = bruto[_CABECALHO.size : _CABECALHO.size + 4 * n]
+        valores = bruto[inicio_valores:]
+        if _NATIVO_LITTLE_ENDIAN:
+            self.dias = dias.cast("i")
+            self.valores = valores.cast("d")
+        else:  # sem cópia zero: converte para a ordem nativa
+            self.dias, self.valores = array("i", dias.tobytes()), array("d", valores.tobytes())
+            self.dias.byteswap()
+            self.valores.byteswap()
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    def faltantes(self, dt_inicio: date, dt_fim: date) -> list[tuple[date, date]]:
+        """Trechos a consultar no BCB para cobrir [dt_inicio, dt_fim], antes e/ou depois do já gravado.
+
+        Os trechos vão até encostar no intervalo gravado, para que ele continue
+        contíguo depois de ``ArmazemSeries.gravar``.
+        """
+        trechos = []
+        inicio, fim = data(self.inicio), data(self.fim)
+        if dt_inicio < inicio:
+            trechos.append((dt_inicio, inicio - timedelta(days=1)))
+        if dt_fim > fim:
+            trechos.append((fim + timedelta(days=1), dt_fim))
+        return trechos
+
+    def cauda(self, politica: Revisao, hoje: date) -> date | None:
+        """Data do primeiro ponto ainda sujeito a revisão pela ``politica``, ou None se nenhum for."""
+        k = max(0, len(self.dias) - politica.pontos)
+        i = bisect_left(self.dias, dia(hoje) - politica.dias, lo=k)
+        return data(self.dias[i]) if i < len(self.dias) else None
+
+    def fatiar(self, nome: str, dt_inicio: date, dt_fim: date) -> Serie:
+        """Pontos em [dt_inicio, dt_fim] como ``Serie`` apoiada no próprio mapeamento (sem cópia)."""
+        i = bisect_left(self.dias, dia(dt_inicio))
+        j = bisect_right(self.dias, dia(dt_fim))
+        return Serie(self.dias[i:j], {nome: self.valores[i:j]})
+
+
+class ArmazemSeries:
+    """Diretório de arquivos de séries, com os mapeamentos abertos reaproveitados por processo."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._abertos: dict[str, ArquivoSerie] = {}
+        self._lock = threading.RLock()
+
+    def _caminho(self, codigo: int) -> str:
+        return os.path.join(self.diretorio, f"sgs-{codigo}.bin")
+
+    def abrir(self, codigo: int) -> ArquivoSerie | None:
+        """Arquivo da série mapeado, reaberto se outro processo o substituiu; None se não existir."""
+        caminho = self._caminho(codigo)
+        try:
+            st = os.stat(caminho)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            aberto = self._abertos.get(caminho)
+            if aberto is not None and aberto.identidade == (st.st_ino, st.st_mtime_ns, st.st_size):
+                return aberto
+            # O mapeamento antigo é liberado quando a última fatia que o usa for coletada
+            aberto = self._abertos[caminho] = ArquivoSerie(caminho)
+            return aberto
+
+    @contextlib.contextmanager
+    def _travar(self, codigo: int) -> Iterator[None]:
+        """Trava exclusiva da série entre as threads e entre os processos (workers) que usam o diretório."""
+        with self._lock, open(os.path.join(self.diretorio, f"sgs-{codigo}.lock"), "a") as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)  # liberada ao fechar o arquivo
+            yield
+
+    def _caminho_revisao(self, codigo: int) -> str:
+        return os.path.join(self.diretorio, f"sgs-{codigo}.revisao.json")
+
+    def revisao(self, codigo: int) -> dict:
+        """Registro de revisão da série: política, última verificação e revisões detectadas ({} se nunca verificada)."""
+        try:
+            with open(self._caminho_revisao(codigo), encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def cauda_pendente(self, codigo: int, hoje: date) -> tuple[date, date] | None:
+        """Trecho mutável da série a reconsultar, se a série tem política e a verificação venceu."""
+        politica = POLITICAS_REVISAO.get(codigo)
+        arquivo = self.abrir(codigo)
+        if politica is None or arquivo is None:
+            return None
+        intervalo = env_float("REVISAO_INTERVALO_HORAS", 12.0) * 3600
+        if time.time() - self.revisao(codigo).get("verificado_em", 0.0) < intervalo:
+            return None
+        inicio = arquivo.cauda(politica, hoje)
+        return None if inicio is None else (inicio, data(arquivo.fim))
+
+    def conferir(self, codigo: int, dt_inicio: date, dt_fim: date, recebidos: Serie) -> bool:
+        """Compara os pontos ``recebidos`` em [dt_inicio, dt_fim] com os gravados e registra a verificação.
+
+        Deve ser chamado antes de ``gravar`` o trecho. Retorna True (e registra
+        a revisão) se o conteúdo mudou.
+        """
+        with self._travar(codigo):
+            return self._conferir(codigo, dt_inicio, dt_fim, recebidos)
+
+    def _conferir(self, codigo: int, dt_inicio: date, dt_fim: date, recebidos: Serie) -> bool:
+        arquivo = self.abrir(codigo)
+        gravados = arquivo.fatiar("v", dt_inicio, dt_fim) if arquivo is not None else Serie.vazia(["v"])
+        resumo = _resumo(recebidos.fatiar(dt_inicio, dt_fim))
+        revisada = _resumo(gravados) != resumo
+        registro = self.revisao(codigo)
+        politica = POLITICAS_REVISAO.get(codigo)
+        registro.update(
+            politica=asdict(politica) if politica is not None else None,
+            verificado_em=time.time(),
+            resumo=resumo,
+        )
+        if revisada:
+            revisoes = registro.setdefault("revisoes", [])
+            revisoes.append(
+                {
+                    "em": datetime.now().astimezone().isoformat(timespec="seconds"),
+                    "inicio": dt_inicio.isoformat(),
+                    "fim": dt_fim.isoformat(),
+                }
+            )
+            del revisoes[:-_MAX_REVISOES_REGISTRADAS]
+        conteudo = json.dumps(registro, ensure_ascii=False).encode()
+        self._escrever(self._caminho_revisao(codigo), [conteudo])
+        return revisada
+
+    def gravar(self, codigo: int, dt_inicio: date, dt_fim: date, novos: Serie) -> ArquivoSerie:
+        """Grava os pontos ``novos`` (de uma coluna), consultados no BCB em [dt_inicio, dt_fim].
+
+        O trecho consultado deve ser contíguo ao intervalo já gravado (como os
+        de ``ArquivoSerie.faltantes``). Os pontos gravados fora dele são copiados
+        em bloco do arquivo atual. O fim do intervalo consultado só avança até o
+        último ponto recebido: dias ainda sem publicação voltam a ser consultados.
+        """
+        (valores_novos,) = novos.colunas.values()
+        a, b = dia(dt_inicio), dia(dt_fim)
+        with self._travar(codigo):
+            atual = self.abrir(codigo)
+            if atual is None:
+                inicio, fim = a, novos.dias[-1] if len(novos) else a - 1
+                antes = depois = (array("i"), array("d"))
+            else:
+                inicio = min(atual.inicio, a)
+                fim = max(atual.fim, novos.dias[-1] if len(novos) else atual.fim)
+                i, j = bisect_left(atual.dias, a), bisect_right(atual.dias, b)
+                antes = (atual.dias[:i], atual.valores[:i])
+                depois = (atual.dias[j:], atual.valores[j:])
+            n = len(antes[0]) + len(novos) + len(depois[0])
+            partes = [_CABECALHO.pack(_ASSINATURA, VERSAO_FORMATO, 0, inicio, fim, n)]
+            partes += [_little_endian(parte, "i") for parte in (antes[0], novos.dias, depois[0])]
+            partes.append(b"\0" * (_alinhar(_CABECALHO.size + 4 * n) - _CABECALHO.size - 4 * n))
+            partes += [_little_endian(parte, "d") for parte in (antes[1], valores_novos, depois[1])]
+            return self._substituir(codigo, partes)
+
+    def instalar(self, codigo: int, dados: bytes) -> ArquivoSerie:
+        """Substitui o arquivo da série por ``dados`` (um arquivo de série completo, ex.: de um pacote).
+
+        Raises:
+            ValueError: se ``dados`` não tiver o layout de um arquivo de série.
+        """
+        ler_cabecalho(dados, f"sgs-{codigo}")
+        with self._travar(codigo):
+            return self._substituir(codigo, [dados])
+
+    def _substituir(self, codigo: int, partes: list[bytes]) -> ArquivoSerie:
+        caminho = self._caminho(codigo)
+        self._escrever(caminho, partes)
+        self._abertos.pop(caminho, None)
+        return self.abrir(codigo)  # type: ignore[return-value]
+
+    def _escrever(self, caminho: str, partes: list[bytes]) -> None:
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                for parte in partes:
+                    arquivo.write(parte)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def codigos(self) -> list[int]:
+        """Códigos das séries gravadas, em ordem crescente."""
+        return sorted(int(m[1]) for nome in os.listdir(self.diretorio) if (m := _NOME_ARQUIVO.fullmatch(nome)))
+
+    def estatisticas(self) -> dict[str, int]:
+        series = tamanho = 0
+        for entrada in os.scandir(self.diretorio):
+            if _NOME_ARQUIVO.fullmatch(entrada.name):
+                series += 1
+                tamanho += entrada.stat().st_size
+        return {"series": series, "bytes": tamanho, "mapeadas": len(self._abertos)}
+
+
+def _little_endian(valores: memoryview | array, tipo: str) -> bytes:
+    if _NATIVO_LITTLE_ENDIAN:
+        return valores.tobytes() if isinstance(valores, memoryview) else bytes(memoryview(valores))
+    copia = array(tipo, valores)
+    copia.byteswap()
+    return copia.tobytes()
+
+
+def _resumo(serie: Serie) -> str:
+    """SHA-256 das datas e valores (de uma coluna), na ordem little-endian do arquivo."""
+    (valores,) = serie.colunas.values()
+    return hashlib.sha256(_little_endian(serie.dias, "i") + _little_endian(valores, "d")).hexdigest()
+
+
+_armazens: dict[str, ArmazemSeries] = {}
+_armazens_lock = threading.Lock()
+
+
+def armazem_atual() -> ArmazemSeries | None:
+    """Armazém em ``CAPIVARA_SERIES_DIRETORIO``, ou None se a variável estiver vazia (padrão fora do HTTP)."""
+    diretorio = env_str("SERIES_DIRETORIO", "")
+    if not diretorio:
+        return None
+    with _armazens_lock:
+        if diretorio not in _armazens:
+            _armazens[diretorio] = ArmazemSeries(diretorio)
+        return _armazens[diretorio]
+
+
+def estatisticas() -> dict:
+    armazem = armazem_atual()
+    return {"diretorio": None} if armazem is None else {"diretorio": armazem.diretorio, **armazem.estatisticas()}
@@ -0,0 +1,132 @@
+"""Assinaturas de resources MCP e notificações de atualização.
+
+Os clientes assinam URIs (``resources/subscribe``). Em cada rodada, o servidor
+lê uma única vez cada URI assinada, pelo mesmo caminho das leituras normais
+(que passa pelo cache), e compara o SHA-256 do registro mais recente
+(``_validation.observacao``) com o da rodada anterior: o cabeçalho e a janela
+padrão mudam todo dia com ``date.today()``, sem dado novo. Se mudou, todos os assinantes daquela URI recebem
+``notifications/resources/updated``: N clientes acompanhando a mesma série
+custam uma verificação no BCB, não N consultas repetidas.
+
+As rodadas acontecem a cada ``ASSINATURAS_INTERVALO_SEGUNDOS`` e logo depois
+de cada renovação da agenda (``_agenda``) que trouxe dado novo.
+
+A tabela de assinaturas é do processo que mantém a sessão; com vários workers
+HTTP (sessões sem estado) o servidor recusa ``resources/subscribe``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import weakref
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+import anyio
+
+from capivara_mcp.config import env_float
+from capivara_mcp.tools._validation import observacao
+
+logger = logging.getLogger("capivara-mcp.assinaturas")
+
+
+class Assinante(Protocol):
+    """Sessão MCP capaz de receber a notificação (``ServerSession``)."""
+
+    async def send_resource_updated(self, uri: Any) -> None: ...
+
+
+def _resumo(conteudo: str) -> str | None:
+    """SHA-256 do registro mais recente; ``None`` se a leitura devolveu ``{"erro": ...}``.
+
+    Os leitores de ``recursos`` não levantam exceção em falha do BCB: respondem
+    o JSON de erro, que não pode virar resumo (cada queda e cada volta do BCB
+    notificaria todos os assinantes).
+    """
+    try:
+        resposta = json.loads(conteudo)
+    except ValueError:
+        resposta = None
+    if isinstance(resposta, dict) and "erro" in resposta:
+        return None
+    return hashlib.sha256(observacao(conteudo).encode()).hexdigest()
+
+
+class Assinaturas:
+    """Assinantes por URI e último resumo do conteúdo de cada URI assinada."""
+
+    def __init__(self, ler: Callable[[str], Awaitable[str]]):
+        self._ler = ler
+        self._assinantes: dict[str, weakref.WeakSet[Assinante]] = {}
+        self._resumos: dict[str, str] = {}
+        self.verificacoes = 0
+        self.notificacoes = 0
+
+    async def assinar(self, uri: str, assinante: Assinante) -> None:
+        """Registra o assinante; na primeira assinatura da URI, lê o conteúdo de referência.
+
+        Se a leitura devolver erro, a URI fica sem referência até a primeira
+        verificação bem-sucedida, que a grava sem notificar ninguém.
+
+        Raises:
+            Exception: o erro levantado pela leitura, repassado ao cliente.
+        """
+        if uri not in self._resumos:
+            resumo = _resumo(await self._ler(uri))
+            if resumo is not None:
+                self._resumos[uri] = resumo
+        self._assinantes.setdefault(uri, weakref.WeakSet()).add(assinante)
+
+    def cancelar(self, uri: str, assinante: Assinante) -> None:
+        assinantes = self._assinantes.get(uri)
+        if assinantes is not None:
+            assinantes.discard(assinante)
+
+    async def verificar(self) -> list[str]:
+        """Relê cada URI assinada e notifica os assinantes das que mudaram; retorna as que mudaram."""
+        atualizadas = []
+        for uri in list(self._assinantes):
+            assinantes = list(self._assinantes.get(uri, ()))
+            if not assinantes:  # todos cancelaram ou desconectaram
+                self._assinantes.pop(uri, None)
+                self._resumos.pop(uri, None)
+                continue
+            try:
+                resumo = _resumo(await self._ler(uri))
+            except Exception:
+                logger.warning("Falha ao verificar o resource assinado %s", uri, exc_info=True)
+                continue
+            if resumo is None:  # BCB fora do ar: mantém o resumo anterior
+                logger.warning("Falha ao verificar o resource assinado %s", uri)
+                continue
+            self.verificacoes += 1
+            anterior = self._resumos.get(uri)
+            self._resumos[uri] = resumo
+            if anterior is None or anterior == resumo:
+                continue
+            atualizadas.append(uri)
+            for assinante in assinantes:
+                try:
+                    await assinante.send_resource_updated(uri)
+                    self.notificacoes += 1
+                except Exception:
+                    logger.debug("Assinante de %s desconectado", uri, exc_info=True)
+                    self.cancelar(uri, assinante)
+        return atualizadas
+
+    async def rodar(self) -> None:
+        """Verifica as assinaturas periodicamente, até ser cancelada (tarefa do event loop do servidor)."""
+        while True:
+            await anyio.sleep(env_float("ASSINATURAS_INTERVALO_SEGUNDOS", 300.0))
+            if self._assinantes:
+                await self.verificar()
+
+    def estado(self) -> dict[str, int]:
+        return {
+            "uris": len(self._assinantes),
+            "assinantes": sum(len(a) for a in self._assinantes.values()),
+            "verificacoes": self.verificacoes,
+            "notificacoes": self.notificacoes,
+        }
@@ -0,0 +1,836 @@
+"""Cache dos resultados de ``_fetch_*`` com backends plugáveis.
+
+Os ``_fetch_*`` dos tools são decorados com ``em_cache(namespace)``: o
+resultado (DataFrame) é guardado por ``CACHE_TTL_SEGUNDOS`` numa chave
+``capivara:<namespace>:<argumentos>``. Onde o cache vive é escolhido por
+configuração (``CAPIVARA_CACHE``):
+
+- ``memoria``: no próprio processo, com orçamento de bytes e snapshot em disco
+  entre reinícios (padrão; caso do stdio no desktop);
+- ``sqlite``: arquivo SQLite em modo WAL (``CAPIVARA_CACHE_SQLITE``),
+  compartilhado pelos workers HTTP de uma máquina;
+- ``arquivos``: um arquivo por entrada em ``CAPIVARA_CACHE_DIRETORIO``;
+- ``redis``: servidor que fale o protocolo Redis (``CAPIVARA_CACHE_REDIS_URL``),
+  para frotas de servidores;
+- ``pacote``: entradas de um pacote offline (``CAPIVARA_OFFLINE``, ver ``_pacote``);
+- ``nenhum``: cache desligado.
+
+Os valores são gravados num formato versionado (``serializar``): entradas de
+outra versão são tratadas como ausentes. Resultados parciais (prazo atingido)
+e servidos a partir de resposta de reserva (upstream fora do ar) não são
+guardados.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import functools
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from typing import Any, TypeVar
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from capivara_mcp.config import env_float, env_int, env_str
+from capivara_mcp.tools import _metricas, _rastreio
+from capivara_mcp.tools._contexto import chamada_atual
+from capivara_mcp.tools._serie import Serie
+
+logger = logging.getLogger("capivara-mcp.cache")
+
+F = TypeVar("F", bound=Callable[..., "pd.DataFrame | Serie"])
+
+PREFIXO = "capivara:"
+
+# Cabeçalho do formato serializado: assinatura + versão (1 byte). DataFrames
+# viram tabela JSON; séries do SGS usam o layout binário compacto da ``Serie``.
+_ASSINATURA = b"CPV"
+_ASSINATURA_SERIE = b"CPS"
+VERSAO_FORMATO = 1
+
+# Em ``attrs``: partição e cobertura de um resultado dos conjuntos do Olinda (``_conjuntos.marca``)
+MARCA_CONJUNTO = "conjunto"
+
+
+# ---------------------------------------------------------------------------
+# Serialização versionada
+# ---------------------------------------------------------------------------
+
+
+def serializar(df: pd.DataFrame | Serie) -> bytes:
+    """DataFrame ou Serie -> bytes no formato versionado."""
+    if isinstance(df, Serie):
+        return _ASSINATURA_SERIE + bytes([VERSAO_FORMATO]) + df.para_bytes()
+    corpo = {"attrs": df.attrs, "tabela": df.to_json(orient="table", date_format="iso")}
+    return _ASSINATURA + bytes([VERSAO_FORMATO]) + json.dumps(corpo, ensure_ascii=False).encode()
+
+
+def desserializar(dados: bytes) -> pd.DataFrame | Serie | None:
+    """Inverso de ``serializar``; None se o formato ou a versão não forem reconhecidos."""
+    if dados[3:4] != bytes([VERSAO_FORMATO]):
+        return None
+    if dados[:3] == _ASSINATURA_SERIE:
+        try:
+            return Serie.de_bytes(memoryview(dados)[4:])
+        except ValueError:
+            return None
+    if dados[:3] != _ASSINATURA:
+        return None
+    try:
+        corpo = json.loads(dados[4:])
+        df = pd.read_json(io.StringIO(corpo["tabela"]), orient="table")
+    except ValueError:
+        return None
+    df.attrs.update(corpo["attrs"])
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+
+class BackendCache(ABC):
+    """Armazenamento chave/valor (bytes) com TTL e contabilidade de bytes."""
+
+    nome: str
+
+    @abstractmethod
+    def get(self, chave: str) -> bytes | None:
+        """Valor da chave, ou None se ausente ou expirada."""
+
+    @abstractmethod
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        """Grava o valor, válido por ``ttl`` segundos."""
+
+    @abstractmethod
+    def delete(self, chave: str) -> None:
+        """Remove a chave, se existir."""
+
+    @abstractmethod
+    def estatisticas(self) -> dict[str, int]:
+        """Número de entradas válidas e bytes ocupados pelos valores."""
+
+    @abstractmethod
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        """Entradas válidas do capivara-mcp: chave, valor e segundos de validade restantes."""
+
+
+class _Entrada:
+    __slots__ = ("valor", "comprimido", "tamanho", "expira", "acessos", "ultimo_acesso")
+
+    def __init__(self, valor: bytes, expira: float):
+        self.valor = valor
+        self.comprimido = False
+        self.tamanho = len(valor)  # tamanho original, sem compressão
+        self.expira = expira
+        self.acessos = 1
+        self.ultimo_acesso = time.monotonic()
+
+
+class CacheMemoria(BackendCache):
+    """Cache no processo com orçamento de bytes (``CACHE_MEMORIA_BYTES``).
+
+    O tamanho de cada entrada conta o valor guardado, a chave e um custo fixo
+    por entrada. Entradas sem acesso há ``CACHE_FRIO_SEGUNDOS`` são comprimidas
+    (zlib) no lugar e voltam a ser descomprimidas no próximo acesso. Se mesmo
+    assim o orçamento estourar, sai a entrada de menor ``acessos / bytes``
+    entre as ``_AMOSTRA_EVICCAO`` usadas há mais tempo: grandes e pouco usadas
+    saem antes de pequenas e populares.
+
+    Com ``snapshot``, o conteúdo (com a validade de cada entrada) é gravado
+    nesse arquivo a cada ``CACHE_SNAPSHOT_SEGUNDOS`` e no encerramento do
+    processo, e relido no primeiro uso depois de reiniciar. Entradas vencidas
+    são descartadas na leitura; um snapshot corrompido (CRC32 ou layout) é
+    ignorado.
+    """
+
+    nome = "memoria"
+
+    _CUSTO_FIXO = 200  # bytes por entrada (objeto, tupla de chave, nó do dicionário)
+    _AMOSTRA_EVICCAO = 8
+
+    # Snapshot: assinatura, versão e nº de entradas; por entrada: validade (epoch),
+    # comprimida, tamanho original, acessos, tamanho da chave e do valor; CRC32 no fim
+    _SNAPSHOT_ASSINATURA = b"CPM"
+    _SNAPSHOT_CABECALHO = struct.Struct("<3sBI")
+    _SNAPSHOT_ENTRADA = struct.Struct("<d?IIHI")
+    _SNAPSHOT_CRC = struct.Struct("<I")
+
+    def __init__(self, snapshot: str | None = None) -> None:
+        self._lock = threading.Lock()
+        self._entradas: OrderedDict[str, _Entrada] = OrderedDict()  # da menos para a mais recente
+        self._residentes = 0
+        self._varrido_em = time.monotonic()
+        self.evicoes = 0
+        self.compressoes = 0
+        self.snapshot = snapshot
+        self._carregado = snapshot is None
+        self._alterado = False
+        self._parar = threading.Event()
+        if snapshot is not None:
+            atexit.register(self.encerrar)
+
+    @staticmethod
+    def _orcamento() -> int:
+        return env_int("CACHE_MEMORIA_BYTES", 64 * 1024 * 1024)
+
+    def _custo(self, chave: str, entrada: _Entrada) -> int:
+        return len(entrada.valor) + len(chave) + self._CUSTO_FIXO
+
+    def get(self, chave: str) -> bytes | None:
+        with self._lock:
+            self._carregar()
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if entrada.expira <= time.time():
+                self._remover(chave)
+                return None
+            entrada.acessos += 1
+            entrada.ultimo_acesso = time.monotonic()
+            self._entradas.move_to_end(chave)
+            if entrada.comprimido:
+                self._residentes -= self._custo(chave, entrada)
+                entrada.valor = zlib.decompress(entrada.valor)
+                entrada.comprimido = False
+                self._residentes += self._custo(chave, entrada)
+                self._ajustar(proteger=chave)
+            return entrada.valor
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        with self._lock:
+            self._carregar()
+            self._alterado = True
+            self._remover(chave)
+            entrada = _Entrada(valor, time.time() + ttl)
+            if self._custo(chave, entrada) > self._orcamento():
+                return  # maior que o cache inteiro: não vale guardar
+            self._entradas[chave] = entrada
+            self._residentes += self._custo(chave, entrada)
+            self._ajustar(proteger=chave)
+
+    def delete(self, chave: str) -> None:
+        with self._lock:
+            self._carregar()
+            self._alterado = True
+            self._remover(chave)
+
+    def _remover(self, chave: str) -> None:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self._residentes -= self._custo(chave, entrada)
+
+    def _ajustar(self, proteger: str) -> None:
+        """Comprime entradas frias e, se preciso, remove entradas até caber no orçamento."""
+        orcamento = self._orcamento()
+        agora = time.monotonic()
+        frio = env_float("CACHE_FRIO_SEGUNDOS", 60.0)
+        if self._residentes > orcamento or agora - self._varrido_em >= frio / 2:
+            self._varrido_em = agora
+            for chave, entrada in list(self._entradas.items()):
+                if agora - entrada.ultimo_acesso < frio:
+                    break  # ordem de recência: as demais são mais recentes
+                if not entrada.comprimido:
+                    self._comprimir(chave, entrada)
+        while self._residentes > orcamento and len(self._entradas) > 1:
+            candidatas = [c for c in itertools.islice(self._entradas, self._AMOSTRA_EVICCAO + 1) if c != proteger]
+            vitima = min(candidatas, key=lambda c: self._entradas[c].acessos / self._custo(c, self._entradas[c]))
+            self._remover(vitima)
+            self.evicoes += 1
+
+    def _comprimir(self, chave: str, entrada: _Entrada) -> None:
+        comprimido = zlib.compress(entrada.valor, 6)
+        if len(comprimido) >= len(entrada.valor):
+            return
+        self._residentes -= self._custo(chave, entrada)
+        entrada.valor = comprimido
+        entrada.comprimido = True
+        entrada.acessos = max(1, entrada.acessos // 2)  # envelhece a frequência das frias
+        self._residentes += self._custo(chave, entrada)
+        self.compressoes += 1
+
+    # -- snapshot ---------------------------------------------------------------
+
+    def _carregar(self) -> None:
+        """Lê o snapshot no primeiro uso (chamado com o lock) e inicia a gravação periódica."""
+        if self._carregado:
+            return
+        self._carregado = True
+        assert self.snapshot is not None
+        threading.Thread(target=self._gravar_periodicamente, name="capivara-cache-snapshot", daemon=True).start()
+        try:
+            with open(self.snapshot, "rb") as arquivo:
+                dados = arquivo.read()
+        except FileNotFoundError:
+            return
+        except OSError:
+            logger.warning("Não foi possível ler o snapshot do cache %s", self.snapshot, exc_info=True)
+            return
+        try:
+            entradas = self._decodificar_snapshot(dados)
+        except (ValueError, struct.error, UnicodeDecodeError) as e:
+            logger.warning("Snapshot do cache %s ignorado: %s", self.snapshot, e)
+            return
+        agora = time.time()
+        for chave, entrada in entradas:
+            if entrada.expira > agora and chave not in self._entradas:
+                self._entradas[chave] = entrada
+                self._residentes += self._custo(chave, entrada)
+        if self._entradas:
+            self._ajustar(proteger="")
+        logger.info("Cache em memória aquecido com %d entradas de %s", len(self._entradas), self.snapshot)
+
+    def _decodificar_snapshot(self, dados: bytes) -> list[tuple[str, _Entrada]]:
+        cabecalho, entrada, crc = self._SNAPSHOT_CABECALHO, self._SNAPSHOT_ENTRADA, self._SNAPSHOT_CRC
+        if len(dados) < cabecalho.size + crc.size:
+            raise ValueError("arquivo truncado")
+        (esperado,) = crc.unpack_from(dados, len(dados) - crc.size)
+        corpo = memoryview(dados)[: len(dados) - crc.size]
+        if zlib.crc32(corpo) != esperado:
+            raise ValueError("CRC32 não confere")
+        assinatura, versao, n = cabecalho.unpack_from(corpo)
+        if assinatura != self._SNAPSHOT_ASSINATURA or versao != VERSAO_FORMATO:
+            raise ValueError(f"formato desconhecido ({assinatura!r} v{versao})")
+        posicao = cabecalho.size
+        entradas = []
+        for _ in range(n):
+            expira, comprimido, tamanho, acessos, tamanho_chave, tamanho_valor = entrada.unpack_from(corpo, posicao)
+            posicao += entrada.size
+            chave = bytes(corpo[posicao : posicao + tamanho_chave]).decode()
+            posicao += tamanho_chave
+            valor = bytes(corpo[posicao : posicao + tamanho_valor])
+            posicao += tamanho_valor
+            if len(valor) != tamanho_valor:
+                raise ValueError("entrada truncada")
+            nova = _Entrada(valor, expira)
+            nova.comprimido, nova.tamanho, nova.acessos = comprimido, tamanho, acessos
+            entradas.append((chave, nova))
+        if posicao != len(corpo):
+            raise ValueError("bytes sobrando após a última entrada")
+        return entradas
+
+    def salvar(self) -> bool:
+        """Grava o snapshot se houve mudanças desde o último. Retorna se gravou."""
+        if self.snapshot is None:
+            return False
+        with self._lock:
+            if not self._carregado or not self._alterado:
+                return False
+            agora = time.time()
+            itens = [(c, e.expira, e.comprimido, e.tamanho, e.acessos, e.valor) for c, e in self._entradas.items()]
+            self._alterado = False
+        itens = [item for item in itens if item[1] > agora]
+        partes = [self._SNAPSHOT_CABECALHO.pack(self._SNAPSHOT_ASSINATURA, VERSAO_FORMATO, len(itens))]
+        for chave, expira, comprimido, tamanho, acessos, valor in itens:
+            chave_bytes = chave.encode()
+            entrada = self._SNAPSHOT_ENTRADA.pack(expira, comprimido, tamanho, acessos, len(chave_bytes), len(valor))
+            partes += [entrada, chave_bytes, valor]
+        corpo = b"".join(partes)
+        diretorio = os.path.dirname(os.path.abspath(self.snapshot))
+        try:
+            os.makedirs(diretorio, exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+            try:
+                with os.fdopen(descritor, "wb") as arquivo:
+                    arquivo.write(corpo)
+                    arquivo.write(self._SNAPSHOT_CRC.pack(zlib.crc32(corpo)))
+                os.replace(temporario, self.snapshot)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+        except OSError:
+            logger.warning("Não foi possível gravar o snapshot do cache %s", self.snapshot, exc_info=True)
+            self._alterado = True
+            return False
+        return True
+
+    def _gravar_periodicamente(self) -> None:
+        while not self._parar.wait(env_float("CACHE_SNAPSHOT_SEGUNDOS", 300.0)):
+            self.salvar()
+
+    def encerrar(self) -> None:
+        """Para a gravação periódica e grava o snapshot final (encerramento gracioso)."""
+        self._parar.set()
+        self.salvar()
+
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        with self._lock:
+            self._carregar()
+            agora = time.time()
+            itens = [(c, e.valor, e.comprimido, e.expira - agora) for c, e in self._entradas.items()]
+        for chave, valor, comprimido, restante in itens:
+            if restante > 0:
+                yield chave, zlib.decompress(valor) if comprimido else valor, restante
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            self._carregar()
+            return {
+                "entradas": len(self._entradas),
+                "bytes": sum(e.tamanho for e in self._entradas.values()),
+                "bytes_residentes": self._residentes,
+                "orcamento_bytes": self._orcamento(),
+                "comprimidas": sum(e.comprimido for e in self._entradas.values()),
+                "compressoes": self.compressoes,
+                "evicoes": self.evicoes,
+            }
+
+
+class CacheSQLite(BackendCache):
+    """Cache em SQLite (WAL), seguro entre threads e processos."""
+
+    nome = "sqlite"
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._local = threading.local()
+        self._conexao().execute(
+            "CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL NOT NULL)"
+        )
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5.0, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def get(self, chave: str) -> bytes | None:
+        linha = self._conexao().execute("SELECT valor, expira FROM cache WHERE chave = ?", (chave,)).fetchone()
+        if linha is None or linha[1] <= time.time():
+            return None
+        return linha[0]
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        self._conexao().execute(
+            "INSERT OR REPLACE INTO cache (chave, valor, expira) VALUES (?, ?, ?)", (chave, valor, time.time() + ttl)
+        )
+
+    def delete(self, chave: str) -> None:
+        self._conexao().execute("DELETE FROM cache WHERE chave = ?", (chave,))
+
+    def limpar_expirados(self) -> int:
+        return self._conexao().execute("DELETE FROM cache WHERE expira <= ?", (time.time(),)).rowcount
+
+    def estatisticas(self) -> dict[str, int]:
+        entradas, tamanho = (
+            self._conexao()
+            .execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(valor)), 0) FROM cache WHERE expira > ?", (time.time(),))
+            .fetchone()
+        )
+        return {"entradas": entradas, "bytes": tamanho}
+
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        agora = time.time()
+        consulta = "SELECT chave, valor, expira FROM cache WHERE expira > ? AND chave LIKE ?"
+        for chave, valor, expira in self._conexao().execute(consulta, (agora, PREFIXO + "%")).fetchall():
+            yield chave, valor, expira - agora
+
+
+class CacheArquivos(BackendCache):
+    """Um arquivo por entrada (nome = SHA-256 da chave), gravado de forma atômica.
+
+    Cada arquivo traz a validade e a própria chave antes do valor, para que o
+    diretório possa ser percorrido (``itens``).
+    """
+
+    nome = "arquivos"
+    _CABECALHO = struct.Struct("<dH")  # instante de expiração, tamanho da chave
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, hashlib.sha256(chave.encode()).hexdigest() + ".cpv")
+
+    def get(self, chave: str) -> bytes | None:
+        try:
+            with open(self._caminho(chave), "rb") as arquivo:
+                dados = arquivo.read()
+        except FileNotFoundError:
+            return None
+        try:
+            expira, tamanho_chave = self._CABECALHO.unpack_from(dados)
+        except struct.error:
+            expira, tamanho_chave = 0.0, 0
+        inicio = self._CABECALHO.size + tamanho_chave
+        # Arquivo truncado (disco cheio, cópia interrompida) conta como ausência.
+        if expira <= time.time() or dados[self._CABECALHO.size : inicio] != chave.encode():
+            self.delete(chave)
+            return None
+        return dados[inicio:]
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            chave_bytes = chave.encode()
+            with os.fdopen(descritor, "wb") as arquivo:
+                arquivo.write(self._CABECALHO.pack(time.time() + ttl, len(chave_bytes)))
+                arquivo.write(chave_bytes)
+                arquivo.write(valor)
+            os.replace(temporario, self._caminho(chave))
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def delete(self, chave: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._caminho(chave))
+
+    def estatisticas(self) -> dict[str, int]:
+        entradas = tamanho = 0
+        agora = time.time()
+        for entrada in os.scandir(self.diretorio):
+            if not entrada.name.endswith(".cpv"):
+                continue
+            try:
+                with open(entrada.path, "rb") as arquivo:
+                    expira, tamanho_chave = self._CABECALHO.unpack(arquivo.read(self._CABECALHO.size))
+            except (OSError, struct.error):
+                continue
+            if expira > agora:
+                entradas += 1
+                tamanho += entrada.stat().st_size - self._CABECALHO.size - tamanho_chave
+        return {"entradas": entradas, "bytes": tamanho}
+
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        for entrada in os.scandir(self.diretorio):
+            if not entrada.name.endswith(".cpv"):
+                continue
+            try:
+                with open(entrada.path, "rb") as arquivo:
+                    dados = arquivo.read()
+                expira, tamanho_chave = self._CABECALHO.unpack_from(dados)
+            except (OSError, struct.error):
+                continue
+            restante = expira - time.time()
+            if restante > 0:
+                fim_chave = self._CABECALHO.size + tamanho_chave
+                yield dados[self._CABECALHO.size : fim_chave].decode(), dados[fim_chave:], restante
+
+
+class ErroRedis(Exception):
+    """Resposta de erro (``-ERR ...``) ou falha de protocolo do servidor Redis."""
+
+
+class _ConexaoRedisPerdida(ErroRedis):
+    """Conexão encerrada ou resposta fora do protocolo: a conexão não serve mais."""
+
+
+class CacheRedis(BackendCache):
+    """Cliente mínimo do protocolo Redis (RESP2): GET, SET PX, DEL, SCAN, STRLEN e PTTL.
+
+    Uma conexão por thread; sem dependências além da biblioteca padrão.
+    """
+
+    nome = "redis"
+
+    def __init__(self, url: str):
+        partes = urlparse(url)
+        self.host = partes.hostname or "localhost"
+        self.porta = partes.port or 6379
+        self.banco = int(partes.path.lstrip("/") or 0)
+        self.senha = partes.password
+        self._local = threading.local()
+
+    def _conectar(self) -> tuple[socket.socket, io.BufferedReader]:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            sock = socket.create_connection((self.host, self.porta), timeout=5.0)
+            conexao = (sock, sock.makefile("rb"))
+            self._local.conexao = conexao
+            if self.senha:
+                self._comando("AUTH", self.senha)
+            if self.banco:
+                self._comando("SELECT", str(self.banco))
+        return conexao
+
+    def _comando(self, *args: str | bytes) -> Any:
+        sock, leitor = self._conectar()
+        partes = [a.encode() if isinstance(a, str) else a for a in args]
+        pedido = b"*%d\r\n" % len(partes) + b"".join(b"$%d\r\n%s\r\n" % (len(p), p) for p in partes)
+        try:
+            sock.sendall(pedido)
+            return self._ler(leitor)
+        except (OSError, _ConexaoRedisPerdida):
+            # Só as respostas ``-ERR`` deixam a conexão utilizável; a próxima chamada reconecta
+            self._local.conexao = None
+            sock.close()
+            raise
+
+    def _ler(self, leitor: io.BufferedReader) -> Any:
+        linha = leitor.readline()
+        if not linha.endswith(b"\r\n"):
+            raise _ConexaoRedisPerdida("Conexão encerrada pelo servidor")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return conteudo.decode()
+        if tipo == b"-":
+            raise ErroRedis(conteudo.decode())
+        try:
+            if tipo == b":":
+                return int(conteudo)
+            if tipo == b"$":
+                tamanho = int(conteudo)
+                if tamanho < 0:
+                    return None
+                dados = leitor.read(tamanho + 2)
+                if len(dados) != tamanho + 2:
+                    raise _ConexaoRedisPerdida("Conexão encerrada pelo servidor")
+                return dados[:-2]
+            if tipo == b"*":
+                return [self._ler(leitor) for _ in range(int(conteudo))]
+        except ValueError as e:
+            raise _ConexaoRedisPerdida(f"Resposta inesperada: {linha!r}") from e
+        raise _ConexaoRedisPerdida(f"Resposta inesperada: {linha!r}")
+
+    def get(self, chave: str) -> bytes | None:
+        return self._comando("GET", chave)
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        self._comando("SET", chave, valor, "PX", str(max(1, int(ttl * 1000))))
+
+    def delete(self, chave: str) -> None:
+        self._comando("DEL", chave)
+
+    def estatisticas(self) -> dict[str, int]:
+        entradas = tamanho = 0
+        cursor = b"0"
+        while True:
+            cursor, chaves = self._comando("SCAN", cursor, "MATCH", PREFIXO + "*", "COUNT", "500")
+            for chave in chaves:
+                entradas += 1
+                tamanho += self._comando("STRLEN", chave)
+            if cursor == b"0":
+                return {"entradas": entradas, "bytes": tamanho}
+
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        cursor = b"0"
+        while True:
+            cursor, chaves = self._comando("SCAN", cursor, "MATCH", PREFIXO + "*", "COUNT", "500")
+            for chave in chaves:
+                valor = self._comando("GET", chave)
+                restante = self._comando("PTTL", chave)
+                if valor is not None and restante > 0:
+                    yield chave.decode(), valor, restante / 1000
+            if cursor == b"0":
+                return
+
+
+# ---------------------------------------------------------------------------
+# Seleção por configuração
+# ---------------------------------------------------------------------------
+
+
+def _cache_do_pacote(caminho: str) -> BackendCache:
+    from capivara_mcp.tools._pacote import CachePacote  # _pacote depende deste módulo
+
+    return CachePacote(caminho)
+
+
+_backends: dict[tuple[str, str], BackendCache] = {}
+_lock = threading.Lock()
+
+_FABRICAS: dict[str, tuple[Callable[[str], BackendCache], str, str]] = {
+    "memoria": (
+        lambda destino: CacheMemoria(None if destino == "nenhum" else destino),
+        "CACHE_SNAPSHOT",
+        "memoria.snapshot",
+    ),
+    "sqlite": (CacheSQLite, "CACHE_SQLITE", "cache.sqlite3"),
+    "arquivos": (CacheArquivos, "CACHE_DIRETORIO", "arquivos"),
+    "redis": (CacheRedis, "CACHE_REDIS_URL", "redis://localhost:6379/0"),
+    "pacote": (_cache_do_pacote, "OFFLINE", ""),
+}
+
+
+_COMPARTILHADOS = {"sqlite", "arquivos", "redis"}
+
+
+def diretorio_padrao() -> str:
+    """Diretório padrão dos dados locais (``$XDG_CACHE_HOME/capivara-mcp``)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "capivara-mcp")
+
+
+def _escolha() -> tuple[str, str] | None:
+    """Nome e destino do backend configurado, ou None se o cache estiver desligado."""
+    nome = env_str("CACHE", "sqlite" if env_str("CACHE_SQLITE", "") else "memoria").strip().lower()
+    if nome == "nenhum":
+        return None
+    if nome not in _FABRICAS:
+        logger.warning("Backend de cache desconhecido: %r. Cache desligado.", nome)
+        return None
+    _fabrica, variavel, padrao = _FABRICAS[nome]
+    destino = ""
+    if variavel:
+        destino = env_str(variavel, "")
+        if not destino:
+            destino = padrao if nome == "redis" else os.path.join(diretorio_padrao(), padrao)
+    return nome, destino
+
+
+def cache_atual() -> BackendCache | None:
+    """Backend escolhido por ``CAPIVARA_CACHE``, ou None se o cache estiver desligado.
+
+    Sem ``CAPIVARA_CACHE``, usa ``sqlite`` se ``CAPIVARA_CACHE_SQLITE`` estiver
+    definido e ``memoria`` caso contrário.
+    """
+    escolha = _escolha()
+    if escolha is None:
+        return None
+    nome, destino = escolha
+    fabrica = _FABRICAS[nome][0]
+    with _lock:
+        if (nome, destino) not in _backends:
+            _backends[(nome, destino)] = fabrica(destino)
+        return _backends[(nome, destino)]
+
+
+def destino_compartilhado() -> str | None:
+    """``nome:destino`` do backend visto por vários processos (sqlite, arquivos, redis).
+
+    None se o cache for do próprio processo (``memoria``, ``pacote``) ou estiver desligado.
+    """
+    escolha = _escolha()
+    if escolha is None or escolha[0] not in _COMPARTILHADOS:
+        return None
+    return ":".join(escolha)
+
+
+def estatisticas() -> dict[str, Any]:
+    """Backend em uso, número de entradas e bytes ocupados (para operadores)."""
+    backend = cache_atual()
+    if backend is None:
+        return {"backend": "nenhum"}
+    try:
+        return {"backend": backend.nome, **backend.estatisticas()}
+    except (OSError, sqlite3.Error, ErroRedis) as e:
+        return {"backend": backend.nome, "erro": str(e)}
+
+
+# ---------------------------------------------------------------------------
+# Decorador
+# ---------------------------------------------------------------------------
+
+
+def chave(namespace: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
+    """Chave namespaced de uma consulta: ``capivara:<namespace>:<argumentos>``."""
+    partes = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in sorted(kwargs.items())]
+    return f"{PREFIXO}{namespace}:{','.join(partes)}"
+
+
+_renovacao: ContextVar[float | None] = ContextVar("capivara_renovacao", default=None)
+
+
+@contextlib.contextmanager
+def renovando(ttl: float) -> Iterator[None]:
+    """No bloco, ``em_cache`` ignora o que está guardado, vai ao BCB e grava o resultado por ``ttl`` segundos.
+
+    Usado pela agenda de renovação (``_agenda``) logo após cada publicação do BCB.
+    """
+    token = _renovacao.set(ttl)
+    try:
+        yield
+    finally:
+        _renovacao.reset(token)
+
+
+def _duravel(namespace: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> pd.DataFrame | None:
+    from capivara_mcp.tools._conjuntos import responder  # _conjuntos depende deste módulo
+
+    return responder(namespace, args, kwargs)
+
+
+def _para_gravar(namespace: str, args: tuple[Any, ...], kwargs: dict[str, Any], df: pd.DataFrame | Serie) -> bytes:
+    """Serializa o resultado; os dos conjuntos levam a própria partição nos ``attrs``."""
+    from capivara_mcp.tools._conjuntos import marca
+
+    if isinstance(df, pd.DataFrame) and (gravada := marca(namespace, args, kwargs, df)) is not None:
+        df = df.copy(deep=False)
+        df.attrs[MARCA_CONJUNTO] = gravada
+    return serializar(df)
+
+
+def em_cache(namespace: str) -> Callable[[F], F]:
+    """Decora um ``_fetch_*`` para consultar o cache antes de ir ao BCB.
+
+    No rastreio da chamada, marca as fases ``buscar`` (aqui dentro) e
+    ``transformar`` (depois do retorno). Sem entrada no cache (ou com o cache
+    desligado), os conjuntos do Olinda ainda podem ser respondidos pelas
+    partições duráveis (``_conjuntos``) antes de ir ao BCB.
+    """
+
+    def decorador(fn: F) -> F:
+        @functools.wraps(fn)
+        def envolvida(*args: Any, **kwargs: Any) -> pd.DataFrame | Serie:
+            _rastreio.fase("buscar")
+            try:
+                return consultar(*args, **kwargs)
+            finally:
+                _rastreio.fase("transformar")
+
+        def consultar(*args: Any, **kwargs: Any) -> pd.DataFrame | Serie:
+            backend = cache_atual()
+            if backend is None:
+                df = _duravel(namespace, args, kwargs)
+                return fn(*args, **kwargs) if df is None else df
+            k = chave(namespace, args, kwargs)
+            ttl = _renovacao.get()
+            with _rastreio.trecho("cache", namespace=namespace) as trecho:
+                try:
+                    guardado = backend.get(k) if ttl is None else None
+                except (OSError, sqlite3.Error, ErroRedis):
+                    logger.warning("Falha ao ler o cache %s", k, exc_info=True)
+                    guardado = None
+                df = desserializar(guardado) if guardado is not None else None
+                resultado = "hit" if df is not None else "miss"
+                if trecho is not None:
+                    trecho.atributos["resultado"] = resultado
+            chamada = chamada_atual()
+            _metricas.contar("capivara_cache_total", camada="resultados", namespace=namespace, resultado=resultado)
+            if chamada is not None:
+                chamada.eventos[f"cache_{resultado}"] += 1
+            if df is not None:
+                if isinstance(df, pd.DataFrame):
+                    df.attrs.pop(MARCA_CONJUNTO, None)
+                return df
+            if ttl is None:
+                df = _duravel(namespace, args, kwargs)
+                if df is not None:
+                    return df
+
+            df = fn(*args, **kwargs)
+            if df.attrs.get("parcial") or (chamada is not None and chamada.avisos):
+                return df
+            try:
+                backend.set(k, _para_gravar(namespace, args, kwargs, df), ttl or env_float("CACHE_TTL_SEGUNDOS", 900.0))
+            except (OSError, sqlite3.Error, ErroRedis):
+                logger.warning("Falha ao gravar o cache %s", k, exc_info=True)
+            return df
+
+        return envolvida  # type: ignore[return-value]
+
+    return decorador
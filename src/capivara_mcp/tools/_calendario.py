@@ -0,0 +1,152 @@
+"""Calendário de dias úteis nacionais (feriados bancários) compartilhado pelos tools.
+
+O calendário é pré-calculado na importação como um bitmap de 1 bit por dia
+entre 1980 e 2099, acompanhado de contagens acumuladas por byte. Com isso,
+``eh_dia_util`` e ``contar_dias_uteis`` são O(1) e ``deslocar_dias_uteis``
+é O(log n), sem alocar nada por consulta.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+
+_INICIO = date(1980, 1, 1)
+_FIM = date(2099, 12, 31)
+_TOTAL_DIAS = (_FIM - _INICIO).days + 1
+
+
+def _pascoa(ano: int) -> date:
+    """Domingo de Páscoa pelo algoritmo gregoriano anônimo (Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    ell = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * ell) // 451
+    mes, dia = divmod(h + ell - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados(ano: int) -> set[date]:
+    """Feriados nacionais em que o BCB não publica dados (calendário bancário)."""
+    pascoa = _pascoa(ano)
+    dias = {
+        date(ano, 1, 1),  # Confraternização Universal
+        pascoa - timedelta(days=48),  # Carnaval (segunda)
+        pascoa - timedelta(days=47),  # Carnaval (terça)
+        pascoa - timedelta(days=2),  # Sexta-feira Santa
+        date(ano, 4, 21),  # Tiradentes
+        date(ano, 5, 1),  # Dia do Trabalho
+        pascoa + timedelta(days=60),  # Corpus Christi
+        date(ano, 9, 7),  # Independência
+        date(ano, 10, 12),  # Nossa Senhora Aparecida
+        date(ano, 11, 2),  # Finados
+        date(ano, 11, 15),  # Proclamação da República
+        date(ano, 12, 25),  # Natal
+    }
+    if ano >= 2024:
+        dias.add(date(ano, 11, 20))  # Consciência Negra (Lei 14.759/2023)
+    return dias
+
+
+def _construir() -> tuple[bytearray, array]:
+    bitmap = bytearray((_TOTAL_DIAS + 7) // 8)
+    nao_uteis: set[date] = set()
+    for ano in range(_INICIO.year, _FIM.year + 1):
+        nao_uteis |= feriados(ano)
+    dia = _INICIO
+    for i in range(_TOTAL_DIAS):
+        if dia.weekday() < 5 and dia not in nao_uteis:
+            bitmap[i >> 3] |= 1 << (i & 7)
+        dia += timedelta(days=1)
+    acumulado = array("I", [0]) * (len(bitmap) + 1)
+    for i, byte in enumerate(bitmap):
+        acumulado[i + 1] = acumulado[i] + byte.bit_count()
+    return bitmap, acumulado
+
+
+_BITMAP, _ACUMULADO = _construir()
+
+
+def _indice(d: date) -> int:
+    if not _INICIO <= d <= _FIM:
+        raise ValueError(f"Data {d} fora do calendário de dias úteis ({_INICIO.year}–{_FIM.year}).")
+    return (d - _INICIO).days
+
+
+def _uteis_antes(i: int) -> int:
+    """Quantidade de dias úteis nos índices [0, i)."""
+    byte, bit = i >> 3, i & 7
+    parcial = _BITMAP[byte] & ((1 << bit) - 1) if bit else 0
+    return _ACUMULADO[byte] + parcial.bit_count()
+
+
+def _k_esimo_util(k: int) -> date:
+    """Data do k-ésimo dia útil (base 0) do calendário."""
+    if not 0 <= k < _ACUMULADO[-1]:
+        raise ValueError("Deslocamento de dias úteis fora do calendário.")
+    byte = bisect_right(_ACUMULADO, k) - 1
+    restante = k - _ACUMULADO[byte]
+    valor = _BITMAP[byte]
+    for bit in range(8):
+        if valor & (1 << bit):
+            if restante == 0:
+                return _INICIO + timedelta(days=(byte << 3) + bit)
+            restante -= 1
+    raise AssertionError("bitmap inconsistente")  # pragma: no cover
+
+
+def eh_dia_util(d: date) -> bool:
+    """Indica se a data é dia útil bancário nacional."""
+    i = _indice(d)
+    return bool(_BITMAP[i >> 3] & (1 << (i & 7)))
+
+
+def contar_dias_uteis(inicio: date, fim: date) -> int:
+    """Conta dias úteis no intervalo fechado [inicio, fim]."""
+    if inicio > fim:
+        return 0
+    return _uteis_antes(_indice(fim) + 1) - _uteis_antes(_indice(inicio))
+
+
+def deslocar_dias_uteis(d: date, n: int) -> date:
+    """Desloca ``n`` dias úteis a partir de ``d``.
+
+    ``n > 0`` retorna o n-ésimo dia útil posterior a ``d``; ``n < 0`` o n-ésimo
+    anterior. Com ``n == 0`` retorna ``d`` se for dia útil, senão o dia útil anterior.
+    """
+    i = _indice(d)
+    if n > 0:
+        return _k_esimo_util(_uteis_antes(i + 1) + n - 1)
+    if n < 0:
+        return _k_esimo_util(_uteis_antes(i) + n)
+    return _k_esimo_util(_uteis_antes(i + 1) - 1)
+
+
+def inicio_por_dias_uteis(fim: date, n: int) -> date:
+    """Data inicial de uma janela que termina em ``fim`` e contém ``n`` dias úteis."""
+    if n < 1:
+        raise ValueError("A quantidade de dias úteis deve ser maior ou igual a 1.")
+    return deslocar_dias_uteis(deslocar_dias_uteis(fim, 0), -(n - 1))
+
+
+def ajustar_janela(inicio: date, fim: date) -> tuple[date, date] | None:
+    """Ajusta a janela ao primeiro e ao último dia útil contidos nela.
+
+    Datas fora da cobertura do calendário são limitadas a ela. Retorna None
+    quando a janela não contém nenhum dia útil — nesse caso não há por que
+    consultar a API, pois séries diárias do BCB não têm dados nesses dias.
+    """
+    inicio, fim = max(inicio, _INICIO), min(fim, _FIM)
+    if inicio > fim:
+        return None
+    antes = _uteis_antes(_indice(inicio))
+    ate = _uteis_antes(_indice(fim) + 1)
+    if ate <= antes:
+        return None
+    return _k_esimo_util(antes), _k_esimo_util(ate - 1)
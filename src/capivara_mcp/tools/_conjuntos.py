@@ -0,0 +1,363 @@
+"""Partições duráveis dos conjuntos do Olinda (PTAX, Focus e TaxaJuros).
+
+O cache de resultados guarda cada consulta pela chave exata dos argumentos e
+por ``CAPIVARA_CACHE_TTL_SEGUNDOS``. Para que esses dados sobrevivam a um
+pacote (``_pacote``) eles são reorganizados em partições sem validade, ao lado
+do armazém de séries, em ``<CAPIVARA_SERIES_DIRETORIO>/conjunto-<nome>.cpv``
+(formato de ``_cache.serializar``):
+
+- ``ptax``: cotações por moeda, com os períodos já consultados;
+- ``expectativas_*``: os retratos do Focus por indicador;
+- ``taxa_juros``: as taxas de cada mês (e modalidade).
+
+Ao gravar um desses resultados no cache, ``em_cache`` guarda junto, nos
+``attrs``, a partição e a cobertura da consulta (``marca``); o pacote as lê de
+volta (``da_entrada``) sem depender do formato da chave.
+
+A cobertura de cada partição fica nos ``attrs`` do DataFrame, e uma consulta é
+respondida por intervalo e filtro sobre a partição, não pela chave: no modo
+offline, sempre que a partição tiver a consulta (a PTAX com só parte da janela
+coberta vem com aviso e ``parcial``); com o BCB disponível, só quando o dado
+não muda mais (PTAX de períodos passados já cobertos, taxas de meses
+anteriores ao corrente). Os retratos do Focus são substituídos toda semana e
+só respondem offline.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Any
+
+import pandas as pd
+
+from capivara_mcp.tools._armazem import armazem_atual
+from capivara_mcp.tools._cache import MARCA_CONJUNTO, desserializar, serializar
+from capivara_mcp.tools._contexto import chamada_atual
+from capivara_mcp.tools._serie import Serie
+
+_PARTICAO = "_particao"
+_NOME_ARQUIVO = re.compile(r"conjunto-([a-z0-9_]+)\.cpv")
+
+_MESES = ("Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez")
+
+
+class Conjunto(ABC):
+    """Como particionar as consultas de um namespace do ``em_cache`` e respondê-las a partir das partições."""
+
+    parametros: tuple[str, ...]
+
+    @abstractmethod
+    def particao(self, argumentos: dict[str, Any]) -> str:
+        """Partição que guarda o resultado da consulta."""
+
+    @abstractmethod
+    def cobertura(self, argumentos: dict[str, Any], df: pd.DataFrame) -> dict[str, Any]:
+        """O que uma consulta com ``argumentos`` acrescenta à cobertura da partição."""
+
+    @abstractmethod
+    def juntar(self, a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+        """Cobertura de uma partição que recebeu os dados de ``a`` e de ``b``."""
+
+    @abstractmethod
+    def responder(
+        self, dados: pd.DataFrame, coberturas: dict[str, Any], argumentos: dict[str, Any], offline: bool
+    ) -> pd.DataFrame | None:
+        """Resultado da consulta a partir do conjunto, ou None se as partições não a cobrem."""
+
+
+def _parte(dados: pd.DataFrame, particao: str) -> pd.DataFrame:
+    return dados.loc[dados[_PARTICAO] == particao].drop(columns=_PARTICAO).reset_index(drop=True)
+
+
+class _Ptax(Conjunto):
+    parametros = ("moeda", "dt_inicio", "dt_fim")
+
+    def particao(self, argumentos: dict[str, Any]) -> str:
+        return argumentos["moeda"]
+
+    def cobertura(self, argumentos: dict[str, Any], df: pd.DataFrame) -> dict[str, Any]:
+        return {"periodos": [[argumentos["dt_inicio"].isoformat(), argumentos["dt_fim"].isoformat()]]}
+
+    def juntar(self, a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+        periodos: list[list[str]] = []
+        for inicio, fim in sorted(a["periodos"] + b["periodos"]):
+            if periodos and date.fromisoformat(inicio) <= date.fromisoformat(periodos[-1][1]) + timedelta(days=1):
+                periodos[-1][1] = max(periodos[-1][1], fim)
+            else:
+                periodos.append([inicio, fim])
+        return {"periodos": periodos}
+
+    def responder(
+        self, dados: pd.DataFrame, coberturas: dict[str, Any], argumentos: dict[str, Any], offline: bool
+    ) -> pd.DataFrame | None:
+        cobertura = coberturas.get(argumentos["moeda"])
+        if cobertura is None:
+            return None
+        inicio, fim = argumentos["dt_inicio"].isoformat(), argumentos["dt_fim"].isoformat()
+        completo = any(a <= inicio and fim <= b for a, b in cobertura["periodos"])
+        if offline:
+            cruzados = [[max(a, inicio), min(b, fim)] for a, b in cobertura["periodos"] if a <= fim and inicio <= b]
+            if not cruzados:
+                return None
+        elif not (completo and argumentos["dt_fim"] < date.today()):
+            return None
+        parte = _parte(dados, argumentos["moeda"])
+        if not parte.empty:
+            dias = parte["dataHoraCotacao"].dt.date
+            parte = parte.loc[(dias >= argumentos["dt_inicio"]) & (dias <= argumentos["dt_fim"])]
+            parte = parte.sort_values(by=["dataHoraCotacao"], kind="stable").reset_index(drop=True)
+        if not completo:
+            # Offline, com só parte da janela no pacote: a resposta diz o que ficou de fora
+            parte.attrs["parcial"] = True
+            chamada = chamada_atual()
+            if chamada is not None:
+                trechos = ", ".join(f"{a} a {b}" for a, b in cruzados)
+                chamada.avisar(
+                    f"Modo offline: o pacote cobre só parte do período pedido para {argumentos['moeda']} "
+                    f"({trechos}); as cotações fora desse trecho não estão na resposta."
+                )
+        return parte
+
+
+class _Focus(Conjunto):
+    """Retratos do Focus por indicador (``top`` registros mais recentes, ``Data desc``)."""
+
+    def __init__(self, parametros: tuple[str, ...]):
+        self.parametros = parametros
+
+    def particao(self, argumentos: dict[str, Any]) -> str:
+        return argumentos.get("indicador", "")
+
+    def cobertura(self, argumentos: dict[str, Any], df: pd.DataFrame) -> dict[str, Any]:
+        return {"top": argumentos["top"]}
+
+    def juntar(self, a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+        return {"top": max(a["top"], b["top"])}
+
+    def responder(
+        self, dados: pd.DataFrame, coberturas: dict[str, Any], argumentos: dict[str, Any], offline: bool
+    ) -> pd.DataFrame | None:
+        particao = self.particao(argumentos)
+        if not offline or particao not in coberturas:
+            return None
+        parte = _parte(dados, particao)
+        if not parte.empty:
+            parte = parte.sort_values("Data", ascending=False, kind="stable")
+        return parte.head(argumentos["top"]).reset_index(drop=True)
+
+
+class _TaxaJuros(Conjunto):
+    """Taxas por mês; a partição ``<mes>|<modalidade>`` guarda as ``top`` menores taxas anuais."""
+
+    parametros = ("mes", "modalidade", "top")
+
+    def particao(self, argumentos: dict[str, Any]) -> str:
+        return f"{argumentos['mes']}|{argumentos['modalidade'] or ''}"
+
+    def cobertura(self, argumentos: dict[str, Any], df: pd.DataFrame) -> dict[str, Any]:
+        return {"top": argumentos["top"], "completo": len(df) < argumentos["top"]}
+
+    def juntar(self, a: dict[str, Any], b: dict[str, Any]) -> dict[str, Any]:
+        return {"top": max(a["top"], b["top"]), "completo": a["completo"] or b["completo"]}
+
+    @staticmethod
+    def _encerrado(mes: str) -> bool:
+        nome, _, ano = mes.partition("-")
+        if nome not in _MESES or not ano.isdigit():
+            return False
+        hoje = date.today()
+        return (int(ano), _MESES.index(nome) + 1) < (hoje.year, hoje.month)
+
+    def responder(
+        self, dados: pd.DataFrame, coberturas: dict[str, Any], argumentos: dict[str, Any], offline: bool
+    ) -> pd.DataFrame | None:
+        mes, modalidade, top = argumentos["mes"], argumentos["modalidade"], argumentos["top"]
+        if not offline and not self._encerrado(mes):
+            return None
+        particao = self.particao(argumentos)
+        cobertura = coberturas.get(particao)
+        if cobertura is not None and (offline or cobertura["completo"] or top <= cobertura["top"]):
+            parte = _parte(dados, particao)
+        else:
+            # O mês inteiro, filtrado pela modalidade: com o BCB disponível, só se tiver todas as taxas
+            cobertura = coberturas.get(f"{mes}|") if modalidade else None
+            if cobertura is None or not (offline or cobertura["completo"]):
+                return None
+            parte = _parte(dados, f"{mes}|")
+            if "Modalidade" not in parte.columns:
+                return None
+            parte = parte.loc[parte["Modalidade"] == modalidade]
+        if not parte.empty:
+            parte = parte.sort_values(by=["TaxaJurosAoAno"], kind="stable")
+        return parte.head(top).reset_index(drop=True)
+
+
+CONJUNTOS: dict[str, Conjunto] = {
+    "ptax": _Ptax(),
+    "expectativas_anuais": _Focus(("indicador", "top")),
+    "expectativas_mensais": _Focus(("indicador", "top")),
+    "expectativas_inflacao12m": _Focus(("indicador", "top")),
+    "expectativas_top5": _Focus(("indicador", "top")),
+    "expectativas_selic": _Focus(("top",)),
+    "taxa_juros": _TaxaJuros(),
+}
+
+
+# ---------------------------------------------------------------------------
+# Consultas e partições
+# ---------------------------------------------------------------------------
+
+
+def argumentos(nome: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+    """Argumentos de uma chamada do ``_fetch_*`` do conjunto ``nome``, pelos nomes dos parâmetros."""
+    return {**dict(zip(CONJUNTOS[nome].parametros, args, strict=False)), **kwargs}
+
+
+def marca(nome: str, args: tuple[Any, ...], kwargs: dict[str, Any], df: pd.DataFrame) -> dict[str, Any] | None:
+    """Conjunto, partição e cobertura de um resultado de ``em_cache(nome)``; None se não for de um conjunto."""
+    conjunto = CONJUNTOS.get(nome)
+    if conjunto is None:
+        return None
+    consulta = argumentos(nome, args, kwargs)
+    return {"nome": nome, "particao": conjunto.particao(consulta), "cobertura": conjunto.cobertura(consulta, df)}
+
+
+def _uma_particao(particao: str, cobertura: dict[str, Any], df: pd.DataFrame) -> pd.DataFrame:
+    dados = df.assign(**{_PARTICAO: particao})
+    dados.attrs = {"coberturas": {particao: cobertura}}
+    return dados
+
+
+def da_entrada(dados: pd.DataFrame | Serie | None) -> tuple[str, pd.DataFrame] | None:
+    """Nome e conjunto de uma partição de uma entrada do cache com ``marca``, ou None se não tiver."""
+    if not isinstance(dados, pd.DataFrame):
+        return None
+    gravada = dados.attrs.get(MARCA_CONJUNTO)
+    if not isinstance(gravada, dict) or gravada.get("nome") not in CONJUNTOS:
+        return None
+    try:
+        return gravada["nome"], _uma_particao(gravada["particao"], gravada["cobertura"], dados)
+    except (KeyError, TypeError):
+        return None
+
+
+def particionar(nome: str, argumentos: dict[str, Any], df: pd.DataFrame) -> pd.DataFrame:
+    """O resultado de uma consulta como conjunto de uma só partição."""
+    conjunto = CONJUNTOS[nome]
+    return _uma_particao(conjunto.particao(argumentos), conjunto.cobertura(argumentos, df), df)
+
+
+def juntar(nome: str, a: pd.DataFrame | None, b: pd.DataFrame) -> pd.DataFrame:
+    """Une dois conjuntos do mesmo ``nome``: linhas sem repetição e coberturas combinadas."""
+    if a is None:
+        return b
+    conjunto = CONJUNTOS[nome]
+    coberturas = dict(a.attrs.get("coberturas", {}))
+    for particao, cobertura in b.attrs.get("coberturas", {}).items():
+        anterior = coberturas.get(particao)
+        coberturas[particao] = cobertura if anterior is None else conjunto.juntar(anterior, cobertura)
+    partes = [d for d in (a, b) if not d.empty]
+    dados = pd.concat(partes, ignore_index=True).drop_duplicates(ignore_index=True) if partes else a.copy()
+    dados.attrs = {"coberturas": coberturas}
+    return dados
+
+
+# ---------------------------------------------------------------------------
+# Armazenamento
+# ---------------------------------------------------------------------------
+
+
+class Conjuntos:
+    """Conjuntos gravados num diretório (o do armazém de séries), um arquivo por nome."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._abertos: dict[str, tuple[int, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, f"conjunto-{nome}.cpv")
+
+    def abrir(self, nome: str) -> pd.DataFrame | None:
+        """O conjunto gravado (relido só quando o arquivo muda), ou None se ausente."""
+        caminho = self._caminho(nome)
+        try:
+            versao = os.stat(caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            aberto = self._abertos.get(nome)
+            if aberto is not None and aberto[0] == versao:
+                return aberto[1]
+        with open(caminho, "rb") as arquivo:
+            dados = desserializar(arquivo.read())
+        if not isinstance(dados, pd.DataFrame):
+            return None
+        with self._lock:
+            self._abertos[nome] = (versao, dados)
+        return dados
+
+    def gravar(self, nome: str, dados: pd.DataFrame) -> None:
+        """Substitui o conjunto ``nome`` de forma atômica."""
+        self.instalar(nome, serializar(dados))
+
+    def instalar(self, nome: str, dados: bytes) -> None:
+        """Substitui o arquivo do conjunto por ``dados`` já serializados (ex.: de um pacote)."""
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(descritor, "wb") as arquivo:
+                arquivo.write(dados)
+            os.replace(temporario, self._caminho(nome))
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def incorporar(self, nome: str, dados: pd.DataFrame) -> None:
+        """Junta ``dados`` ao conjunto gravado."""
+        self.gravar(nome, juntar(nome, self.abrir(nome), dados))
+
+    def nomes(self) -> list[str]:
+        return sorted(
+            m[1] for n in os.listdir(self.diretorio) if (m := _NOME_ARQUIVO.fullmatch(n)) and m[1] in CONJUNTOS
+        )
+
+    def responder(self, nome: str, args: tuple[Any, ...], kwargs: dict[str, Any], offline: bool) -> pd.DataFrame | None:
+        """Resultado de ``_fetch_*(*args, **kwargs)`` do conjunto ``nome`` a partir das partições, se coberto."""
+        dados = self.abrir(nome)
+        if dados is None:
+            return None
+        return CONJUNTOS[nome].responder(
+            dados, dados.attrs.get("coberturas", {}), argumentos(nome, args, kwargs), offline
+        )
+
+
+_conjuntos: dict[str, Conjuntos] = {}
+_conjuntos_lock = threading.Lock()
+
+
+def conjuntos_em(diretorio: str) -> Conjuntos:
+    with _conjuntos_lock:
+        if diretorio not in _conjuntos:
+            _conjuntos[diretorio] = Conjuntos(diretorio)
+        return _conjuntos[diretorio]
+
+
+def responder(nome: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> pd.DataFrame | None:
+    """Resposta durável para uma consulta de ``em_cache(nome)``, ou None para seguir ao BCB.
+
+    Só há partições com o armazém de séries ligado (``CAPIVARA_SERIES_DIRETORIO``).
+    """
+    from capivara_mcp.tools._pacote import pacote_offline  # _pacote depende deste módulo
+
+    if nome not in CONJUNTOS:
+        return None
+    armazem = armazem_atual()
+    if armazem is None:
+        return None
+    return conjuntos_em(armazem.diretorio).responder(nome, args, kwargs, pacote_offline() is not None)
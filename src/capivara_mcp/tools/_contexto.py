@@ -0,0 +1,106 @@
+"""Contexto da chamada de tool em andamento (progresso, prazo e cancelamento).
+
+O servidor cria uma ``Chamada`` para cada execução de tool e a publica numa
+``ContextVar``. As camadas inferiores (planejador de buscas, HTTP) consultam
+``chamada_atual()`` para reportar progresso e respeitar o prazo, sem que as
+assinaturas dos tools precisem mudar. Chamadas diretas (ex: testes) não têm
+contexto e seguem sem prazo nem progresso.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+Notificador = Callable[[float, float | None, str | None], None]
+
+
+class ChamadaCancelada(BaseException):
+    """O cliente cancelou a chamada; o trabalho restante deve ser abandonado.
+
+    Deriva de BaseException (como ``asyncio.CancelledError``) para atravessar
+    os ``except Exception`` dos tools sem virar mensagem de erro.
+    """
+
+
+@dataclass
+class Chamada:
+    """Estado compartilhado de uma execução de tool."""
+
+    ferramenta: str
+    id: str
+    prazo: float | None = None  # instante limite em time.monotonic()
+    notificar: Notificador | None = None
+    # Executa uma corrotina no event loop do servidor a partir da thread do tool
+    # (anyio.from_thread.run). None fora do servidor: cada busca usa seu próprio loop.
+    executar_no_loop: Callable[..., Any] | None = None
+    cancelada: threading.Event = field(default_factory=threading.Event)
+    avisos: list[str] = field(default_factory=list)
+    erro_upstream: str | None = None  # tipo da última falha ao consultar o BCB (métricas)
+    status_upstream: int | None = None  # último status HTTP do BCB (logs)
+    eventos: Counter[str] = field(default_factory=Counter)  # cache_hit, cache_miss, upstream (logs)
+    linhas: int | None = None  # registros na resposta, anotado por resposta_json (métricas e logs)
+    erro_resposta: str | None = None  # mensagem da resposta {"erro": ...}, anotada por erro_json
+    _ao_cancelar: set[Callable[[], None]] = field(default_factory=set, repr=False)
+
+    def restante(self) -> float | None:
+        """Segundos até o prazo, ou None se a chamada não tem prazo."""
+        if self.prazo is None:
+            return None
+        return max(0.0, self.prazo - time.monotonic())
+
+    def expirou(self) -> bool:
+        return self.prazo is not None and time.monotonic() >= self.prazo
+
+    def ao_cancelar(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Registra ``callback`` para o cancelamento e retorna a função que o desregistra.
+
+        Deve ser usado no event loop, assim como ``cancelar``.
+        """
+        self._ao_cancelar.add(callback)
+        return lambda: self._ao_cancelar.discard(callback)
+
+    def cancelar(self) -> None:
+        """Marca a chamada como cancelada e aborta as operações em andamento."""
+        self.cancelada.set()
+        for callback in list(self._ao_cancelar):
+            callback()
+
+    def verificar(self) -> None:
+        """Levanta ChamadaCancelada se o cliente cancelou a chamada."""
+        if self.cancelada.is_set():
+            raise ChamadaCancelada(self.id)
+
+    def avisar(self, mensagem: str) -> None:
+        """Registra um aviso a ser incluído na resposta do tool (sem repetições)."""
+        if mensagem not in self.avisos:
+            self.avisos.append(mensagem)
+
+    def progresso(self, feito: float, total: float | None = None, mensagem: str | None = None) -> None:
+        """Reporta progresso ao cliente, se houver quem escutar."""
+        if self.notificar is not None:
+            self.notificar(feito, total, mensagem)
+
+
+_atual: ContextVar[Chamada | None] = ContextVar("capivara_chamada", default=None)
+
+
+def chamada_atual() -> Chamada | None:
+    """Chamada em andamento no contexto atual, se houver."""
+    return _atual.get()
+
+
+@contextmanager
+def em_chamada(chamada: Chamada) -> Iterator[Chamada]:
+    """Publica ``chamada`` como a chamada atual durante o bloco."""
+    token = _atual.set(chamada)
+    try:
+        yield chamada
+    finally:
+        _atual.reset(token)
@@ -0,0 +1,71 @@
+"""Codificação por degraus (run-length) para séries que mudam raramente.
+
+Séries como a Selic meta (432) ou o CDI (12) só mudam em reuniões do COPOM:
+um ano de dados diários vira poucos trechos ``[inicio, fim, valor]``.
+
+Os trechos são só formato de saída. O armazém (``_armazem``) continua ponto a
+ponto: as leituras são fatias ``memoryview`` sem cópia do arquivo mapeado, e
+trechos exigiriam decodificar a cada leitura. O ganho também seria pequeno,
+porque as datas ``int32`` de cada ponto precisam ficar gravadas de qualquer
+forma (cada série tem o seu calendário, com lacunas), e só a coluna
+``float64`` encolheria (2 a 3 KB por ano da 432). No cache em memória,
+as entradas frias são comprimidas com zlib, que já reduz os valores repetidos.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping, Sequence
+
+# Formatos de saída aceitos pelos tools de séries
+FORMATOS = ("registros", "degraus", "auto")
+
+# Uma série é tratada como degrau quando tem no máximo 1 mudança a cada 10 pontos
+_RAZAO_MAXIMA_MUDANCAS = 0.1
+
+
+def _normalizar(valor: float | None) -> float | None:
+    """NaN vira None para que o JSON de saída seja válido e os trechos comparáveis."""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    return valor
+
+
+def contar_mudancas(valores: Sequence[float | None]) -> int:
+    """Quantidade de pontos cujo valor difere do ponto anterior."""
+    mudancas = 0
+    anterior = object()
+    for i, valor in enumerate(valores):
+        valor = _normalizar(valor)
+        if i and valor != anterior:
+            mudancas += 1
+        anterior = valor
+    return mudancas
+
+
+def eh_serie_degrau(valores: Sequence[float | None]) -> bool:
+    """Detecta pelos próprios dados se a série se comporta como degrau."""
+    if len(valores) < 2:
+        return False
+    return contar_mudancas(valores) <= _RAZAO_MAXIMA_MUDANCAS * len(valores)
+
+
+def codificar_degraus(datas: Sequence[str], valores: Sequence[float | None]) -> list[list]:
+    """Converte pontos ``(data, valor)`` em trechos ``[inicio, fim, valor]`` de valor constante."""
+    trechos: list[list] = []
+    for data, valor in zip(datas, valores, strict=True):
+        valor = _normalizar(valor)
+        if trechos and trechos[-1][2] == valor:
+            trechos[-1][1] = data
+        else:
+            trechos.append([data, data, valor])
+    return trechos
+
+
+def resolver_formato(formato: str, colunas: Mapping[str, Sequence[float | None]]) -> str:
+    """Resolve ``auto`` para ``degraus`` quando todas as colunas são degraus, senão ``registros``."""
+    if formato != "auto":
+        return formato
+    if colunas and all(eh_serie_degrau(valores) for valores in colunas.values()):
+        return "degraus"
+    return "registros"
@@ -0,0 +1,407 @@
+"""Camada HTTP compartilhada para as APIs do BCB (SGS e Olinda/OData).
+
+As requisições são feitas com ``httpx.AsyncClient``. Dentro do servidor elas
+rodam no event loop principal (a thread do tool espera o resultado), o que
+permite abortá-las de verdade quando o cliente MCP cancela a chamada: o
+cancel scope da requisição é cancelado, o socket é fechado e a thread do tool
+recebe ``ChamadaCancelada``. Fora do servidor (testes, scripts) cada busca
+roda num event loop próprio e descartável.
+
+Os clientes (pools de conexões) por upstream só são compartilhados enquanto o
+servidor os mantém abertos com ``clientes_compartilhados`` e são fechados
+quando ele encerra. Num loop sem esse escopo (ex.: sessões em memória nos
+testes), cada busca usa um cliente próprio, fechado ao terminar.
+
+Hedge (opcional, por upstream): se a primeira tentativa de um GET não
+responder até o p90 observado do endpoint, uma segunda é disparada; a
+primeira resposta vence e a outra é cancelada. Um orçamento limita as
+requisições extras a uma fração das requisições normais.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+from urllib.parse import quote
+
+import anyio
+import httpx
+
+from capivara_mcp.config import env_float, env_int, env_str
+from capivara_mcp.tools import _latencia, _limites, _metricas, _rastreio, _resiliencia
+from capivara_mcp.tools._contexto import Chamada, ChamadaCancelada, chamada_atual
+from capivara_mcp.tools._pacote import ForaDoPacote, pacote_offline
+
+# URL base de cada upstream
+UPSTREAMS = {
+    "sgs": "https://api.bcb.gov.br/dados/serie",
+    "ptax": "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata",
+    "expectativas": "https://olinda.bcb.gov.br/olinda/servico/Expectativas/versao/v1/odata",
+    "taxa_juros": "https://olinda.bcb.gov.br/olinda/servico/taxaJuros/versao/v2/odata",
+}
+
+
+def url_base(upstream: str) -> str:
+    """URL base do upstream; ``CAPIVARA_BCB_URL`` troca esquema, host e porta e mantém o caminho.
+
+    Serve para apontar o servidor para um BCB falso (ex: ``benchmarks/bcb_falso.py``).
+    """
+    base = UPSTREAMS[upstream]
+    substituto = env_str("BCB_URL", "")
+    if not substituto:
+        return base
+    return substituto.rstrip("/") + httpx.URL(base).path
+
+
+def _host(upstream: str) -> str:
+    """Host do BCB cujo limitador o upstream usa (o mesmo com ``CAPIVARA_BCB_URL``)."""
+    return httpx.URL(UPSTREAMS[upstream]).host
+
+
+# Um cliente (pool de conexões) por upstream, por event loop com ``clientes_compartilhados`` aberto
+_clientes: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def montar_query(params: dict[str, Any]) -> str:
+    """Monta a query string com ``%20`` para espaços, como esperado pelas APIs OData do BCB."""
+    return "&".join(f"{quote(str(k))}={quote(str(v))}" for k, v in params.items())
+
+
+@contextlib.asynccontextmanager
+async def clientes_compartilhados() -> AsyncIterator[None]:
+    """Compartilha um cliente por upstream no loop atual enquanto o bloco roda; fecha todos na saída."""
+    loop = asyncio.get_running_loop()
+    if loop in _clientes:
+        yield
+        return
+    por_upstream = _clientes[loop] = {}
+    try:
+        yield
+    finally:
+        del _clientes[loop]
+        with anyio.CancelScope(shield=True):
+            for cliente in por_upstream.values():
+                await cliente.aclose()
+
+
+@contextlib.asynccontextmanager
+async def _cliente(upstream: str) -> AsyncIterator[httpx.AsyncClient]:
+    """O cliente compartilhado do upstream ou, fora de ``clientes_compartilhados``, um descartável."""
+    por_upstream = _clientes.get(asyncio.get_running_loop())
+    if por_upstream is None:
+        async with httpx.AsyncClient() as cliente:
+            yield cliente
+        return
+    cliente = por_upstream.get(upstream)
+    if cliente is None or cliente.is_closed:
+        cliente = por_upstream[upstream] = httpx.AsyncClient()
+    yield cliente
+
+
+class _OrcamentoHedge:
+    """Balde de créditos: cada requisição normal rende ``HEDGE_MAX_FRACAO`` crédito, cada hedge custa 1."""
+
+    _MAX_CREDITOS = 10.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.creditos = 1.0
+        self.requisicoes = 0
+        self.hedges = 0
+        self.hedges_vencedores = 0
+
+    def requisicao(self) -> None:
+        with self._lock:
+            self.requisicoes += 1
+            self.creditos = min(self._MAX_CREDITOS, self.creditos + env_float("HEDGE_MAX_FRACAO", 0.1))
+
+    def gastar(self) -> bool:
+        with self._lock:
+            if self.creditos < 1.0:
+                return False
+            self.creditos -= 1.0
+            self.hedges += 1
+            return True
+
+    def venceu(self) -> None:
+        with self._lock:
+            self.hedges_vencedores += 1
+
+
+_orcamentos: dict[str, _OrcamentoHedge] = {}
+_orcamentos_lock = threading.Lock()
+
+
+def _orcamento(upstream: str) -> _OrcamentoHedge:
+    with _orcamentos_lock:
+        if upstream not in _orcamentos:
+            _orcamentos[upstream] = _OrcamentoHedge()
+        return _orcamentos[upstream]
+
+
+def estado_hedge() -> dict[str, dict]:
+    """Requisições, hedges disparados e hedges vencedores por upstream."""
+    with _orcamentos_lock:
+        itens = sorted(_orcamentos.items())
+    return {
+        nome: {"requisicoes": o.requisicoes, "hedges": o.hedges, "hedges_vencedores": o.hedges_vencedores}
+        for nome, o in itens
+    }
+
+
+def _atraso_hedge(upstream: str, chave: str) -> float | None:
+    """Espera antes do hedge (p90 do endpoint), ou None se o hedge não se aplica."""
+    habilitados = {u.strip() for u in env_str("HEDGE_UPSTREAMS", "").split(",") if u.strip()}
+    if upstream not in habilitados:
+        return None
+    _orcamento(upstream).requisicao()
+    limiar = _latencia.quantil(chave, env_float("HEDGE_QUANTIL", 0.9), min_amostras=env_int("HEDGE_MIN_AMOSTRAS", 20))
+    if limiar is None:
+        return None
+    return max(limiar, env_float("HEDGE_MIN_SEGUNDOS", 0.05))
+
+
+def _vaga_para_hedge(upstream: str, host: str) -> bool:
+    """Ocupa uma vaga no host para o hedge se houver vaga livre agora (sem fila) e orçamento."""
+    limitador = _limites.limitador(host)
+    if not limitador.tentar_entrar():
+        return False
+    if _orcamento(upstream).gastar():
+        return True
+    limitador.sair()
+    return False
+
+
+async def _baixar(
+    cliente: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str] | None,
+    timeout: httpx.Timeout,
+    rastrear: Callable[[str, dict], Awaitable[None]] | None = None,
+) -> bytes:
+    extensoes = {"trace": rastrear} if rastrear is not None else None
+    corpo = bytearray()
+    async with cliente.stream("GET", url, headers=headers, timeout=timeout, extensions=extensoes) as resposta:
+        resposta.raise_for_status()
+        async for parte in resposta.aiter_bytes():
+            corpo.extend(parte)
+    return bytes(corpo)
+
+
+async def _medir(
+    cliente: httpx.AsyncClient,
+    upstream: str,
+    chave: str,
+    url: str,
+    headers: dict[str, str] | None,
+    limites: _latencia.Timeouts,
+) -> bytes:
+    """Baixa ``url`` dentro de ``limites`` e registra as latências de conexão e da resposta.
+
+    Um timeout entra no esboço com o próprio limite, para que os timeouts
+    cresçam quando o endpoint fica mais lento em vez de falharem para sempre.
+    """
+    conexao_iniciada: list[float] = []
+
+    async def rastrear(evento: str, info: dict) -> None:
+        if evento == "connection.connect_tcp.started":
+            conexao_iniciada.append(time.monotonic())
+        elif evento == "connection.connect_tcp.complete" and conexao_iniciada:
+            _latencia.registrar(_latencia.chave_conexao(upstream), time.monotonic() - conexao_iniciada[0])
+
+    inicio = time.monotonic()
+    resultado = "cancelada"
+    try:
+        with anyio.fail_after(limites.total):
+            corpo = await _baixar(
+                cliente, url, headers, httpx.Timeout(limites.total, connect=limites.conexao), rastrear=rastrear
+            )
+        resultado = "ok"
+    except (TimeoutError, httpx.TimeoutException) as e:
+        resultado = "timeout"
+        _latencia.registrar(chave, limites.total)
+        if isinstance(e, httpx.TimeoutException):
+            raise
+        raise httpx.ReadTimeout(f"Sem resposta de {upstream} em {limites.total:.1f} s") from None
+    except Exception:
+        resultado = "erro"
+        raise
+    finally:
+        decorrido = time.monotonic() - inicio
+        _metricas.contar("capivara_upstream_requisicoes_total", upstream=upstream, endpoint=chave, resultado=resultado)
+        _metricas.observar("capivara_upstream_segundos", decorrido, upstream=upstream, endpoint=chave)
+    _latencia.registrar(chave, decorrido)
+    return corpo
+
+
+async def _com_hedge(
+    cliente: httpx.AsyncClient,
+    upstream: str,
+    chave: str,
+    url: str,
+    headers: dict[str, str] | None,
+    limites: _latencia.Timeouts,
+    atraso: float,
+) -> bytes:
+    resultados: list[bytes] = []
+    erros: list[Exception] = []
+    primeira_concluida = anyio.Event()
+    host = _host(upstream)
+
+    async def tentar(hedge: bool, limites: _latencia.Timeouts) -> None:
+        try:
+            corpo = await _medir(cliente, upstream, chave, url, headers, limites)
+        except Exception as e:
+            erros.append(e)
+        else:
+            resultados.append(corpo)
+            if hedge:
+                _orcamento(upstream).venceu()
+            grupo.cancel_scope.cancel()  # cancela a tentativa perdedora
+        finally:
+            if hedge:
+                _limites.limitador(host).sair()
+            else:
+                primeira_concluida.set()
+
+    async with anyio.create_task_group() as grupo:
+        grupo.start_soon(tentar, False, limites)
+        with anyio.move_on_after(atraso):
+            await primeira_concluida.wait()
+        if not primeira_concluida.is_set() and _vaga_para_hedge(upstream, host):
+            grupo.start_soon(tentar, True, limites._replace(total=limites.total - atraso))
+
+    if resultados:
+        return resultados[0]
+    raise erros[0]
+
+
+async def _buscar(
+    cliente: httpx.AsyncClient,
+    upstream: str,
+    chave: str,
+    url: str,
+    headers: dict[str, str] | None,
+    limites: _latencia.Timeouts,
+) -> bytes:
+    atraso = _atraso_hedge(upstream, chave)
+    if atraso is None or atraso >= limites.total:
+        return await _medir(cliente, upstream, chave, url, headers, limites)
+    return await _com_hedge(cliente, upstream, chave, url, headers, limites, atraso)
+
+
+async def _obter_no_loop(
+    upstream: str,
+    chave: str,
+    url: str,
+    headers: dict[str, str] | None,
+    limites: _latencia.Timeouts,
+    chamada: Chamada,
+) -> bytes | None:
+    """Executa a requisição no loop do servidor; retorna None se a chamada for cancelada."""
+    if chamada.cancelada.is_set():
+        return None
+    with anyio.CancelScope() as escopo:
+        desregistrar = chamada.ao_cancelar(escopo.cancel)
+        try:
+            async with _cliente(upstream) as cliente:
+                return await _buscar(cliente, upstream, chave, url, headers, limites)
+        finally:
+            desregistrar()
+    return None
+
+
+async def _obter_isolado(
+    upstream: str, chave: str, url: str, headers: dict[str, str] | None, limites: _latencia.Timeouts
+) -> bytes:
+    async with httpx.AsyncClient() as cliente:
+        return await _buscar(cliente, upstream, chave, url, headers, limites)
+
+
+def _tentar(upstream: str, chave: str, url: str, headers: dict[str, str] | None, chamada: Chamada | None) -> bytes:
+    limites = _latencia.timeouts(upstream, chave)
+    if chamada is None:
+        return anyio.run(_obter_isolado, upstream, chave, url, headers, limites)
+    restante = chamada.restante()
+    if restante is not None:
+        if restante <= 0:
+            raise httpx.TimeoutException(f"Prazo da chamada {chamada.id} esgotado")
+        limites = _latencia.Timeouts(min(limites.conexao, restante), min(limites.total, restante))
+    if chamada.executar_no_loop is None:
+        return anyio.run(_obter_isolado, upstream, chave, url, headers, limites)
+    corpo = chamada.executar_no_loop(_obter_no_loop, upstream, chave, url, headers, limites, chamada)
+    if corpo is None:
+        raise ChamadaCancelada(chamada.id)
+    return corpo
+
+
+def obter(upstream: str, caminho: str, params: dict[str, Any], *, headers: dict[str, str] | None = None) -> bytes:
+    """Executa um GET em ``url_base(upstream)/caminho`` e retorna o corpo da resposta.
+
+    Chamada a partir da thread do tool. Cada tentativa espera sua vez no
+    limitador do host (ver ``_limites``); os timeouts de cada tentativa se adaptam
+    à latência observada do endpoint (ver ``_latencia.timeouts``) e nunca passam
+    do prazo da chamada atual. Falhas transitórias são repetidas pelo disjuntor
+    do upstream (ver ``_resiliencia``), dentro do mesmo prazo.
+
+    Raises:
+        httpx.HTTPError: em falhas de rede, timeout ou status HTTP de erro.
+        CircuitoAberto: se o upstream estiver indisponível e não houver resposta de reserva.
+        ChamadaCancelada: se o cliente cancelar a chamada.
+        ForaDoPacote: no modo offline (``CAPIVARA_OFFLINE``), sem tentar a rede.
+    """
+    url = f"{url_base(upstream)}/{caminho}?{montar_query(params)}"
+    pacote = pacote_offline()
+    if pacote is not None:
+        raise ForaDoPacote(upstream, url, pacote)
+    chave = _latencia.endpoint(upstream, caminho)
+    chamada = chamada_atual()
+
+    host = _host(upstream)
+    limitador = _limites.limitador(host)
+    tentativas = 0
+
+    def tentativa() -> bytes:
+        nonlocal tentativas
+        tentativas += 1
+        if chamada is not None:
+            chamada.verificar()
+        with _rastreio.trecho("fila", host=host):
+            limitador.entrar(chamada)
+        try:
+            with _rastreio.trecho("upstream", endpoint=chave, tentativa=tentativas):
+                corpo = _tentar(upstream, chave, url, headers, chamada)
+        except httpx.HTTPStatusError as e:
+            if chamada is not None:
+                chamada.status_upstream = e.response.status_code
+            raise
+        finally:
+            limitador.sair()
+            if chamada is not None:
+                chamada.eventos["upstream"] += 1
+        if chamada is not None:
+            chamada.status_upstream = 200
+        return corpo
+
+    try:
+        return _resiliencia.executar(upstream, url, tentativa)
+    except Exception as e:
+        _metricas.contar("capivara_upstream_erros_total", upstream=upstream, endpoint=chave, tipo=type(e).__name__)
+        if chamada is not None:
+            chamada.erro_upstream = type(e).__name__
+        raise
+
+
+def obter_json(upstream: str, caminho: str, params: dict[str, Any], *, headers: dict[str, str] | None = None) -> Any:
+    """Como ``obter``, decodificando o corpo como JSON (fora do event loop)."""
+    corpo = obter(upstream, caminho, params, headers=headers)
+    with _rastreio.trecho("decodificar", bytes=len(corpo)):
+        return json.loads(corpo)
@@ -0,0 +1,144 @@
+"""Latência observada por endpoint dos upstreams, em esboços de percentis.
+
+Cada endpoint (ex: ``expectativas/ExpectativasMercadoAnuais``) mantém um
+histograma em buckets logarítmicos: memória constante, erro relativo de
+~2% em qualquer percentil e custo O(1) por amostra. As contagens decaem pela
+metade a cada ``_MEIA_VIDA`` amostras, de modo que os percentis acompanham o
+comportamento recente do BCB.
+
+Os timeouts de cada requisição saem daqui: um múltiplo do p99 recente do
+endpoint (e do tempo de conexão do upstream), limitado a faixas configuráveis.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from typing import NamedTuple
+
+from capivara_mcp.config import env_float, env_int
+
+_ALFA = 0.02  # erro relativo dos quantis
+_MIN_SEGUNDOS = 1e-4
+_MEIA_VIDA = 512
+
+
+class Esboco:
+    """Histograma de buckets logarítmicos com decaimento (percentis em streaming)."""
+
+    __slots__ = ("_gama", "_log_gama", "_contagens", "_total", "_desde_decaimento", "n")
+
+    def __init__(self, alfa: float = _ALFA):
+        self._gama = (1 + alfa) / (1 - alfa)
+        self._log_gama = math.log(self._gama)
+        self._contagens: dict[int, float] = {}
+        self._total = 0.0
+        self._desde_decaimento = 0
+        self.n = 0  # amostras registradas (sem decaimento)
+
+    def registrar(self, segundos: float) -> None:
+        indice = math.ceil(math.log(max(segundos, _MIN_SEGUNDOS)) / self._log_gama)
+        self._contagens[indice] = self._contagens.get(indice, 0.0) + 1.0
+        self._total += 1.0
+        self.n += 1
+        self._desde_decaimento += 1
+        if self._desde_decaimento >= _MEIA_VIDA:
+            self._decair()
+
+    def _decair(self) -> None:
+        self._contagens = {i: c / 2 for i, c in self._contagens.items() if c >= 0.25}
+        self._total = sum(self._contagens.values())
+        self._desde_decaimento = 0
+
+    def quantil(self, q: float) -> float | None:
+        """Valor aproximado do quantil ``q`` (0–1), ou None sem amostras."""
+        if self._total <= 0:
+            return None
+        alvo = q * self._total
+        acumulado = 0.0
+        indices = sorted(self._contagens)
+        for indice in indices:
+            acumulado += self._contagens[indice]
+            if acumulado >= alvo:
+                break
+        return 2 * self._gama**indice / (self._gama + 1)
+
+
+_esbocos: dict[str, Esboco] = {}
+_lock = threading.Lock()
+
+
+class Timeouts(NamedTuple):
+    """Timeouts de uma tentativa: conexão TCP e tempo total da resposta, em segundos."""
+
+    conexao: float
+    total: float
+
+
+def endpoint(upstream: str, caminho: str) -> str:
+    """Chave do endpoint: recurso sem parâmetros de função nem código de série."""
+    recurso = re.sub(r"\d+", "{codigo}", caminho.split("(", 1)[0])
+    return f"{upstream}/{recurso}"
+
+
+def chave_conexao(upstream: str) -> str:
+    """Chave do tempo de conexão TCP do upstream (compartilhado entre seus endpoints)."""
+    return f"{upstream}/conexao"
+
+
+def registrar(chave: str, segundos: float) -> None:
+    with _lock:
+        esboco = _esbocos.get(chave)
+        if esboco is None:
+            esboco = _esbocos[chave] = Esboco()
+        esboco.registrar(segundos)
+
+
+def quantil(chave: str, q: float, min_amostras: int = 1) -> float | None:
+    """Quantil ``q`` da latência do endpoint, ou None com menos de ``min_amostras`` amostras."""
+    with _lock:
+        esboco = _esbocos.get(chave)
+        if esboco is None or esboco.n < min_amostras:
+            return None
+        return esboco.quantil(q)
+
+
+def timeouts(upstream: str, chave: str) -> Timeouts:
+    """Timeouts adaptativos: ``TIMEOUT_MULTIPLICADOR`` × p99 recente, dentro dos limites configurados.
+
+    Sem amostras suficientes usa o limite máximo de cada faixa.
+    """
+    multiplicador = env_float("TIMEOUT_MULTIPLICADOR", 3.0)
+    min_amostras = env_int("TIMEOUT_MIN_AMOSTRAS", 10)
+
+    def ajustar(chave: str, minimo: float, maximo: float) -> float:
+        p99 = quantil(chave, 0.99, min_amostras)
+        return maximo if p99 is None else min(maximo, max(minimo, multiplicador * p99))
+
+    return Timeouts(
+        conexao=ajustar(
+            chave_conexao(upstream),
+            env_float("TIMEOUT_CONEXAO_MIN_SEGUNDOS", 1.0),
+            env_float("TIMEOUT_CONEXAO_MAX_SEGUNDOS", 10.0),
+        ),
+        total=ajustar(chave, env_float("TIMEOUT_MIN_SEGUNDOS", 2.0), env_float("TIMEOUT_MAX_SEGUNDOS", 30.0)),
+    )
+
+
+def resumo() -> dict[str, dict]:
+    """p50/p90/p99 (em ms) e número de amostras por endpoint."""
+    with _lock:
+        return {
+            chave: {
+                "amostras": esboco.n,
+                **{f"p{int(q * 100)}_ms": round(esboco.quantil(q) * 1000, 1) for q in (0.5, 0.9, 0.99)},  # type: ignore[operator]
+            }
+            for chave, esboco in sorted(_esbocos.items())
+        }
+
+
+def reiniciar() -> None:
+    """Descarta todas as amostras (uso em testes)."""
+    with _lock:
+        _esbocos.clear()
@@ -0,0 +1,182 @@
+"""Limite de taxa e de concorrência por host do BCB.
+
+Todas as buscas (SGS em ``api.bcb.gov.br``; PTAX, Expectativas e TaxaJuros em
+``olinda.bcb.gov.br``) passam pelo limitador do host antes de cada tentativa:
+um token bucket (``LIMITE_RPS`` requisições/s, rajada de ``LIMITE_RAJADA``) e
+no máximo ``LIMITE_CONCORRENCIA`` requisições em voo. Quem espera é atendido
+por ordem de chegada (fila FIFO de senhas), e o tempo na fila é medido à
+parte, sem contaminar a latência do upstream.
+
+Os limites valem para o servidor inteiro: com vários workers HTTP
+(``CAPIVARA_HTTP_WORKERS``), cada processo fica com a sua fração (taxa,
+rajada e concorrência divididas pelo número de workers, no mínimo 1
+requisição em voo), para que o BCB não receba N vezes o configurado.
+
+O limitador é síncrono (``threading.Condition``): a espera acontece na thread
+do tool, antes de a requisição ir para o event loop, e vale tanto para o
+servidor quanto para chamadas diretas.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from capivara_mcp.config import env_float, env_int
+from capivara_mcp.tools._contexto import Chamada, ChamadaCancelada
+from capivara_mcp.tools._latencia import Esboco
+
+# Intervalo máximo entre verificações de cancelamento/prazo durante a espera
+_FATIA_ESPERA = 0.2
+
+
+class EsperaEsgotada(httpx.TimeoutException):
+    """O prazo da chamada acabou enquanto a requisição esperava na fila do host."""
+
+
+class Limitador:
+    """Token bucket + limite de requisições em voo de um host, com fila FIFO."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._cond = threading.Condition()
+        self._fila: deque[int] = deque()
+        self._senhas = 0
+        self._tokens = float(self._rajada())
+        self._reposto_em = time.monotonic()
+        self.em_voo = 0
+        self.admitidas = 0
+        self.desistencias = 0
+        self._espera = Esboco()
+
+    @staticmethod
+    def _workers() -> int:
+        return max(1, env_int("HTTP_WORKERS", 1))
+
+    @classmethod
+    def _rps(cls) -> float:
+        return max(0.01, env_float("LIMITE_RPS", 10.0) / cls._workers())
+
+    @classmethod
+    def _rajada(cls) -> int:
+        return max(1, env_int("LIMITE_RAJADA", 10) // cls._workers())
+
+    @classmethod
+    def _concorrencia(cls) -> int:
+        return max(1, env_int("LIMITE_CONCORRENCIA", 4) // cls._workers())
+
+    def _repor(self) -> None:
+        agora = time.monotonic()
+        self._tokens = min(float(self._rajada()), self._tokens + (agora - self._reposto_em) * self._rps())
+        self._reposto_em = agora
+
+    def _livre(self) -> bool:
+        self._repor()
+        return self.em_voo < self._concorrencia() and self._tokens >= 1.0
+
+    def _admitir(self) -> None:
+        self._tokens -= 1.0
+        self.em_voo += 1
+        self.admitidas += 1
+
+    def entrar(self, chamada: Chamada | None = None) -> float:
+        """Espera a vez na fila do host e ocupa uma vaga. Retorna os segundos de espera.
+
+        Raises:
+            EsperaEsgotada: se o prazo da chamada acabar na fila.
+            ChamadaCancelada: se o cliente cancelar a chamada.
+        """
+        inicio = time.monotonic()
+        with self._cond:
+            senha = self._senhas
+            self._senhas += 1
+            self._fila.append(senha)
+            try:
+                while True:
+                    if self._fila[0] == senha and self._livre():
+                        self._fila.popleft()
+                        self._admitir()
+                        espera = time.monotonic() - inicio
+                        self._espera.registrar(espera)
+                        self._cond.notify_all()
+                        return espera
+                    fatia = _FATIA_ESPERA
+                    if self._fila[0] == senha and self.em_voo < self._concorrencia():
+                        fatia = min(fatia, (1.0 - self._tokens) / self._rps())
+                    if chamada is not None:
+                        chamada.verificar()
+                        restante = chamada.restante()
+                        if restante is not None:
+                            if restante <= 0:
+                                raise EsperaEsgotada(f"Prazo da chamada {chamada.id} esgotado na fila de {self.host}")
+                            fatia = min(fatia, restante)
+                    self._cond.wait(fatia)
+            except (EsperaEsgotada, ChamadaCancelada):
+                self.desistencias += 1
+                self._fila.remove(senha)
+                self._cond.notify_all()
+                raise
+
+    def tentar_entrar(self) -> bool:
+        """Ocupa uma vaga só se ela estiver livre agora e ninguém estiver na fila."""
+        with self._cond:
+            if self._fila or not self._livre():
+                return False
+            self._admitir()
+            return True
+
+    def ocupado(self) -> bool:
+        """Há requisições na fila ou metade ou mais das vagas em uso."""
+        with self._cond:
+            return bool(self._fila) or self.em_voo * 2 >= self._concorrencia()
+
+    def sair(self) -> None:
+        with self._cond:
+            self.em_voo -= 1
+            self._cond.notify_all()
+
+    def resumo(self) -> dict:
+        with self._cond:
+            p50, p99 = self._espera.quantil(0.5), self._espera.quantil(0.99)
+            return {
+                "em_voo": self.em_voo,
+                "na_fila": len(self._fila),
+                "admitidas": self.admitidas,
+                "desistencias": self.desistencias,
+                "espera_fila_p50_ms": None if p50 is None else round(p50 * 1000, 1),
+                "espera_fila_p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            }
+
+
+_limitadores: dict[str, Limitador] = {}
+_lock = threading.Lock()
+
+
+def limitador(host: str) -> Limitador:
+    with _lock:
+        if host not in _limitadores:
+            _limitadores[host] = Limitador(host)
+        return _limitadores[host]
+
+
+def estado_limites() -> dict[str, dict]:
+    """Ocupação, fila e tempo de espera na fila por host."""
+    with _lock:
+        itens = sorted(_limitadores.items())
+    return {host: lim.resumo() for host, lim in itens}
+
+
+def ocupado() -> bool:
+    """Algum host está ocupado (ver ``Limitador.ocupado``); usado pela agenda para ceder a vez."""
+    with _lock:
+        itens = list(_limitadores.values())
+    return any(lim.ocupado() for lim in itens)
+
+
+def reiniciar() -> None:
+    """Descarta os limitadores (uso em testes)."""
+    with _lock:
+        _limitadores.clear()
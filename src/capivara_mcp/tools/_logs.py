@@ -0,0 +1,154 @@
+"""Logs estruturados, correlacionados por requisição e fora do caminho crítico.
+
+``configurar()`` (chamado pelo servidor) troca o ``basicConfig`` por:
+
+- um ``QueueHandler`` na raiz: quem loga só enfileira o registro; a escrita em
+  stderr acontece numa thread própria (``QueueListener``), de modo que logar
+  nunca atrasa o loop do protocolo stdio;
+- um filtro que, na thread de quem loga, anexa o ID da requisição MCP e o nome
+  do tool da chamada em andamento (``_contexto``);
+- saída em JSON, uma linha por registro (``CAPIVARA_LOG_FORMATO=json``, padrão),
+  ou no formato texto de antes (``texto``).
+
+Cada chamada de tool gera um único registro-resumo (``registrar_chamada``):
+tempo, resultado, parâmetros, acertos e faltas de cache, requisições e último
+status do BCB, linhas e bytes. Erros e chamadas acima de
+``CAPIVARA_LOG_LENTA_MS`` são sempre registrados; as bem-sucedidas, numa
+amostra de ``CAPIVARA_LOG_AMOSTRAGEM``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime
+from typing import Any
+
+from capivara_mcp.config import env_float, env_str
+from capivara_mcp.tools._contexto import Chamada, chamada_atual
+
+logger = logging.getLogger("capivara-mcp.chamadas")
+
+_FORMATO_TEXTO = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_ouvinte: logging.handlers.QueueListener | None = None
+
+
+class FiltroChamada(logging.Filter):
+    """Anexa ``request_id`` e ``ferramenta`` da chamada em andamento (na thread de quem loga)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            chamada = chamada_atual()
+            record.request_id = chamada.id if chamada is not None else None
+            record.ferramenta = chamada.ferramenta if chamada is not None else None
+        return True
+
+
+class FormatoJson(logging.Formatter):
+    """Uma linha JSON por registro; campos extras vêm de ``extra={"campos": {...}}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for campo in ("request_id", "ferramenta"):
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        dados.update(getattr(record, "campos", {}))
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados["exc"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _Enfileirador(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só resolve a mensagem e o traceback; a formatação final fica na thread do ouvinte
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configurar() -> None:
+    """Configura a raiz com fila, filtro de chamada e formato; não faz nada se já houver handlers."""
+    global _ouvinte
+    raiz = logging.getLogger()
+    if raiz.handlers:
+        return
+    raiz.setLevel(env_str("LOG_NIVEL", "INFO").upper())
+    saida = logging.StreamHandler(sys.stderr)
+    saida.setFormatter(FormatoJson() if env_str("LOG_FORMATO", "json") == "json" else logging.Formatter(_FORMATO_TEXTO))
+    fila: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    enfileirador = _Enfileirador(fila)
+    enfileirador.addFilter(FiltroChamada())
+    raiz.addHandler(enfileirador)
+    _ouvinte = logging.handlers.QueueListener(fila, saida, respect_handler_level=True)
+    _ouvinte.start()
+    atexit.register(parar)
+
+
+def parar() -> None:
+    """Escreve o que estiver na fila e encerra a thread de escrita."""
+    global _ouvinte
+    if _ouvinte is not None:
+        _ouvinte.stop()
+        _ouvinte = None
+
+
+def deve_registrar(duracao_ms: float, erro: str | None) -> bool:
+    """Erros e chamadas lentas sempre; as demais, com probabilidade ``CAPIVARA_LOG_AMOSTRAGEM``."""
+    if erro is not None or duracao_ms >= env_float("LOG_LENTA_MS", 2000.0):
+        return True
+    return random.random() < env_float("LOG_AMOSTRAGEM", 0.1)
+
+
+def registrar_chamada(
+    chamada: Chamada,
+    parametros: dict[str, Any],
+    duracao_ms: float,
+    erro: str | None,
+    linhas: int | None = None,
+    tamanho: int | None = None,
+) -> None:
+    """Registro-resumo de uma chamada de tool, sujeito à amostragem."""
+    if not deve_registrar(duracao_ms, erro):
+        return
+    lenta = duracao_ms >= env_float("LOG_LENTA_MS", 2000.0)
+    campos: dict[str, Any] = {
+        "duracao_ms": round(duracao_ms, 3),
+        "resultado": "ok" if erro is None else "erro",
+        "parametros": parametros,
+        "cache": {"hit": chamada.eventos["cache_hit"], "miss": chamada.eventos["cache_miss"]},
+        "upstream": {"requisicoes": chamada.eventos["upstream"], "status": chamada.status_upstream},
+    }
+    if erro is not None:
+        campos["erro"] = erro
+    if linhas is not None:
+        campos["linhas"] = linhas
+    if tamanho is not None:
+        campos["bytes"] = tamanho
+    if lenta:
+        campos["lenta"] = True
+    nivel = logging.WARNING if erro is not None or lenta else logging.INFO
+    logger.log(
+        nivel,
+        "%s %s em %.0f ms",
+        chamada.ferramenta,
+        campos["resultado"],
+        duracao_ms,
+        extra={"campos": campos, "request_id": chamada.id, "ferramenta": chamada.ferramenta},
+    )
@@ -0,0 +1,145 @@
+"""Métricas do processo no formato texto do Prometheus.
+
+Contadores e histogramas (buckets fixos, cumulativos) com rótulos, mantidos em
+memória e protegidos por um único lock: registrar uma amostra é um incremento
+num dicionário. O servidor instrumenta:
+
+- chamadas de tool: total por resultado, erros por tipo, latência de ponta a
+  ponta, linhas e bytes da resposta;
+- upstreams: requisições, erros por tipo e latência por endpoint;
+- cache: acertos, faltas e respostas de reserva servidas com o BCB fora do ar
+  (``stale``).
+
+``exportar()`` gera o texto exposto em ``/metrics`` no modo HTTP e no resource
+``capivara://metricas``. Com vários workers, cada processo tem as próprias
+métricas e o servidor as exporta com o rótulo ``worker`` (o PID): cada coleta
+cai num worker qualquer, e sem o rótulo o Prometheus veria os contadores de
+processos diferentes como uma única série que sobe e volta. Com o rótulo, cada
+série continua monotônica; some com ``sum without (worker)``.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+
+# Segundos: de respostas do cache (ms) a buscas longas no SGS
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_AJUDA = {
+    "capivara_chamadas_total": ("counter", "Chamadas de tool por resultado (ok, erro)."),
+    "capivara_chamadas_erros_total": ("counter", "Chamadas de tool com erro, por tipo."),
+    "capivara_chamada_segundos": ("histogram", "Latência de ponta a ponta das chamadas de tool."),
+    "capivara_linhas_total": ("counter", "Linhas (registros) devolvidas pelos tools."),
+    "capivara_resposta_bytes": ("histogram", "Tamanho das respostas dos tools, em bytes."),
+    "capivara_upstream_requisicoes_total": ("counter", "Requisições (tentativas) aos upstreams do BCB."),
+    "capivara_upstream_erros_total": ("counter", "Falhas nas consultas aos upstreams, por tipo."),
+    "capivara_upstream_segundos": ("histogram", "Latência das requisições por endpoint do upstream."),
+    "capivara_cache_total": ("counter", "Consultas ao cache por resultado (hit, miss, stale)."),
+}
+
+Rotulos = tuple[tuple[str, str], ...]
+
+
+class _Histograma:
+    __slots__ = ("limites", "contagens", "soma", "n")
+
+    def __init__(self, limites: tuple[float, ...]):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.soma = 0.0
+        self.n = 0
+
+    def registrar(self, valor: float) -> None:
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[i] += 1
+                break
+        self.soma += valor
+        self.n += 1
+
+
+_contadores: dict[str, dict[Rotulos, float]] = {}
+_histogramas: dict[str, dict[Rotulos, _Histograma]] = {}
+_lock = threading.Lock()
+
+
+def _rotulos(rotulos: dict[str, str]) -> Rotulos:
+    return tuple(sorted(rotulos.items()))
+
+
+def contar(nome: str, valor: float = 1, **rotulos: str) -> None:
+    """Soma ``valor`` ao contador ``nome`` com os rótulos dados."""
+    chave = _rotulos(rotulos)
+    with _lock:
+        serie = _contadores.setdefault(nome, {})
+        serie[chave] = serie.get(chave, 0) + valor
+
+
+def observar(nome: str, valor: float, limites: tuple[float, ...] = BUCKETS_SEGUNDOS, **rotulos: str) -> None:
+    """Registra ``valor`` no histograma ``nome`` com os rótulos dados."""
+    chave = _rotulos(rotulos)
+    with _lock:
+        serie = _histogramas.setdefault(nome, {})
+        histograma = serie.get(chave)
+        if histograma is None:
+            histograma = serie[chave] = _Histograma(limites)
+        histograma.registrar(valor)
+
+
+def valor(nome: str, **rotulos: str) -> float:
+    """Valor atual do contador (ou número de amostras do histograma); 0 se nunca registrado."""
+    chave = _rotulos(rotulos)
+    with _lock:
+        if nome in _histogramas:
+            histograma = _histogramas[nome].get(chave)
+            return 0 if histograma is None else histograma.n
+        return _contadores.get(nome, {}).get(chave, 0)
+
+
+def _formatar_rotulos(rotulos: Rotulos, extra: tuple[str, str] | None = None) -> str:
+    pares = [*rotulos, extra] if extra is not None else list(rotulos)
+    if not pares:
+        return ""
+    escapar = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+    return "{" + ",".join(f'{k}="{str(v).translate(escapar)}"' for k, v in pares) + "}"
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf"
+    return repr(int(valor)) if float(valor).is_integer() else repr(valor)
+
+
+def exportar(worker: str | None = None) -> str:
+    """Todas as métricas no formato de exposição texto do Prometheus (0.0.4).
+
+    Com ``worker``, todas as séries levam o rótulo ``worker`` com esse valor.
+    """
+    processo: Rotulos = (("worker", worker),) if worker is not None else ()
+    linhas = []
+    with _lock:
+        for nome in sorted(_contadores.keys() | _histogramas.keys()):
+            tipo, ajuda = _AJUDA.get(nome, ("histogram" if nome in _histogramas else "counter", ""))
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for rotulos, total in sorted(_contadores.get(nome, {}).items()):
+                linhas.append(f"{nome}{_formatar_rotulos(processo + rotulos)} {_numero(total)}")
+            for rotulos, histograma in sorted(_histogramas.get(nome, {}).items()):
+                rotulos = processo + rotulos
+                acumulado = 0
+                for limite, contagem in zip(histograma.limites, histograma.contagens, strict=True):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', _numero(limite)))} {acumulado}")
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', '+Inf'))} {histograma.n}")
+                linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {_numero(histograma.soma)}")
+                linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {histograma.n}")
+    return "\n".join(linhas) + "\n"
+
+
+def reiniciar() -> None:
+    """Descarta todas as métricas (uso em testes)."""
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
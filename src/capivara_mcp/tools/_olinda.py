@@ -0,0 +1,68 @@
+"""Consultas OData às APIs Olinda do BCB (PTAX, Expectativas e Taxas de Juros).
+
+Monta a URL OData diretamente (filtros, ordenação, seleção e parâmetros de
+função) e executa a requisição pela camada HTTP compartilhada, sem baixar o
+documento de serviço e o ``$metadata`` a cada consulta.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pandas as pd
+
+from capivara_mcp.tools._http import obter_json
+
+# Colunas devolvidas como texto ISO que devem virar datetime
+_COLUNAS_DATA = {"Data", "dataHoraCotacao", "InicioPeriodo", "FimPeriodo", "DataVigencia"}
+
+_HEADERS = {"OData-Version": "4.0", "OData-MaxVersion": "4.0"}
+
+
+def literal(valor: str | int | float) -> str:
+    """Formata um valor como literal OData (strings entre aspas simples, com escape)."""
+    if isinstance(valor, str):
+        return "'" + valor.replace("'", "''") + "'"
+    return str(valor)
+
+
+def consultar(
+    upstream: str,
+    recurso: str,
+    *,
+    parametros: dict[str, Any] | None = None,
+    filtro: str | None = None,
+    ordem: str | None = None,
+    campos: list[str] | None = None,
+    top: int | None = None,
+) -> pd.DataFrame:
+    """Consulta um entity set ou function import OData e retorna os registros em DataFrame.
+
+    Args:
+        upstream: Chave do upstream em ``_http.UPSTREAMS`` (ex: "ptax").
+        recurso: Nome do entity set ou da função (ex: "CotacaoMoedaPeriodo").
+        parametros: Parâmetros de função, passados como ``@nome`` na query string.
+        filtro: Expressão ``$filter`` (use ``literal`` para os valores).
+        ordem: Expressão ``$orderby`` (ex: "Data desc").
+        campos: Colunas para ``$select``.
+        top: Limite ``$top`` de registros.
+    """
+    caminho = recurso
+    query: dict[str, Any] = {"$format": "json"}
+    if parametros:
+        caminho += "(" + ",".join(f"{nome}=@{nome}" for nome in parametros) + ")"
+        query.update({f"@{nome}": literal(valor) for nome, valor in parametros.items()})
+    if filtro:
+        query["$filter"] = filtro
+    if ordem:
+        query["$orderby"] = ordem
+    if campos:
+        query["$select"] = ",".join(campos)
+    if top is not None:
+        query["$top"] = top
+
+    dados = obter_json(upstream, caminho, query, headers=_HEADERS)
+    df = pd.DataFrame(dados["value"])
+    for coluna in _COLUNAS_DATA.intersection(df.columns):
+        df[coluna] = pd.to_datetime(df[coluna])
+    return df
@@ -0,0 +1,378 @@
+"""Pacotes offline: os dados locais do capivara-mcp num único arquivo.
+
+``capivara-mcp exportar pacote.cpvb`` reúne num tar comprimido (gzip):
+
+- ``manifesto.json``: versão do formato, data de criação, versão do
+  capivara-mcp, séries incluídas (intervalo consultado e nº de pontos),
+  número de entradas de cache e o SHA-256 de cada membro;
+- ``series/sgs-<codigo>.bin``: os arquivos do armazém de séries
+  (``_armazem``), no próprio layout mapeável;
+- ``conjuntos/<nome>.cpv``: PTAX, Focus e TaxaJuros como partições sem
+  validade (``_conjuntos``), reunidas das partições locais e das entradas do
+  cache de resultados;
+- ``cache.bin``: as demais entradas válidas do cache de resultados, cada uma
+  com a validade que lhe restava.
+
+``capivara-mcp importar pacote.cpvb`` grava esse conteúdo no armazém (séries e
+conjuntos, sem validade) e no cache configurados de outra máquina, que começa
+aquecida.
+
+Com ``--offline pacote.cpvb`` (ou ``CAPIVARA_OFFLINE``) o servidor responde só
+a partir do pacote: as séries são extraídas uma vez para um diretório próprio,
+o cache passa a ser o do pacote (sem validade) e nenhuma requisição ao BCB é
+tentada. Séries do SGS atendem qualquer janela dentro do intervalo exportado;
+PTAX, Focus e TaxaJuros são respondidos por intervalo e filtro sobre as
+partições (ex.: qualquer período que cruze os já consultados de uma moeda, ou
+o último retrato do Focus de um indicador); o que não estiver no pacote falha
+com ``ForaDoPacote``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import struct
+import tarfile
+import tempfile
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from importlib.metadata import version
+from typing import Any
+
+import pandas as pd
+
+from capivara_mcp.config import env_float, env_str
+from capivara_mcp.tools._armazem import ArmazemSeries, armazem_atual, ler_cabecalho
+from capivara_mcp.tools._cache import (
+    BackendCache,
+    CacheMemoria,
+    cache_atual,
+    desserializar,
+    diretorio_padrao,
+    serializar,
+)
+from capivara_mcp.tools._conjuntos import CONJUNTOS, Conjuntos, conjuntos_em, da_entrada, juntar
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import data
+
+logger = logging.getLogger("capivara-mcp.pacote")
+
+FORMATO = 1
+
+_MANIFESTO = "manifesto.json"
+_CACHE = "cache.bin"
+_SERIE = re.compile(r"series/sgs-(\d+)\.bin")
+_CONJUNTO = re.compile(r"conjuntos/([a-z0-9_]+)\.cpv")
+
+# Por entrada de cache: validade restante (s), tamanho da chave e do valor
+_ENTRADA = struct.Struct("<dHI")
+
+
+class PacoteInvalido(Exception):
+    """Arquivo ilegível, de formato desconhecido ou com conteúdo que não confere com o manifesto."""
+
+
+class ForaDoPacote(CircuitoAberto):
+    """Modo offline: a consulta exigiria uma requisição ao BCB, que não é feita."""
+
+    def __init__(self, upstream: str, url: str, pacote: str):
+        self.url = url
+        super().__init__(
+            upstream,
+            math.inf,
+            f"Modo offline: os dados pedidos não estão no pacote {os.path.basename(pacote)} "
+            f"e a API {upstream} do BCB não é consultada.",
+        )
+
+
+def pacote_offline() -> str | None:
+    """Pacote do modo offline (``CAPIVARA_OFFLINE``), ou None fora dele."""
+    return env_str("OFFLINE", "") or None
+
+
+# ---------------------------------------------------------------------------
+# Formato
+# ---------------------------------------------------------------------------
+
+
+def _codificar_cache(itens: Iterator[tuple[str, bytes, float]]) -> tuple[bytes, int]:
+    partes = []
+    n = 0
+    for chave, valor, restante in itens:
+        chave_bytes = chave.encode()
+        partes += [_ENTRADA.pack(restante, len(chave_bytes), len(valor)), chave_bytes, valor]
+        n += 1
+    return b"".join(partes), n
+
+
+def _decodificar_cache(dados: bytes) -> Iterator[tuple[str, bytes, float]]:
+    corpo = memoryview(dados)
+    posicao = 0
+    while posicao < len(corpo):
+        restante, tamanho_chave, tamanho_valor = _ENTRADA.unpack_from(corpo, posicao)
+        posicao += _ENTRADA.size
+        chave = bytes(corpo[posicao : posicao + tamanho_chave]).decode()
+        posicao += tamanho_chave
+        yield chave, bytes(corpo[posicao : posicao + tamanho_valor]), restante
+        posicao += tamanho_valor
+
+
+def ler(origem: str) -> tuple[dict[str, Any], dict[str, bytes]]:
+    """Lê e valida um pacote: retorna o manifesto e o conteúdo de cada membro.
+
+    Raises:
+        PacoteInvalido: se o arquivo não puder ser lido, for de outra versão ou
+            algum membro não conferir com o SHA-256 do manifesto.
+    """
+    membros: dict[str, bytes] = {}
+    try:
+        with tarfile.open(origem, "r:gz") as tar:
+            for info in tar:
+                arquivo = tar.extractfile(info) if info.isfile() else None
+                if arquivo is not None:
+                    membros[info.name] = arquivo.read()
+    except (OSError, tarfile.TarError, EOFError) as e:
+        raise PacoteInvalido(f"Não foi possível ler o pacote {origem}: {e}") from e
+    try:
+        manifesto = json.loads(membros.pop(_MANIFESTO))
+    except (KeyError, ValueError) as e:
+        raise PacoteInvalido(f"Pacote {origem} sem manifesto válido.") from e
+    if manifesto.get("formato") != FORMATO:
+        raise PacoteInvalido(f"Pacote {origem} no formato {manifesto.get('formato')!r}; esperado {FORMATO}.")
+    resumos = manifesto.get("sha256", {})
+    if set(resumos) != set(membros):
+        raise PacoteInvalido(f"Pacote {origem} com membros diferentes dos listados no manifesto.")
+    for nome, dados in membros.items():
+        if hashlib.sha256(dados).hexdigest() != resumos[nome]:
+            raise PacoteInvalido(f"Membro {nome} do pacote {origem} corrompido (SHA-256 não confere).")
+        if nome != _CACHE and not _SERIE.fullmatch(nome) and not _CONJUNTO.fullmatch(nome):
+            raise PacoteInvalido(f"Membro desconhecido no pacote {origem}: {nome}")
+    return manifesto, membros
+
+
+def _series(membros: dict[str, bytes]) -> Iterator[tuple[int, bytes]]:
+    for nome, dados in membros.items():
+        if m := _SERIE.fullmatch(nome):
+            yield int(m[1]), dados
+
+
+def _conjuntos(membros: dict[str, bytes]) -> Iterator[tuple[str, bytes]]:
+    for nome, dados in membros.items():
+        if (m := _CONJUNTO.fullmatch(nome)) and m[1] in CONJUNTOS:
+            yield m[1], dados
+
+
+# ---------------------------------------------------------------------------
+# Exportação e importação
+# ---------------------------------------------------------------------------
+
+
+def _armazem_local() -> ArmazemSeries:
+    """Armazém configurado ou, se desligado, o diretório padrão do modo HTTP."""
+    return armazem_atual() or ArmazemSeries(os.path.join(diretorio_padrao(), "series"))
+
+
+def exportar(destino: str) -> dict[str, Any]:
+    """Grava o armazém de séries e o cache de resultados num pacote em ``destino``.
+
+    Retorna o manifesto gravado. O arquivo é escrito num temporário e renomeado
+    no fim, de forma atômica.
+    """
+    membros: dict[str, bytes] = {}
+    series: dict[str, dict[str, Any]] = {}
+    armazem = _armazem_local()
+    for codigo in armazem.codigos():
+        with open(os.path.join(armazem.diretorio, f"sgs-{codigo}.bin"), "rb") as arquivo:
+            dados = arquivo.read()
+        try:
+            inicio, fim, n = ler_cabecalho(dados, arquivo.name)
+        except ValueError:
+            continue
+        membros[f"series/sgs-{codigo}.bin"] = dados
+        series[str(codigo)] = {"inicio": data(inicio).isoformat(), "fim": data(fim).isoformat(), "pontos": n}
+
+    locais = conjuntos_em(armazem.diretorio)
+    reunidos = {nome: dados for nome in locais.nomes() if (dados := locais.abrir(nome)) is not None}
+    backend = cache_atual()
+    entradas = 0
+    if backend is not None:
+        restantes = []
+        for chave, valor, restante in backend.itens():
+            encontrada = da_entrada(desserializar(valor))
+            if encontrada is not None:
+                nome, dados = encontrada
+                reunidos[nome] = juntar(nome, reunidos.get(nome), dados)
+            else:
+                restantes.append((chave, valor, restante))
+        membros[_CACHE], entradas = _codificar_cache(iter(restantes))
+    conjuntos: dict[str, dict[str, int]] = {}
+    for nome, dados in sorted(reunidos.items()):
+        membros[f"conjuntos/{nome}.cpv"] = serializar(dados)
+        conjuntos[nome] = {"particoes": len(dados.attrs["coberturas"]), "linhas": len(dados)}
+
+    manifesto = {
+        "formato": FORMATO,
+        "criado_em": datetime.now(UTC).isoformat(timespec="seconds"),
+        "versao": version("capivara-mcp"),
+        "series": series,
+        "conjuntos": conjuntos,
+        "cache": {"backend": "nenhum" if backend is None else backend.nome, "entradas": entradas},
+        "sha256": {nome: hashlib.sha256(dados).hexdigest() for nome, dados in membros.items()},
+    }
+    diretorio = os.path.dirname(os.path.abspath(destino))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo, tarfile.open(fileobj=arquivo, mode="w:gz") as tar:
+            agora = time.time()
+            conteudo = {_MANIFESTO: json.dumps(manifesto, ensure_ascii=False, indent=2).encode(), **membros}
+            for nome, dados in conteudo.items():
+                info = tarfile.TarInfo(nome)
+                info.size, info.mtime = len(dados), agora
+                tar.addfile(info, io.BytesIO(dados))
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+    return manifesto
+
+
+def importar(origem: str) -> dict[str, int]:
+    """Grava o conteúdo do pacote no armazém de séries e no cache configurados.
+
+    Uma série só substitui a local se o intervalo exportado contiver o local;
+    caso contrário a local é mantida. Os conjuntos são juntados às partições
+    locais, sem validade. As entradas de cache recebem a validade que lhes
+    restava na exportação. Retorna as contagens do que foi gravado.
+
+    Sem ``CAPIVARA_SERIES_DIRETORIO``, séries e conjuntos vão para o armazém
+    padrão do modo HTTP, que o stdio só lê com a variável definida: um aviso
+    diz isso.
+
+    Raises:
+        PacoteInvalido: ver ``ler``.
+    """
+    _, membros = ler(origem)
+    configurado = armazem_atual() is not None
+    armazem = _armazem_local()
+    gravadas = mantidas = 0
+    for codigo, dados in _series(membros):
+        inicio, fim, _ = ler_cabecalho(dados, f"sgs-{codigo}")
+        atual = armazem.abrir(codigo)
+        if atual is not None and not (inicio <= atual.inicio and fim >= atual.fim):
+            mantidas += 1
+            continue
+        armazem.instalar(codigo, dados)
+        gravadas += 1
+
+    locais = conjuntos_em(armazem.diretorio)
+    conjuntos = 0
+    for nome, dados in _conjuntos(membros):
+        particoes = desserializar(dados)
+        if isinstance(particoes, pd.DataFrame):
+            locais.incorporar(nome, particoes)
+            conjuntos += 1
+
+    if not configurado and (gravadas or conjuntos):
+        logger.warning(
+            "CAPIVARA_SERIES_DIRETORIO vazio: séries e conjuntos gravados em %s, o armazém padrão do modo HTTP. "
+            "No stdio, defina CAPIVARA_SERIES_DIRETORIO=%s para usá-los.",
+            armazem.diretorio,
+            armazem.diretorio,
+        )
+
+    entradas = 0
+    backend = cache_atual()
+    if backend is not None:
+        for chave, valor, restante in _decodificar_cache(membros.get(_CACHE, b"")):
+            backend.set(chave, valor, restante)
+            entradas += 1
+    return {"series": gravadas, "series_mantidas": mantidas, "conjuntos": conjuntos, "cache": entradas}
+
+
+# ---------------------------------------------------------------------------
+# Modo offline
+# ---------------------------------------------------------------------------
+
+
+def ativar_offline(origem: str) -> dict[str, Any]:
+    """Configura o processo para responder só a partir do pacote; retorna o manifesto.
+
+    As séries e os conjuntos são extraídos para ``<diretório padrão>/offline/<resumo>``, uma
+    única vez por conteúdo de pacote (os workers HTTP chamam isto ao subir). A
+    configuração segue pelo ambiente (``CAPIVARA_OFFLINE``, ``CAPIVARA_CACHE``
+    e ``CAPIVARA_SERIES_DIRETORIO``), como no resto do servidor.
+
+    Raises:
+        PacoteInvalido: ver ``ler``.
+    """
+    origem = os.path.abspath(origem)
+    manifesto, membros = ler(origem)
+    resumo = hashlib.sha256(json.dumps(manifesto["sha256"], sort_keys=True).encode()).hexdigest()[:16]
+    diretorio = os.path.join(diretorio_padrao(), "offline", resumo)
+    if not os.path.isdir(diretorio):
+        os.makedirs(os.path.dirname(diretorio), exist_ok=True)
+        temporario = tempfile.mkdtemp(dir=os.path.dirname(diretorio), suffix=".tmp")
+        armazem = ArmazemSeries(temporario)
+        for codigo, dados in _series(membros):
+            armazem.instalar(codigo, dados)
+        conjuntos = Conjuntos(temporario)
+        for nome, dados in _conjuntos(membros):
+            conjuntos.instalar(nome, dados)
+        try:
+            os.rename(temporario, diretorio)
+        except OSError:  # outro worker extraiu antes
+            shutil.rmtree(temporario, ignore_errors=True)
+    os.environ["CAPIVARA_OFFLINE"] = origem
+    os.environ["CAPIVARA_CACHE"] = "pacote"
+    os.environ["CAPIVARA_SERIES_DIRETORIO"] = diretorio
+    return manifesto
+
+
+class CachePacote(BackendCache):
+    """Cache do modo offline: as entradas do pacote, sem validade.
+
+    Resultados calculados no processo (ex.: séries lidas do armazém do pacote)
+    vão para um ``CacheMemoria`` à parte, com o orçamento
+    (``CACHE_MEMORIA_BYTES``) e a validade dele: as entradas do pacote nunca
+    são substituídas nem expulsas.
+    """
+
+    nome = "pacote"
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        _, membros = ler(caminho)
+        self._entradas = {chave: valor for chave, valor, _ in _decodificar_cache(membros.get(_CACHE, b""))}
+        self._bytes = sum(len(v) for v in self._entradas.values())
+        self._calculados = CacheMemoria()
+
+    def get(self, chave: str) -> bytes | None:
+        valor = self._entradas.get(chave)
+        return valor if valor is not None else self._calculados.get(chave)
+
+    def set(self, chave: str, valor: bytes, ttl: float) -> None:
+        if chave not in self._entradas:
+            self._calculados.set(chave, valor, ttl)
+
+    def delete(self, chave: str) -> None:
+        self._calculados.delete(chave)
+
+    def estatisticas(self) -> dict[str, int]:
+        calculados = self._calculados.estatisticas()
+        return {
+            "entradas": len(self._entradas) + calculados["entradas"],
+            "bytes": self._bytes + calculados["bytes"],
+        }
+
+    def itens(self) -> Iterator[tuple[str, bytes, float]]:
+        ttl = env_float("CACHE_TTL_SEGUNDOS", 900.0)
+        for chave, valor in self._entradas.items():
+            yield chave, valor, ttl
+        yield from self._calculados.itens()
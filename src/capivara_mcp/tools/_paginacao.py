@@ -0,0 +1,206 @@
+"""Paginação por cursor para resultados grandes dos tools.
+
+A primeira chamada com ``tamanho_pagina`` guarda o resultado já transformado
+(DataFrame ou ``Serie`` compacta do SGS) sob um identificador de curta
+duração e devolve só a primeira página. As páginas seguintes são serializadas
+sob demanda a partir desse resultado, de modo que o JSON completo nunca é
+montado de uma vez. O resultado fica ligado ao tool que o emitiu: um cursor
+só é aceito pelo mesmo tool.
+
+Com vários workers HTTP (``CAPIVARA_HTTP_WORKERS`` > 1) a página seguinte pode
+cair em outro processo: o resultado também é gravado no backend de cache
+compartilhado (SQLite, arquivos ou Redis) pelo mesmo prazo, e o worker que não
+o tem na memória o lê de lá.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from capivara_mcp.config import env_int
+from capivara_mcp.tools import _cache, _rastreio
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._validation import erro_json, resposta_json
+
+logger = logging.getLogger("capivara-mcp.paginacao")
+
+_TTL_SEGUNDOS = 300
+_MAX_RESULTADOS = 32
+_TAMANHO_MAXIMO = 5000
+
+
+@dataclass
+class _Resultado:
+    ferramenta: str
+    cabecalho: dict[str, Any]
+    chave: str
+    dados: pd.DataFrame | Serie
+    expira_em: float
+
+
+_resultados: OrderedDict[str, _Resultado] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _codificar_cursor(identificador: str, inicio: int, tamanho: int) -> str:
+    bruto = json.dumps({"r": identificador, "o": inicio, "n": tamanho}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> tuple[str, int, int] | None:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        return str(dados["r"]), int(dados["o"]), int(dados["n"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def _remover_expirados(agora: float) -> None:
+    for identificador in [k for k, r in _resultados.items() if r.expira_em <= agora]:
+        del _resultados[identificador]
+
+
+def _guardar(identificador: str, resultado: _Resultado) -> None:
+    with _lock:
+        _remover_expirados(time.monotonic())
+        _resultados[identificador] = resultado
+        while len(_resultados) > _MAX_RESULTADOS:
+            _resultados.popitem(last=False)
+
+
+def _chave_compartilhada(identificador: str) -> str:
+    return f"{_cache.PREFIXO}paginacao:{identificador}"
+
+
+def _compartilhar(identificador: str, resultado: _Resultado) -> None:
+    """Grava o resultado no cache compartilhado, para os cursores atendidos por outros workers."""
+    backend = _cache.cache_atual()
+    if backend is None:
+        return
+    meta = json.dumps(
+        {"ferramenta": resultado.ferramenta, "cabecalho": resultado.cabecalho, "chave": resultado.chave},
+        ensure_ascii=False,
+    )
+    try:
+        backend.set(
+            _chave_compartilhada(identificador),
+            meta.encode() + b"\n" + _cache.serializar(resultado.dados),
+            _TTL_SEGUNDOS,
+        )
+    except (OSError, sqlite3.Error, _cache.ErroRedis):
+        logger.warning("Falha ao compartilhar o resultado paginado %s", identificador, exc_info=True)
+
+
+def _buscar_compartilhado(identificador: str) -> _Resultado | None:
+    """Resultado gravado por outro worker, ou None se ausente, expirado ou ilegível."""
+    backend = _cache.cache_atual()
+    if backend is None:
+        return None
+    try:
+        guardado = backend.get(_chave_compartilhada(identificador))
+    except (OSError, sqlite3.Error, _cache.ErroRedis):
+        logger.warning("Falha ao ler o resultado paginado %s", identificador, exc_info=True)
+        return None
+    if guardado is None:
+        return None
+    meta, _, corpo = guardado.partition(b"\n")
+    dados = _cache.desserializar(corpo)
+    if dados is None:
+        return None
+    try:
+        meta = json.loads(meta)
+        return _Resultado(
+            str(meta["ferramenta"]),
+            dict(meta["cabecalho"]),
+            str(meta["chave"]),
+            dados,
+            time.monotonic() + _TTL_SEGUNDOS,
+        )
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Resultado paginado %s ilegível no cache compartilhado", identificador)
+        return None
+
+
+def validar_tamanho_pagina(tamanho_pagina: int | None) -> str | None:
+    """Valida o tamanho de página informado pelo cliente.
+
+    Returns:
+        None se válido (ou ausente), ou string JSON de erro se inválido.
+    """
+    if tamanho_pagina is None or 1 <= tamanho_pagina <= _TAMANHO_MAXIMO:
+        return None
+    return erro_json(f"tamanho_pagina deve estar entre 1 e {_TAMANHO_MAXIMO}.")
+
+
+def _pagina(resultado: _Resultado, identificador: str, inicio: int, tamanho: int) -> str:
+    total = len(resultado.dados)
+    fim = min(inicio + tamanho, total)
+    proximo = _codificar_cursor(identificador, fim, tamanho) if fim < total else None
+    if isinstance(resultado.dados, Serie):
+        registros = resultado.dados.registros(inicio, fim)
+    else:
+        registros = resultado.dados.iloc[inicio:fim].to_dict(orient="records")
+    return resposta_json(
+        {
+            **resultado.cabecalho,
+            resultado.chave: registros,
+            "paginacao": {"total": total, "inicio": inicio, "tamanho_pagina": tamanho, "proximo_cursor": proximo},
+        },
+    )
+
+
+def paginar(
+    ferramenta: str, cabecalho: dict[str, Any], chave: str, dados: pd.DataFrame | Serie, tamanho_pagina: int
+) -> str:
+    """Retorna a primeira página e, se houver mais, registra o resultado para os próximos cursores.
+
+    Args:
+        ferramenta: Tool que emite o cursor (o único que poderá continuá-lo).
+        cabecalho: Campos fixos da resposta (repetidos em todas as páginas).
+        chave: Nome do campo que recebe a lista de registros da página.
+        dados: DataFrame já transformado (colunas renomeadas, datas como string) ou ``Serie``.
+        tamanho_pagina: Quantidade de registros por página.
+    """
+    _rastreio.fase("serializar")
+    identificador = secrets.token_urlsafe(12)
+    resultado = _Resultado(ferramenta, cabecalho, chave, dados, time.monotonic() + _TTL_SEGUNDOS)
+    if len(dados) > tamanho_pagina:
+        _guardar(identificador, resultado)
+        if env_int("HTTP_WORKERS", 1) > 1:
+            _compartilhar(identificador, resultado)
+    return _pagina(resultado, identificador, 0, tamanho_pagina)
+
+
+def continuar(ferramenta: str, cursor: str) -> str:
+    """Retorna a página apontada por um cursor emitido anteriormente pelo mesmo tool ``ferramenta``."""
+    decodificado = _decodificar_cursor(cursor)
+    if decodificado is None:
+        return erro_json("Cursor inválido. Use o valor de 'proximo_cursor' retornado pela consulta anterior.")
+    identificador, inicio, tamanho = decodificado
+    with _lock:
+        _remover_expirados(time.monotonic())
+        resultado = _resultados.get(identificador)
+        if resultado is not None:
+            _resultados.move_to_end(identificador)
+    if resultado is None and env_int("HTTP_WORKERS", 1) > 1:
+        resultado = _buscar_compartilhado(identificador)
+        if resultado is not None:
+            _guardar(identificador, resultado)
+    if resultado is None:
+        return erro_json("Cursor expirado ou desconhecido. Refaça a consulta original para obter um novo cursor.")
+    if resultado.ferramenta != ferramenta or not 0 <= inicio < len(resultado.dados) or validar_tamanho_pagina(tamanho):
+        return erro_json("Cursor inválido. Use o valor de 'proximo_cursor' retornado pela consulta anterior.")
+    return _pagina(resultado, identificador, inicio, tamanho)
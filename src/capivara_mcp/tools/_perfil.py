@@ -0,0 +1,263 @@
+"""Perfil sob demanda das próximas N chamadas de tools escolhidos.
+
+Armado por ``CAPIVARA_PERFIL`` (ex: ``get_expectativas_top5:5,get_ptax:2``) ou,
+em produção, pelo tool administrativo ``perfilar_chamadas`` (registrado com
+``CAPIVARA_ADMIN``), sem reiniciar o servidor. Cada chamada perfilada grava em
+``CAPIVARA_PERFIL_DIRETORIO`` três arquivos com o mesmo prefixo
+(``<tool>-<aaaammddThhmmss>-<id>``):
+
+- ``.pstats``: perfil determinístico (``cProfile``) da thread do tool, para
+  ``python -m pstats`` ou snakeviz; só no modo ``deterministico``. Só uma
+  chamada por processo usa o cProfile de cada vez (no Python 3.12+ ele é
+  global e registra todas as threads): as que chegam enquanto ele está ocupado
+  caem para ``amostragem``, e o ``.json`` registra o modo efetivo;
+- ``.folded``: pilhas amostradas a cada ``CAPIVARA_PERFIL_INTERVALO_MS`` no
+  formato "collapsed" (``quadro;quadro;... contagem``), para flamegraph.pl ou
+  speedscope;
+- ``.json``: metadados: parâmetros do tool, ID da requisição, modo, tempos de
+  parede e de CPU e nº de amostras.
+
+Sem nada armado, o custo por chamada é a leitura de um dicionário vazio.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+from capivara_mcp.config import env_float, env_str
+from capivara_mcp.tools._validation import erro_json, resposta_json
+
+logger = logging.getLogger("capivara-mcp.perfil")
+
+MODOS = ("deterministico", "amostragem")
+_MAX_CHAMADAS = 100
+
+_armados: dict[str, tuple[int, str]] = {}  # tool -> (chamadas restantes, modo)
+_lock = threading.Lock()
+_cprofile = threading.Lock()
+_env_lido = False
+_gravados = 0
+
+
+def diretorio() -> str:
+    from capivara_mcp.tools._cache import diretorio_padrao
+
+    return env_str("PERFIL_DIRETORIO", "") or os.path.join(diretorio_padrao(), "perfis")
+
+
+def _ler_env() -> None:
+    """Arma o que estiver em ``CAPIVARA_PERFIL`` na primeira chamada do processo."""
+    global _env_lido
+    with _lock:
+        if _env_lido:
+            return
+        _env_lido = True
+        modo = env_str("PERFIL_MODO", "deterministico")
+        for item in filter(None, (p.strip() for p in env_str("PERFIL", "").split(","))):
+            nome, _, n = item.partition(":")
+            try:
+                chamadas = int(n) if n else 1
+            except ValueError:
+                logger.warning("CAPIVARA_PERFIL: quantidade inválida em %r", item)
+                continue
+            if chamadas <= 0:
+                logger.warning("CAPIVARA_PERFIL: quantidade deve ser positiva em %r; ignorado", item)
+                continue
+            _armados[nome.strip()] = (min(_MAX_CHAMADAS, chamadas), modo)
+
+
+def _visao() -> dict[str, dict[str, Any]]:
+    return {nome: {"chamadas": n, "modo": modo} for nome, (n, modo) in _armados.items()}
+
+
+def armar(ferramentas: dict[str, int], modo: str = "deterministico") -> dict[str, dict[str, Any]]:
+    """Perfila as próximas ``n`` chamadas de cada tool em ``modo`` (0 desarma).
+
+    O modo vale só para os tools desta chamada: os que já estavam armados
+    mantêm o deles. Retorna o que ficou armado.
+    """
+    _ler_env()
+    with _lock:
+        for nome, n in ferramentas.items():
+            if n > 0:
+                _armados[nome] = (min(_MAX_CHAMADAS, n), modo)
+            else:
+                _armados.pop(nome, None)
+        return _visao()
+
+
+def _reservar(ferramenta: str) -> str | None:
+    with _lock:
+        if ferramenta not in _armados:
+            return None
+        restantes, modo = _armados[ferramenta]
+        if restantes <= 1:
+            del _armados[ferramenta]
+        else:
+            _armados[ferramenta] = (restantes - 1, modo)
+        return modo
+
+
+class _Amostrador(threading.Thread):
+    """Amostra a pilha de uma thread em intervalos fixos e conta as pilhas colapsadas."""
+
+    def __init__(self, alvo: int, intervalo: float):
+        super().__init__(name="capivara-perfil", daemon=True)
+        self.alvo = alvo
+        self.intervalo = intervalo
+        self.pilhas: Counter[str] = Counter()
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                quadro = quadro.f_back
+            if pilha:
+                self.pilhas[";".join(reversed(pilha))] += 1
+
+    def parar(self) -> Counter[str]:
+        self._parar.set()
+        if self.ident is not None:
+            self.join()
+        return self.pilhas
+
+
+def _ligar_cprofile() -> cProfile.Profile | None:
+    """Liga um cProfile se nenhuma outra chamada estiver usando; None se ocupado."""
+    if not _cprofile.acquire(blocking=False):
+        return None
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:  # outra ferramenta de perfil ativa no processo (Python 3.12+)
+        _cprofile.release()
+        return None
+    return perfil
+
+
+@contextlib.contextmanager
+def _perfilar(ferramenta: str, requisicao: str, parametros: dict[str, Any], modo: str) -> Iterator[None]:
+    amostrador = _Amostrador(threading.get_ident(), env_float("PERFIL_INTERVALO_MS", 5.0) / 1000)
+    perfil = None
+    if modo == "deterministico":
+        perfil = _ligar_cprofile()
+        if perfil is None:
+            modo = "amostragem"
+    inicio = datetime.now().astimezone()
+    parede, cpu = time.perf_counter(), time.thread_time()
+    erro = None
+    try:
+        amostrador.start()
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            _cprofile.release()
+        parede, cpu = time.perf_counter() - parede, time.thread_time() - cpu
+        pilhas = amostrador.parar()
+        metadados = {
+            "ferramenta": ferramenta,
+            "requisicao": requisicao,
+            "parametros": parametros,
+            "modo": modo,
+            "inicio": inicio.isoformat(timespec="milliseconds"),
+            "parede_ms": round(parede * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "amostras": sum(pilhas.values()),
+            "erro": erro,
+        }
+        try:
+            _gravar(ferramenta, requisicao, inicio, perfil, pilhas, metadados)
+        except OSError:
+            logger.warning("Falha ao gravar o perfil da chamada %s de %s", requisicao, ferramenta, exc_info=True)
+
+
+def _gravar(
+    ferramenta: str,
+    requisicao: str,
+    inicio: datetime,
+    perfil: cProfile.Profile | None,
+    pilhas: Counter[str],
+    metadados: dict[str, Any],
+) -> None:
+    global _gravados
+    destino = diretorio()
+    os.makedirs(destino, exist_ok=True)
+    identificador = "".join(c if c.isalnum() else "_" for c in requisicao)[:32]
+    prefixo = os.path.join(destino, f"{ferramenta}-{inicio:%Y%m%dT%H%M%S}-{identificador}")
+    if perfil is not None:
+        perfil.dump_stats(f"{prefixo}.pstats")
+    with open(f"{prefixo}.folded", "w", encoding="utf-8") as arquivo:
+        arquivo.writelines(f"{pilha} {n}\n" for pilha, n in pilhas.most_common())
+    with open(f"{prefixo}.json", "w", encoding="utf-8") as arquivo:
+        json.dump(metadados, arquivo, ensure_ascii=False, indent=2, default=str)
+    with _lock:
+        _gravados += 1
+    logger.info("Perfil de %s gravado em %s.*", ferramenta, prefixo)
+
+
+def perfilando(ferramenta: str, requisicao: str, parametros: dict[str, Any]) -> contextlib.AbstractContextManager[None]:
+    """Perfila o bloco se a próxima chamada de ``ferramenta`` estiver armada; senão, não faz nada."""
+    if not _env_lido:
+        _ler_env()
+    if not _armados:
+        return contextlib.nullcontext()
+    modo = _reservar(ferramenta)
+    if modo is None:
+        return contextlib.nullcontext()
+    return _perfilar(ferramenta, requisicao, parametros, modo)
+
+
+def estado() -> dict[str, Any]:
+    with _lock:
+        return {"armados": _visao(), "gravados": _gravados}
+
+
+def perfilar_chamadas(ferramentas: str, chamadas: int = 1, modo: str = "deterministico") -> str:
+    """Perfila as próximas chamadas dos tools indicados e grava os perfis no servidor (administrativo).
+
+    Args:
+        ferramentas: Nomes dos tools, separados por vírgula (ex: "get_expectativas_top5,get_ptax").
+        chamadas: Quantas das próximas chamadas de cada tool perfilar (1 a 100; 0 desarma).
+        modo: "deterministico" (cProfile + pilhas amostradas) ou "amostragem" (só pilhas amostradas, menor custo).
+
+    Returns:
+        JSON com os tools armados (chamadas restantes e modo de cada um) e o
+        diretório onde os perfis são gravados.
+    """
+    if modo not in MODOS:
+        return erro_json(f"Modo inválido: '{modo}'. Use um de: {', '.join(MODOS)}.")
+    if not 0 <= chamadas <= _MAX_CHAMADAS:
+        return erro_json(f"chamadas deve estar entre 0 e {_MAX_CHAMADAS}.")
+    nomes = [n.strip() for n in ferramentas.split(",") if n.strip()]
+    if not nomes:
+        return erro_json("Informe ao menos um tool em 'ferramentas'.")
+    armados = armar(dict.fromkeys(nomes, chamadas), modo)
+    return resposta_json({"armados": armados, "diretorio": diretorio()})
+
+
+def reiniciar() -> None:
+    """Desarma tudo e volta a ler ``CAPIVARA_PERFIL`` na próxima chamada (uso em testes)."""
+    global _env_lido, _gravados
+    with _lock:
+        _armados.clear()
+        _env_lido = False
+        _gravados = 0
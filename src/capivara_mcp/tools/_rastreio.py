@@ -0,0 +1,231 @@
+"""Rastreio (tracing) das fases de cada chamada de tool.
+
+Com ``CAPIVARA_RASTREIO`` ligado, cada chamada vira um rastro com um trecho
+raiz (o tool, com o ID da requisição MCP) e trechos filhos:
+
+- fases sequenciais, marcadas com ``fase()``: ``validar`` (início da chamada),
+  ``buscar`` e ``transformar`` (marcadas por ``em_cache`` ao entrar e sair) e
+  ``serializar`` (marcada pelos tools antes do ``json.dumps`` final);
+- trechos aninhados na fase corrente, com ``trecho()``: consulta ao cache,
+  espera na fila do host, cada tentativa de requisição ao BCB e cada bloco do
+  SGS.
+
+Ao fim da chamada o rastro é exportado como uma linha JSON: em ``stderr`` ou,
+com ``CAPIVARA_RASTREIO=otlp``, num arquivo no formato JSON do OTLP
+(``ExportTraceServiceRequest``, o mesmo do file exporter do OpenTelemetry
+Collector). Desligado, ``trecho()`` e ``fase()`` custam uma leitura de
+``ContextVar``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import Any
+
+from capivara_mcp.config import env_str
+
+_NULO = contextlib.nullcontext()
+_escrita_lock = threading.Lock()
+
+
+class Trecho:
+    """Um span: nome, intervalo (ns desde a época), pai e atributos."""
+
+    __slots__ = ("nome", "id", "pai", "inicio", "fim", "atributos")
+
+    def __init__(self, nome: str, pai: str | None, atributos: dict[str, Any]):
+        self.nome = nome
+        self.id = secrets.token_hex(8)
+        self.pai = pai
+        self.inicio = time.time_ns()
+        self.fim: int | None = None
+        self.atributos = atributos
+
+    def encerrar(self) -> None:
+        if self.fim is None:
+            self.fim = time.time_ns()
+
+
+class Rastro:
+    """Trechos de uma chamada; a pilha guarda o caminho até o trecho aberto mais interno."""
+
+    def __init__(self, ferramenta: str, requisicao: str):
+        self.id = secrets.token_hex(16)
+        self.requisicao = requisicao
+        self.raiz = Trecho(ferramenta, None, {"ferramenta": ferramenta, "mcp.request_id": requisicao})
+        self.trechos = [self.raiz]
+        self._pilha = [self.raiz]
+        self._fase: Trecho | None = None
+
+    def abrir(self, nome: str, atributos: dict[str, Any]) -> Trecho:
+        trecho = Trecho(nome, self._pilha[-1].id, atributos)
+        self.trechos.append(trecho)
+        self._pilha.append(trecho)
+        return trecho
+
+    def fechar(self, trecho: Trecho) -> None:
+        trecho.encerrar()
+        if self._pilha[-1] is trecho:
+            self._pilha.pop()
+
+    def fase(self, nome: str) -> None:
+        """Encerra a fase corrente e abre ``nome``; ignorado dentro de um trecho aninhado."""
+        if self._fase is not None and self._fase.nome == nome:
+            return
+        if self._pilha[-1] is not (self._fase or self.raiz):
+            return
+        if self._fase is not None:
+            self.fechar(self._fase)
+        self._fase = self.abrir(nome, {})
+
+    def encerrar(self) -> None:
+        for trecho in reversed(self._pilha):
+            trecho.encerrar()
+        self._pilha = []
+
+
+_rastro: ContextVar[Rastro | None] = ContextVar("capivara_rastro", default=None)
+
+
+@contextlib.contextmanager
+def _trecho(rastro: Rastro, nome: str, atributos: dict[str, Any]) -> Iterator[Trecho]:
+    trecho = rastro.abrir(nome, atributos)
+    try:
+        yield trecho
+    except BaseException as e:
+        trecho.atributos["erro"] = type(e).__name__
+        raise
+    finally:
+        rastro.fechar(trecho)
+
+
+def trecho(nome: str, **atributos: Any) -> contextlib.AbstractContextManager[Trecho | None]:
+    """Trecho aninhado na posição corrente do rastro da chamada (nada, se o rastreio estiver desligado)."""
+    rastro = _rastro.get()
+    if rastro is None:
+        return _NULO
+    return _trecho(rastro, nome, atributos)
+
+
+def fase(nome: str) -> None:
+    """Marca o início de uma fase da chamada (``validar``, ``buscar``, ``transformar``, ``serializar``)."""
+    rastro = _rastro.get()
+    if rastro is not None:
+        rastro.fase(nome)
+
+
+def exportador() -> str:
+    """Destino configurado em ``CAPIVARA_RASTREIO``: ``nenhum`` (padrão), ``stderr`` ou ``otlp``."""
+    return env_str("RASTREIO", "nenhum").lower()
+
+
+@contextlib.contextmanager
+def rastrear(ferramenta: str, requisicao: str) -> Iterator[Rastro | None]:
+    """Rastreia a chamada no bloco (fase inicial ``validar``) e exporta o rastro ao sair."""
+    destino = exportador()
+    if destino not in ("stderr", "otlp"):
+        yield None
+        return
+    rastro = Rastro(ferramenta, requisicao)
+    rastro.fase("validar")
+    token = _rastro.set(rastro)
+    try:
+        yield rastro
+    except BaseException as e:
+        rastro.raiz.atributos["erro"] = type(e).__name__
+        raise
+    finally:
+        _rastro.reset(token)
+        rastro.encerrar()
+        _exportar(rastro, destino)
+
+
+def _valor(valor: Any) -> Any:
+    return valor if isinstance(valor, (bool, int, float, str)) else str(valor)
+
+
+def como_json(rastro: Rastro) -> dict[str, Any]:
+    """Rastro compacto (formato do exportador ``stderr``), com tempos relativos ao início em ms."""
+    inicio = rastro.raiz.inicio
+    return {
+        "trace_id": rastro.id,
+        "request_id": rastro.requisicao,
+        "trechos": [
+            {
+                "nome": t.nome,
+                "id": t.id,
+                "pai": t.pai,
+                "inicio_ms": round((t.inicio - inicio) / 1e6, 3),
+                "duracao_ms": round(((t.fim or t.inicio) - t.inicio) / 1e6, 3),
+                **({"atributos": {k: _valor(v) for k, v in t.atributos.items()}} if t.atributos else {}),
+            }
+            for t in rastro.trechos
+        ],
+    }
+
+
+def _atributo_otlp(chave: str, valor: Any) -> dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"key": chave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": chave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": chave, "value": {"doubleValue": valor}}
+    return {"key": chave, "value": {"stringValue": str(valor)}}
+
+
+def como_otlp(rastro: Rastro) -> dict[str, Any]:
+    """Rastro como ``ExportTraceServiceRequest`` em JSON (OTLP)."""
+    spans = []
+    for t in rastro.trechos:
+        span: dict[str, Any] = {
+            "traceId": rastro.id,
+            "spanId": t.id,
+            "name": t.nome,
+            "kind": 2 if t.pai is None else 1,  # SERVER na raiz, INTERNAL nos demais
+            "startTimeUnixNano": str(t.inicio),
+            "endTimeUnixNano": str(t.fim or t.inicio),
+            "attributes": [_atributo_otlp(k, v) for k, v in t.atributos.items()],
+        }
+        if t.pai is not None:
+            span["parentSpanId"] = t.pai
+        if "erro" in t.atributos:
+            span["status"] = {"code": 2, "message": str(t.atributos["erro"])}
+        spans.append(span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_atributo_otlp("service.name", "capivara-mcp")]},
+                "scopeSpans": [{"scope": {"name": "capivara_mcp"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def arquivo_otlp() -> str:
+    """Arquivo do exportador ``otlp`` (``CAPIVARA_RASTREIO_ARQUIVO``), uma linha JSON por chamada."""
+    from capivara_mcp.tools._cache import diretorio_padrao
+
+    return env_str("RASTREIO_ARQUIVO", "") or os.path.join(diretorio_padrao(), "rastreio.jsonl")
+
+
+def _exportar(rastro: Rastro, destino: str) -> None:
+    if destino == "stderr":
+        linha = json.dumps({"rastro": como_json(rastro)}, ensure_ascii=False)
+        with _escrita_lock:
+            print(linha, file=sys.stderr, flush=True)
+        return
+    caminho = arquivo_otlp()
+    linha = json.dumps(como_otlp(rastro), ensure_ascii=False)
+    with _escrita_lock:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha + "\n")
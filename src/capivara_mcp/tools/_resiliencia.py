@@ -0,0 +1,279 @@
+"""Retentativas e disjuntores (circuit breakers) por upstream do BCB.
+
+Cada upstream (SGS, PTAX, Expectativas, TaxaJuros) tem seu próprio disjuntor.
+Falhas transitórias (timeout, erro de rede, HTTP 429/5xx) são repetidas com
+backoff exponencial e jitter, sem ultrapassar o prazo da chamada. Depois de
+várias falhas seguidas o disjuntor abre e as chamadas falham na hora (ou usam
+a última resposta boa da mesma URL) até o período de espera acabar; então uma
+única requisição de teste decide se ele fecha de novo.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import httpx
+
+from capivara_mcp.config import env_float, env_int
+from capivara_mcp.tools import _metricas
+from capivara_mcp.tools._contexto import Chamada, chamada_atual
+from capivara_mcp.tools._limites import EsperaEsgotada
+
+logger = logging.getLogger("capivara-mcp.resiliencia")
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+# Últimas respostas boas por URL, usadas como fallback com o disjuntor aberto,
+# limitadas em quantidade e em bytes (CAPIVARA_RESERVA_BYTES)
+_MAX_RESPOSTAS_RESERVA = 256
+
+AVISO_RESERVA = "API {upstream} do BCB indisponível: resultado servido a partir da última resposta obtida."
+
+
+class CircuitoAberto(Exception):
+    """O disjuntor do upstream está aberto; a requisição nem foi tentada.
+
+    ``mensagem`` substitui o texto padrão (ex.: ``_pacote.ForaDoPacote``, no modo offline).
+    """
+
+    def __init__(self, upstream: str, reabre_em: float, mensagem: str | None = None):
+        self.upstream = upstream
+        self.reabre_em = reabre_em
+        super().__init__(
+            mensagem
+            or f"API {upstream} do BCB temporariamente indisponível após falhas seguidas. "
+            f"Tente novamente em {max(1, round(reabre_em))} s."
+        )
+
+
+def eh_transitorio(erro: BaseException) -> bool:
+    """Indica se vale a pena repetir a requisição que levantou ``erro``."""
+    if isinstance(erro, httpx.HTTPStatusError):
+        status = erro.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(erro, (httpx.TransportError, TimeoutError))
+
+
+@dataclass
+class Disjuntor:
+    """Disjuntor de um upstream: conta falhas seguidas e bloqueia chamadas enquanto aberto."""
+
+    upstream: str
+    estado: str = FECHADO
+    falhas_seguidas: int = 0
+    aberto_desde: float | None = None
+    teste_em_andamento: bool = False
+    total_falhas: int = 0
+    total_retentativas: int = 0
+    total_rejeitadas: int = 0
+    total_reservas: int = 0
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def _espera(self) -> float:
+        return env_float("DISJUNTOR_ESPERA_SEGUNDOS", 30.0)
+
+    def permitir(self) -> None:
+        """Libera uma tentativa ou levanta CircuitoAberto."""
+        with self._lock:
+            if self.estado == FECHADO:
+                return
+            decorrido = time.monotonic() - (self.aberto_desde or 0.0)
+            if self.estado == ABERTO and decorrido >= self._espera():
+                self.estado = MEIO_ABERTO
+                logger.info("Disjuntor %s meio-aberto: enviando requisição de teste", self.upstream)
+            if self.estado == MEIO_ABERTO and not self.teste_em_andamento:
+                self.teste_em_andamento = True
+                return
+            self.total_rejeitadas += 1
+            raise CircuitoAberto(self.upstream, max(0.0, self._espera() - decorrido))
+
+    def sucesso(self) -> None:
+        with self._lock:
+            if self.estado != FECHADO:
+                logger.info("Disjuntor %s fechado: upstream respondeu", self.upstream)
+            self.estado = FECHADO
+            self.falhas_seguidas = 0
+            self.aberto_desde = None
+            self.teste_em_andamento = False
+
+    def falha(self) -> None:
+        with self._lock:
+            self.falhas_seguidas += 1
+            self.total_falhas += 1
+            self.teste_em_andamento = False
+            limite = env_int("DISJUNTOR_FALHAS", 5)
+            if self.estado == MEIO_ABERTO or (self.estado == FECHADO and self.falhas_seguidas >= limite):
+                logger.warning("Disjuntor %s aberto após %d falhas seguidas", self.upstream, self.falhas_seguidas)
+                self.estado = ABERTO
+                self.aberto_desde = time.monotonic()
+
+    def liberar_teste(self) -> None:
+        """Devolve a vaga de teste sem julgar o upstream (ex: chamada cancelada)."""
+        with self._lock:
+            self.teste_em_andamento = False
+
+    def resumo(self) -> dict:
+        with self._lock:
+            resumo = {
+                "estado": self.estado,
+                "falhas_seguidas": self.falhas_seguidas,
+                "total_falhas": self.total_falhas,
+                "total_retentativas": self.total_retentativas,
+                "total_rejeitadas": self.total_rejeitadas,
+                "total_reservas": self.total_reservas,
+            }
+            if self.estado != FECHADO and self.aberto_desde is not None:
+                resumo["reabre_em_segundos"] = round(
+                    max(0.0, self._espera() - (time.monotonic() - self.aberto_desde)), 1
+                )
+            return resumo
+
+
+_disjuntores: dict[str, Disjuntor] = {}
+_disjuntores_lock = threading.Lock()
+_reservas: OrderedDict[str, bytes] = OrderedDict()
+_reservas_bytes = 0
+_reservas_lock = threading.Lock()
+
+
+def disjuntor(upstream: str) -> Disjuntor:
+    with _disjuntores_lock:
+        if upstream not in _disjuntores:
+            _disjuntores[upstream] = Disjuntor(upstream)
+        return _disjuntores[upstream]
+
+
+def estado_upstreams() -> dict[str, dict]:
+    """Estado dos disjuntores de todos os upstreams já usados (para operadores)."""
+    with _disjuntores_lock:
+        nomes = sorted(_disjuntores)
+    return {nome: disjuntor(nome).resumo() for nome in nomes}
+
+
+def reiniciar() -> None:
+    """Descarta disjuntores e respostas de reserva (uso em testes)."""
+    global _reservas_bytes
+    with _disjuntores_lock:
+        _disjuntores.clear()
+    with _reservas_lock:
+        _reservas.clear()
+        _reservas_bytes = 0
+
+
+def _guardar_reserva(url: str, corpo: bytes) -> None:
+    """Guarda ``corpo`` como reserva de ``url``, descartando as mais antigas acima dos limites.
+
+    Respostas maiores que o orçamento inteiro não são guardadas.
+    """
+    global _reservas_bytes
+    orcamento = env_int("RESERVA_BYTES", 32 * 1024 * 1024)
+    with _reservas_lock:
+        anterior = _reservas.pop(url, None)
+        if anterior is not None:
+            _reservas_bytes -= len(anterior)
+        if len(corpo) > orcamento:
+            return
+        _reservas[url] = corpo
+        _reservas_bytes += len(corpo)
+        while len(_reservas) > _MAX_RESPOSTAS_RESERVA or _reservas_bytes > orcamento:
+            _, descartado = _reservas.popitem(last=False)
+            _reservas_bytes -= len(descartado)
+
+
+def _reserva(url: str) -> bytes | None:
+    with _reservas_lock:
+        return _reservas.get(url)
+
+
+def _backoff(tentativa: int) -> float:
+    """Backoff exponencial com jitter completo (0 até base * 2^tentativa, limitado)."""
+    base = env_float("BACKOFF_BASE_SEGUNDOS", 0.5)
+    teto = env_float("BACKOFF_MAX_SEGUNDOS", 8.0)
+    return random.uniform(0.0, min(teto, base * 2**tentativa))
+
+
+def _dormir(segundos: float, chamada: Chamada | None) -> None:
+    if chamada is None:
+        time.sleep(segundos)
+        return
+    chamada.cancelada.wait(segundos)
+    chamada.verificar()
+
+
+def executar(upstream: str, url: str, tentativa: Callable[[], bytes]) -> bytes:
+    """Executa ``tentativa`` com retentativas e disjuntor do ``upstream``.
+
+    Se o disjuntor estiver aberto, ou todas as tentativas falharem, usa a última
+    resposta boa de ``url`` (quando houver) e registra um aviso na chamada atual.
+
+    Raises:
+        CircuitoAberto: disjuntor aberto e sem resposta de reserva.
+        httpx.HTTPError / TimeoutError: última falha, se não houver reserva.
+    """
+    chamada = chamada_atual()
+    estado = disjuntor(upstream)
+    max_retentativas = max(0, env_int("RETENTATIVAS", 2))
+    n = 0
+    while True:
+        try:
+            estado.permitir()
+        except CircuitoAberto:
+            return _usar_reserva(upstream, url, estado, chamada)
+        try:
+            corpo = tentativa()
+        except httpx.HTTPStatusError as e:
+            if not eh_transitorio(e):
+                estado.sucesso()  # 4xx: o upstream está respondendo
+                raise
+            erro: BaseException = e
+        except EsperaEsgotada:
+            estado.liberar_teste()  # a requisição nem saiu: não é falha do upstream
+            raise
+        except (httpx.TransportError, TimeoutError) as e:
+            erro = e
+        except BaseException:
+            estado.liberar_teste()
+            raise
+        else:
+            estado.sucesso()
+            _guardar_reserva(url, corpo)
+            return corpo
+
+        estado.falha()
+        espera = _backoff(n)
+        restante = chamada.restante() if chamada is not None else None
+        if n >= max_retentativas or estado.estado == ABERTO or (restante is not None and restante <= espera):
+            logger.warning("Falha em %s após %d tentativa(s): %r", upstream, n + 1, erro)
+            try:
+                return _usar_reserva(upstream, url, estado, chamada)
+            except CircuitoAberto:
+                raise erro from None
+        n += 1
+        with estado._lock:
+            estado.total_retentativas += 1
+        logger.info("Retentativa %d em %s após %.2f s: %r", n, upstream, espera, erro)
+        _dormir(espera, chamada)
+
+
+def _usar_reserva(upstream: str, url: str, estado: Disjuntor, chamada: Chamada | None) -> bytes:
+    corpo = _reserva(url)
+    if corpo is None:
+        with estado._lock:
+            reabre = estado._espera() - (time.monotonic() - (estado.aberto_desde or time.monotonic()))
+        raise CircuitoAberto(upstream, max(0.0, reabre))
+    with estado._lock:
+        estado.total_reservas += 1
+    _metricas.contar("capivara_cache_total", camada="reserva", namespace=upstream, resultado="stale")
+    if chamada is not None:
+        chamada.avisar(AVISO_RESERVA.format(upstream=upstream))
+    return corpo
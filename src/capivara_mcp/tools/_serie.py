@@ -0,0 +1,236 @@
+"""Representação compacta das séries do SGS, sem DataFrame.
+
+Uma ``Serie`` guarda as datas como deslocamentos em dias desde 1970-01-01
+(``array("i")``, 4 bytes por ponto) e cada coluna como ``array("d")`` (8 bytes
+por ponto, NaN para valor ausente). No cache, um ano de Selic (meta e efetiva)
+ocupa ~5 KB, contra ~15 KB da tabela JSON de um DataFrame, e as páginas
+guardadas para os cursores deixam de carregar uma coluna de datas em texto.
+Fatiar por data é busca binária, e os registros, degraus e páginas de saída
+saem direto dos arrays, sem passar pelo pandas.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+_EPOCA = date(1970, 1, 1).toordinal()
+
+# Layout binário: nº de linhas, nº de colunas, tamanho do JSON de metadados
+_CABECALHO = struct.Struct("<IHI")
+
+
+def dia(d: date) -> int:
+    """Deslocamento de ``d`` em dias desde 1970-01-01."""
+    return d.toordinal() - _EPOCA
+
+
+def data(deslocamento: int) -> date:
+    """Inverso de ``dia``."""
+    return date.fromordinal(deslocamento + _EPOCA)
+
+
+def _numero(valor: Any) -> float:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _em_ordem_little_endian(arr: array | memoryview) -> array | memoryview:
+    if sys.byteorder == "big":
+        arr = array(arr.format if isinstance(arr, memoryview) else arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+class Serie:
+    """Colunas ``float64`` indexadas por dia (``int32``), em ordem crescente de data.
+
+    Os vetores são ``array`` ou, para séries lidas do armazém, ``memoryview``
+    sobre o arquivo mapeado.
+    """
+
+    __slots__ = ("dias", "colunas", "attrs")
+
+    def __init__(
+        self,
+        dias: array | memoryview,
+        colunas: dict[str, array | memoryview],
+        attrs: dict[str, Any] | None = None,
+    ):
+        for nome, valores in colunas.items():
+            if len(valores) != len(dias):
+                raise ValueError(f"Coluna {nome!r} com {len(valores)} valores para {len(dias)} datas.")
+        self.dias = dias
+        self.colunas = colunas
+        self.attrs: dict[str, Any] = {} if attrs is None else attrs
+
+    # -- construção ---------------------------------------------------------
+
+    @classmethod
+    def vazia(cls, nomes: Iterable[str] = ()) -> Serie:
+        return cls(array("i"), {nome: array("d") for nome in nomes})
+
+    @classmethod
+    def de_sgs(cls, nome: str, dados: Sequence[dict[str, Any]]) -> Serie:
+        """Converte a resposta JSON do SGS (``[{"data": "dd/mm/aaaa", "valor": "10.50"}]``)."""
+        pontos = []
+        for ponto in dados:
+            d, m, a = ponto["data"].split("/")
+            pontos.append((dia(date(int(a), int(m), int(d))), _numero(ponto.get("valor"))))
+        pontos.sort(key=lambda p: p[0])
+        return cls(array("i", (p[0] for p in pontos)), {nome: array("d", (p[1] for p in pontos))})
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> Serie:
+        """DataFrame indexado por data (colunas numéricas) -> Serie; preserva ``attrs``."""
+        dias = array("i")
+        dias.frombytes(np.asarray(df.index.values.astype("datetime64[D]").astype(np.int64), dtype="<i4").tobytes())
+        colunas = {}
+        for nome in df.columns:
+            valores = array("d")
+            valores.frombytes(np.asarray(df[nome].to_numpy(dtype=np.float64, na_value=np.nan), dtype="<f8").tobytes())
+            colunas[str(nome)] = _em_ordem_little_endian(valores)
+        return cls(_em_ordem_little_endian(dias), colunas, {str(k): v for k, v in df.attrs.items()})
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """Serie -> DataFrame com índice ``Date`` (para quem ainda precisa do pandas)."""
+        indice = pd.DatetimeIndex(
+            np.frombuffer(self.dias, dtype=np.int32).astype("datetime64[D]").astype("datetime64[ns]"), name="Date"
+        )
+        df = pd.DataFrame(
+            {nome: np.array(valores, dtype=np.float64) for nome, valores in self.colunas.items()}, index=indice
+        )
+        df.attrs.update(self.attrs)
+        return df
+
+    @classmethod
+    def concatenar(cls, partes: Sequence[Serie]) -> Serie:
+        """Junta blocos consecutivos (sem sobreposição) das mesmas colunas."""
+        if len(partes) == 1:
+            return partes[0]
+        dias = array("i")
+        for parte in partes:
+            dias.extend(parte.dias)
+        colunas: dict[str, array | memoryview] = {}
+        for nome in partes[0].colunas:
+            valores = array("d")
+            for parte in partes:
+                valores.extend(parte.colunas[nome])
+            colunas[nome] = valores
+        return cls(dias, colunas)
+
+    @classmethod
+    def juntar(cls, series: Sequence[Serie]) -> Serie:
+        """Junção externa por data: colunas de todas as séries, NaN onde uma delas não tem o dia."""
+        if len(series) == 1:
+            return series[0]
+        if all(s.dias == series[0].dias for s in series[1:]):
+            return cls(series[0].dias, {nome: v for s in series for nome, v in s.colunas.items()})
+        dias = array("i", sorted(set().union(*(s.dias for s in series))))
+        posicao = {d: i for i, d in enumerate(dias)}
+        colunas = {}
+        for s in series:
+            for nome, valores in s.colunas.items():
+                alinhados = array("d", [math.nan]) * len(dias)
+                for d, v in zip(s.dias, valores, strict=True):
+                    alinhados[posicao[d]] = v
+                colunas[nome] = alinhados
+        return cls(dias, colunas)
+
+    # -- consulta -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos arrays de datas e valores."""
+        return self.dias.itemsize * len(self.dias) + sum(v.itemsize * len(v) for v in self.colunas.values())
+
+    def fatiar(self, inicio: date | None = None, fim: date | None = None) -> Serie:
+        """Pontos com data em [inicio, fim], por busca binária."""
+        i = 0 if inicio is None else bisect_left(self.dias, dia(inicio))
+        j = len(self.dias) if fim is None else bisect_right(self.dias, dia(fim))
+        return Serie(self.dias[i:j], {nome: v[i:j] for nome, v in self.colunas.items()}, dict(self.attrs))
+
+    def datas(self, inicio: int = 0, fim: int | None = None) -> list[str]:
+        """Datas ISO (``aaaa-mm-dd``) das linhas [inicio, fim)."""
+        return [date.fromordinal(d + _EPOCA).isoformat() for d in self.dias[inicio:fim]]
+
+    def valores(self, nome: str, inicio: int = 0, fim: int | None = None) -> list[float | None]:
+        """Valores da coluna nas linhas [inicio, fim), com None no lugar de NaN."""
+        return [None if math.isnan(v) else v for v in self.colunas[nome][inicio:fim]]
+
+    def registros(self, inicio: int = 0, fim: int | None = None) -> list[dict[str, Any]]:
+        """Linhas [inicio, fim) como ``{"data": ..., <coluna>: valor}``, prontas para ``json.dumps``."""
+        colunas = {nome: self.valores(nome, inicio, fim) for nome in self.colunas}
+        return [
+            {"data": d, **{nome: valores[k] for nome, valores in colunas.items()}}
+            for k, d in enumerate(self.datas(inicio, fim))
+        ]
+
+    # -- formato binário ----------------------------------------------------
+
+    def para_bytes(self) -> bytes:
+        """Layout fixo: cabeçalho, metadados JSON, datas int32 e colunas float64 (little-endian)."""
+        meta = json.dumps({"colunas": list(self.colunas), "attrs": self.attrs}, ensure_ascii=False).encode()
+        partes = [_CABECALHO.pack(len(self.dias), len(self.colunas), len(meta)), meta]
+        partes.append(_em_ordem_little_endian(self.dias).tobytes())
+        partes.extend(_em_ordem_little_endian(v).tobytes() for v in self.colunas.values())
+        return b"".join(partes)
+
+    @classmethod
+    def de_bytes(cls, dados: bytes | memoryview) -> Serie:
+        """Inverso de ``para_bytes``.
+
+        Raises:
+            ValueError: se o conteúdo estiver truncado ou inconsistente.
+        """
+        dados = memoryview(dados)
+        if len(dados) < _CABECALHO.size:
+            raise ValueError("Série binária truncada.")
+        n, ncolunas, tamanho_meta = _CABECALHO.unpack_from(dados)
+        inicio = _CABECALHO.size + tamanho_meta
+        if len(dados) != inicio + 4 * n + 8 * n * ncolunas:
+            raise ValueError("Série binária com tamanho inconsistente.")
+        meta = json.loads(bytes(dados[_CABECALHO.size : inicio]))
+        dias = array("i")
+        dias.frombytes(dados[inicio : inicio + 4 * n])
+        colunas = {}
+        posicao = inicio + 4 * n
+        for nome in meta["colunas"]:
+            valores = array("d")
+            valores.frombytes(dados[posicao : posicao + 8 * n])
+            colunas[nome] = _em_ordem_little_endian(valores)
+            posicao += 8 * n
+        return cls(_em_ordem_little_endian(dias), colunas, meta["attrs"])
+
+    def __eq__(self, outra: object) -> bool:
+        if not isinstance(outra, Serie):
+            return NotImplemented
+        return (
+            self.dias == outra.dias
+            and list(self.colunas) == list(outra.colunas)
+            and all(
+                np.array_equal(np.array(v), np.array(outra.colunas[nome]), equal_nan=True)
+                for nome, v in self.colunas.items()
+            )
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        intervalo = f"{self.datas(0, 1)[0]}..{self.datas(-1)[0]}" if self.dias else "vazia"
+        return f"Serie({', '.join(self.colunas)}; {len(self)} pontos; {intervalo})"
@@ -0,0 +1,151 @@
+"""Planejador de buscas no SGS do BCB, compartilhado pelos tools de séries.
+
+Cada série é buscada separadamente e, em janelas longas, em blocos de no
+máximo 10 anos (limite da API para séries diárias). Com o armazém persistente
+(``_armazem``) ligado, só os trechos ainda não gravados, e a cauda ainda sujeita a
+revisão das séries que o BCB revisa, vão ao BCB. Entre um bloco e outro o
+planejador reporta progresso, respeita cancelamento e, se o prazo da chamada
+acabar, devolve o que já foi obtido marcado como parcial.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import httpx
+
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._armazem import armazem_atual
+from capivara_mcp.tools._contexto import chamada_atual
+from capivara_mcp.tools._http import obter_json
+from capivara_mcp.tools._pacote import pacote_offline
+from capivara_mcp.tools._serie import Serie
+
+_MAX_ANOS_POR_BLOCO = 10
+
+AVISO_PARCIAL = "Prazo da chamada atingido: o resultado contém apenas os dados obtidos até o momento."
+
+
+def planejar_blocos(dt_inicio: date, dt_fim: date, max_anos: int = _MAX_ANOS_POR_BLOCO) -> list[tuple[date, date]]:
+    """Divide [dt_inicio, dt_fim] em blocos consecutivos de até ``max_anos`` anos."""
+    blocos = []
+    inicio = dt_inicio
+    while inicio <= dt_fim:
+        try:
+            limite = inicio.replace(year=inicio.year + max_anos)
+        except ValueError:  # 29/02 sem correspondente no ano de destino
+            limite = inicio.replace(year=inicio.year + max_anos, day=28)
+        fim = min(dt_fim, limite - timedelta(days=1))
+        blocos.append((inicio, fim))
+        inicio = fim + timedelta(days=1)
+    return blocos
+
+
+def _buscar_bloco(nome: str, codigo: int, dt_inicio: date, dt_fim: date) -> Serie:
+    """Busca um bloco de uma série na API JSON do SGS (coluna ``nome``)."""
+    dados = obter_json(
+        "sgs",
+        f"bcdata.sgs.{codigo}/dados",
+        {"formato": "json", "dataInicial": dt_inicio.strftime("%d/%m/%Y"), "dataFinal": dt_fim.strftime("%d/%m/%Y")},
+    )
+    return Serie.de_sgs(nome, dados)
+
+
+def buscar_series(series: dict[str, int], dt_inicio: date, dt_fim: date) -> Serie:
+    """Busca uma ou mais séries do SGS e as combina em colunas de uma ``Serie``.
+
+    Com o armazém persistente ligado (``CAPIVARA_SERIES_DIRETORIO``), só os
+    trechos ainda não gravados vão ao BCB; o resultado é gravado e a resposta
+    sai de uma fatia do arquivo mapeado. Se a janela alcança a cauda mutável de
+    uma série com política de revisão e a última verificação venceu, a cauda é
+    buscada de novo e conferida com a gravada antes de ser sobrescrita. No modo offline (``_pacote``), as séries
+    gravadas respondem só com o que o arquivo tem, sem buscar o que falta.
+
+    Se o prazo da chamada atual acabar no meio do caminho, retorna as partes já
+    obtidas com ``serie.attrs["parcial"] = True`` (e não grava nada).
+
+    Raises:
+        TimeoutError: se o prazo acabar antes de qualquer bloco ser obtido.
+        ChamadaCancelada: se o cliente cancelar a chamada.
+    """
+    chamada = chamada_atual()
+    armazem = armazem_atual()
+    gravados = {codigo: armazem.abrir(codigo) for codigo in series.values()} if armazem is not None else {}
+    offline = pacote_offline() is not None
+    trechos: dict[str, list[tuple[date, date]]] = {}
+    caudas: dict[str, tuple[date, date]] = {}
+    for nome, codigo in series.items():
+        arquivo = gravados.get(codigo)
+        if arquivo is None:
+            trechos[nome] = [(dt_inicio, dt_fim)]
+        elif offline:
+            trechos[nome] = []  # o pacote é tudo o que há: responde com o que foi gravado
+        else:
+            trechos[nome] = arquivo.faltantes(dt_inicio, dt_fim)
+            cauda = armazem.cauda_pendente(codigo, date.today())  # type: ignore[union-attr]
+            if cauda is not None and dt_fim >= cauda[0]:
+                caudas[nome] = cauda
+                if trechos[nome] and trechos[nome][-1][0] > cauda[1]:  # junta ao trecho depois do gravado
+                    trechos[nome][-1] = (cauda[0], trechos[nome][-1][1])
+                else:
+                    trechos[nome].append(cauda)
+    tarefas = [
+        (nome, codigo, k, ini, fim)
+        for nome, codigo in series.items()
+        for k, trecho in enumerate(trechos[nome])
+        for ini, fim in planejar_blocos(*trecho)
+    ]
+    partes: dict[tuple[str, int], list[Serie]] = {}
+    tem_gravados = any(gravados.values())
+    linhas = 0
+    parcial = False
+
+    for i, (nome, codigo, k, ini, fim) in enumerate(tarefas):
+        if chamada is not None:
+            chamada.verificar()
+            if chamada.expirou():
+                if not partes and not tem_gravados:
+                    raise TimeoutError(f"Prazo da chamada {chamada.id} esgotado antes da primeira resposta do SGS.")
+                parcial = True
+                break
+
+        try:
+            with _rastreio.trecho("bloco", codigo=codigo, inicio=ini, fim=fim):
+                bloco = _buscar_bloco(nome, codigo, ini, fim)
+        except (TimeoutError, httpx.TimeoutException):
+            if chamada is None or not (partes or tem_gravados) or not chamada.expirou():
+                raise
+            parcial = True
+            break
+        partes.setdefault((nome, k), []).append(bloco)
+        linhas += len(bloco)
+        if chamada is not None:
+            chamada.progresso(i + 1, len(tarefas), f"{i + 1}/{len(tarefas)} blocos do SGS, {linhas} linhas")
+
+    colunas = []
+    for nome, codigo in series.items():
+        arquivo = gravados.get(codigo)
+        buscados = [
+            Serie.concatenar(blocos) if (blocos := partes.get((nome, k))) else Serie.vazia([nome])
+            for k in range(len(trechos[nome]))
+        ]
+        if parcial:
+            # Nada é gravado: junta o que veio do arquivo e do BCB, em ordem de data
+            if arquivo is None and not any((nome, k) in partes for k in range(len(buscados))):
+                continue
+            pedacos = buscados + ([arquivo.fatiar(nome, dt_inicio, dt_fim)] if arquivo is not None else [])
+            pedacos = sorted((p for p in pedacos if len(p)), key=lambda p: p.dias[0]) or [Serie.vazia([nome])]
+            colunas.append(Serie.concatenar(pedacos).fatiar(dt_inicio, dt_fim))
+        elif armazem is not None:
+            for trecho, bloco in zip(trechos[nome], buscados, strict=True):
+                if (cauda := caudas.get(nome)) is not None and trecho[0] == cauda[0]:
+                    armazem.conferir(codigo, *cauda, bloco)
+                arquivo = armazem.gravar(codigo, *trecho, bloco)
+            if arquivo is not None:
+                colunas.append(arquivo.fatiar(nome, dt_inicio, dt_fim))
+        else:
+            colunas.append(buscados[0])  # sem armazém há um único trecho: a própria janela
+
+    serie = Serie.juntar(colunas) if colunas else Serie.vazia(series)
+    serie.attrs["parcial"] = parcial
+    return serie
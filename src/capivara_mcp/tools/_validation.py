@@ -4,13 +4,56 @@ from __future__ import annotations
 
 import json
 from datetime import date
+from typing import Any
+
+from capivara_mcp.tools._contexto import chamada_atual
 
 
 def erro_json(msg: str) -> str:
     """Retorna JSON com chave 'erro' para respostas de erro padronizadas."""
+    chamada = chamada_atual()
+    if chamada is not None:
+        chamada.erro_resposta = msg
     return json.dumps({"erro": msg}, ensure_ascii=False)
 
 
+def resposta_json(corpo: dict[str, Any]) -> str:
+    """Serializa a resposta de sucesso de um tool.
+
+    Na chamada em andamento, acrescenta os avisos acumulados e anota o nº de
+    registros (soma das listas do corpo) para métricas e logs, para que o
+    servidor não precise reler o JSON.
+    """
+    chamada = chamada_atual()
+    if chamada is not None:
+        chamada.linhas = sum(len(v) for v in corpo.values() if isinstance(v, list))
+        if chamada.avisos:
+            corpo = {**corpo, "avisos": chamada.avisos}
+    return json.dumps(corpo, ensure_ascii=False)
+
+
+def observacao(resultado: str) -> str:
+    """O registro mais recente de cada lista de uma resposta, sem o cabeçalho.
+
+    É o que a agenda e as assinaturas comparam para saber se o BCB publicou
+    dado novo: o ``periodo`` e a janela padrão andam com ``date.today()``
+    mesmo sem publicação nenhuma.
+    """
+    try:
+        resposta = json.loads(resultado)
+    except ValueError:
+        return resultado
+    if not isinstance(resposta, dict):
+        return resultado
+    recentes = {}
+    for chave, registros in resposta.items():
+        if not isinstance(registros, list) or not registros or not all(isinstance(r, dict) for r in registros):
+            continue
+        datas = [k for k in registros[0] if k.startswith("data")]
+        recentes[chave] = max(registros, key=lambda r: tuple(str(r.get(k)) for k in datas)) if datas else registros[-1]
+    return json.dumps(recentes, sort_keys=True, ensure_ascii=False, default=str)
+
+
 def parse_date(value: str, param_name: str) -> date | str:
     """Converte string ISO para date, retornando erro JSON se inválida.
 
@@ -2,22 +2,22 @@
 
 from __future__ import annotations
 
-import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import date, timedelta
 
-import pandas as pd
-import requests
-from bcb import sgs
+import httpx
 
-from capivara_mcp.tools._validation import erro_json, parse_date, validate_date_range
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import AVISO_PARCIAL, buscar_series
+from capivara_mcp.tools._validation import erro_json, parse_date, resposta_json, validate_date_range
 
 logger = logging.getLogger("capivara-mcp.atividade")
 
 _MAX_DAYS = 1825  # ~5 anos (dados mensais)
-_API_TIMEOUT_SECONDS = 30
 
 
 # Códigos das séries no SGS
@@ -28,22 +28,18 @@ _SERIES = {
 }
 
 
-def _fetch_atividade(indicador: str, codigo: int, dt_inicio: date, dt_fim: date) -> pd.DataFrame:
+@em_cache("atividade")
+def _fetch_atividade(indicador: str, codigo: int, dt_inicio: date, dt_fim: date) -> Serie:
     """Busca indicador de atividade econômica na API SGS do BCB."""
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(
-            sgs.get,
-            {indicador: codigo},
-            start=dt_inicio.strftime("%Y-%m-%d"),
-            end=dt_fim.strftime("%Y-%m-%d"),
-        )
-        return future.result(timeout=_API_TIMEOUT_SECONDS)  # type: ignore[return-value]
+    return buscar_series({indicador: codigo}, dt_inicio, dt_fim)
 
 
 def get_atividade_economica(
     indicador: str = "PIB mensal",
     data_inicio: str | None = None,
     data_fim: str | None = None,
+    cursor: str | None = None,
+    tamanho_pagina: int | None = None,
 ) -> str:
     """Consulta indicadores de atividade econômica do Banco Central do Brasil.
 
@@ -55,17 +51,24 @@ def get_atividade_economica(
             Padrão: "PIB mensal".
         data_inicio: Data inicial no formato YYYY-MM-DD. Padrão: 365 dias atrás.
         data_fim: Data final no formato YYYY-MM-DD. Padrão: hoje.
+        cursor: Cursor de continuação ("proximo_cursor" de uma resposta paginada anterior).
+            Quando informado, os demais parâmetros são ignorados.
+        tamanho_pagina: Se informado, pagina o resultado com esse número de registros por página.
 
     Returns:
         JSON com os valores mensais do indicador no período.
     """
-    logger.info("get_atividade_economica chamado: indicador=%s, data_inicio=%s, data_fim=%s", indicador, data_inicio, data_fim)
+    logger.debug("get_atividade_economica chamado: indicador=%s, data_inicio=%s, data_fim=%s", indicador, data_inicio, data_fim)
+
+    if cursor:
+        return continuar("get_atividade_economica", cursor)
 
     if indicador not in _SERIES:
-        return json.dumps(
-            {"erro": f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_SERIES))}."},
-            ensure_ascii=False,
-        )
+        return erro_json(f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_SERIES))}.")
+
+    pagina_err = validar_tamanho_pagina(tamanho_pagina)
+    if pagina_err:
+        return pagina_err
 
     hoje = date.today()
 
@@ -91,31 +94,26 @@ def get_atividade_economica(
 
     try:
         codigo = _SERIES[indicador]
-        df: pd.DataFrame = _fetch_atividade(indicador, codigo, dt_inicio, dt_fim)
-
-        if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhum dado de {indicador} encontrado no período informado."},
-                ensure_ascii=False,
-            )
-
-        df.index.name = "data"
-        df = df.reset_index()
-        df["data"] = df["data"].dt.strftime("%Y-%m-%d")
-
-        registros = df.to_dict(orient="records")
-        return json.dumps(
-            {
-                "indicador": indicador,
-                "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)},
-                "valores": registros,
-            },
-            ensure_ascii=False,
-        )
-
-    except FuturesTimeoutError:
+        serie: Serie = _fetch_atividade(indicador, codigo, dt_inicio, dt_fim)
+
+        if not serie:
+            return erro_json(f"Nenhum dado de {indicador} encontrado no período informado.")
+
+        cabecalho = {"indicador": indicador, "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)}}
+        if serie.attrs.get("parcial"):
+            cabecalho.update(parcial=True, aviso=AVISO_PARCIAL)
+
+        if tamanho_pagina is not None:
+            return paginar("get_atividade_economica", cabecalho, "valores", serie, tamanho_pagina)
+
+        _rastreio.fase("serializar")
+        return resposta_json({**cabecalho, "valores": serie.registros()})
+
+    except (TimeoutError, httpx.TimeoutException):
         return erro_json(f"Tempo limite excedido ao consultar {indicador} na API do BCB. Tente novamente.")
-    except requests.ConnectionError:
+    except CircuitoAberto as e:
+        return erro_json(str(e))
+    except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API do BCB. Verifique sua conexão.")
     except Exception:
         logger.exception("Erro ao consultar atividade econômica: indicador=%s", indicador)
@@ -1,17 +1,17 @@
 """Tool para consulta de expectativas de mercado (Focus) do Banco Central."""
 
-# pyright: reportAttributeAccessIssue=false
-
 from __future__ import annotations
 
-import json
 import logging
 
 import httpx
 import pandas as pd
-from bcb import Expectativas
 
-from capivara_mcp.tools._validation import erro_json
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._olinda import consultar, literal
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._validation import erro_json, resposta_json
 
 logger = logging.getLogger("capivara-mcp.expectativas")
 
@@ -82,25 +82,16 @@ def _convert_datetime_columns(df: pd.DataFrame) -> None:
 # Expectativas anuais (existente)
 # ---------------------------------------------------------------------------
 
+@em_cache("expectativas_anuais")
 def _fetch_expectativas(indicador: str, top: int) -> pd.DataFrame:
     """Busca expectativas de mercado na API do BCB."""
-    em = Expectativas()
-    ep = em.get_endpoint("ExpectativasMercadoAnuais")
-    return (
-        ep.query()
-        .filter(ep.Indicador == indicador, ep.baseCalculo == 0)
-        .orderby(ep.Data.desc())
-        .select(
-            ep.Indicador,
-            ep.Data,
-            ep.DataReferencia,
-            ep.Media,
-            ep.Mediana,
-            ep.Minimo,
-            ep.Maximo,
-        )
-        .limit(top)
-        .collect()
+    return consultar(
+        "expectativas",
+        "ExpectativasMercadoAnuais",
+        filtro=f"Indicador eq {literal(indicador)} and baseCalculo eq 0",
+        ordem="Data desc",
+        campos=["Indicador", "Data", "DataReferencia", "Media", "Mediana", "Minimo", "Maximo"],
+        top=top,
     )
 
 
@@ -122,7 +113,7 @@ def get_expectativas_mercado(
     Returns:
         JSON com as expectativas de mercado para o indicador.
     """
-    logger.info("get_expectativas_mercado chamado: indicador=%s, top=%d", indicador, top)
+    logger.debug("get_expectativas_mercado chamado: indicador=%s, top=%d", indicador, top)
 
     if indicador not in _INDICADORES:
         return erro_json(f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_INDICADORES))}.")
@@ -131,22 +122,19 @@ def get_expectativas_mercado(
         df: pd.DataFrame = _fetch_expectativas(indicador, top)
 
         if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhuma expectativa encontrada para '{indicador}'."},
-                ensure_ascii=False,
-            )
+            return erro_json(f"Nenhuma expectativa encontrada para '{indicador}'.")
 
         df = df.rename(columns=_COLUNAS_BASE)
         _convert_datetime_columns(df)
 
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"indicador": indicador, "expectativas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"indicador": indicador, "expectativas": registros})
 
     except httpx.TimeoutException:
         return erro_json(f"Tempo limite excedido ao consultar expectativas de {indicador}. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Expectativas do BCB. Verifique sua conexão.")
     except Exception:
@@ -158,25 +146,16 @@ def get_expectativas_mercado(
 # Expectativas mensais
 # ---------------------------------------------------------------------------
 
+@em_cache("expectativas_mensais")
 def _fetch_expectativas_mensais(indicador: str, top: int) -> pd.DataFrame:
     """Busca expectativas mensais de mercado na API do BCB."""
-    em = Expectativas()
-    ep = em.get_endpoint("ExpectativaMercadoMensais")
-    return (
-        ep.query()
-        .filter(ep.Indicador == indicador, ep.baseCalculo == 0)
-        .orderby(ep.Data.desc())
-        .select(
-            ep.Indicador,
-            ep.Data,
-            ep.DataReferencia,
-            ep.Media,
-            ep.Mediana,
-            ep.Minimo,
-            ep.Maximo,
-        )
-        .limit(top)
-        .collect()
+    return consultar(
+        "expectativas",
+        "ExpectativaMercadoMensais",
+        filtro=f"Indicador eq {literal(indicador)} and baseCalculo eq 0",
+        ordem="Data desc",
+        campos=["Indicador", "Data", "DataReferencia", "Media", "Mediana", "Minimo", "Maximo"],
+        top=top,
     )
 
 
@@ -198,7 +177,7 @@ def get_expectativas_mensais(
     Returns:
         JSON com as expectativas mensais de mercado para o indicador.
     """
-    logger.info("get_expectativas_mensais chamado: indicador=%s, top=%d", indicador, top)
+    logger.debug("get_expectativas_mensais chamado: indicador=%s, top=%d", indicador, top)
 
     if indicador not in _INDICADORES:
         return erro_json(f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_INDICADORES))}.")
@@ -207,22 +186,19 @@ def get_expectativas_mensais(
         df: pd.DataFrame = _fetch_expectativas_mensais(indicador, top)
 
         if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhuma expectativa mensal encontrada para '{indicador}'."},
-                ensure_ascii=False,
-            )
+            return erro_json(f"Nenhuma expectativa mensal encontrada para '{indicador}'.")
 
         df = df.rename(columns=_COLUNAS_BASE)
         _convert_datetime_columns(df)
 
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"indicador": indicador, "frequencia": "mensal", "expectativas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"indicador": indicador, "frequencia": "mensal", "expectativas": registros})
 
     except httpx.TimeoutException:
         return erro_json(f"Tempo limite excedido ao consultar expectativas mensais de {indicador}. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Expectativas do BCB. Verifique sua conexão.")
     except Exception:
@@ -234,24 +210,16 @@ def get_expectativas_mensais(
 # Expectativas Selic (por reunião COPOM)
 # ---------------------------------------------------------------------------
 
+@em_cache("expectativas_selic")
 def _fetch_expectativas_selic(top: int) -> pd.DataFrame:
     """Busca expectativas da Selic por reunião na API do BCB."""
-    em = Expectativas()
-    ep = em.get_endpoint("ExpectativasMercadoSelic")
-    return (
-        ep.query()
-        .filter(ep.baseCalculo == 0)
-        .orderby(ep.Data.desc())
-        .select(
-            ep.Data,
-            ep.Reuniao,
-            ep.Media,
-            ep.Mediana,
-            ep.Minimo,
-            ep.Maximo,
-        )
-        .limit(top)
-        .collect()
+    return consultar(
+        "expectativas",
+        "ExpectativasMercadoSelic",
+        filtro="baseCalculo eq 0",
+        ordem="Data desc",
+        campos=["Data", "Reuniao", "Media", "Mediana", "Minimo", "Maximo"],
+        top=top,
     )
 
 
@@ -270,16 +238,13 @@ def get_expectativas_selic(
     Returns:
         JSON com as expectativas da Selic por reunião.
     """
-    logger.info("get_expectativas_selic chamado: top=%d", top)
+    logger.debug("get_expectativas_selic chamado: top=%d", top)
 
     try:
         df: pd.DataFrame = _fetch_expectativas_selic(top)
 
         if df.empty:
-            return json.dumps(
-                {"erro": "Nenhuma expectativa da Selic encontrada."},
-                ensure_ascii=False,
-            )
+            return erro_json("Nenhuma expectativa da Selic encontrada.")
 
         colunas = {
             "Data": "data_pesquisa",
@@ -293,13 +258,13 @@ def get_expectativas_selic(
         _convert_datetime_columns(df)
 
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"indicador": "Selic", "frequencia": "por_reuniao", "expectativas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"indicador": "Selic", "frequencia": "por_reuniao", "expectativas": registros})
 
     except httpx.TimeoutException:
         return erro_json("Tempo limite excedido ao consultar expectativas da Selic. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Expectativas do BCB. Verifique sua conexão.")
     except Exception:
@@ -311,25 +276,16 @@ def get_expectativas_selic(
 # Expectativas de inflação 12 meses
 # ---------------------------------------------------------------------------
 
+@em_cache("expectativas_inflacao12m")
 def _fetch_expectativas_inflacao12m(indicador: str, top: int) -> pd.DataFrame:
     """Busca expectativas de inflação 12 meses na API do BCB."""
-    em = Expectativas()
-    ep = em.get_endpoint("ExpectativasMercadoInflacao12Meses")
-    return (
-        ep.query()
-        .filter(ep.Indicador == indicador, ep.baseCalculo == 0)
-        .orderby(ep.Data.desc())
-        .select(
-            ep.Indicador,
-            ep.Data,
-            ep.Media,
-            ep.Mediana,
-            ep.Minimo,
-            ep.Maximo,
-            ep.Suavizada,
-        )
-        .limit(top)
-        .collect()
+    return consultar(
+        "expectativas",
+        "ExpectativasMercadoInflacao12Meses",
+        filtro=f"Indicador eq {literal(indicador)} and baseCalculo eq 0",
+        ordem="Data desc",
+        campos=["Indicador", "Data", "Media", "Mediana", "Minimo", "Maximo", "Suavizada"],
+        top=top,
     )
 
 
@@ -351,7 +307,7 @@ def get_expectativas_inflacao12m(
     Returns:
         JSON com as expectativas de inflação 12 meses para o indicador.
     """
-    logger.info("get_expectativas_inflacao12m chamado: indicador=%s, top=%d", indicador, top)
+    logger.debug("get_expectativas_inflacao12m chamado: indicador=%s, top=%d", indicador, top)
 
     if indicador not in _INDICADORES_INFLACAO:
         return erro_json(f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_INDICADORES_INFLACAO))}.")
@@ -360,10 +316,7 @@ def get_expectativas_inflacao12m(
         df: pd.DataFrame = _fetch_expectativas_inflacao12m(indicador, top)
 
         if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhuma expectativa de inflação 12 meses encontrada para '{indicador}'."},
-                ensure_ascii=False,
-            )
+            return erro_json(f"Nenhuma expectativa de inflação 12 meses encontrada para '{indicador}'.")
 
         colunas = {
             "Indicador": "indicador",
@@ -378,13 +331,13 @@ def get_expectativas_inflacao12m(
         _convert_datetime_columns(df)
 
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"indicador": indicador, "horizonte": "12_meses", "expectativas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"indicador": indicador, "horizonte": "12_meses", "expectativas": registros})
 
     except httpx.TimeoutException:
         return erro_json(f"Tempo limite excedido ao consultar expectativas de inflação 12m de {indicador}. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Expectativas do BCB. Verifique sua conexão.")
     except Exception:
@@ -396,26 +349,16 @@ def get_expectativas_inflacao12m(
 # Expectativas Top 5 anuais
 # ---------------------------------------------------------------------------
 
+@em_cache("expectativas_top5")
 def _fetch_expectativas_top5(indicador: str, top: int) -> pd.DataFrame:
     """Busca expectativas Top 5 anuais na API do BCB."""
-    em = Expectativas()
-    ep = em.get_endpoint("ExpectativasMercadoTop5Anuais")
-    return (
-        ep.query()
-        .filter(ep.Indicador == indicador)
-        .orderby(ep.Data.desc())
-        .select(
-            ep.Indicador,
-            ep.Data,
-            ep.DataReferencia,
-            ep.tipoCalculo,
-            ep.Media,
-            ep.Mediana,
-            ep.Minimo,
-            ep.Maximo,
-        )
-        .limit(top)
-        .collect()
+    return consultar(
+        "expectativas",
+        "ExpectativasMercadoTop5Anuais",
+        filtro=f"Indicador eq {literal(indicador)}",
+        ordem="Data desc",
+        campos=["Indicador", "Data", "DataReferencia", "tipoCalculo", "Media", "Mediana", "Minimo", "Maximo"],
+        top=top,
     )
 
 
@@ -437,7 +380,7 @@ def get_expectativas_top5(
     Returns:
         JSON com as expectativas Top 5 para o indicador.
     """
-    logger.info("get_expectativas_top5 chamado: indicador=%s, top=%d", indicador, top)
+    logger.debug("get_expectativas_top5 chamado: indicador=%s, top=%d", indicador, top)
 
     if indicador not in _INDICADORES:
         return erro_json(f"Indicador '{indicador}' não suportado. Use: {', '.join(sorted(_INDICADORES))}.")
@@ -446,10 +389,7 @@ def get_expectativas_top5(
         df: pd.DataFrame = _fetch_expectativas_top5(indicador, top)
 
         if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhuma expectativa Top 5 encontrada para '{indicador}'."},
-                ensure_ascii=False,
-            )
+            return erro_json(f"Nenhuma expectativa Top 5 encontrada para '{indicador}'.")
 
         colunas = {
             "Indicador": "indicador",
@@ -465,13 +405,13 @@ def get_expectativas_top5(
         _convert_datetime_columns(df)
 
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"indicador": indicador, "tipo": "top5_anual", "expectativas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"indicador": indicador, "tipo": "top5_anual", "expectativas": registros})
 
     except httpx.TimeoutException:
         return erro_json(f"Tempo limite excedido ao consultar expectativas Top 5 de {indicador}. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Expectativas do BCB. Verifique sua conexão.")
     except Exception:
@@ -2,22 +2,24 @@
 
 from __future__ import annotations
 
-import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import date, timedelta
 
-import pandas as pd
-import requests
-from bcb import sgs
+import httpx
 
-from capivara_mcp.tools._validation import erro_json, parse_date, validate_date_range
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._calendario import ajustar_janela
+from capivara_mcp.tools._degraus import FORMATOS, codificar_degraus, resolver_formato
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import AVISO_PARCIAL, buscar_series
+from capivara_mcp.tools._validation import erro_json, parse_date, resposta_json, validate_date_range
 
 logger = logging.getLogger("capivara-mcp.inflacao")
 
 _MAX_DAYS = 1825  # ~5 anos (dados mensais)
-_API_TIMEOUT_SECONDS = 30
 
 
 # Códigos das séries no SGS
@@ -29,23 +31,23 @@ _SERIES = {
     "INPC": 188,
 }
 
+# Séries com observações apenas em dias úteis (as demais são mensais)
+_SERIES_DIARIAS = {"CDI"}
 
-def _fetch_inflacao(indice: str, codigo: int, dt_inicio: date, dt_fim: date) -> pd.DataFrame:
+
+@em_cache("inflacao")
+def _fetch_inflacao(indice: str, codigo: int, dt_inicio: date, dt_fim: date) -> Serie:
     """Busca índice de inflação na API SGS do BCB."""
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(
-            sgs.get,
-            {indice: codigo},
-            start=dt_inicio.strftime("%Y-%m-%d"),
-            end=dt_fim.strftime("%Y-%m-%d"),
-        )
-        return future.result(timeout=_API_TIMEOUT_SECONDS)  # type: ignore[return-value]  # sgs.get returns DataFrame for dict input
+    return buscar_series({indice: codigo}, dt_inicio, dt_fim)
 
 
 def get_inflacao(
     indice: str = "IPCA",
     data_inicio: str | None = None,
     data_fim: str | None = None,
+    formato: str = "registros",
+    cursor: str | None = None,
+    tamanho_pagina: int | None = None,
 ) -> str:
     """Consulta índices de inflação e taxas de referência do Banco Central do Brasil.
 
@@ -56,18 +58,37 @@ def get_inflacao(
         indice: Índice desejado: "IPCA", "IGP-M", "CDI", "IPCA-15" ou "INPC". Padrão: "IPCA".
         data_inicio: Data inicial no formato YYYY-MM-DD. Padrão: 365 dias atrás.
         data_fim: Data final no formato YYYY-MM-DD. Padrão: hoje.
+        formato: "registros" (um valor por data), "degraus" (trechos [inicio, fim, valor] de valor
+            constante, útil para o CDI) ou "auto" (degraus quando a série muda raramente).
+            Padrão: "registros".
+        cursor: Cursor de continuação ("proximo_cursor" de uma resposta paginada anterior).
+            Quando informado, os demais parâmetros são ignorados.
+        tamanho_pagina: Se informado, pagina o resultado em formato "registros" com esse número de registros por página.
 
     Returns:
         JSON com os valores mensais do índice no período.
     """
-    logger.info("get_inflacao chamado: indice=%s, data_inicio=%s, data_fim=%s", indice, data_inicio, data_fim)
+    logger.debug(
+        "get_inflacao chamado: indice=%s, data_inicio=%s, data_fim=%s, formato=%s",
+        indice,
+        data_inicio,
+        data_fim,
+        formato,
+    )
+
+    if cursor:
+        return continuar("get_inflacao", cursor)
 
     indice_upper = indice.upper()
     if indice_upper not in _SERIES:
-        return json.dumps(
-            {"erro": f"Índice '{indice}' não suportado. Use: {', '.join(sorted(_SERIES))}."},
-            ensure_ascii=False,
-        )
+        return erro_json(f"Índice '{indice}' não suportado. Use: {', '.join(sorted(_SERIES))}.")
+
+    if formato not in FORMATOS:
+        return erro_json(f"Formato '{formato}' não suportado. Use: {', '.join(FORMATOS)}.")
+
+    pagina_err = validar_tamanho_pagina(tamanho_pagina)
+    if pagina_err:
+        return pagina_err
 
     hoje = date.today()
 
@@ -91,33 +112,39 @@ def get_inflacao(
     if range_err:
         return range_err
 
+    if indice_upper in _SERIES_DIARIAS and ajustar_janela(dt_inicio, dt_fim) is None:
+        return erro_json(f"Nenhum dia útil entre {dt_inicio} e {dt_fim}; não há dados de {indice_upper} no período.")
+
     try:
         codigo = _SERIES[indice_upper]
-        df: pd.DataFrame = _fetch_inflacao(indice_upper, codigo, dt_inicio, dt_fim)
-
-        if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhum dado de {indice_upper} encontrado no período informado."},
-                ensure_ascii=False,
-            )
-
-        df.index.name = "data"
-        df = df.reset_index()
-        df["data"] = df["data"].dt.strftime("%Y-%m-%d")
-
-        registros = df.to_dict(orient="records")
-        return json.dumps(
-            {
-                "indice": indice_upper,
-                "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)},
-                "valores": registros,
-            },
-            ensure_ascii=False,
-        )
-
-    except FuturesTimeoutError:
+        serie: Serie = _fetch_inflacao(indice_upper, codigo, dt_inicio, dt_fim)
+
+        if not serie:
+            return erro_json(f"Nenhum dado de {indice_upper} encontrado no período informado.")
+
+        resposta = {"indice": indice_upper, "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)}}
+        if serie.attrs.get("parcial"):
+            resposta.update(parcial=True, aviso=AVISO_PARCIAL)
+
+        if formato != "registros":
+            valores = serie.valores(indice_upper)
+            if resolver_formato(formato, {indice_upper: valores}) == "degraus":
+                resposta["formato"] = "degraus"
+                resposta["valores"] = codificar_degraus(serie.datas(), valores)
+                return resposta_json(resposta)
+
+        if tamanho_pagina is not None:
+            return paginar("get_inflacao", resposta, "valores", serie, tamanho_pagina)
+
+        resposta["valores"] = serie.registros()
+        _rastreio.fase("serializar")
+        return resposta_json(resposta)
+
+    except (TimeoutError, httpx.TimeoutException):
         return erro_json(f"Tempo limite excedido ao consultar {indice_upper} na API do BCB. Tente novamente.")
-    except requests.ConnectionError:
+    except CircuitoAberto as e:
+        return erro_json(str(e))
+    except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API do BCB. Verifique sua conexão.")
     except Exception:
         logger.exception("Erro ao consultar inflação: indice=%s", indice_upper)
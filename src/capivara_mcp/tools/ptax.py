@@ -2,33 +2,36 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from datetime import date, timedelta
 
 import httpx
 import pandas as pd
-from bcb import PTAX
 
-from capivara_mcp.tools._validation import erro_json, parse_date, validate_date_range
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._calendario import ajustar_janela, contar_dias_uteis, inicio_por_dias_uteis
+from capivara_mcp.tools._olinda import consultar
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._validation import erro_json, parse_date, resposta_json, validate_date_range
 
 logger = logging.getLogger("capivara-mcp.ptax")
 
 _MAX_DAYS = 365
 
 
+@em_cache("ptax")
 def _fetch_ptax(moeda: str, dt_inicio: date, dt_fim: date) -> pd.DataFrame:
     """Busca cotações PTAX na API do BCB."""
-    ptax = PTAX()
-    ep = ptax.get_endpoint("CotacaoMoedaPeriodo")
-    return (
-        ep.query()
-        .parameters(
-            moeda=moeda,
-            dataInicial=dt_inicio.strftime("%m-%d-%Y"),
-            dataFinalCotacao=dt_fim.strftime("%m-%d-%Y"),
-        )
-        .collect()
+    return consultar(
+        "ptax",
+        "CotacaoMoedaPeriodo",
+        parametros={
+            "moeda": moeda,
+            "dataInicial": dt_inicio.strftime("%m-%d-%Y"),
+            "dataFinalCotacao": dt_fim.strftime("%m-%d-%Y"),
+        },
     )
 
 
@@ -36,6 +39,9 @@ def get_ptax(
     moeda: str = "USD",
     data_inicio: str | None = None,
     data_fim: str | None = None,
+    dias_uteis: int | None = None,
+    cursor: str | None = None,
+    tamanho_pagina: int | None = None,
 ) -> str:
     """Consulta cotações PTAX (câmbio) do Banco Central do Brasil.
 
@@ -46,11 +52,29 @@ def get_ptax(
         moeda: Código da moeda (ex: "USD", "EUR"). Padrão: "USD".
         data_inicio: Data inicial no formato YYYY-MM-DD. Padrão: 30 dias atrás.
         data_fim: Data final no formato YYYY-MM-DD. Padrão: hoje.
+        dias_uteis: Alternativa a data_inicio: quantidade de dias úteis terminando em data_fim
+            (ex: 5 para a última semana útil).
+        cursor: Cursor de continuação ("proximo_cursor" de uma resposta paginada anterior).
+            Quando informado, os demais parâmetros são ignorados.
+        tamanho_pagina: Se informado, pagina o resultado com esse número de registros por página.
 
     Returns:
         JSON com as cotações de compra e venda no período.
     """
-    logger.info("get_ptax chamado: moeda=%s, data_inicio=%s, data_fim=%s", moeda, data_inicio, data_fim)
+    logger.debug(
+        "get_ptax chamado: moeda=%s, data_inicio=%s, data_fim=%s, dias_uteis=%s",
+        moeda,
+        data_inicio,
+        data_fim,
+        dias_uteis,
+    )
+
+    if cursor:
+        return continuar("get_ptax", cursor)
+
+    pagina_err = validar_tamanho_pagina(tamanho_pagina)
+    if pagina_err:
+        return pagina_err
 
     hoje = date.today()
 
@@ -62,11 +86,19 @@ def get_ptax(
     else:
         dt_fim = hoje
 
+    if data_inicio and dias_uteis is not None:
+        return erro_json("Informe data_inicio ou dias_uteis, não ambos.")
+
     if data_inicio:
         parsed = parse_date(data_inicio, "data_inicio")
         if isinstance(parsed, str):
             return parsed
         dt_inicio = parsed
+    elif dias_uteis is not None:
+        try:
+            dt_inicio = inicio_por_dias_uteis(dt_fim, dias_uteis)
+        except ValueError as e:
+            return erro_json(f"Valor inválido para 'dias_uteis': {e}")
     else:
         dt_inicio = dt_fim - timedelta(days=30)
 
@@ -74,14 +106,17 @@ def get_ptax(
     if range_err:
         return range_err
 
+    # Fins de semana e feriados não têm boletim PTAX: evita ida à API sem dados possíveis
+    janela = ajustar_janela(dt_inicio, dt_fim)
+    if janela is None:
+        return erro_json(f"Nenhum dia útil entre {dt_inicio} e {dt_fim}; não há cotações PTAX no período.")
+
     try:
-        df: pd.DataFrame = _fetch_ptax(moeda, dt_inicio, dt_fim)
+        df: pd.DataFrame = _fetch_ptax(moeda, *janela)
 
         if df.empty:
-            return json.dumps(
-                {"erro": f"Nenhuma cotação encontrada para {moeda} no período informado."},
-                ensure_ascii=False,
-            )
+            return erro_json(f"Nenhuma cotação encontrada para {moeda} no período informado.")
+        parcial = df.attrs.get("parcial", False)
 
         # Selecionar e renomear colunas relevantes
         colunas = {
@@ -98,14 +133,23 @@ def get_ptax(
             if pd.api.types.is_datetime64_any_dtype(df[col]):
                 df[col] = df[col].dt.strftime("%Y-%m-%d %H:%M:%S")
 
+        cabecalho = {
+            "moeda": moeda,
+            "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim), "dias_uteis": contar_dias_uteis(*janela)},
+        }
+        if parcial:
+            cabecalho["parcial"] = True  # offline, com só parte do período no pacote (ver "avisos")
+        if tamanho_pagina is not None:
+            return paginar("get_ptax", cabecalho, "cotacoes", df, tamanho_pagina)
+
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"moeda": moeda, "periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)}, "cotacoes": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({**cabecalho, "cotacoes": registros})
 
     except httpx.TimeoutException:
         return erro_json("Tempo limite excedido ao consultar a API PTAX do BCB. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API PTAX do BCB. Verifique sua conexão.")
     except Exception:
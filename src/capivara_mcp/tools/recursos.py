@@ -0,0 +1,73 @@
+"""Leitores dos resources MCP de séries e conjuntos de dados do BCB.
+
+- ``sgs://{codigo}``: últimos pontos de qualquer série do SGS (ex: ``sgs://432``);
+- ``ptax://{moeda}``: cotações PTAX dos últimos 30 dias (ex: ``ptax://USD``);
+- ``focus://anuais/{indicador}``: expectativas anuais do Focus (ex: ``focus://anuais/IPCA``).
+
+Os resources de PTAX e Focus devolvem o mesmo JSON da consulta padrão do tool
+correspondente, a que a agenda de renovação mantém aquecida. Com isso, ler
+ou verificar um resource assinado custa, no máximo, uma consulta ao BCB por
+validade do cache, qualquer que seja o número de clientes.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from urllib.parse import unquote
+
+import httpx
+
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import AVISO_PARCIAL, buscar_series
+from capivara_mcp.tools._validation import erro_json, resposta_json
+from capivara_mcp.tools.expectativas import get_expectativas_mercado
+from capivara_mcp.tools.ptax import get_ptax
+
+logger = logging.getLogger("capivara-mcp.recursos")
+
+_JANELA_DIAS = 400  # cobre pelo menos 12 pontos de séries mensais
+_PONTOS = 20
+
+
+@em_cache("sgs")
+def _fetch_sgs(codigo: int, dt_inicio: date, dt_fim: date) -> Serie:
+    """Busca uma série qualquer do SGS (coluna ``valor``)."""
+    return buscar_series({"valor": codigo}, dt_inicio, dt_fim)
+
+
+def ler_sgs(codigo: str) -> str:
+    """Últimos ``_PONTOS`` pontos da série ``codigo`` do SGS nos últimos ~13 meses."""
+    if not codigo.isdigit():
+        return erro_json(f"Código de série inválido: '{codigo}'. Use o número da série no SGS, ex: sgs://432.")
+    hoje = date.today()
+    try:
+        serie = _fetch_sgs(int(codigo), hoje - timedelta(days=_JANELA_DIAS), hoje)
+        resultado: dict = {"codigo": int(codigo)}
+        if serie.attrs.get("parcial"):
+            resultado.update(parcial=True, aviso=AVISO_PARCIAL)
+        resultado["dados"] = serie.registros(max(0, len(serie) - _PONTOS))
+        return resposta_json(resultado)
+    except (TimeoutError, httpx.TimeoutException):
+        return erro_json("Tempo limite excedido ao consultar a API SGS do BCB. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
+    except httpx.ConnectError:
+        return erro_json("Não foi possível conectar à API do BCB. Verifique sua conexão.")
+    except httpx.HTTPStatusError as e:
+        return erro_json(f"A API SGS do BCB respondeu {e.response.status_code} para a série {codigo}.")
+    except Exception:
+        logger.exception("Erro ao consultar a série %s do SGS", codigo)
+        return erro_json(f"Erro inesperado ao consultar a série {codigo} do SGS.")
+
+
+def ler_ptax(moeda: str) -> str:
+    """Cotações PTAX da moeda nos últimos 30 dias (consulta padrão de ``get_ptax``)."""
+    return get_ptax(moeda=unquote(moeda).upper())
+
+
+def ler_focus_anuais(indicador: str) -> str:
+    """Expectativas anuais do Focus para o indicador (consulta padrão de ``get_expectativas_mercado``)."""
+    return get_expectativas_mercado(indicador=unquote(indicador))
@@ -2,22 +2,24 @@
 
 from __future__ import annotations
 
-import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import date, timedelta
 
-import pandas as pd
-import requests
-from bcb import sgs
+import httpx
 
-from capivara_mcp.tools._validation import erro_json, parse_date, validate_date_range
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._calendario import ajustar_janela, contar_dias_uteis, inicio_por_dias_uteis
+from capivara_mcp.tools._degraus import FORMATOS, codificar_degraus, resolver_formato
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import AVISO_PARCIAL, buscar_series
+from capivara_mcp.tools._validation import erro_json, parse_date, resposta_json, validate_date_range
 
 logger = logging.getLogger("capivara-mcp.selic")
 
 _MAX_DAYS = 365
-_API_TIMEOUT_SECONDS = 30
 
 
 # Códigos das séries no SGS
@@ -27,21 +29,23 @@ _SERIES = {
 }
 
 
-def _fetch_selic(dt_inicio: date, dt_fim: date) -> pd.DataFrame:
+@em_cache("selic")
+def _fetch_selic(dt_inicio: date, dt_fim: date) -> Serie:
     """Busca taxas Selic na API SGS do BCB."""
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(
-            sgs.get,
-            {"selic_meta": _SERIES["meta"], "selic_efetiva": _SERIES["efetiva"]},
-            start=dt_inicio.strftime("%Y-%m-%d"),
-            end=dt_fim.strftime("%Y-%m-%d"),
-        )
-        return future.result(timeout=_API_TIMEOUT_SECONDS)  # type: ignore[return-value]  # sgs.get returns DataFrame for dict input
+    return buscar_series(
+        {"selic_meta": _SERIES["meta"], "selic_efetiva": _SERIES["efetiva"]},
+        dt_inicio,
+        dt_fim,
+    )
 
 
 def get_selic(
     data_inicio: str | None = None,
     data_fim: str | None = None,
+    dias_uteis: int | None = None,
+    formato: str = "registros",
+    cursor: str | None = None,
+    tamanho_pagina: int | None = None,
 ) -> str:
     """Consulta a taxa Selic meta e efetiva do Banco Central do Brasil.
 
@@ -51,11 +55,35 @@ def get_selic(
     Args:
         data_inicio: Data inicial no formato YYYY-MM-DD. Padrão: 30 dias atrás.
         data_fim: Data final no formato YYYY-MM-DD. Padrão: hoje.
+        dias_uteis: Alternativa a data_inicio: quantidade de dias úteis terminando em data_fim
+            (ex: 20 para aproximadamente o último mês útil).
+        formato: "registros" (uma linha por dia), "degraus" (trechos [inicio, fim, valor] de valor
+            constante, muito mais compacto para a Selic meta) ou "auto" (degraus quando as séries
+            mudam raramente). Padrão: "registros".
+        cursor: Cursor de continuação ("proximo_cursor" de uma resposta paginada anterior).
+            Quando informado, os demais parâmetros são ignorados.
+        tamanho_pagina: Se informado, pagina o resultado em formato "registros" com esse número de registros por página.
 
     Returns:
         JSON com os valores da Selic meta e efetiva no período.
     """
-    logger.info("get_selic chamado: data_inicio=%s, data_fim=%s", data_inicio, data_fim)
+    logger.debug(
+        "get_selic chamado: data_inicio=%s, data_fim=%s, dias_uteis=%s, formato=%s",
+        data_inicio,
+        data_fim,
+        dias_uteis,
+        formato,
+    )
+
+    if cursor:
+        return continuar("get_selic", cursor)
+
+    if formato not in FORMATOS:
+        return erro_json(f"Formato '{formato}' não suportado. Use: {', '.join(FORMATOS)}.")
+
+    pagina_err = validar_tamanho_pagina(tamanho_pagina)
+    if pagina_err:
+        return pagina_err
 
     hoje = date.today()
 
@@ -67,11 +95,19 @@ def get_selic(
     else:
         dt_fim = hoje
 
+    if data_inicio and dias_uteis is not None:
+        return erro_json("Informe data_inicio ou dias_uteis, não ambos.")
+
     if data_inicio:
         parsed = parse_date(data_inicio, "data_inicio")
         if isinstance(parsed, str):
             return parsed
         dt_inicio = parsed
+    elif dias_uteis is not None:
+        try:
+            dt_inicio = inicio_por_dias_uteis(dt_fim, dias_uteis)
+        except ValueError as e:
+            return erro_json(f"Valor inválido para 'dias_uteis': {e}")
     else:
         dt_inicio = dt_fim - timedelta(days=30)
 
@@ -79,29 +115,40 @@ def get_selic(
     if range_err:
         return range_err
 
+    # As séries 432 e 11 só têm observações em dias úteis
+    janela = ajustar_janela(dt_inicio, dt_fim)
+    if janela is None:
+        return erro_json(f"Nenhum dia útil entre {dt_inicio} e {dt_fim}; não há dados da Selic no período.")
+
     try:
-        df: pd.DataFrame = _fetch_selic(dt_inicio, dt_fim)
-
-        if df.empty:
-            return json.dumps(
-                {"erro": "Nenhum dado da Selic encontrado no período informado."},
-                ensure_ascii=False,
-            )
-
-        # O índice é a data
-        df.index.name = "data"
-        df = df.reset_index()
-        df["data"] = df["data"].dt.strftime("%Y-%m-%d")
-
-        registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"periodo": {"inicio": str(dt_inicio), "fim": str(dt_fim)}, "selic": registros},
-            ensure_ascii=False,
-        )
-
-    except FuturesTimeoutError:
+        serie: Serie = _fetch_selic(*janela)
+
+        if not serie:
+            return erro_json("Nenhum dado da Selic encontrado no período informado.")
+
+        periodo = {"inicio": str(dt_inicio), "fim": str(dt_fim), "dias_uteis": contar_dias_uteis(*janela)}
+        cabecalho: dict = {"periodo": periodo}
+        if serie.attrs.get("parcial"):
+            cabecalho.update(parcial=True, aviso=AVISO_PARCIAL)
+
+        if formato != "registros":
+            colunas = {col: serie.valores(col) for col in serie.colunas}
+            if resolver_formato(formato, colunas) == "degraus":
+                datas = serie.datas()
+                degraus = {col: codificar_degraus(datas, valores) for col, valores in colunas.items()}
+                return resposta_json({**cabecalho, "formato": "degraus", "selic": degraus})
+
+        if tamanho_pagina is not None:
+            return paginar("get_selic", cabecalho, "selic", serie, tamanho_pagina)
+
+        _rastreio.fase("serializar")
+        return resposta_json({**cabecalho, "selic": serie.registros()})
+
+    except (TimeoutError, httpx.TimeoutException):
         return erro_json("Tempo limite excedido ao consultar a API Selic do BCB. Tente novamente.")
-    except requests.ConnectionError:
+    except CircuitoAberto as e:
+        return erro_json(str(e))
+    except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API do BCB. Verifique sua conexão.")
     except Exception:
         logger.exception("Erro ao consultar Selic")
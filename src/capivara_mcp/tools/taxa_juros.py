@@ -1,38 +1,40 @@
 """Tool para consulta de taxas de juros por instituição financeira do Banco Central."""
 
-# pyright: reportAttributeAccessIssue=false
-
 from __future__ import annotations
 
-import json
 import logging
 import re
 
 import httpx
 import pandas as pd
-from bcb import TaxaJuros
 
-from capivara_mcp.tools._validation import erro_json
+from capivara_mcp.tools import _rastreio
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._olinda import consultar, literal
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._validation import erro_json, resposta_json
 
 logger = logging.getLogger("capivara-mcp.taxa_juros")
 
 _MES_REGEX = re.compile(r"^[A-Z][a-z]{2}-\d{4}$")
 
 
+@em_cache("taxa_juros")
 def _fetch_taxa_juros(mes: str, modalidade: str | None, top: int) -> pd.DataFrame:
     """Busca taxas de juros por mês na API do BCB."""
-    tj = TaxaJuros()
-    ep = tj.get_endpoint("TaxasJurosMensalPorMes")
-    query = ep.query().filter(ep.Mes == mes)
+    filtro = f"Mes eq {literal(mes)}"
     if modalidade:
-        query = query.filter(ep.Modalidade == modalidade)
-    return query.orderby(ep.TaxaJurosAoAno.asc()).limit(top).collect()
+        filtro += f" and Modalidade eq {literal(modalidade)}"
+    return consultar("taxa_juros", "TaxasJurosMensalPorMes", filtro=filtro, ordem="TaxaJurosAoAno asc", top=top)
 
 
 def get_taxa_juros(
     mes: str,
     modalidade: str | None = None,
     top: int = 20,
+    cursor: str | None = None,
+    tamanho_pagina: int | None = None,
 ) -> str:
     """Consulta taxas de juros por instituição financeira do Banco Central.
 
@@ -44,15 +46,25 @@ def get_taxa_juros(
         mes: Mês de referência no formato "MMM-YYYY" (ex: "Jan-2025", "Fev-2025").
         modalidade: Filtro opcional por modalidade de crédito (ex: "CHEQUE ESPECIAL").
         top: Número máximo de resultados. Padrão: 20.
+        cursor: Cursor de continuação ("proximo_cursor" de uma resposta paginada anterior).
+            Quando informado, os demais parâmetros são ignorados.
+        tamanho_pagina: Se informado, pagina o resultado com esse número de registros por página.
 
     Returns:
         JSON com as taxas de juros por instituição para o mês.
     """
-    logger.info("get_taxa_juros chamado: mes=%s, modalidade=%s, top=%d", mes, modalidade, top)
+    logger.debug("get_taxa_juros chamado: mes=%s, modalidade=%s, top=%d", mes, modalidade, top)
+
+    if cursor:
+        return continuar("get_taxa_juros", cursor)
 
     if not _MES_REGEX.match(mes):
         return erro_json(f"Formato de mês inválido: '{mes}'. Use o formato 'MMM-YYYY' (ex: 'Jan-2025').")
 
+    pagina_err = validar_tamanho_pagina(tamanho_pagina)
+    if pagina_err:
+        return pagina_err
+
     try:
         df: pd.DataFrame = _fetch_taxa_juros(mes, modalidade, top)
 
@@ -61,7 +73,7 @@ def get_taxa_juros(
             if modalidade:
                 msg += f" na modalidade '{modalidade}'"
             msg += "."
-            return json.dumps({"erro": msg}, ensure_ascii=False)
+            return erro_json(msg)
 
         colunas = {
             "InstituicaoFinanceira": "instituicao",
@@ -78,14 +90,17 @@ def get_taxa_juros(
             if pd.api.types.is_datetime64_any_dtype(df[col]):
                 df[col] = df[col].dt.strftime("%Y-%m-%d")
 
+        if tamanho_pagina is not None:
+            return paginar("get_taxa_juros", {"mes": mes}, "taxas", df, tamanho_pagina)
+
         registros = df.to_dict(orient="records")
-        return json.dumps(
-            {"mes": mes, "taxas": registros},
-            ensure_ascii=False,
-        )
+        _rastreio.fase("serializar")
+        return resposta_json({"mes": mes, "taxas": registros})
 
     except httpx.TimeoutException:
         return erro_json(f"Tempo limite excedido ao consultar taxas de juros para {mes}. Tente novamente.")
+    except CircuitoAberto as e:
+        return erro_json(str(e))
     except httpx.ConnectError:
         return erro_json("Não foi possível conectar à API de Taxas de Juros do BCB. Verifique sua conexão.")
     except Exception:
@@ -5,6 +5,33 @@ from __future__ import annotations
 from datetime import datetime
 
 import pandas as pd
+import pytest
+
+from capivara_mcp.tools._armazem import ArmazemSeries, armazem_atual
+from capivara_mcp.tools._cache import BackendCache, cache_atual
+from capivara_mcp.tools._serie import Serie
+
+
+@pytest.fixture(autouse=True)
+def _sem_cache(monkeypatch):
+    """Desliga o cache de resultados e o armazém de séries: cada teste vê as chamadas aos ``_fetch_*``."""
+    monkeypatch.setenv("CAPIVARA_CACHE", "nenhum")
+    monkeypatch.setenv("CAPIVARA_CACHE_SNAPSHOT", "nenhum")
+    monkeypatch.delenv("CAPIVARA_SERIES_DIRETORIO", raising=False)
+
+
+def cache_configurado() -> BackendCache:
+    """O backend de cache de um teste que o ligou (``cache_atual()`` sem o None)."""
+    backend = cache_atual()
+    assert backend is not None, "cache desligado"
+    return backend
+
+
+def armazem_configurado() -> ArmazemSeries:
+    """O armazém de séries de um teste que definiu ``CAPIVARA_SERIES_DIRETORIO``."""
+    armazem = armazem_atual()
+    assert armazem is not None, "CAPIVARA_SERIES_DIRETORIO vazio"
+    return armazem
 
 
 def make_ptax_df(n: int = 3) -> pd.DataFrame:
@@ -39,6 +66,11 @@ def make_sgs_df(columns: dict[str, float], n: int = 5) -> pd.DataFrame:
     return df
 
 
+def make_sgs_serie(columns: dict[str, float], n: int = 5) -> Serie:
+    """Same data as ``make_sgs_df``, in the compact representation returned by the SGS fetches."""
+    return Serie.de_dataframe(make_sgs_df(columns, n))
+
+
 def make_expectativas_df(indicador: str = "Selic", n: int = 3) -> pd.DataFrame:
     """Build a DataFrame matching Expectativas ExpectativasMercadoAnuais response shape."""
     rows = []
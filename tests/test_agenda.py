@@ -0,0 +1,237 @@
+"""Tests for _agenda.py — background refresh aligned with BCB release times."""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta
+from typing import IO
+from unittest.mock import patch
+
+import pytest
+
+from capivara_mcp.tools import _agenda, _cache
+from capivara_mcp.tools._agenda import BRT, Agenda, Tarefa, primeiro_dia_util_da_semana
+from capivara_mcp.tools._cache import em_cache
+from capivara_mcp.tools._calendario import eh_dia_util
+from capivara_mcp.tools._validation import erro_json
+from tests.conftest import cache_configurado, make_ptax_df
+
+
+def _tarefa(chamadas=(), mensal=False, dias=eh_dia_util):
+    return Tarefa("teste", time(13, 20), dias, list(chamadas), mensal=mensal)
+
+
+def _proxima(tarefa: Tarefa) -> datetime:
+    assert tarefa.proxima is not None
+    return tarefa.proxima
+
+
+def _outro_processo_com_sqlite(monkeypatch, tmp_path) -> IO[str]:
+    """Liga o cache SQLite e toma a trava da agenda dele, como outro processo faria."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+    monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache.sqlite3"))
+    destino = _cache.destino_compartilhado()
+    assert destino is not None
+    trava = _agenda._travar(destino)
+    assert trava is not None
+    return trava
+
+
+@pytest.fixture(autouse=True)
+def _sem_jitter(monkeypatch):
+    monkeypatch.setenv("CAPIVARA_AGENDA_JITTER_SEGUNDOS", "0")
+
+
+class TestCalendario:
+    def test_next_release_skips_weekend(self):
+        sexta_tarde = datetime(2025, 1, 3, 14, 0, tzinfo=BRT)
+        assert _tarefa().publicacao(sexta_tarde) == datetime(2025, 1, 6, 13, 20, tzinfo=BRT)
+
+    def test_same_day_before_release(self):
+        manha = datetime(2025, 1, 6, 9, 0, tzinfo=BRT)
+        assert _tarefa().publicacao(manha) == datetime(2025, 1, 6, 13, 20, tzinfo=BRT)
+
+    def test_focus_moves_after_carnival(self):
+        assert primeiro_dia_util_da_semana(date(2025, 2, 24))  # segunda comum
+        assert not primeiro_dia_util_da_semana(date(2025, 2, 25))
+        assert not primeiro_dia_util_da_semana(date(2025, 3, 3))  # segunda de Carnaval
+        assert primeiro_dia_util_da_semana(date(2025, 3, 5))  # quarta de cinzas
+
+    def test_default_tasks(self):
+        nomes = [t.nome for t in _agenda.tarefas_padrao()]
+        assert nomes == ["ptax", "focus", "sgs_diario", "ipca_inpc", "igpm"]
+
+
+class TestConclusao:
+    agora = datetime(2025, 1, 6, 13, 21, tzinfo=BRT)
+
+    def test_new_content_schedules_next_release(self):
+        tarefa = _tarefa()
+        tarefa.resumo = "antigo"
+        Agenda([tarefa]).concluir(tarefa, self.agora, None, "novo")
+        assert tarefa.proxima == datetime(2025, 1, 7, 13, 20, tzinfo=BRT)
+        assert tarefa.ultimo_resultado == "novo"
+
+    def test_unchanged_content_is_late_publication(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_AGENDA_RETENTATIVA_SEGUNDOS", "100")
+        tarefa = _tarefa()
+        tarefa.resumo = "igual"
+        agenda = Agenda([tarefa])
+        agenda.concluir(tarefa, self.agora, None, "igual")
+        assert tarefa.ultimo_resultado == "publicação atrasada"
+        assert timedelta(seconds=100) <= _proxima(tarefa) - self.agora <= timedelta(seconds=150)
+        agenda.concluir(tarefa, self.agora, None, "igual")
+        assert timedelta(seconds=200) <= _proxima(tarefa) - self.agora <= timedelta(seconds=300)
+
+    def test_retries_bounded(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_AGENDA_TENTATIVAS", "2")
+        tarefa = _tarefa()
+        agenda = Agenda([tarefa])
+        for _ in range(3):
+            agenda.concluir(tarefa, self.agora, "HTTP 503", "")
+        assert tarefa.tentativas == 0
+        assert tarefa.proxima == datetime(2025, 1, 7, 13, 20, tzinfo=BRT)
+
+    def test_monthly_checks_daily_until_new_data(self):
+        tarefa = _tarefa(mensal=True, dias=lambda d: eh_dia_util(d) and 8 <= d.day <= 15)
+        agora = datetime(2025, 1, 8, 13, 21, tzinfo=BRT)
+        agenda = Agenda([tarefa])
+        agenda.concluir(tarefa, agora, None, "dezembro")  # primeira execução: só a referência
+        assert _proxima(tarefa).date() == date(2025, 1, 9)
+        agenda.concluir(tarefa, agora + timedelta(days=1), None, "dezembro")
+        assert tarefa.tentativas == 0 and _proxima(tarefa).date() == date(2025, 1, 10)
+        agenda.concluir(tarefa, agora + timedelta(days=2), None, "janeiro")
+        assert _proxima(tarefa).date() == date(2025, 2, 10)  # mês concluído
+
+
+class TestRenovacao:
+    @pytest.fixture
+    def sqlite(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+        monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache.sqlite3"))
+        yield
+        _cache._backends.clear()
+
+    async def test_bypasses_cache_and_stores_until_next_release(self, sqlite):
+        buscas = []
+
+        @em_cache("teste")
+        def _fetch(x):
+            buscas.append(x)
+            return make_ptax_df()
+
+        def get_teste():
+            return json.dumps({"linhas": len(_fetch(1))})
+
+        get_teste()
+        tarefa = _tarefa([(get_teste, {})])
+        with patch.object(_agenda, "_agora", return_value=datetime(2025, 1, 6, 13, 21, tzinfo=BRT)):
+            await Agenda([tarefa]).renovar(tarefa)
+        assert len(buscas) == 2
+        assert tarefa.ultimo_resultado == "novo"
+        ((_, _, restante),) = list(cache_configurado().itens())
+        assert restante > 3600  # até a próxima publicação, não o TTL padrão
+
+    async def test_sliding_header_is_not_new_data(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_AGENDA_RETENTATIVA_SEGUNDOS", "100")
+        hoje = {"data": date(2025, 1, 6)}
+
+        def get_teste():
+            fim = hoje["data"]
+            return json.dumps(
+                {
+                    "periodo": {"inicio": str(fim - timedelta(days=30)), "fim": str(fim)},
+                    "valores": [{"data": "2025-01-02", "valor": 1.0}, {"data": "2025-01-03", "valor": 1.1}],
+                }
+            )
+
+        tarefa = _tarefa([(get_teste, {})])
+        agenda = Agenda([tarefa])
+        for dia in (6, 7):
+            hoje["data"] = date(2025, 1, dia)
+            with patch.object(_agenda, "_agora", return_value=datetime(2025, 1, dia, 13, 21, tzinfo=BRT)):
+                await agenda.renovar(tarefa)
+        assert tarefa.ultimo_resultado == "publicação atrasada"
+        assert tarefa.tentativas == 1
+
+    async def test_day_window_expires_at_midnight(self, sqlite):
+        @em_cache("teste")
+        def _fetch(x):
+            return make_ptax_df()
+
+        tarefa = _tarefa([(lambda: json.dumps({"linhas": len(_fetch(1))}), {})])
+        tarefa.janela_do_dia = True
+        with patch.object(_agenda, "_agora", return_value=datetime(2025, 1, 6, 13, 21, tzinfo=BRT)):
+            await Agenda([tarefa]).renovar(tarefa)
+        ((_, _, restante),) = list(cache_configurado().itens())
+        assert restante <= (10 * 60 + 39) * 60
+
+    async def test_tool_error_retried(self):
+        tarefa = _tarefa([(lambda: erro_json("API fora do ar"), {})])
+        await Agenda([tarefa]).renovar(tarefa)
+        assert tarefa.ultimo_resultado == "API fora do ar"
+        assert tarefa.tentativas == 1
+
+    async def test_yields_to_interactive_calls(self, monkeypatch):
+        ocupado = iter([True, True, False])
+        monkeypatch.setattr(_agenda, "_PAUSA_CONTRAPRESSAO", 0)
+        monkeypatch.setattr(_agenda._limites, "ocupado", lambda: next(ocupado))
+        tarefa = _tarefa([(lambda: "{}", {})])
+        await Agenda([tarefa]).renovar(tarefa)
+        assert next(ocupado, "fim") == "fim"
+
+
+class TestProcesso:
+    def test_single_runner_per_shared_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        primeira = _agenda._travar("sqlite:/dados/cache.sqlite3")
+        assert primeira is not None
+        try:
+            assert _agenda._travar("sqlite:/dados/cache.sqlite3") is None
+            outra = _agenda._travar("sqlite:/outros/cache.sqlite3")
+            assert outra is not None
+            outra.close()
+        finally:
+            primeira.close()
+
+    def test_shared_destination(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("CAPIVARA_CACHE", "memoria")
+        assert _cache.destino_compartilhado() is None
+        monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+        monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache.sqlite3"))
+        assert _cache.destino_compartilhado() == f"sqlite:{tmp_path / 'cache.sqlite3'}"
+
+    async def test_memory_cache_runs_without_lock(self, monkeypatch, tmp_path):
+        outro_processo = _outro_processo_com_sqlite(monkeypatch, tmp_path)
+        monkeypatch.setenv("CAPIVARA_CACHE", "memoria")
+        rodou = []
+
+        async def _rodar(agenda):
+            rodou.append(_agenda.estado()["ativa"])
+
+        monkeypatch.setattr(Agenda, "rodar", _rodar)
+        try:
+            await _agenda.rodar()
+        finally:
+            outro_processo.close()
+        assert rodou == [True]
+
+    async def test_shared_cache_skipped_when_locked(self, monkeypatch, tmp_path):
+        outro_processo = _outro_processo_com_sqlite(monkeypatch, tmp_path)
+        rodou = []
+
+        async def _rodar(agenda):
+            rodou.append(True)
+
+        monkeypatch.setattr(Agenda, "rodar", _rodar)
+        try:
+            await _agenda.rodar()
+        finally:
+            outro_processo.close()
+        assert rodou == []
+
+    async def test_disabled_offline(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_OFFLINE", "pacote.cpvb")
+        await _agenda.rodar()
+        assert _agenda.estado() == {"ativa": False}
@@ -0,0 +1,230 @@
+"""Tests for _armazem.py — memory-mapped SGS series files."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from capivara_mcp.tools import _armazem
+from capivara_mcp.tools._armazem import ArmazemSeries, ArquivoSerie
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import buscar_series
+
+_PATCH = "capivara_mcp.tools._sgs._buscar_bloco"
+
+
+def _pontos(nome, inicio, fim, codigo=1):
+    """Um ponto por dia em [inicio, fim], valor = dia do mês + código/1000."""
+    dados = []
+    d = inicio
+    while d <= fim:
+        dados.append({"data": d.strftime("%d/%m/%Y"), "valor": str(d.day + codigo / 1000)})
+        d = date.fromordinal(d.toordinal() + 1)
+    return Serie.de_sgs(nome, dados)
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return _pontos(nome, dt_inicio, min(dt_fim, date(2025, 3, 31)), codigo)
+
+
+@pytest.fixture
+def armazem(monkeypatch, tmp_path):
+    monkeypatch.setenv("CAPIVARA_SERIES_DIRETORIO", str(tmp_path / "series"))
+    return _armazem.armazem_atual()
+
+
+class TestArquivo:
+    def test_write_then_mmap_slice(self, tmp_path):
+        armazem = ArmazemSeries(str(tmp_path))
+        arquivo = armazem.gravar(
+            432, date(2025, 1, 1), date(2025, 1, 31), _pontos("x", date(2025, 1, 1), date(2025, 1, 31))
+        )
+        assert isinstance(arquivo.dias, memoryview) and arquivo.dias.readonly
+        fatia = arquivo.fatiar("selic", date(2025, 1, 10), date(2025, 1, 12))
+        assert fatia.datas() == ["2025-01-10", "2025-01-11", "2025-01-12"]
+        assert fatia.valores("selic") == [10.001, 11.001, 12.001]
+        assert isinstance(fatia.dias, memoryview)
+        assert fatia.dias.obj is arquivo.dias.obj  # fatia sem cópia do mapeamento
+
+    def test_fixed_layout(self, tmp_path):
+        ArmazemSeries(str(tmp_path)).gravar(
+            11, date(2025, 1, 1), date(2025, 1, 3), _pontos("x", date(2025, 1, 1), date(2025, 1, 3))
+        )
+        conteudo = (tmp_path / "sgs-11.bin").read_bytes()
+        assert conteudo[:4] == b"CPSA"
+        assert len(conteudo) == 24 + 16 + 3 * 8  # cabeçalho + 3 datas alinhadas a 8 + 3 valores
+
+    def test_append_is_atomic_replace(self, tmp_path):
+        armazem = ArmazemSeries(str(tmp_path))
+        antigo = armazem.gravar(1, date(2025, 1, 1), date(2025, 1, 5), _pontos("x", date(2025, 1, 1), date(2025, 1, 5)))
+        leitura_antiga = antigo.fatiar("x", date(2025, 1, 1), date(2025, 12, 31))
+        novo = armazem.gravar(1, date(2025, 1, 6), date(2025, 1, 8), _pontos("x", date(2025, 1, 6), date(2025, 1, 8)))
+        assert len(novo) == 8
+        assert len(leitura_antiga) == 5  # quem já lia o arquivo antigo não é afetado
+        assert os.stat(novo.caminho).st_ino != antigo.identidade[0]
+        assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+    def test_missing_ranges(self, tmp_path):
+        armazem = ArmazemSeries(str(tmp_path))
+        arquivo = armazem.gravar(
+            1, date(2025, 2, 1), date(2025, 2, 28), _pontos("x", date(2025, 2, 1), date(2025, 2, 20))
+        )
+        # O fim consultado só avança até o último ponto publicado
+        assert arquivo.faltantes(date(2025, 1, 15), date(2025, 3, 10)) == [
+            (date(2025, 1, 15), date(2025, 1, 31)),
+            (date(2025, 2, 21), date(2025, 3, 10)),
+        ]
+        assert arquivo.faltantes(date(2025, 2, 5), date(2025, 2, 10)) == []
+
+    def test_reopens_after_other_process_replaces(self, tmp_path):
+        armazem = ArmazemSeries(str(tmp_path))
+        armazem.gravar(1, date(2025, 1, 1), date(2025, 1, 5), _pontos("x", date(2025, 1, 1), date(2025, 1, 5)))
+        aberto = armazem.abrir(1)
+        assert armazem.abrir(1) is aberto
+        ArmazemSeries(str(tmp_path)).gravar(
+            1, date(2025, 1, 6), date(2025, 1, 6), _pontos("x", date(2025, 1, 6), date(2025, 1, 6))
+        )
+        estendido = armazem.abrir(1)
+        assert estendido is not None and len(estendido) == 6
+
+    def test_shared_with_child_process(self, tmp_path):
+        ArmazemSeries(str(tmp_path)).gravar(
+            7, date(2025, 1, 1), date(2025, 1, 9), _pontos("x", date(2025, 1, 1), date(2025, 1, 9))
+        )
+        codigo = (
+            "import sys; from datetime import date;"
+            "from capivara_mcp.tools._armazem import ArmazemSeries;"
+            "a = ArmazemSeries(sys.argv[1]).abrir(7);"
+            "print(a.fatiar('x', date(2025, 1, 2), date(2025, 1, 3)).valores('x'))"
+        )
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo, str(tmp_path)], capture_output=True, text=True, check=True
+        )
+        assert saida.stdout.strip() == "[2.001, 3.001]"
+
+    def test_concurrent_writers_do_not_lose_points(self, tmp_path):
+        # Dois workers (instâncias distintas, sem a trava de threads em comum) estendendo a mesma série
+        primeiro, segundo = ArmazemSeries(str(tmp_path)), ArmazemSeries(str(tmp_path))
+        primeiro.gravar(1, date(2025, 1, 1), date(2025, 1, 10), _pontos("x", date(2025, 1, 1), date(2025, 1, 10)))
+        entrou, libera = threading.Event(), threading.Event()
+        escrever = primeiro._escrever
+
+        def escrever_devagar(caminho, partes):
+            entrou.set()
+            libera.wait(5)
+            escrever(caminho, partes)
+
+        with patch.object(primeiro, "_escrever", escrever_devagar):
+            a = threading.Thread(
+                target=primeiro.gravar,
+                args=(1, date(2025, 1, 11), date(2025, 1, 20), _pontos("x", date(2025, 1, 11), date(2025, 1, 20))),
+            )
+            b = threading.Thread(
+                target=segundo.gravar,
+                args=(1, date(2025, 1, 21), date(2025, 1, 31), _pontos("x", date(2025, 1, 21), date(2025, 1, 31))),
+            )
+            a.start()
+            assert entrou.wait(5)
+            b.start()
+            b.join(0.2)
+            assert b.is_alive()  # espera a trava da série
+            libera.set()
+            a.join(5)
+            b.join(5)
+        estendido = ArmazemSeries(str(tmp_path)).abrir(1)
+        assert estendido is not None and len(estendido) == 31
+
+    def test_corrupt_file_rejected(self, tmp_path):
+        (tmp_path / "sgs-1.bin").write_bytes(b"CPSA" + b"\0" * 30)
+        with pytest.raises(ValueError):
+            ArquivoSerie(str(tmp_path / "sgs-1.bin"))
+
+
+class TestBuscarSeriesComArmazem:
+    @patch(_PATCH, side_effect=_bloco)
+    def test_second_call_served_from_file(self, mock_bloco, armazem):
+        primeira = buscar_series({"a": 1, "b": 2}, date(2025, 1, 1), date(2025, 1, 31))
+        assert mock_bloco.call_count == 2
+        segunda = buscar_series({"a": 1, "b": 2}, date(2025, 1, 10), date(2025, 1, 20))
+        assert mock_bloco.call_count == 2
+        assert segunda.registros() == primeira.fatiar(date(2025, 1, 10), date(2025, 1, 20)).registros()
+        assert segunda.attrs["parcial"] is False
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_only_missing_tail_fetched(self, mock_bloco, armazem):
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        serie = buscar_series({"a": 1}, date(2025, 1, 20), date(2025, 2, 10))
+        assert mock_bloco.call_args.args[2:] == (date(2025, 2, 1), date(2025, 2, 10))
+        assert serie.datas()[0] == "2025-01-20" and serie.datas()[-1] == "2025-02-10"
+        assert len(armazem.abrir(1)) == 41
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_unpublished_days_refetched(self, mock_bloco, armazem):
+        buscar_series({"a": 1}, date(2025, 3, 1), date(2025, 4, 10))  # dados só até 31/03
+        buscar_series({"a": 1}, date(2025, 3, 1), date(2025, 4, 10))
+        assert mock_bloco.call_args.args[2:] == (date(2025, 4, 1), date(2025, 4, 10))
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_disabled_by_default(self, mock_bloco, monkeypatch):
+        monkeypatch.delenv("CAPIVARA_SERIES_DIRETORIO", raising=False)
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 5))
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 5))
+        assert mock_bloco.call_count == 2
+        assert _armazem.estatisticas() == {"diretorio": None}
+
+
+class TestRevisao:
+    @pytest.fixture
+    def revisavel(self, monkeypatch, armazem):
+        monkeypatch.setitem(_armazem.POLITICAS_REVISAO, 1, _armazem.Revisao(pontos=5, dias=100_000))
+        return armazem
+
+    def test_tail_limited_by_points_and_age(self, tmp_path):
+        arquivo = ArmazemSeries(str(tmp_path)).gravar(
+            1, date(2025, 1, 1), date(2025, 1, 31), _bloco("a", 1, date(2025, 1, 1), date(2025, 1, 31))
+        )
+        assert arquivo.cauda(_armazem.Revisao(pontos=5, dias=365), date(2025, 2, 1)) == date(2025, 1, 27)
+        assert arquivo.cauda(_armazem.Revisao(pontos=5, dias=2), date(2025, 2, 1)) == date(2025, 1, 30)
+        assert arquivo.cauda(_armazem.Revisao(pontos=5, dias=0), date(2025, 3, 1)) is None
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_only_mutable_tail_rechecked(self, mock_bloco, revisavel):
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        assert mock_bloco.call_args.args[2:] == (date(2025, 1, 27), date(2025, 1, 31))
+        registro = revisavel.revisao(1)
+        assert registro["politica"] == {"pontos": 5, "dias": 100_000}
+        assert "revisoes" not in registro
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))  # verificação ainda válida
+        assert mock_bloco.call_count == 2
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_history_outside_tail_not_rechecked(self, mock_bloco, revisavel):
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 20))
+        assert mock_bloco.call_count == 1
+
+    def test_revision_detected_and_recorded(self, revisavel, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_REVISAO_INTERVALO_HORAS", "0")
+        with patch(_PATCH, side_effect=_bloco):
+            buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        with patch(_PATCH, side_effect=lambda nome, codigo, ini, fim: _bloco(nome, 2, ini, fim)):
+            serie = buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        assert serie.registros()[-1]["a"] == 31.002  # valor revisto
+        assert serie.registros()[0]["a"] == 1.001  # histórico imutável preservado
+        (revisao,) = revisavel.revisao(1)["revisoes"]
+        assert (revisao["inicio"], revisao["fim"]) == ("2025-01-27", "2025-01-31")
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_tail_merged_with_new_points(self, mock_bloco, revisavel):
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 1, 31))
+        buscar_series({"a": 1}, date(2025, 1, 1), date(2025, 2, 10))
+        assert mock_bloco.call_args.args[2:] == (date(2025, 1, 27), date(2025, 2, 10))
+        assert mock_bloco.call_count == 2
+        assert len(revisavel.abrir(1)) == 41
@@ -0,0 +1,178 @@
+"""Tests for resources and _assinaturas.py — subscriptions and update notifications."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import mcp.types as types
+import pytest
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.shared.session import RequestResponder
+from pydantic import AnyUrl
+
+from capivara_mcp.server import assinaturas, mcp
+from capivara_mcp.tools._assinaturas import Assinaturas
+from capivara_mcp.tools._validation import erro_json
+from capivara_mcp.tools.recursos import ler_sgs
+from tests.conftest import make_sgs_serie
+
+_PATCH = "capivara_mcp.tools._sgs._buscar_bloco"
+_SGS_432 = AnyUrl("sgs://432")
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: float(codigo)}, n=30)
+
+
+class _Sessao:
+    def __init__(self):
+        self.uris = []
+
+    async def send_resource_updated(self, uri):
+        self.uris.append(str(uri))
+
+
+class _Leitor:
+    def __init__(self):
+        self.conteudo = "a"
+        self.leituras = 0
+
+    async def __call__(self, uri):
+        self.leituras += 1
+        return self.conteudo
+
+
+def _assinatura_anunciada(session: ClientSession) -> bool | None:
+    capacidades = session.get_server_capabilities()
+    assert capacidades is not None and capacidades.resources is not None
+    return capacidades.resources.subscribe
+
+
+class TestAssinaturas:
+    async def test_one_read_for_many_subscribers(self):
+        ler = _Leitor()
+        assinaturas = Assinaturas(ler)
+        sessoes = [_Sessao() for _ in range(5)]
+        for sessao in sessoes:
+            await assinaturas.assinar("sgs://432", sessao)
+        assert ler.leituras == 1
+        ler.conteudo = "b"
+        assert await assinaturas.verificar() == ["sgs://432"]
+        assert ler.leituras == 2
+        assert all(s.uris == ["sgs://432"] for s in sessoes)
+
+    async def test_unchanged_content_not_notified(self):
+        ler = _Leitor()
+        assinaturas = Assinaturas(ler)
+        sessao = _Sessao()
+        await assinaturas.assinar("ptax://USD", sessao)
+        assert await assinaturas.verificar() == []
+        assert sessao.uris == []
+
+    async def test_sliding_period_not_notified(self):
+        ler = _Leitor()
+        cotacoes = [{"data_hora": "2025-01-03 13:00:00", "cotacao_venda": 6.1}]
+        ler.conteudo = json.dumps({"periodo": {"inicio": "2024-12-04", "fim": "2025-01-03"}, "cotacoes": cotacoes})
+        assinaturas = Assinaturas(ler)
+        sessao = _Sessao()
+        await assinaturas.assinar("ptax://USD", sessao)
+        ler.conteudo = json.dumps({"periodo": {"inicio": "2024-12-05", "fim": "2025-01-04"}, "cotacoes": cotacoes})
+        assert await assinaturas.verificar() == []
+        assert sessao.uris == []
+
+    async def test_upstream_error_not_notified(self):
+        ler = _Leitor()
+        assinaturas = Assinaturas(ler)
+        sessao = _Sessao()
+        await assinaturas.assinar("sgs://432", sessao)
+        ler.conteudo = erro_json("Não foi possível conectar à API do BCB. Verifique sua conexão.")
+        assert await assinaturas.verificar() == []
+        ler.conteudo = "a"
+        assert await assinaturas.verificar() == []
+        assert sessao.uris == []
+
+    async def test_error_on_subscribe_not_used_as_baseline(self):
+        ler = _Leitor()
+        ler.conteudo = erro_json("Tempo limite excedido ao consultar a API SGS do BCB. Tente novamente.")
+        assinaturas = Assinaturas(ler)
+        sessao = _Sessao()
+        await assinaturas.assinar("sgs://432", sessao)
+        ler.conteudo = "a"
+        assert await assinaturas.verificar() == []
+        ler.conteudo = "b"
+        assert await assinaturas.verificar() == ["sgs://432"]
+        assert sessao.uris == ["sgs://432"]
+
+    async def test_cancelled_uri_dropped(self):
+        ler = _Leitor()
+        assinaturas = Assinaturas(ler)
+        sessao = _Sessao()
+        await assinaturas.assinar("ptax://USD", sessao)
+        assinaturas.cancelar("ptax://USD", sessao)
+        await assinaturas.verificar()
+        assert ler.leituras == 1
+        assert assinaturas.estado()["uris"] == 0
+
+
+class TestRecursos:
+    def test_invalid_sgs_code(self):
+        assert "erro" in json.loads(ler_sgs("selic"))
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_sgs_returns_last_points(self, _):
+        data = json.loads(ler_sgs("432"))
+        assert data["codigo"] == 432
+        assert len(data["dados"]) == 20
+        assert data["dados"][-1]["valor"] == 432.29
+
+    async def test_templates_listed(self):
+        async with create_connected_server_and_client_session(mcp) as session:
+            result = await session.list_resource_templates()
+        uris = {t.uriTemplate for t in result.resourceTemplates}
+        assert {"sgs://{codigo}", "ptax://{moeda}", "focus://anuais/{indicador}"} <= uris
+
+    async def test_subscribe_capability_advertised(self):
+        async with create_connected_server_and_client_session(mcp) as session:
+            assert _assinatura_anunciada(session) is True
+
+    async def test_subscribe_refused_with_several_workers(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "4")
+        async with create_connected_server_and_client_session(mcp) as session:
+            assert _assinatura_anunciada(session) is False
+            with pytest.raises(McpError, match="vários workers"):
+                await session.subscribe_resource(_SGS_432)
+        assert assinaturas.estado()["uris"] == 0
+
+
+async def test_subscriber_notified_on_new_data():
+    notificacoes = []
+
+    async def on_message(
+        message: RequestResponder[types.ServerRequest, types.ClientResult] | types.ServerNotification | Exception,
+    ) -> None:
+        if isinstance(message, types.ServerNotification):
+            notificacoes.append(message.root)
+
+    valor = [1.0]
+
+    def _bloco_mutavel(nome, codigo, dt_inicio, dt_fim):
+        return make_sgs_serie({nome: valor[0]}, n=30)
+
+    with patch(_PATCH, side_effect=_bloco_mutavel):
+        async with create_connected_server_and_client_session(mcp, message_handler=on_message) as session:
+            result = await session.read_resource(_SGS_432)
+            conteudo = result.contents[0]
+            assert isinstance(conteudo, types.TextResourceContents)
+            assert json.loads(conteudo.text)["dados"][0]["valor"] == 1.1
+            await session.subscribe_resource(_SGS_432)
+            valor[0] = 2.0
+            assert await assinaturas.verificar() == ["sgs://432"]
+            await session.send_ping()  # garante que a notificação já chegou
+            await session.unsubscribe_resource(_SGS_432)
+    await assinaturas.verificar()
+    atualizacoes = [n for n in notificacoes if isinstance(n, types.ResourceUpdatedNotification)]
+    assert [str(n.params.uri) for n in atualizacoes] == ["sgs://432"]
+    assert assinaturas.estado()["uris"] == 0
@@ -6,11 +6,11 @@ import json
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from unittest.mock import patch
 
-import pandas as pd
-import requests
+import httpx
 
+from capivara_mcp.tools._serie import Serie
 from capivara_mcp.tools.atividade import get_atividade_economica
-from tests.conftest import make_sgs_df
+from tests.conftest import make_sgs_serie
 
 _PATCH = "capivara_mcp.tools.atividade._fetch_atividade"
 
@@ -18,7 +18,7 @@ _PATCH = "capivara_mcp.tools.atividade._fetch_atividade"
 class TestGetAtividadeSuccess:
     @patch(_PATCH)
     def test_pib_mensal_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"PIB mensal": 150.0}, n=3)
+        mock_fetch.return_value = make_sgs_serie({"PIB mensal": 150.0}, n=3)
         result = get_atividade_economica(indicador="PIB mensal", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indicador"] == "PIB mensal"
@@ -28,7 +28,7 @@ class TestGetAtividadeSuccess:
 
     @patch(_PATCH)
     def test_divida_pib_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"Dívida bruta/PIB": 75.0}, n=2)
+        mock_fetch.return_value = make_sgs_serie({"Dívida bruta/PIB": 75.0}, n=2)
         result = get_atividade_economica(indicador="Dívida bruta/PIB", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indicador"] == "Dívida bruta/PIB"
@@ -36,7 +36,7 @@ class TestGetAtividadeSuccess:
 
     @patch(_PATCH)
     def test_resultado_primario_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"Resultado primário": -10.0}, n=4)
+        mock_fetch.return_value = make_sgs_serie({"Resultado primário": -10.0}, n=4)
         result = get_atividade_economica(indicador="Resultado primário", data_inicio="2025-01-02", data_fim="2025-06-01")
         data = json.loads(result)
         assert data["indicador"] == "Resultado primário"
@@ -44,7 +44,7 @@ class TestGetAtividadeSuccess:
 
     @patch(_PATCH)
     def test_records_have_expected_keys(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"PIB mensal": 150.0}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"PIB mensal": 150.0}, n=1)
         result = get_atividade_economica(indicador="PIB mensal", data_inicio="2025-01-02", data_fim="2025-01-31")
         data = json.loads(result)
         record = data["valores"][0]
@@ -53,7 +53,7 @@ class TestGetAtividadeSuccess:
 
     @patch(_PATCH)
     def test_dates_formatted_as_iso(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"PIB mensal": 150.0}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"PIB mensal": 150.0}, n=1)
         result = get_atividade_economica(indicador="PIB mensal", data_inicio="2025-01-02", data_fim="2025-01-31")
         data = json.loads(result)
         assert data["valores"][0]["data"] == "2025-01-02"
@@ -62,7 +62,7 @@ class TestGetAtividadeSuccess:
 class TestGetAtividadeEmptyResponse:
     @patch(_PATCH)
     def test_empty_dataframe(self, mock_fetch):
-        mock_fetch.return_value = pd.DataFrame()
+        mock_fetch.return_value = Serie.vazia()
         result = get_atividade_economica(indicador="PIB mensal", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert "erro" in data
@@ -106,7 +106,7 @@ class TestGetAtividadeErrors:
         assert "erro" in data
         assert "Tempo limite" in data["erro"]
 
-    @patch(_PATCH, side_effect=requests.ConnectionError())
+    @patch(_PATCH, side_effect=httpx.ConnectError("falha"))
     def test_connection_error(self, _):
         result = get_atividade_economica(indicador="PIB mensal", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
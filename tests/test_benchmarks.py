@@ -0,0 +1,54 @@
+"""Tests for benchmarks/transformacoes.py — the post-fetch microbenchmarks stay runnable."""
+
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+from benchmarks import transformacoes
+
+from tests.conftest import make_ptax_df
+
+
+class TestCasos:
+    def test_every_case_measures_real_records(self):
+        documento = transformacoes.executar(list(transformacoes.CASOS), [10], repeticoes=1)
+        assert {r["tool"] for r in documento["resultados"]} == set(transformacoes.CASOS)
+        for r in documento["resultados"]:
+            assert r["linhas"] == 10 and r["repeticoes"] == 1
+            assert r["tempo_ms"]["min"] > 0 and r["pico_memoria_bytes"] > 0 and r["bytes_resposta"] > 0
+        assert documento["ambiente"]["pandas"]
+
+    def test_error_response_is_not_measured(self):
+        caso = transformacoes.CASOS["get_ptax"]
+        quebrado = transformacoes.Caso(caso.modulo, caso.tool, caso.busca, lambda n: pd.DataFrame(), caso.chave)
+        with pytest.raises(RuntimeError, match="registros esperados"):
+            transformacoes.medir(quebrado, 10, repeticoes=1)
+
+    def test_large_sizes_repeat_a_block(self, monkeypatch):
+        monkeypatch.setattr(transformacoes, "_BLOCO", 4)
+        df = transformacoes._escalar(make_ptax_df)(10)
+        assert len(df) == 10 and list(df.index) == list(range(10))
+        assert df["cotacaoCompra"].iloc[4] == df["cotacaoCompra"].iloc[0]
+
+
+class TestResultados:
+    def test_main_writes_json_and_compares(self, tmp_path, capsys):
+        base, atual = tmp_path / "base.json", tmp_path / "atual.json"
+        argumentos = ["--tools", "get_selic", "--tamanhos", "10", "--repeticoes", "1"]
+        assert transformacoes.main([*argumentos, "--saida", str(base)]) == 0
+        assert transformacoes.main([*argumentos, "--saida", str(atual), "--comparar", str(base)]) == 0
+        (resultado,) = json.loads(atual.read_text())["resultados"]
+        assert resultado["tool"] == "get_selic"
+        assert "tempo" in capsys.readouterr().out.splitlines()[-1]
+
+    def test_compare_ratios(self):
+        def doc(ms, pico):
+            return {
+                "resultados": [{"tool": "get_ptax", "linhas": 10, "tempo_ms": {"min": ms}, "pico_memoria_bytes": pico}]
+            }
+
+        assert transformacoes.comparar(doc(2.0, 100), doc(1.0, 150)) == [
+            {"tool": "get_ptax", "linhas": 10, "tempo": 0.5, "memoria": 1.5}
+        ]
@@ -0,0 +1,500 @@
+"""Tests for _cache.py — pluggable backends, versioned format and the em_cache decorator."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from capivara_mcp.tools import _cache
+from capivara_mcp.tools._cache import (
+    CacheArquivos,
+    CacheMemoria,
+    CacheRedis,
+    CacheSQLite,
+    ErroRedis,
+    desserializar,
+    em_cache,
+    serializar,
+)
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._serie import Serie
+from tests.conftest import make_ptax_df, make_sgs_df, make_sgs_serie
+
+
+class _RedisFalso(socketserver.ThreadingTCPServer):
+    """Servidor local que fala RESP2 com o subconjunto de comandos usado pelo CacheRedis."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, porta: int = 0):
+        self.dados: dict[bytes, tuple[bytes, float]] = {}
+        self.conexoes: list[socket.socket] = []
+        super().__init__(("127.0.0.1", porta), _RedisHandler)
+
+    def encerrar(self):
+        """Para como um servidor reiniciado: fecha também as conexões dos clientes."""
+        self.shutdown()
+        self.server_close()
+        for conexao in self.conexoes:
+            with contextlib.suppress(OSError):  # o cliente pode já ter fechado
+                conexao.shutdown(socket.SHUT_RDWR)
+
+
+def _iniciar_redis(porta: int = 0) -> _RedisFalso:
+    servidor = _RedisFalso(porta)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+class _RedisHandler(socketserver.StreamRequestHandler):
+    server: _RedisFalso
+
+    def setup(self):
+        super().setup()
+        self.server.conexoes.append(self.request)
+
+    def handle(self):
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            args = []
+            for _ in range(int(linha[1:-2])):
+                tamanho = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(tamanho + 2)[:-2])
+            self.wfile.write(self._executar(args))
+
+    def _executar(self, args):
+        dados = self.server.dados
+        comando = args[0].upper()
+        agora = time.time()
+        vivos = {k: v for k, (v, expira) in dados.items() if expira > agora}
+        if comando == b"GET":
+            valor = vivos.get(args[1])
+            return b"$-1\r\n" if valor is None else b"$%d\r\n%s\r\n" % (len(valor), valor)
+        if comando == b"SET":
+            dados[args[1]] = (args[2], agora + int(args[4]) / 1000)
+            return b"+OK\r\n"
+        if comando == b"DEL":
+            return b":%d\r\n" % (dados.pop(args[1], None) is not None)
+        if comando == b"PTTL":
+            return b":%d\r\n" % (int((dados[args[1]][1] - agora) * 1000) if args[1] in vivos else -2)
+        if comando == b"STRLEN":
+            return b":%d\r\n" % len(vivos.get(args[1], b""))
+        if comando == b"SCAN":
+            prefixo = args[3].rstrip(b"*")
+            chaves = [k for k in vivos if k.startswith(prefixo)]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(chaves) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in chaves)
+        return b"-ERR comando desconhecido\r\n"
+
+
+@pytest.fixture
+def redis_falso():
+    servidor = _iniciar_redis()
+    yield f"redis://127.0.0.1:{servidor.server_address[1]}/0"
+    servidor.encerrar()
+
+
+@pytest.fixture(params=["memoria", "sqlite", "arquivos", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memoria":
+        return CacheMemoria()
+    if request.param == "sqlite":
+        return CacheSQLite(str(tmp_path / "c.sqlite3"))
+    if request.param == "arquivos":
+        return CacheArquivos(str(tmp_path / "arquivos"))
+    return CacheRedis(request.getfixturevalue("redis_falso"))
+
+
+@pytest.fixture
+def sqlite(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+    monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache" / "cache.sqlite3"))
+    yield
+    _cache._backends.clear()
+
+
+class TestBackends:
+    def test_get_set_delete(self, backend):
+        assert backend.get("capivara:t:a") is None
+        backend.set("capivara:t:a", b"valor", ttl=60)
+        assert backend.get("capivara:t:a") == b"valor"
+        backend.delete("capivara:t:a")
+        assert backend.get("capivara:t:a") is None
+
+    def test_ttl(self, backend):
+        backend.set("capivara:t:a", b"valor", ttl=0.05)
+        time.sleep(0.1)
+        assert backend.get("capivara:t:a") is None
+
+    def test_byte_accounting(self, backend):
+        backend.set("capivara:t:a", b"x" * 100, ttl=60)
+        backend.set("capivara:t:b", b"y" * 50, ttl=60)
+        backend.set("capivara:t:a", b"z" * 10, ttl=60)
+        estatisticas = backend.estatisticas()
+        assert (estatisticas["entradas"], estatisticas["bytes"]) == (2, 60)
+
+    def test_itens(self, backend):
+        backend.set("capivara:t:a", b"valor", ttl=60)
+        backend.set("capivara:t:b", b"expira", ttl=0.05)
+        time.sleep(0.1)
+        ((chave, valor, restante),) = list(backend.itens())
+        assert (chave, valor) == ("capivara:t:a", b"valor")
+        assert 0 < restante <= 60
+
+
+class TestArquivos:
+    @pytest.mark.parametrize("tamanho", [0, 5, 12])
+    def test_truncated_entry_is_a_miss(self, tmp_path, tamanho):
+        backend = CacheArquivos(str(tmp_path))
+        backend.set("capivara:t:a", b"valor", ttl=60)
+        caminho = backend._caminho("capivara:t:a")
+        with open(caminho, "r+b") as arquivo:
+            arquivo.truncate(tamanho)
+        assert backend.get("capivara:t:a") is None
+        assert not os.path.exists(caminho)
+
+    def test_truncated_value_is_a_miss(self, tmp_path):
+        backend = CacheArquivos(str(tmp_path))
+        backend.set("capivara:t:a", serializar(make_ptax_df(3)), ttl=60)
+        with open(backend._caminho("capivara:t:a"), "r+b") as arquivo:
+            arquivo.truncate(os.path.getsize(backend._caminho("capivara:t:a")) - 10)
+        truncado = backend.get("capivara:t:a")
+        assert truncado is not None
+        assert desserializar(truncado) is None
+
+
+class TestRedis:
+    def test_reconnects_after_server_restart(self):
+        servidor = _iniciar_redis()
+        porta = servidor.server_address[1]
+        backend = CacheRedis(f"redis://127.0.0.1:{porta}/0")
+        try:
+            backend.set("capivara:a", b"1", 60)
+            assert backend.get("capivara:a") == b"1"
+            servidor.encerrar()
+            servidor = _iniciar_redis(porta)
+            with pytest.raises((ErroRedis, OSError)):
+                backend.get("capivara:a")  # a conexão antiga foi encerrada pelo servidor
+            assert backend.get("capivara:a") is None  # nova conexão, servidor sem os dados
+            backend.set("capivara:a", b"2", 60)
+            assert backend.get("capivara:a") == b"2"
+        finally:
+            servidor.encerrar()
+
+    def test_error_reply_keeps_connection(self, redis_falso):
+        backend = CacheRedis(redis_falso)
+        backend.set("capivara:a", b"1", 60)
+        conexao = backend._local.conexao
+        with pytest.raises(ErroRedis, match="desconhecido"):
+            backend._comando("PING")
+        assert backend._local.conexao is conexao
+        assert backend.get("capivara:a") == b"1"
+
+
+class TestSQLite:
+    def test_wal_mode(self, tmp_path):
+        caminho = str(tmp_path / "c.sqlite3")
+        CacheSQLite(caminho).set("a", b"v", ttl=60)
+        assert sqlite3.connect(caminho).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_shared_between_instances(self, tmp_path):
+        """Duas instâncias no mesmo arquivo (como dois workers) veem as mesmas entradas."""
+        caminho = str(tmp_path / "c.sqlite3")
+        CacheSQLite(caminho).set("a", b"valor", ttl=60)
+        assert CacheSQLite(caminho).get("a") == b"valor"
+
+    def test_expired_entries_purged(self, tmp_path):
+        cache = CacheSQLite(str(tmp_path / "c.sqlite3"))
+        cache.set("a", b"valor", ttl=-1)
+        assert cache.limpar_expirados() == 1
+
+
+class TestMemoria:
+    def _custo(self, chave, valor):
+        return len(valor) + len(chave) + CacheMemoria._CUSTO_FIXO
+
+    def test_byte_budget_enforced(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", str(3 * self._custo("a", b"x" * 100)))
+        cache = CacheMemoria()
+        for chave in "abcde":
+            cache.set(chave, bytes(range(100)), ttl=60)
+        estatisticas = cache.estatisticas()
+        assert estatisticas["entradas"] == 3
+        assert estatisticas["bytes_residentes"] <= estatisticas["orcamento_bytes"]
+        assert estatisticas["evicoes"] == 2
+
+    def test_recency_bound(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", str(2 * self._custo("a", b"1")))
+        cache = CacheMemoria()
+        cache.set("a", b"1", ttl=60)
+        cache.set("b", b"2", ttl=60)
+        cache.get("a")
+        cache.set("c", b"3", ttl=60)
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+
+    def test_large_unpopular_evicted_before_small_popular(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", "3000")
+        cache = CacheMemoria()
+        cache.set("pequena", b"p" * 100, ttl=60)
+        for _ in range(5):
+            cache.get("pequena")
+        cache.set("grande", bytes(range(256)) * 6, ttl=60)
+        cache.set("nova", bytes(range(256)) * 4, ttl=60)
+        assert cache.get("grande") is None
+        assert cache.get("pequena") == b"p" * 100
+
+    def test_larger_than_budget_not_stored(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", "1000")
+        cache = CacheMemoria()
+        cache.set("a", b"x" * 2000, ttl=60)
+        assert cache.get("a") is None
+        assert cache.estatisticas()["bytes_residentes"] == 0
+
+    def test_cold_entries_compressed_in_place(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_FRIO_SEGUNDOS", "0.05")
+        cache = CacheMemoria()
+        valor = serializar(make_sgs_df({"a": 1.0}, n=200))
+        cache.set("fria", valor, ttl=60)
+        antes = cache.estatisticas()["bytes_residentes"]
+        time.sleep(0.1)
+        cache.set("quente", b"q", ttl=60)  # a varredura de entradas frias roda na escrita
+        estatisticas = cache.estatisticas()
+        assert estatisticas["comprimidas"] == 1
+        assert estatisticas["bytes"] == len(valor) + 1
+        assert estatisticas["bytes_residentes"] < antes
+        assert cache.get("fria") == valor
+        assert cache.estatisticas()["comprimidas"] == 0
+
+    def test_compression_avoids_eviction(self, monkeypatch):
+        valor = b"0123456789" * 200
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", str(self._custo("a", valor) + 500))
+        monkeypatch.setenv("CAPIVARA_CACHE_FRIO_SEGUNDOS", "0.05")
+        cache = CacheMemoria()
+        cache.set("a", valor, ttl=60)
+        time.sleep(0.1)
+        cache.set("b", b"b" * 300, ttl=60)
+        assert cache.estatisticas()["evicoes"] == 0
+        assert cache.get("a") == valor
+
+
+class TestSnapshot:
+    def _cache(self, tmp_path):
+        return CacheMemoria(str(tmp_path / "memoria.snapshot"))
+
+    def test_restart_is_warm(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("a", b"valor", ttl=60)
+        cache.encerrar()
+        reiniciado = self._cache(tmp_path)
+        assert reiniciado.get("a") == b"valor"
+        assert reiniciado.estatisticas()["entradas"] == 1
+
+    def test_expired_entries_dropped_on_load(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("velha", b"1", ttl=0.05)
+        cache.set("nova", b"2", ttl=60)
+        cache.salvar()
+        time.sleep(0.1)
+        reiniciado = self._cache(tmp_path)
+        assert reiniciado.get("velha") is None
+        assert reiniciado.get("nova") == b"2"
+
+    def test_compressed_entries_survive(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_FRIO_SEGUNDOS", "0.05")
+        valor = serializar(make_sgs_df({"a": 1.0}, n=100))
+        cache = self._cache(tmp_path)
+        cache.set("fria", valor, ttl=60)
+        time.sleep(0.1)
+        cache.set("quente", b"q", ttl=60)
+        assert cache.estatisticas()["comprimidas"] == 1
+        cache.salvar()
+        assert self._cache(tmp_path).get("fria") == valor
+
+    def test_only_writes_when_changed(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("a", b"1", ttl=60)
+        assert cache.salvar() is True
+        assert cache.salvar() is False
+
+    @pytest.mark.parametrize("estrago", [lambda d: d[:-3], lambda d: d[:10] + b"X" + d[11:], lambda d: b"lixo"])
+    def test_corrupt_snapshot_ignored(self, tmp_path, estrago):
+        cache = self._cache(tmp_path)
+        cache.set("a", b"valor", ttl=60)
+        cache.salvar()
+        arquivo = tmp_path / "memoria.snapshot"
+        arquivo.write_bytes(estrago(arquivo.read_bytes()))
+        reiniciado = self._cache(tmp_path)
+        assert reiniciado.get("a") is None
+        reiniciado.set("b", b"1", ttl=60)
+        reiniciado.salvar()
+        assert self._cache(tmp_path).get("b") == b"1"
+
+    def test_periodic_snapshot(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_SNAPSHOT_SEGUNDOS", "0.05")
+        cache = self._cache(tmp_path)
+        cache.set("a", b"valor", ttl=60)
+        time.sleep(0.3)
+        cache.encerrar()
+        assert (tmp_path / "memoria.snapshot").exists()
+
+    def test_selected_backend_uses_default_snapshot_path(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        monkeypatch.setenv("CAPIVARA_CACHE", "memoria")
+        monkeypatch.delenv("CAPIVARA_CACHE_SNAPSHOT", raising=False)
+        backend = _cache.cache_atual()
+        assert isinstance(backend, CacheMemoria)
+        assert backend.snapshot == str(tmp_path / "capivara-mcp" / "memoria.snapshot")
+
+
+class TestSerializacao:
+    @pytest.mark.parametrize("df", [make_sgs_df({"a": 1.0, "b": 2.0}), make_ptax_df()])
+    def test_round_trip(self, df):
+        df.attrs["parcial"] = False
+        lido = desserializar(serializar(df))
+        assert isinstance(lido, pd.DataFrame)
+        pd.testing.assert_frame_equal(df, lido, check_freq=False, check_index_type=False, check_dtype=False)
+        assert lido.attrs == {"parcial": False}
+
+    def test_series_use_compact_binary_layout(self):
+        serie = make_sgs_serie({"a": 1.0, "b": 2.0}, n=250)
+        serie.attrs["parcial"] = False
+        dados = serializar(serie)
+        assert dados[:4] == b"CPS\x01"
+        assert len(dados) < len(serializar(serie.para_dataframe())) / 3
+        lida = desserializar(dados)
+        assert isinstance(lida, Serie)
+        assert lida == serie
+        assert lida.attrs == {"parcial": False}
+        assert desserializar(dados[:-8]) is None
+
+    def test_versioned_header(self):
+        dados = serializar(make_sgs_df({"a": 1.0}))
+        assert dados[:4] == b"CPV\x01"
+        assert desserializar(b"CPV\x02" + dados[4:]) is None
+        assert desserializar(b"lixo") is None
+
+
+class TestSelecao:
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE", "nenhum")
+        assert _cache.cache_atual() is None
+        assert _cache.estatisticas() == {"backend": "nenhum"}
+
+    def test_default_memory(self, monkeypatch):
+        monkeypatch.delenv("CAPIVARA_CACHE", raising=False)
+        monkeypatch.delenv("CAPIVARA_CACHE_SQLITE", raising=False)
+        assert isinstance(_cache.cache_atual(), CacheMemoria)
+
+    def test_sqlite_path_implies_sqlite(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("CAPIVARA_CACHE", raising=False)
+        monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "c.sqlite3"))
+        assert isinstance(_cache.cache_atual(), CacheSQLite)
+
+    def test_redis_by_config(self, monkeypatch, redis_falso):
+        monkeypatch.setenv("CAPIVARA_CACHE", "redis")
+        monkeypatch.setenv("CAPIVARA_CACHE_REDIS_URL", redis_falso)
+        backend = _cache.cache_atual()
+        assert isinstance(backend, CacheRedis)
+        assert _cache.estatisticas() == {"backend": "redis", "entradas": 0, "bytes": 0}
+
+    def test_unknown_backend_disables(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE", "memcached")
+        assert _cache.cache_atual() is None
+
+
+class TestEmCache:
+    def test_disabled_calls_through(self):
+        chamadas = []
+
+        @em_cache("teste")
+        def fetch(x):
+            chamadas.append(x)
+            return make_sgs_df({"a": 1.0})
+
+        fetch(1)
+        fetch(1)
+        assert chamadas == [1, 1]
+
+    def test_hit_skips_fetch(self, sqlite):
+        chamadas = []
+
+        @em_cache("teste")
+        def fetch(x, y=None):
+            chamadas.append(x)
+            return make_sgs_df({"a": float(x)})
+
+        primeiro = fetch(2, y="b")
+        segundo = fetch(2, y="b")
+        fetch(3, y="b")
+        assert chamadas == [2, 3]
+        pd.testing.assert_frame_equal(primeiro, segundo, check_freq=False, check_index_type=False)
+
+    def test_namespaced_keys(self):
+        assert _cache.chave("ptax", ("USD",), {}) == "capivara:ptax:'USD'"
+        assert _cache.chave("selic", (), {"b": 1, "a": 2}) == "capivara:selic:a=2,b=1"
+
+    def test_namespaces_isolated(self, sqlite):
+        @em_cache("um")
+        def um(x):
+            return make_sgs_df({"a": 1.0})
+
+        @em_cache("dois")
+        def dois(x):
+            return make_sgs_df({"b": 2.0})
+
+        um(1)
+        assert list(dois(1).columns) == ["b"]
+
+    def test_partial_result_not_cached(self, sqlite):
+        chamadas = []
+
+        @em_cache("teste")
+        def fetch(x):
+            chamadas.append(x)
+            df = make_sgs_df({"a": 1.0})
+            df.attrs["parcial"] = True
+            return df
+
+        fetch(1)
+        fetch(1)
+        assert len(chamadas) == 2
+
+    def test_fallback_result_not_cached(self, sqlite):
+        chamadas = []
+
+        @em_cache("teste")
+        def fetch(x):
+            chamadas.append(x)
+            return make_sgs_df({"a": 1.0})
+
+        chamada = Chamada("get_selic", "1")
+        chamada.avisar("API sgs do BCB indisponível")
+        with em_chamada(chamada):
+            fetch(1)
+        fetch(1)
+        assert len(chamadas) == 2
+
+    def test_ttl(self, sqlite, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_TTL_SEGUNDOS", "0.05")
+        chamadas = []
+
+        @em_cache("teste")
+        def fetch(x):
+            chamadas.append(x)
+            return make_sgs_df({"a": 1.0})
+
+        fetch(1)
+        time.sleep(0.1)
+        fetch(1)
+        assert len(chamadas) == 2
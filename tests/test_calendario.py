@@ -0,0 +1,118 @@
+"""Tests for _calendario.py — pure unit tests, no mocking needed."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from capivara_mcp.tools._calendario import (
+    ajustar_janela,
+    contar_dias_uteis,
+    deslocar_dias_uteis,
+    eh_dia_util,
+    feriados,
+    inicio_por_dias_uteis,
+)
+
+
+class TestFeriados:
+    def test_fixed_holidays(self):
+        dias = feriados(2025)
+        assert date(2025, 1, 1) in dias
+        assert date(2025, 4, 21) in dias
+        assert date(2025, 12, 25) in dias
+
+    def test_easter_based_holidays_2025(self):
+        dias = feriados(2025)
+        assert date(2025, 3, 3) in dias  # Carnaval segunda
+        assert date(2025, 3, 4) in dias  # Carnaval terça
+        assert date(2025, 4, 18) in dias  # Sexta-feira Santa
+        assert date(2025, 6, 19) in dias  # Corpus Christi
+
+    def test_consciencia_negra_only_since_2024(self):
+        assert date(2023, 11, 20) not in feriados(2023)
+        assert date(2024, 11, 20) in feriados(2024)
+
+
+class TestEhDiaUtil:
+    def test_weekday(self):
+        assert eh_dia_util(date(2025, 1, 2))
+
+    def test_weekend(self):
+        assert not eh_dia_util(date(2025, 1, 4))
+        assert not eh_dia_util(date(2025, 1, 5))
+
+    def test_holiday(self):
+        assert not eh_dia_util(date(2025, 1, 1))
+        assert not eh_dia_util(date(2025, 3, 4))
+
+    def test_out_of_range(self):
+        with pytest.raises(ValueError):
+            eh_dia_util(date(1970, 1, 1))
+
+    def test_matches_brute_force_over_a_year(self):
+        dias = feriados(2024)
+        d = date(2024, 1, 1)
+        while d.year == 2024:
+            assert eh_dia_util(d) == (d.weekday() < 5 and d not in dias)
+            d += timedelta(days=1)
+
+
+class TestContarDiasUteis:
+    def test_single_week(self):
+        assert contar_dias_uteis(date(2025, 1, 6), date(2025, 1, 12)) == 5
+
+    def test_holiday_week(self):
+        # 30/12 a 03/01: 01/01 é feriado
+        assert contar_dias_uteis(date(2024, 12, 30), date(2025, 1, 3)) == 4
+
+    def test_empty_when_reversed(self):
+        assert contar_dias_uteis(date(2025, 1, 10), date(2025, 1, 1)) == 0
+
+    def test_full_year_2025(self):
+        # 261 dias de semana menos 9 feriados que caem em dia útil
+        assert contar_dias_uteis(date(2025, 1, 1), date(2025, 12, 31)) == 252
+
+
+class TestDeslocarDiasUteis:
+    def test_forward_skips_weekend(self):
+        assert deslocar_dias_uteis(date(2025, 1, 3), 1) == date(2025, 1, 6)
+
+    def test_backward_skips_holiday(self):
+        assert deslocar_dias_uteis(date(2025, 1, 2), -1) == date(2024, 12, 31)
+
+    def test_zero_snaps_back(self):
+        assert deslocar_dias_uteis(date(2025, 1, 5), 0) == date(2025, 1, 3)
+        assert deslocar_dias_uteis(date(2025, 1, 3), 0) == date(2025, 1, 3)
+
+    def test_roundtrip_with_count(self):
+        inicio = date(2025, 1, 2)
+        fim = deslocar_dias_uteis(inicio, 100)
+        assert contar_dias_uteis(inicio, fim) == 101
+
+
+class TestInicioPorDiasUteis:
+    def test_window_from_saturday(self):
+        assert inicio_por_dias_uteis(date(2025, 1, 11), 5) == date(2025, 1, 6)
+
+    def test_single_day(self):
+        assert inicio_por_dias_uteis(date(2025, 1, 10), 1) == date(2025, 1, 10)
+
+    def test_rejects_non_positive(self):
+        with pytest.raises(ValueError):
+            inicio_por_dias_uteis(date(2025, 1, 10), 0)
+
+
+class TestAjustarJanela:
+    def test_snaps_both_ends(self):
+        assert ajustar_janela(date(2025, 1, 4), date(2025, 1, 12)) == (date(2025, 1, 6), date(2025, 1, 10))
+
+    def test_weekend_only_window(self):
+        assert ajustar_janela(date(2025, 1, 4), date(2025, 1, 5)) is None
+
+    def test_holiday_only_window(self):
+        assert ajustar_janela(date(2025, 3, 3), date(2025, 3, 4)) is None
+
+    def test_clamps_to_coverage(self):
+        assert ajustar_janela(date(1970, 1, 1), date(1980, 1, 2)) == (date(1980, 1, 2), date(1980, 1, 2))
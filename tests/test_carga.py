@@ -0,0 +1,102 @@
+"""Tests for benchmarks/bcb_falso.py and benchmarks/carga.py — the fake BCB and the load driver."""
+
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from benchmarks import carga
+from benchmarks.bcb_falso import BcbFalso, Parametros, ServidorFalso
+
+from capivara_mcp.tools import _latencia, _limites, _resiliencia, expectativas, ptax, selic, taxa_juros
+
+
+@pytest.fixture(scope="module")
+def bcb():
+    with ServidorFalso(BcbFalso(Parametros(latencia_ms=0, jitter_ms=0), semente=1)) as servidor:
+        yield servidor
+
+
+@pytest.fixture(autouse=True)
+def _upstream_falso(bcb, monkeypatch):
+    monkeypatch.setenv("CAPIVARA_BCB_URL", bcb.url)
+    bcb.bcb.parametros = Parametros(latencia_ms=0, jitter_ms=0)
+    _resiliencia.reiniciar()
+    _latencia.reiniciar()
+    _limites.reiniciar()
+    yield
+    _resiliencia.reiniciar()
+    _latencia.reiniciar()
+
+
+class TestBcbFalso:
+    def test_sgs_business_days_through_tool(self):
+        resposta = json.loads(selic.get_selic(data_inicio="2025-01-02", data_fim="2025-01-08"))
+        assert [r["data"] for r in resposta["selic"]] == [
+            "2025-01-02",
+            "2025-01-03",
+            "2025-01-06",
+            "2025-01-07",
+            "2025-01-08",
+        ]
+        assert resposta["selic"][0]["selic_meta"] > 10
+
+    def test_ptax_bulletins_per_day(self, bcb):
+        bcb.bcb.parametros.boletins = 5
+        resposta = json.loads(ptax.get_ptax(data_inicio="2025-01-02", data_fim="2025-01-03"))
+        assert len(resposta["cotacoes"]) == 10
+        assert resposta["cotacoes"][-1]["tipo_boletim"] == "Fechamento"
+
+    def test_odata_top_select_and_filter(self, bcb):
+        bcb.bcb.parametros.linhas = 3
+        resposta = json.loads(expectativas.get_expectativas_mercado("IPCA", top=10))
+        assert len(resposta["expectativas"]) == 3
+        assert set(resposta["expectativas"][0]) == {
+            "indicador",
+            "data_pesquisa",
+            "periodo_referencia",
+            "media",
+            "mediana",
+            "minimo",
+            "maximo",
+        }
+        assert {r["indicador"] for r in resposta["expectativas"]} == {"IPCA"}
+        taxas = json.loads(taxa_juros.get_taxa_juros("Fev-2025", modalidade="CHEQUE ESPECIAL", top=2))["taxas"]
+        assert [t["modalidade"] for t in taxas] == ["CHEQUE ESPECIAL"] * 2
+
+    def test_injected_errors_counted(self, bcb, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        bcb.bcb.parametros.taxa_erro = 1.0
+        antes = bcb.bcb.estado()["requisicoes"].get("taxa_juros", {}).get("503", 0)
+        assert "erro" in json.loads(taxa_juros.get_taxa_juros("Jan-2025"))
+        assert bcb.bcb.estado()["requisicoes"]["taxa_juros"]["503"] == antes + 1
+
+    def test_parameters_changed_at_runtime(self, bcb):
+        resposta = httpx.post(f"{bcb.url}/_parametros", json={"latencia_ms": 5, "linhas": "7"})
+        assert resposta.json()["linhas"] == 7 and bcb.bcb.parametros.latencia_ms == 5
+        assert httpx.post(f"{bcb.url}/_parametros", json={"latencia": 1}).status_code == 400
+
+
+class TestRelatorio:
+    def test_percentiles(self):
+        p = carga.percentis([i / 1000 for i in range(1, 101)])
+        assert (p["p50"], p["p95"], p["p99"], p["max"]) == (50.5, 95.05, 99.01, 100.0)
+        assert carga.percentis([0.002])["p99"] == 2.0
+
+    def test_report_and_upstream_delta(self):
+        amostras = [carga.Amostra("get_ptax", 0.1, False), carga.Amostra("get_ptax", 0.3, True)]
+        delta = carga._diferenca({"sgs": {"200": 5, "503": 1}, "ptax": {"200": 2}}, {"sgs": {"200": 2, "503": 1}})
+        assert delta == {"sgs": {"200": 3}, "ptax": {"200": 2}}
+        r = carga.relatorio(amostras, 2.0, delta)
+        assert (r["chamadas"], r["erros"], r["vazao_por_s"], r["upstream_total"]) == (2, 1, 1.0, 5)
+        assert r["por_tool"]["get_ptax"]["erros"] == 1
+
+
+class TestCarga:
+    def test_http_sessions_end_to_end(self, bcb):
+        documento = carga.executar("http", sessoes=2, chamadas=3, upstream=bcb.url)
+        assert documento["chamadas"] == 6 and documento["erros"] == 0
+        assert documento["vazao_por_s"] > 0 and documento["latencia_ms"]["p99"] > 0
+        assert len(documento["por_tool"]) == 4
+        assert documento["upstream_total"] >= 6
@@ -0,0 +1,158 @@
+"""Tests for _conjuntos.py — durable Olinda partitions answered by range and filter."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from capivara_mcp.tools import _cache, _conjuntos
+from capivara_mcp.tools._conjuntos import Conjuntos, da_entrada, juntar, particionar
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools.ptax import _fetch_ptax
+from capivara_mcp.tools.taxa_juros import _fetch_taxa_juros
+from tests.conftest import cache_configurado, make_expectativas_df, make_ptax_df, make_taxa_juros_df
+
+_JAN = (date(2025, 1, 2), date(2025, 1, 10))
+
+
+def _ptax(inicio: date, fim: date, moeda: str = "USD") -> pd.DataFrame:
+    df = make_ptax_df((fim - inicio).days + 1)
+    df["dataHoraCotacao"] = [pd.Timestamp(inicio) + pd.Timedelta(days=i, hours=13) for i in range(len(df))]
+    return particionar("ptax", {"moeda": moeda, "dt_inicio": inicio, "dt_fim": fim}, df)
+
+
+def _responder(dados: pd.DataFrame, nome: str, offline: bool = False, **argumentos) -> pd.DataFrame | None:
+    return _conjuntos.CONJUNTOS[nome].responder(dados, dados.attrs["coberturas"], argumentos, offline)
+
+
+def _respondido(dados: pd.DataFrame, nome: str, offline: bool = False, **argumentos) -> pd.DataFrame:
+    df = _responder(dados, nome, offline, **argumentos)
+    assert df is not None
+    return df
+
+
+class TestMarca:
+    @pytest.fixture
+    def sqlite(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+        monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache.sqlite3"))
+        monkeypatch.delenv("CAPIVARA_SERIES_DIRETORIO", raising=False)
+        yield
+        _cache._backends.clear()
+
+    def test_partition_stored_with_cache_entry(self, sqlite):
+        _cache.em_cache("ptax")(lambda *args: make_ptax_df(2))("USD", *_JAN)
+        ((_, valor, _),) = cache_configurado().itens()
+        entrada = da_entrada(_cache.desserializar(valor))
+        assert entrada is not None
+        nome, dados = entrada
+        assert nome == "ptax"
+        assert dados.attrs == {"coberturas": {"USD": {"periodos": [["2025-01-02", "2025-01-10"]]}}}
+        assert list(dados[_conjuntos._PARTICAO]) == ["USD", "USD"]
+
+    def test_mark_not_returned_to_tools(self, sqlite):
+        buscar = _cache.em_cache("taxa_juros")(lambda *args: make_taxa_juros_df())
+        buscar("Jan-2025", None, 20)
+        assert buscar("Jan-2025", None, 20).attrs == {}
+
+    def test_other_entries_ignored(self):
+        assert da_entrada(make_ptax_df()) is None
+        df = make_ptax_df()
+        df.attrs[_cache.MARCA_CONJUNTO] = {"nome": "sgs", "particao": "x", "cobertura": {}}
+        assert da_entrada(df) is None
+
+
+class TestPtax:
+    def test_adjacent_periods_merged(self):
+        dados = juntar("ptax", _ptax(date(2025, 1, 1), date(2025, 1, 10)), _ptax(date(2025, 1, 11), date(2025, 1, 20)))
+        dados = juntar("ptax", dados, _ptax(date(2025, 3, 1), date(2025, 3, 5)))
+        assert dados.attrs["coberturas"]["USD"]["periodos"] == [
+            ["2025-01-01", "2025-01-20"],
+            ["2025-03-01", "2025-03-05"],
+        ]
+        assert len(dados) == 25
+
+    def test_online_only_inside_past_coverage(self):
+        dados = _ptax(date(2025, 1, 1), date(2025, 1, 31))
+        df = _respondido(dados, "ptax", moeda="USD", dt_inicio=date(2025, 1, 10), dt_fim=date(2025, 1, 12))
+        assert [d.day for d in df["dataHoraCotacao"]] == [10, 11, 12]
+        assert _responder(dados, "ptax", moeda="USD", dt_inicio=date(2025, 1, 20), dt_fim=date(2025, 2, 5)) is None
+        assert _responder(dados, "ptax", moeda="EUR", dt_inicio=date(2025, 1, 2), dt_fim=date(2025, 1, 3)) is None
+        hoje = date.today()
+        recente = _ptax(hoje - timedelta(days=5), hoje)
+        assert _responder(recente, "ptax", moeda="USD", dt_inicio=hoje - timedelta(days=3), dt_fim=hoje) is None
+
+    def test_offline_any_overlap(self):
+        dados = _ptax(date(2025, 1, 1), date(2025, 1, 31))
+        chamada = Chamada(ferramenta="get_ptax", id="1")
+        with em_chamada(chamada):
+            df = _respondido(dados, "ptax", True, moeda="USD", dt_inicio=date(2025, 1, 30), dt_fim=date(2025, 3, 1))
+        assert [d.day for d in df["dataHoraCotacao"]] == [30, 31]
+        assert df.attrs["parcial"] is True
+        assert "2025-01-30 a 2025-01-31" in chamada.avisos[0]
+        completo = _respondido(dados, "ptax", True, moeda="USD", dt_inicio=date(2025, 1, 3), dt_fim=date(2025, 1, 4))
+        assert "parcial" not in completo.attrs
+        assert _responder(dados, "ptax", True, moeda="USD", dt_inicio=date(2025, 3, 1), dt_fim=date(2025, 3, 9)) is None
+
+
+class TestFocus:
+    def test_latest_snapshot_offline_only(self):
+        antigo = particionar("expectativas_anuais", {"indicador": "IPCA", "top": 3}, make_expectativas_df("IPCA", 3))
+        novo = make_expectativas_df("IPCA", 2)
+        novo["Data"] += pd.Timedelta(days=7)
+        dados = juntar(
+            "expectativas_anuais", antigo, particionar("expectativas_anuais", {"indicador": "IPCA", "top": 2}, novo)
+        )
+        assert _responder(dados, "expectativas_anuais", indicador="IPCA", top=2) is None
+        df = _respondido(dados, "expectativas_anuais", True, indicador="IPCA", top=2)
+        assert list(df["Data"]) == sorted(set(dados["Data"]), reverse=True)[:2]
+        assert _responder(dados, "expectativas_anuais", True, indicador="Selic", top=2) is None
+
+
+class TestTaxaJuros:
+    def test_past_month_served_when_complete_or_within_top(self):
+        df = make_taxa_juros_df(3)
+        dados = particionar("taxa_juros", {"mes": "Jan-2025", "modalidade": None, "top": 20}, df)
+        assert len(_respondido(dados, "taxa_juros", mes="Jan-2025", modalidade=None, top=50)) == 3
+        filtrado = _respondido(dados, "taxa_juros", mes="Jan-2025", modalidade="FINANCIAMENTO IMOBILIARIO", top=2)
+        assert list(filtrado["TaxaJurosAoAno"]) == [4.75, 5.25]
+        incompleto = particionar("taxa_juros", {"mes": "Fev-2025", "modalidade": None, "top": 3}, df)
+        assert _responder(incompleto, "taxa_juros", mes="Fev-2025", modalidade=None, top=20) is None
+        assert len(_respondido(incompleto, "taxa_juros", True, mes="Fev-2025", modalidade=None, top=20)) == 3
+
+    def test_current_month_not_served_online(self):
+        hoje = date.today()
+        mes = f"{_conjuntos._MESES[hoje.month - 1]}-{hoje.year}"
+        dados = particionar("taxa_juros", {"mes": mes, "modalidade": None, "top": 20}, make_taxa_juros_df(3))
+        assert _responder(dados, "taxa_juros", mes=mes, modalidade=None, top=20) is None
+
+
+class TestArmazenamento:
+    def test_written_atomically_and_reread_on_change(self, tmp_path):
+        conjuntos = Conjuntos(str(tmp_path))
+        conjuntos.incorporar("ptax", _ptax(*_JAN))
+        assert conjuntos.nomes() == ["ptax"]
+        primeira = conjuntos.abrir("ptax")
+        assert conjuntos.abrir("ptax") is primeira
+        conjuntos.incorporar("ptax", _ptax(date(2025, 1, 11), date(2025, 1, 12)))
+        segunda = conjuntos.abrir("ptax")
+        assert segunda is not None and len(segunda) == 11
+        assert [p.name for p in tmp_path.iterdir()] == ["conjunto-ptax.cpv"]
+
+    @patch("capivara_mcp.tools._http._tentar")
+    def test_fetch_answered_without_network(self, tentar, monkeypatch, tmp_path):
+        monkeypatch.setenv("CAPIVARA_SERIES_DIRETORIO", str(tmp_path))
+        monkeypatch.setenv("CAPIVARA_CACHE", "nenhum")
+        monkeypatch.delenv("CAPIVARA_OFFLINE", raising=False)
+        conjuntos = _conjuntos.conjuntos_em(str(tmp_path))
+        conjuntos.incorporar("ptax", _ptax(*_JAN))
+        conjuntos.incorporar(
+            "taxa_juros",
+            particionar("taxa_juros", {"mes": "Jan-2025", "modalidade": None, "top": 20}, make_taxa_juros_df()),
+        )
+        assert len(_fetch_ptax("USD", date(2025, 1, 3), date(2025, 1, 4))) == 2
+        assert len(_fetch_taxa_juros("Jan-2025", None, 10)) == 3
+        tentar.assert_not_called()
@@ -0,0 +1,58 @@
+"""Tests for _contexto.py — per-call progress, deadline and cancellation state."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from capivara_mcp.tools._contexto import Chamada, ChamadaCancelada, chamada_atual, em_chamada
+
+
+class TestChamada:
+    def test_without_deadline(self):
+        chamada = Chamada("get_ptax", "1")
+        assert chamada.restante() is None
+        assert not chamada.expirou()
+
+    def test_expired_deadline(self):
+        chamada = Chamada("get_ptax", "1", prazo=time.monotonic() - 1)
+        assert chamada.expirou()
+        assert chamada.restante() == 0.0
+
+    def test_cancel_raises_on_verify(self):
+        chamada = Chamada("get_ptax", "1")
+        chamada.verificar()
+        chamada.cancelada.set()
+        with pytest.raises(ChamadaCancelada):
+            chamada.verificar()
+
+    def test_progress_forwarded(self):
+        eventos = []
+        chamada = Chamada("get_selic", "1", notificar=lambda *a: eventos.append(a))
+        chamada.progresso(1, 2, "metade")
+        assert eventos == [(1, 2, "metade")]
+
+    def test_progress_without_listener_is_noop(self):
+        Chamada("get_selic", "1").progresso(1, 2)
+
+
+class TestEmChamada:
+    def test_sets_and_resets_current(self):
+        assert chamada_atual() is None
+        chamada = Chamada("get_selic", "7")
+        with em_chamada(chamada):
+            assert chamada_atual() is chamada
+        assert chamada_atual() is None
+
+
+class TestCancelar:
+    def test_runs_callbacks_and_sets_flag(self):
+        chamada = Chamada("get_selic", "1")
+        chamados = []
+        chamada.ao_cancelar(lambda: chamados.append("a"))
+        desregistrar = chamada.ao_cancelar(lambda: chamados.append("b"))
+        desregistrar()
+        chamada.cancelar()
+        assert chamada.cancelada.is_set()
+        assert chamados == ["a"]
@@ -0,0 +1,57 @@
+"""Tests for _degraus.py — pure unit tests, no mocking needed."""
+
+from __future__ import annotations
+
+import math
+
+from capivara_mcp.tools._degraus import (
+    codificar_degraus,
+    contar_mudancas,
+    eh_serie_degrau,
+    resolver_formato,
+)
+
+_DATAS = ["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07", "2025-01-08"]
+
+
+class TestCodificarDegraus:
+    def test_constant_series_is_single_run(self):
+        assert codificar_degraus(_DATAS, [12.25] * 5) == [["2025-01-02", "2025-01-08", 12.25]]
+
+    def test_change_point_splits_runs(self):
+        trechos = codificar_degraus(_DATAS, [12.25, 12.25, 13.25, 13.25, 13.25])
+        assert trechos == [
+            ["2025-01-02", "2025-01-03", 12.25],
+            ["2025-01-06", "2025-01-08", 13.25],
+        ]
+
+    def test_nan_becomes_none(self):
+        trechos = codificar_degraus(_DATAS[:3], [math.nan, math.nan, 1.0])
+        assert trechos == [["2025-01-02", "2025-01-03", None], ["2025-01-06", "2025-01-06", 1.0]]
+
+    def test_empty(self):
+        assert codificar_degraus([], []) == []
+
+
+class TestDeteccao:
+    def test_counts_changes(self):
+        assert contar_mudancas([1.0, 1.0, 2.0, 2.0, 3.0]) == 2
+
+    def test_step_series_detected(self):
+        assert eh_serie_degrau([10.5] * 120 + [10.75] * 130)
+
+    def test_noisy_series_not_step(self):
+        assert not eh_serie_degrau([0.1 * i for i in range(50)])
+
+    def test_single_point_not_step(self):
+        assert not eh_serie_degrau([1.0])
+
+
+class TestResolverFormato:
+    def test_explicit_formats_pass_through(self):
+        assert resolver_formato("registros", {"a": [1.0] * 20}) == "registros"
+        assert resolver_formato("degraus", {"a": [0.1 * i for i in range(20)]}) == "degraus"
+
+    def test_auto_requires_all_columns_step(self):
+        assert resolver_formato("auto", {"a": [1.0] * 20, "b": [2.0] * 20}) == "degraus"
+        assert resolver_formato("auto", {"a": [1.0] * 20, "b": [0.1 * i for i in range(20)]}) == "registros"
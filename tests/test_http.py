@@ -0,0 +1,256 @@
+"""Tests for _http.py — URL building and cancellation of in-flight requests."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+import httpx
+import pytest
+
+from capivara_mcp.tools import _http, _latencia, _limites, _resiliencia
+from capivara_mcp.tools._contexto import Chamada, ChamadaCancelada, em_chamada
+
+
+@pytest.fixture(autouse=True)
+def _estado_limpo():
+    _resiliencia.reiniciar()
+    _latencia.reiniciar()
+    _limites.reiniciar()
+    _http._orcamentos.clear()
+    yield
+    _resiliencia.reiniciar()
+    _latencia.reiniciar()
+    _http._orcamentos.clear()
+
+
+class TestMontarQuery:
+    def test_spaces_encoded_as_percent20(self):
+        assert _http.montar_query({"$filter": "Mes eq '2025-01'"}) == "%24filter=Mes%20eq%20%272025-01%27"
+
+    def test_preserves_order(self):
+        assert _http.montar_query({"a": 1, "b": "x"}) == "a=1&b=x"
+
+
+class TestObterIsolado:
+    def test_returns_body(self, monkeypatch):
+        urls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            urls.append(str(request.url))
+            return httpx.Response(200, content=b"[]")
+
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            return original(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        corpo = _http.obter("sgs", "bcdata.sgs.432/dados", {"formato": "json"})
+        assert corpo == b"[]"
+        assert urls == ["https://api.bcb.gov.br/dados/serie/bcdata.sgs.432/dados?formato=json"]
+        limites = _limites.estado_limites()["api.bcb.gov.br"]
+        assert limites["admitidas"] == 1
+        assert limites["em_voo"] == 0
+
+    def test_bcb_url_override_keeps_path_and_host_limiter(self, monkeypatch):
+        urls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            urls.append(str(request.url))
+            return httpx.Response(200, content=b"{}")
+
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            return original(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        monkeypatch.setenv("CAPIVARA_BCB_URL", "http://127.0.0.1:8765/")
+        _http.obter("ptax", "Moedas", {"$format": "json"})
+        assert urls == ["http://127.0.0.1:8765/olinda/servico/PTAX/versao/v1/odata/Moedas?%24format=json"]
+        assert list(_limites.estado_limites()) == ["olinda.bcb.gov.br"]
+
+    def test_http_error_raised(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            return original(*args, transport=httpx.MockTransport(lambda r: httpx.Response(500)), **kwargs)
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        with pytest.raises(httpx.HTTPStatusError):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {})
+
+    def test_already_cancelled_call_does_not_fetch(self):
+        chamada = Chamada("get_selic", "1")
+        chamada.cancelada.set()
+        with em_chamada(chamada), pytest.raises(ChamadaCancelada):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {})
+
+
+class TestTimeouts:
+    def test_capped_by_call_deadline(self, monkeypatch):
+        recebidos = []
+
+        async def baixar(cliente, url, headers, timeout, **_):
+            recebidos.append(timeout)
+            return b"ok"
+
+        monkeypatch.setattr(_http, "_baixar", baixar)
+        with em_chamada(Chamada("get_selic", "1", prazo=time.monotonic() + 5)):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {})
+        assert recebidos[0].read <= 5
+        assert recebidos[0].connect <= 5
+
+    def test_sick_endpoint_times_out_near_healthy_p99(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        for _ in range(20):
+            _latencia.registrar("sgs/bcdata.sgs.{codigo}/dados", 0.1)
+
+        async def travado(cliente, url, headers, timeout, **_):
+            await anyio.sleep(30)
+
+        monkeypatch.setenv("CAPIVARA_TIMEOUT_MIN_SEGUNDOS", "0.2")
+        monkeypatch.setattr(_http, "_baixar", travado)
+        inicio = time.monotonic()
+        with pytest.raises(httpx.TimeoutException):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {})
+        assert time.monotonic() - inicio < 2
+
+
+class TestHedge:
+    _CHAVE = "expectativas/ExpectativasMercadoAnuais"
+
+    @pytest.fixture
+    def lento_depois_rapido(self, monkeypatch):
+        """Primeira tentativa trava; as seguintes respondem na hora."""
+        eventos = []
+
+        async def baixar(cliente, url, headers, timeout, **_):
+            ordem = len(eventos)
+            eventos.append("inicio")
+            if ordem == 0:
+                try:
+                    await anyio.sleep(5)
+                except anyio.get_cancelled_exc_class():
+                    eventos.append("perdedora cancelada")
+                    raise
+                return b"lento"
+            return b"rapido"
+
+        monkeypatch.setattr(_http, "_baixar", baixar)
+        monkeypatch.setenv("CAPIVARA_HEDGE_UPSTREAMS", "expectativas")
+        monkeypatch.setenv("CAPIVARA_HEDGE_MIN_AMOSTRAS", "1")
+        for _ in range(5):
+            _latencia.registrar(self._CHAVE, 0.05)
+        return eventos
+
+    def _obter(self):
+        return _http.obter("expectativas", "ExpectativasMercadoAnuais", {})
+
+    def test_hedge_wins_and_loser_cancelled(self, lento_depois_rapido):
+        inicio = time.monotonic()
+        assert self._obter() == b"rapido"
+        assert time.monotonic() - inicio < 2
+        assert "perdedora cancelada" in lento_depois_rapido
+        assert _http.estado_hedge()["expectativas"] == {"requisicoes": 1, "hedges": 1, "hedges_vencedores": 1}
+
+    def test_budget_caps_extra_requests(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HEDGE_MAX_FRACAO", "0.1")
+        orcamento = _http._OrcamentoHedge()
+        assert orcamento.gastar()
+        assert not orcamento.gastar()
+        for _ in range(11):  # 0.1 crédito por requisição
+            orcamento.requisicao()
+        assert orcamento.gastar()
+        assert not orcamento.gastar()
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("CAPIVARA_HEDGE_UPSTREAMS", raising=False)
+        assert _http._atraso_hedge("expectativas", self._CHAVE) is None
+
+    def test_needs_latency_samples(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HEDGE_UPSTREAMS", "expectativas")
+        assert _http._atraso_hedge("expectativas", self._CHAVE) is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_aborts_request_on_server_loop(monkeypatch):
+    """Uma requisição pendurada no loop é abortada por Chamada.cancelar()."""
+    iniciou = threading.Event()
+
+    async def baixar_lento(cliente, url, headers, timeout, **_):
+        iniciou.set()
+        await anyio.sleep(30)
+        return b"nunca"
+
+    monkeypatch.setattr(_http, "_baixar", baixar_lento)
+    chamada = Chamada("get_selic", "1", executar_no_loop=anyio.from_thread.run)
+
+    def tool():
+        with em_chamada(chamada):
+            return _http.obter("sgs", "bcdata.sgs.432/dados", {})
+
+    resultado: list[BaseException] = []
+
+    async def rodar():
+        try:
+            await anyio.to_thread.run_sync(tool)
+        except ChamadaCancelada as e:
+            resultado.append(e)
+
+    with anyio.fail_after(5):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(rodar)
+            await anyio.to_thread.run_sync(iniciou.wait)
+            chamada.cancelar()
+
+    assert len(resultado) == 1
+    assert not chamada._ao_cancelar
+
+
+class TestClientesCompartilhados:
+    @pytest.fixture
+    def criados(self, monkeypatch):
+        criados: list[httpx.AsyncClient] = []
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            criados.append(original(*args, transport=httpx.MockTransport(lambda r: httpx.Response(200)), **kwargs))
+            return criados[-1]
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        return criados
+
+    @staticmethod
+    def _buscar_duas_vezes():
+        with em_chamada(Chamada("get_selic", "1", executar_no_loop=anyio.from_thread.run)):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {})
+            _http.obter("sgs", "bcdata.sgs.433/dados", {})
+
+    @pytest.mark.asyncio
+    async def test_shared_while_server_runs_and_closed_at_exit(self, criados):
+        async with _http.clientes_compartilhados():
+            await anyio.to_thread.run_sync(self._buscar_duas_vezes)
+            assert len(criados) == 1 and not criados[0].is_closed
+        assert criados[0].is_closed
+        assert not _http._clientes
+
+    @pytest.mark.asyncio
+    async def test_closed_even_when_cancelled(self, criados):
+        with anyio.CancelScope() as escopo:
+            async with _http.clientes_compartilhados():
+                await anyio.to_thread.run_sync(self._buscar_duas_vezes)
+                escopo.cancel()
+                await anyio.sleep(1)
+        assert criados[0].is_closed
+
+    @pytest.mark.asyncio
+    async def test_loop_without_scope_closes_each_client(self, criados):
+        await anyio.to_thread.run_sync(self._buscar_duas_vezes)
+        assert len(criados) == 2 and all(c.is_closed for c in criados)
+        assert not _http._clientes
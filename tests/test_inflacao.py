@@ -6,11 +6,11 @@ import json
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from unittest.mock import patch
 
-import pandas as pd
-import requests
+import httpx
 
+from capivara_mcp.tools._serie import Serie
 from capivara_mcp.tools.inflacao import get_inflacao
-from tests.conftest import make_sgs_df
+from tests.conftest import make_sgs_df, make_sgs_serie
 
 _PATCH = "capivara_mcp.tools.inflacao._fetch_inflacao"
 
@@ -18,7 +18,7 @@ _PATCH = "capivara_mcp.tools.inflacao._fetch_inflacao"
 class TestGetInflacaoSuccess:
     @patch(_PATCH)
     def test_ipca_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IPCA": 0.5}, n=3)
+        mock_fetch.return_value = make_sgs_serie({"IPCA": 0.5}, n=3)
         result = get_inflacao(indice="IPCA", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "IPCA"
@@ -28,7 +28,7 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_igpm_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IGP-M": 0.3}, n=2)
+        mock_fetch.return_value = make_sgs_serie({"IGP-M": 0.3}, n=2)
         result = get_inflacao(indice="IGP-M", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "IGP-M"
@@ -36,7 +36,7 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_cdi_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"CDI": 0.1}, n=3)
+        mock_fetch.return_value = make_sgs_serie({"CDI": 0.1}, n=3)
         result = get_inflacao(indice="CDI", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "CDI"
@@ -44,7 +44,7 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_ipca15_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IPCA-15": 0.4}, n=2)
+        mock_fetch.return_value = make_sgs_serie({"IPCA-15": 0.4}, n=2)
         result = get_inflacao(indice="IPCA-15", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "IPCA-15"
@@ -52,7 +52,7 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_inpc_success(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"INPC": 0.35}, n=2)
+        mock_fetch.return_value = make_sgs_serie({"INPC": 0.35}, n=2)
         result = get_inflacao(indice="INPC", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "INPC"
@@ -60,28 +60,28 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_case_insensitive_indice(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IPCA": 0.5}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"IPCA": 0.5}, n=1)
         result = get_inflacao(indice="ipca", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "IPCA"
 
     @patch(_PATCH)
     def test_case_insensitive_cdi(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"CDI": 0.1}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"CDI": 0.1}, n=1)
         result = get_inflacao(indice="cdi", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "CDI"
 
     @patch(_PATCH)
     def test_case_insensitive_inpc(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"INPC": 0.3}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"INPC": 0.3}, n=1)
         result = get_inflacao(indice="inpc", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert data["indice"] == "INPC"
 
     @patch(_PATCH)
     def test_records_have_expected_keys(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IPCA": 0.5}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"IPCA": 0.5}, n=1)
         result = get_inflacao(indice="IPCA", data_inicio="2025-01-02", data_fim="2025-01-31")
         data = json.loads(result)
         record = data["valores"][0]
@@ -90,7 +90,7 @@ class TestGetInflacaoSuccess:
 
     @patch(_PATCH)
     def test_dates_formatted_as_iso(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"IPCA": 0.5}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"IPCA": 0.5}, n=1)
         result = get_inflacao(indice="IPCA", data_inicio="2025-01-02", data_fim="2025-01-31")
         data = json.loads(result)
         assert data["valores"][0]["data"] == "2025-01-02"
@@ -99,12 +99,36 @@ class TestGetInflacaoSuccess:
 class TestGetInflacaoEmptyResponse:
     @patch(_PATCH)
     def test_empty_dataframe(self, mock_fetch):
-        mock_fetch.return_value = pd.DataFrame()
+        mock_fetch.return_value = Serie.vazia()
         result = get_inflacao(indice="IPCA", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
         assert "erro" in data
         assert "IPCA" in data["erro"]
 
+    @patch(_PATCH)
+    def test_cdi_formato_degraus(self, mock_fetch):
+        df = make_sgs_df({"CDI": 0.05}, n=5)
+        df["CDI"] = 0.05
+        mock_fetch.return_value = Serie.de_dataframe(df)
+        result = get_inflacao(indice="CDI", data_inicio="2025-01-02", data_fim="2025-01-10", formato="degraus")
+        data = json.loads(result)
+        assert data["formato"] == "degraus"
+        assert data["valores"] == [["2025-01-02", "2025-01-08", 0.05]]
+
+    @patch(_PATCH)
+    def test_cdi_weekend_window_skips_upstream(self, mock_fetch):
+        result = get_inflacao(indice="CDI", data_inicio="2025-01-04", data_fim="2025-01-05")
+        data = json.loads(result)
+        assert "erro" in data
+        mock_fetch.assert_not_called()
+
+    @patch(_PATCH)
+    def test_monthly_series_not_snapped(self, mock_fetch):
+        mock_fetch.return_value = make_sgs_serie({"IPCA": 0.5}, n=1)
+        result = get_inflacao(indice="IPCA", data_inicio="2025-01-01", data_fim="2025-01-01")
+        assert "erro" not in json.loads(result)
+        mock_fetch.assert_called_once()
+
 
 class TestGetInflacaoValidation:
     def test_unsupported_indice(self):
@@ -143,7 +167,7 @@ class TestGetInflacaoErrors:
         assert "erro" in data
         assert "Tempo limite" in data["erro"]
 
-    @patch(_PATCH, side_effect=requests.ConnectionError())
+    @patch(_PATCH, side_effect=httpx.ConnectError("falha"))
     def test_connection_error(self, _):
         result = get_inflacao(indice="IPCA", data_inicio="2025-01-02", data_fim="2025-03-01")
         data = json.loads(result)
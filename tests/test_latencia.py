@@ -0,0 +1,78 @@
+"""Tests for _latencia.py — streaming percentile sketch per endpoint."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from capivara_mcp.tools import _latencia
+from capivara_mcp.tools._latencia import Esboco
+
+
+@pytest.fixture(autouse=True)
+def _limpo():
+    _latencia.reiniciar()
+    yield
+    _latencia.reiniciar()
+
+
+class TestEsboco:
+    def test_empty(self):
+        assert Esboco().quantil(0.5) is None
+
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(1)
+        amostras = [rng.lognormvariate(-1, 0.8) for _ in range(400)]
+        esboco = Esboco()
+        for a in amostras:
+            esboco.registrar(a)
+        ordenadas = sorted(amostras)
+        for q in (0.5, 0.9, 0.99):
+            exato = ordenadas[int(q * len(ordenadas)) - 1]
+            assert esboco.quantil(q) == pytest.approx(exato, rel=0.05)
+
+    def test_decay_tracks_recent_latency(self):
+        esboco = Esboco()
+        for _ in range(2000):
+            esboco.registrar(2.0)
+        for _ in range(2000):
+            esboco.registrar(0.1)
+        assert esboco.quantil(0.5) == pytest.approx(0.1, rel=0.05)
+
+
+class TestRegistro:
+    def test_endpoint_key_strips_codes_and_parameters(self):
+        assert _latencia.endpoint("sgs", "bcdata.sgs.432/dados") == "sgs/bcdata.sgs.{codigo}/dados"
+        assert _latencia.endpoint("ptax", "CotacaoMoedaPeriodo(moeda=@moeda)") == "ptax/CotacaoMoedaPeriodo"
+
+    def test_min_samples(self):
+        _latencia.registrar("sgs/x", 0.2)
+        assert _latencia.quantil("sgs/x", 0.9, min_amostras=2) is None
+        assert _latencia.quantil("sgs/x", 0.9) == pytest.approx(0.2, rel=0.05)
+
+    def test_summary_in_ms(self):
+        for _ in range(10):
+            _latencia.registrar("ptax/CotacaoMoedaPeriodo", 0.3)
+        resumo = _latencia.resumo()["ptax/CotacaoMoedaPeriodo"]
+        assert resumo["amostras"] == 10
+        assert resumo["p99_ms"] == pytest.approx(300, rel=0.05)
+
+
+class TestTimeoutsAdaptativos:
+    def test_max_without_samples(self):
+        assert _latencia.timeouts("sgs", "sgs/x") == (10.0, 30.0)
+
+    def test_multiple_of_p99_within_bounds(self):
+        for _ in range(20):
+            _latencia.registrar("sgs/x", 0.8)
+            _latencia.registrar("sgs/conexao", 0.01)
+        conexao, total = _latencia.timeouts("sgs", "sgs/x")
+        assert total == pytest.approx(2.4, rel=0.05)
+        assert conexao == 1.0  # limite mínimo
+
+    def test_upper_bound(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_TIMEOUT_MAX_SEGUNDOS", "5")
+        for _ in range(20):
+            _latencia.registrar("sgs/x", 4.0)
+        assert _latencia.timeouts("sgs", "sgs/x").total == 5.0
@@ -0,0 +1,141 @@
+"""Tests for _limites.py — per-host token bucket, in-flight cap and FIFO queue."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from capivara_mcp.tools import _limites, _resiliencia
+from capivara_mcp.tools._contexto import Chamada, ChamadaCancelada
+from capivara_mcp.tools._limites import EsperaEsgotada, Limitador
+
+
+@pytest.fixture(autouse=True)
+def _limpo(monkeypatch):
+    monkeypatch.setenv("CAPIVARA_LIMITE_RPS", "1000")
+    monkeypatch.setenv("CAPIVARA_LIMITE_RAJADA", "100")
+    _limites.reiniciar()
+    _resiliencia.reiniciar()
+    yield
+    _limites.reiniciar()
+    _resiliencia.reiniciar()
+
+
+def _em_thread(fn):
+    t = threading.Thread(target=fn, daemon=True)
+    t.start()
+    return t
+
+
+def _esperar_fila(limitador: Limitador, n: int) -> None:
+    limite = time.monotonic() + 2
+    while limitador.resumo()["na_fila"] < n:
+        assert time.monotonic() < limite, "fila não atingiu o tamanho esperado"
+        time.sleep(0.005)
+
+
+class TestWorkers:
+    def test_limits_split_across_workers(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_RPS", "10")
+        monkeypatch.setenv("CAPIVARA_LIMITE_RAJADA", "10")
+        monkeypatch.setenv("CAPIVARA_LIMITE_CONCORRENCIA", "4")
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "4")
+        assert (Limitador._rps(), Limitador._rajada(), Limitador._concorrencia()) == (2.5, 2, 1)
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "1")
+        assert (Limitador._rps(), Limitador._rajada(), Limitador._concorrencia()) == (10.0, 10, 4)
+
+
+class TestConcorrencia:
+    def test_caps_in_flight_and_serves_fifo(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_CONCORRENCIA", "1")
+        limitador = Limitador("olinda.bcb.gov.br")
+        limitador.entrar()
+        ordem = []
+        threads = []
+        for i in range(3):
+            threads.append(_em_thread(lambda i=i: (limitador.entrar(), ordem.append(i), limitador.sair())))
+            _esperar_fila(limitador, i + 1)
+        assert limitador.em_voo == 1
+        limitador.sair()
+        for t in threads:
+            t.join(2)
+        assert ordem == [0, 1, 2]
+        assert limitador.em_voo == 0
+
+    def test_try_enter_never_queues(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_CONCORRENCIA", "1")
+        limitador = Limitador("olinda.bcb.gov.br")
+        assert limitador.tentar_entrar()
+        assert not limitador.tentar_entrar()
+        limitador.sair()
+        assert limitador.tentar_entrar()
+
+
+class TestTaxa:
+    def test_token_bucket_spaces_requests(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_RPS", "50")
+        monkeypatch.setenv("CAPIVARA_LIMITE_RAJADA", "1")
+        limitador = Limitador("api.bcb.gov.br")
+        inicio = time.monotonic()
+        for _ in range(6):
+            limitador.entrar()
+            limitador.sair()
+        assert time.monotonic() - inicio >= 0.09  # 5 esperas de ~20 ms
+
+    def test_queue_wait_reported_separately(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_RPS", "20")
+        monkeypatch.setenv("CAPIVARA_LIMITE_RAJADA", "1")
+        limitador = Limitador("api.bcb.gov.br")
+        assert limitador.entrar() < 0.01
+        limitador.sair()
+        assert limitador.entrar() >= 0.03
+        resumo = limitador.resumo()
+        assert resumo["admitidas"] == 2
+        assert resumo["espera_fila_p99_ms"] >= 30
+
+
+class TestDesistencia:
+    def test_deadline_in_queue(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_CONCORRENCIA", "1")
+        limitador = Limitador("api.bcb.gov.br")
+        limitador.entrar()
+        with pytest.raises(EsperaEsgotada):
+            limitador.entrar(Chamada("get_selic", "1", prazo=time.monotonic() + 0.05))
+        assert limitador.resumo()["na_fila"] == 0
+        assert limitador.desistencias == 1
+
+    def test_cancel_in_queue(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LIMITE_CONCORRENCIA", "1")
+        limitador = Limitador("api.bcb.gov.br")
+        limitador.entrar()
+        chamada = Chamada("get_selic", "1")
+        erros = []
+
+        def esperar():
+            try:
+                limitador.entrar(chamada)
+            except ChamadaCancelada as e:
+                erros.append(e)
+
+        t = _em_thread(esperar)
+        _esperar_fila(limitador, 1)
+        chamada.cancelada.set()
+        t.join(2)
+        assert len(erros) == 1
+        assert limitador.resumo()["na_fila"] == 0
+
+    def test_queue_timeout_not_counted_against_upstream(self):
+        def tentativa():
+            raise EsperaEsgotada("fila")
+
+        with pytest.raises(EsperaEsgotada):
+            _resiliencia.executar("sgs", "u", tentativa)
+        assert _resiliencia.estado_upstreams()["sgs"]["falhas_seguidas"] == 0
+
+
+def test_one_limiter_per_host():
+    assert _limites.limitador("a") is _limites.limitador("a")
+    assert _limites.limitador("a") is not _limites.limitador("b")
+    assert set(_limites.estado_limites()) == {"a", "b"}
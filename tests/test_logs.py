@@ -0,0 +1,99 @@
+"""Tests for _logs.py — structured, sampled and queued logging."""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import logging.handlers
+import queue
+
+import pytest
+
+from capivara_mcp.tools import _logs
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+
+
+def _registro(msg="x", **extra):
+    registro = logging.LogRecord("capivara-mcp.teste", logging.INFO, __file__, 1, msg, None, None)
+    registro.__dict__.update(extra)
+    return registro
+
+
+class TestFormato:
+    def test_json_line_with_fields(self):
+        linha = _logs.FormatoJson().format(_registro(request_id=7, ferramenta="get_ptax", campos={"duracao_ms": 1.5}))
+        dados = json.loads(linha)
+        assert dados["msg"] == "x" and dados["nivel"] == "INFO"
+        assert dados["request_id"] == 7 and dados["ferramenta"] == "get_ptax"
+        assert dados["duracao_ms"] == 1.5
+
+    def test_request_id_attached_in_calling_thread(self):
+        registro = _registro()
+        with em_chamada(Chamada(ferramenta="get_selic", id="abc")):
+            _logs.FiltroChamada().filter(registro)
+        assert (registro.__dict__["request_id"], registro.__dict__["ferramenta"]) == ("abc", "get_selic")
+
+
+class TestAmostragem:
+    def test_errors_and_slow_calls_always_logged(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LOG_AMOSTRAGEM", "0")
+        monkeypatch.setenv("CAPIVARA_LOG_LENTA_MS", "500")
+        assert _logs.deve_registrar(10, "HTTPStatusError")
+        assert _logs.deve_registrar(600, None)
+        assert not _logs.deve_registrar(10, None)
+
+    def test_successful_calls_sampled(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_LOG_AMOSTRAGEM", "1")
+        assert _logs.deve_registrar(10, None)
+
+    def test_call_summary(self, monkeypatch, caplog):
+        monkeypatch.setenv("CAPIVARA_LOG_AMOSTRAGEM", "1")
+        chamada = Chamada(ferramenta="get_ptax", id="9")
+        chamada.eventos.update(cache_miss=1, upstream=2)
+        chamada.status_upstream = 503
+        with caplog.at_level(logging.INFO, logger="capivara-mcp.chamadas"):
+            _logs.registrar_chamada(chamada, {"moeda": "USD"}, 12.0, "HTTPStatusError")
+        (registro,) = caplog.records
+        assert registro.levelno == logging.WARNING
+        assert registro.request_id == "9"
+        assert registro.campos["cache"] == {"hit": 0, "miss": 1}
+        assert registro.campos["upstream"] == {"requisicoes": 2, "status": 503}
+        assert registro.campos["parametros"] == {"moeda": "USD"}
+
+
+class TestFila:
+    def test_written_by_listener_thread(self):
+        fila = queue.SimpleQueue()
+        saida = io.StringIO()
+        destino = logging.StreamHandler(saida)
+        destino.setFormatter(_logs.FormatoJson())
+        ouvinte = logging.handlers.QueueListener(fila, destino)
+        enfileirador = _logs._Enfileirador(fila)
+        enfileirador.addFilter(_logs.FiltroChamada())
+        teste = logging.getLogger("capivara-mcp.teste-fila")
+        teste.addHandler(enfileirador)
+        teste.propagate = False
+        teste.setLevel(logging.INFO)
+        ouvinte.start()
+        try:
+            with em_chamada(Chamada(ferramenta="get_ptax", id="r1")):
+                teste.info("olá %s", "mundo")
+                try:
+                    raise ValueError("falhou")
+                except ValueError:
+                    teste.exception("erro")
+        finally:
+            ouvinte.stop()
+            teste.removeHandler(enfileirador)
+        primeira, segunda = (json.loads(linha) for linha in saida.getvalue().splitlines())
+        assert primeira["msg"] == "olá mundo" and primeira["request_id"] == "r1"
+        assert "ValueError: falhou" in segunda["exc"]
+
+
+@pytest.fixture(autouse=True)
+def _sem_handlers_extras():
+    yield
+    teste = logging.getLogger("capivara-mcp.teste-fila")
+    teste.propagate = True
+    teste.setLevel(logging.NOTSET)
@@ -0,0 +1,133 @@
+"""Tests for _metricas.py — Prometheus text exposition and server instrumentation."""
+
+from __future__ import annotations
+
+import json
+import os
+from unittest.mock import patch
+
+import httpx
+import mcp.types as types
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+from starlette.testclient import TestClient
+
+from capivara_mcp.server import criar_app_http, mcp
+from capivara_mcp.tools import _cache, _http, _metricas, _resiliencia
+from capivara_mcp.tools._cache import em_cache
+from tests.conftest import make_sgs_serie
+
+
+@pytest.fixture(autouse=True)
+def _metricas_limpas():
+    _metricas.reiniciar()
+    yield
+    _metricas.reiniciar()
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: 10.0}, n=5)
+
+
+class TestExposicao:
+    def test_counter_with_labels(self):
+        _metricas.contar("capivara_chamadas_total", ferramenta="get_ptax", resultado="ok")
+        _metricas.contar("capivara_chamadas_total", ferramenta="get_ptax", resultado="ok")
+        texto = _metricas.exportar()
+        assert "# TYPE capivara_chamadas_total counter" in texto
+        assert 'capivara_chamadas_total{ferramenta="get_ptax",resultado="ok"} 2' in texto
+
+    def test_histogram_buckets_cumulative(self):
+        for segundos in (0.003, 0.2, 0.2, 100.0):
+            _metricas.observar("capivara_chamada_segundos", segundos, ferramenta="get_selic")
+        linhas = _metricas.exportar().splitlines()
+        assert 'capivara_chamada_segundos_bucket{ferramenta="get_selic",le="0.005"} 1' in linhas
+        assert 'capivara_chamada_segundos_bucket{ferramenta="get_selic",le="0.25"} 3' in linhas
+        assert 'capivara_chamada_segundos_bucket{ferramenta="get_selic",le="60"} 3' in linhas
+        assert 'capivara_chamada_segundos_bucket{ferramenta="get_selic",le="+Inf"} 4' in linhas
+        assert 'capivara_chamada_segundos_count{ferramenta="get_selic"} 4' in linhas
+
+    def test_label_values_escaped(self):
+        _metricas.contar("x_total", tipo='a"b')
+        assert 'x_total{tipo="a\\"b"} 1' in _metricas.exportar()
+
+
+class TestInstrumentacao:
+    @patch("capivara_mcp.tools._sgs._buscar_bloco", side_effect=_bloco)
+    async def test_tool_call_counted(self, _):
+        async with create_connected_server_and_client_session(mcp) as session:
+            await session.call_tool("get_selic", {"data_inicio": "2025-01-02", "data_fim": "2025-01-10"})
+            await session.call_tool("get_ptax", {"data_inicio": "bad"})
+        assert _metricas.valor("capivara_chamadas_total", ferramenta="get_selic", resultado="ok") == 1
+        assert _metricas.valor("capivara_linhas_total", ferramenta="get_selic") == 5
+        assert _metricas.valor("capivara_chamada_segundos", ferramenta="get_selic") == 1
+        assert _metricas.valor("capivara_resposta_bytes", ferramenta="get_selic") == 1
+        assert _metricas.valor("capivara_chamadas_erros_total", ferramenta="get_ptax", tipo="RespostaDeErro") == 1
+
+    def test_cache_hits_and_misses(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE", "memoria")
+        _cache._backends.clear()
+
+        @em_cache("teste")
+        def _fetch(x):
+            return make_sgs_serie({"a": 1.0})
+
+        try:
+            _fetch(1)
+            _fetch(1)
+        finally:
+            _cache._backends.clear()
+        assert _metricas.valor("capivara_cache_total", camada="resultados", namespace="teste", resultado="miss") == 1
+        assert _metricas.valor("capivara_cache_total", camada="resultados", namespace="teste", resultado="hit") == 1
+
+    def test_upstream_errors_by_type(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        _resiliencia.reiniciar()
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            transporte = httpx.MockTransport(lambda request: httpx.Response(404))
+            return original(*args, transport=transporte, **kwargs)
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        with pytest.raises(httpx.HTTPStatusError):
+            _http.obter("sgs", "bcdata.sgs.432/dados", {"formato": "json"})
+        _resiliencia.reiniciar()
+        rotulos = {"upstream": "sgs", "endpoint": "sgs/bcdata.sgs.{codigo}/dados"}
+        assert _metricas.valor("capivara_upstream_erros_total", tipo="HTTPStatusError", **rotulos) == 1
+        assert _metricas.valor("capivara_upstream_requisicoes_total", resultado="erro", **rotulos) == 1
+        assert _metricas.valor("capivara_upstream_segundos", **rotulos) == 1
+
+
+class TestExportacao:
+    async def test_resource_in_stdio(self):
+        _metricas.contar("capivara_chamadas_total", ferramenta="get_ptax", resultado="ok")
+        async with create_connected_server_and_client_session(mcp) as session:
+            result = await session.read_resource(AnyUrl("capivara://metricas"))
+        conteudo = result.contents[0]
+        assert isinstance(conteudo, types.TextResourceContents)
+        assert "capivara_chamadas_total" in conteudo.text
+
+    def test_prometheus_endpoint_in_http(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "1")
+        monkeypatch.setattr(mcp, "_session_manager", None)
+        _metricas.contar("capivara_chamadas_total", ferramenta="get_ptax", resultado="ok")
+        with TestClient(criar_app_http()) as cliente:
+            resposta = cliente.get("/metrics")
+        assert resposta.status_code == 200
+        assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert json.dumps("get_ptax") in resposta.text
+        assert "worker=" not in resposta.text
+
+    def test_worker_label_with_several_workers(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "4")
+        monkeypatch.setattr(mcp, "_session_manager", None)
+        _metricas.contar("capivara_chamadas_total", ferramenta="get_ptax", resultado="ok")
+        _metricas.observar("capivara_chamada_segundos", 0.2, ferramenta="get_ptax")
+        with TestClient(criar_app_http()) as cliente:
+            linhas = cliente.get("/metrics").text.splitlines()
+        worker = f'worker="{os.getpid()}"'
+        assert f'capivara_chamadas_total{{{worker},ferramenta="get_ptax",resultado="ok"}} 1' in linhas
+        assert f'capivara_chamada_segundos_bucket{{{worker},ferramenta="get_ptax",le="+Inf"}} 1' in linhas
+        assert f'capivara_chamada_segundos_count{{{worker},ferramenta="get_ptax"}} 1' in linhas
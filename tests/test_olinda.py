@@ -0,0 +1,56 @@
+"""Tests for _olinda.py — OData URL building and response parsing."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pandas as pd
+
+from capivara_mcp.tools._olinda import consultar, literal
+
+_PATCH = "capivara_mcp.tools._olinda.obter_json"
+
+
+class TestLiteral:
+    def test_string_quoted(self):
+        assert literal("IPCA") == "'IPCA'"
+
+    def test_quote_escaped(self):
+        assert literal("d'agua") == "'d''agua'"
+
+    def test_number_unquoted(self):
+        assert literal(0) == "0"
+
+
+class TestConsultar:
+    @patch(_PATCH, return_value={"value": []})
+    def test_function_parameters(self, mock_obter):
+        consultar("ptax", "CotacaoMoedaPeriodo", parametros={"moeda": "USD", "dataInicial": "01-02-2025"})
+        upstream, caminho, query = mock_obter.call_args.args
+        assert upstream == "ptax"
+        assert caminho == "CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial)"
+        assert query["@moeda"] == "'USD'"
+        assert query["@dataInicial"] == "'01-02-2025'"
+        assert query["$format"] == "json"
+
+    @patch(_PATCH, return_value={"value": []})
+    def test_query_options(self, mock_obter):
+        consultar(
+            "expectativas",
+            "ExpectativasMercadoSelic",
+            filtro="baseCalculo eq 0",
+            ordem="Data desc",
+            campos=["Data", "Mediana"],
+            top=10,
+        )
+        query = mock_obter.call_args.args[2]
+        assert query["$filter"] == "baseCalculo eq 0"
+        assert query["$orderby"] == "Data desc"
+        assert query["$select"] == "Data,Mediana"
+        assert query["$top"] == 10
+
+    @patch(_PATCH, return_value={"value": [{"Data": "2025-01-10", "Mediana": 4.5}]})
+    def test_date_columns_parsed(self, _):
+        df = consultar("expectativas", "ExpectativasMercadoSelic")
+        assert pd.api.types.is_datetime64_any_dtype(df["Data"])
+        assert df["Mediana"].iloc[0] == 4.5
@@ -0,0 +1,249 @@
+"""Tests for _pacote.py — offline bundle export/import and offline mode."""
+
+from __future__ import annotations
+
+import io
+import json
+import math
+import tarfile
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from capivara_mcp.server import main
+from capivara_mcp.tools import _cache, _pacote
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._pacote import ForaDoPacote, PacoteInvalido
+from capivara_mcp.tools._resiliencia import CircuitoAberto
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import buscar_series
+from capivara_mcp.tools.expectativas import get_expectativas_mercado
+from capivara_mcp.tools.ptax import get_ptax
+from capivara_mcp.tools.taxa_juros import get_taxa_juros
+from tests.conftest import (
+    armazem_configurado,
+    cache_configurado,
+    make_expectativas_df,
+    make_ptax_df,
+    make_taxa_juros_df,
+)
+
+
+def _pontos(inicio, fim):
+    dados = []
+    d = inicio
+    while d <= fim:
+        dados.append({"data": d.strftime("%d/%m/%Y"), "valor": str(d.day)})
+        d = date.fromordinal(d.toordinal() + 1)
+    return Serie.de_sgs("x", dados)
+
+
+def _maquina(monkeypatch, raiz):
+    """Aponta armazém, cache e diretório padrão para ``raiz`` (uma "máquina")."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(raiz / "xdg"))
+    monkeypatch.setenv("CAPIVARA_SERIES_DIRETORIO", str(raiz / "series"))
+    monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+    monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(raiz / "cache.sqlite3"))
+    monkeypatch.setenv("CAPIVARA_OFFLINE", "")
+
+
+@pytest.fixture(autouse=True)
+def _limpar_backends():
+    yield
+    _cache._backends.clear()
+
+
+@pytest.fixture
+def pacote(monkeypatch, tmp_path):
+    _maquina(monkeypatch, tmp_path / "origem")
+    armazem_configurado().gravar(432, date(2025, 1, 1), date(2025, 1, 31), _pontos(date(2025, 1, 1), date(2025, 1, 31)))
+    cache_configurado().set("capivara:ptax:'USD'", b"valor-ptax", ttl=600)
+    caminho = tmp_path / "dados.cpvb"
+    _pacote.exportar(str(caminho))
+    return caminho
+
+
+class TestExportacao:
+    def test_manifest_lists_contents(self, pacote):
+        with tarfile.open(pacote, "r:gz") as tar:
+            assert tar.getnames()[0] == "manifesto.json"
+            arquivo = tar.extractfile("manifesto.json")
+            assert arquivo is not None
+            manifesto = json.load(arquivo)
+        assert manifesto["formato"] == _pacote.FORMATO
+        assert manifesto["series"] == {"432": {"inicio": "2025-01-01", "fim": "2025-01-31", "pontos": 31}}
+        assert manifesto["cache"] == {"backend": "sqlite", "entradas": 1}
+        assert set(manifesto["sha256"]) == {"series/sgs-432.bin", "cache.bin"}
+
+    def test_import_on_another_machine(self, pacote, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "destino")
+        assert _pacote.importar(str(pacote)) == {"series": 1, "series_mantidas": 0, "conjuntos": 0, "cache": 1}
+        serie = armazem_configurado().abrir(432)
+        assert serie is not None
+        assert serie.fatiar("x", date(2025, 1, 30), date(2025, 1, 31)).valores("x") == [30, 31]
+        assert cache_configurado().get("capivara:ptax:'USD'") == b"valor-ptax"
+
+    def test_import_keeps_wider_local_series(self, pacote, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "destino")
+        armazem = armazem_configurado()
+        armazem.gravar(432, date(2024, 12, 1), date(2025, 2, 28), _pontos(date(2024, 12, 1), date(2025, 2, 28)))
+        assert _pacote.importar(str(pacote))["series_mantidas"] == 1
+        serie = armazem.abrir(432)
+        assert serie is not None and len(serie) == 90
+
+    def test_import_without_series_store_warns(self, pacote, monkeypatch, tmp_path, caplog):
+        _maquina(monkeypatch, tmp_path / "destino")
+        monkeypatch.setenv("CAPIVARA_SERIES_DIRETORIO", "")
+        with caplog.at_level("WARNING", logger="capivara-mcp.pacote"):
+            assert _pacote.importar(str(pacote))["series"] == 1
+        assert "CAPIVARA_SERIES_DIRETORIO" in caplog.text
+        assert str(tmp_path / "destino" / "xdg" / "capivara-mcp" / "series") in caplog.text
+
+    def test_corrupt_member_rejected(self, pacote, tmp_path):
+        with tarfile.open(pacote, "r:gz") as tar:
+            membros = {m.name: arquivo.read() for m in tar if (arquivo := tar.extractfile(m)) is not None}
+        membros["cache.bin"] = membros["cache.bin"].replace(b"valor-ptax", b"valor-xxxx")
+        adulterado = tmp_path / "adulterado.cpvb"
+        with tarfile.open(adulterado, "w:gz") as tar:
+            for nome, dados in membros.items():
+                info = tarfile.TarInfo(nome)
+                info.size = len(dados)
+                tar.addfile(info, io.BytesIO(dados))
+        with pytest.raises(PacoteInvalido, match="SHA-256"):
+            _pacote.ler(str(adulterado))
+
+    def test_not_a_bundle(self, tmp_path):
+        (tmp_path / "x.cpvb").write_bytes(b"nada")
+        with pytest.raises(PacoteInvalido):
+            _pacote.ler(str(tmp_path / "x.cpvb"))
+
+
+class TestOffline:
+    @pytest.fixture
+    def offline(self, pacote, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "offline")
+        _pacote.ativar_offline(str(pacote))
+
+    @patch("capivara_mcp.tools._http._tentar")
+    def test_series_answered_from_bundle_without_network(self, tentar, offline):
+        serie = buscar_series({"selic_meta": 432}, date(2025, 1, 20), date(2025, 3, 31))
+        assert serie.datas()[-1] == "2025-01-31"
+        assert serie.attrs["parcial"] is False
+        tentar.assert_not_called()
+
+    @patch("capivara_mcp.tools._http._tentar")
+    def test_uncovered_query_fails_without_network(self, tentar, offline):
+        with pytest.raises(ForaDoPacote):
+            buscar_series({"selic_efetiva": 11}, date(2025, 1, 1), date(2025, 1, 31))
+        resposta = json.loads(get_ptax("EUR", "2025-01-02", "2025-01-10"))
+        assert "Modo offline" in resposta["erro"]
+        tentar.assert_not_called()
+
+    def test_bundle_cache_ignores_expiry(self, offline):
+        backend = cache_configurado()
+        assert backend.nome == "pacote"
+        assert backend.get("capivara:ptax:'USD'") == b"valor-ptax"
+
+    def test_session_writes_bounded_and_bundle_kept(self, offline, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_CACHE_MEMORIA_BYTES", "1000")
+        backend = cache_configurado()
+        backend.set("capivara:ptax:'USD'", b"outro", ttl=600)
+        backend.delete("capivara:ptax:'USD'")
+        assert backend.get("capivara:ptax:'USD'") == b"valor-ptax"
+        for i in range(10):
+            backend.set(f"capivara:x:{i}", b"v" * 300, ttl=600)
+        assert backend.estatisticas()["bytes"] <= len(b"valor-ptax") + 1000
+        assert backend.get("capivara:x:9") == b"v" * 300
+        assert backend.get("capivara:x:0") is None
+
+    def test_fora_do_pacote_is_open_circuit(self, pacote):
+        erro = ForaDoPacote("SGS", "https://exemplo", str(pacote))
+        assert isinstance(erro, CircuitoAberto)
+        assert erro.upstream == "SGS"
+        assert erro.reabre_em == math.inf
+        assert str(erro).startswith("Modo offline")
+
+    def test_extraction_reused(self, pacote, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "offline")
+        _pacote.ativar_offline(str(pacote))
+        diretorio = armazem_configurado().diretorio
+        _pacote.ativar_offline(str(pacote))
+        assert armazem_configurado().diretorio == diretorio
+
+
+@pytest.fixture
+def pacote_olinda(monkeypatch, tmp_path):
+    """Pacote exportado de um cache com PTAX, Focus e TaxaJuros de verdade."""
+    _maquina(monkeypatch, tmp_path / "origem")
+    juros = make_taxa_juros_df()
+    juros.loc[2, "Modalidade"] = "CHEQUE ESPECIAL"
+    _cache.em_cache("ptax")(lambda *args: make_ptax_df(9))("USD", date(2025, 1, 2), date(2025, 1, 10))
+    _cache.em_cache("expectativas_anuais")(lambda *args: make_expectativas_df("IPCA", 4))("IPCA", 4)
+    _cache.em_cache("taxa_juros")(lambda *args: juros)("Jan-2025", None, 20)
+    caminho = tmp_path / "olinda.cpvb"
+    _pacote.exportar(str(caminho))
+    return caminho
+
+
+class TestConjuntos:
+    def test_exported_as_partitions_not_cache(self, pacote_olinda):
+        manifesto, membros = _pacote.ler(str(pacote_olinda))
+        assert manifesto["conjuntos"] == {
+            "expectativas_anuais": {"particoes": 1, "linhas": 4},
+            "ptax": {"particoes": 1, "linhas": 9},
+            "taxa_juros": {"particoes": 1, "linhas": 3},
+        }
+        assert manifesto["cache"]["entradas"] == 0
+        assert "conjuntos/ptax.cpv" in membros
+
+    @patch("capivara_mcp.tools._http._tentar")
+    def test_imported_past_data_never_expires(self, tentar, pacote_olinda, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "destino")
+        assert _pacote.importar(str(pacote_olinda))["conjuntos"] == 3
+        _cache._backends.clear()
+        cotacoes = json.loads(get_ptax("USD", "2025-01-06", "2025-01-08"))["cotacoes"]
+        assert [c["data_hora"][:10] for c in cotacoes] == ["2025-01-06", "2025-01-07", "2025-01-08"]
+        assert len(json.loads(get_taxa_juros("Jan-2025", top=5))["taxas"]) == 3
+        tentar.assert_not_called()
+
+    @patch("capivara_mcp.tools._http._tentar")
+    def test_offline_answers_by_range_and_filter(self, tentar, pacote_olinda, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "offline")
+        _pacote.ativar_offline(str(pacote_olinda))
+        with em_chamada(Chamada(ferramenta="get_ptax", id="1")):
+            resposta = json.loads(get_ptax("USD", "2025-01-09", "2025-02-28"))
+        assert [c["data_hora"][:10] for c in resposta["cotacoes"]] == ["2025-01-09", "2025-01-10"]
+        assert resposta["parcial"] is True
+        assert "2025-01-09 a 2025-01-10" in resposta["avisos"][0]
+        assert "parcial" not in json.loads(get_ptax("USD", "2025-01-06", "2025-01-08"))
+        assert len(json.loads(get_expectativas_mercado("IPCA", top=2))["expectativas"]) == 2
+        taxas = json.loads(get_taxa_juros("Jan-2025", modalidade="CHEQUE ESPECIAL"))["taxas"]
+        assert [t["modalidade"] for t in taxas] == ["CHEQUE ESPECIAL"]
+        tentar.assert_not_called()
+
+
+class TestCLI:
+    def test_export_and_import_subcommands(self, monkeypatch, tmp_path, capsys):
+        _maquina(monkeypatch, tmp_path / "origem")
+        armazem_configurado().gravar(
+            11, date(2025, 1, 1), date(2025, 1, 3), _pontos(date(2025, 1, 1), date(2025, 1, 3))
+        )
+        main(["exportar", str(tmp_path / "p.cpvb")])
+        assert json.loads(capsys.readouterr().out)["series"] == 1
+        _maquina(monkeypatch, tmp_path / "destino")
+        main(["import", str(tmp_path / "p.cpvb")])
+        assert json.loads(capsys.readouterr().out)["series"] == 1
+
+    def test_offline_flag(self, pacote, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path / "offline")
+        with patch("anyio.run") as run, patch("signal.signal"):
+            main(["--offline", str(pacote)])
+        run.assert_called_once()
+        assert _pacote.pacote_offline() == str(pacote)
+
+    def test_invalid_bundle_exits(self, monkeypatch, tmp_path):
+        _maquina(monkeypatch, tmp_path)
+        with pytest.raises(SystemExit) as saida:
+            main(["importar", str(tmp_path / "inexistente.cpvb")])
+        assert saida.value.code == 1
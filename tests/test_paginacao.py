@@ -0,0 +1,115 @@
+"""Tests for _paginacao.py — cursor handling over in-memory results."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from capivara_mcp.tools import _cache, _paginacao
+from capivara_mcp.tools._paginacao import continuar, paginar, validar_tamanho_pagina
+from tests.conftest import cache_configurado, make_sgs_serie
+
+
+def _df(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"data": [f"2025-01-{i + 1:02d}" for i in range(n)], "valor": list(range(n))})
+
+
+class TestValidarTamanhoPagina:
+    def test_none_is_valid(self):
+        assert validar_tamanho_pagina(None) is None
+
+    def test_bounds(self):
+        assert validar_tamanho_pagina(1) is None
+        for tamanho in (0, 100_000):
+            erro = validar_tamanho_pagina(tamanho)
+            assert erro is not None and "erro" in json.loads(erro)
+
+
+class TestPaginar:
+    def test_single_page_has_no_cursor(self):
+        data = json.loads(paginar("get_teste", {"indice": "X"}, "valores", _df(3), 10))
+        assert data["indice"] == "X"
+        assert len(data["valores"]) == 3
+        assert data["paginacao"]["proximo_cursor"] is None
+        assert data["paginacao"]["total"] == 3
+
+    def test_walks_all_pages(self):
+        data = json.loads(paginar("get_teste", {"indice": "X"}, "valores", _df(7), 3))
+        vistos = [r["valor"] for r in data["valores"]]
+        while data["paginacao"]["proximo_cursor"]:
+            data = json.loads(continuar("get_teste", data["paginacao"]["proximo_cursor"]))
+            assert data["indice"] == "X"
+            vistos.extend(r["valor"] for r in data["valores"])
+        assert vistos == list(range(7))
+
+    def test_invalid_cursor(self):
+        data = json.loads(continuar("get_teste", "not-a-cursor"))
+        assert "erro" in data
+        assert "inválido" in data["erro"]
+
+    def test_cursor_bound_to_issuing_tool(self):
+        cursor = json.loads(paginar("get_ptax", {}, "valores", _df(5), 2))["paginacao"]["proximo_cursor"]
+        assert "inválido" in json.loads(continuar("get_selic", cursor))["erro"]
+        assert len(json.loads(continuar("get_ptax", cursor))["valores"]) == 2
+
+    def test_expired_cursor(self):
+        primeira = json.loads(paginar("get_teste", {}, "valores", _df(5), 2))
+        cursor = primeira["paginacao"]["proximo_cursor"]
+        with patch.object(_paginacao.time, "monotonic", return_value=float("inf")):
+            data = json.loads(continuar("get_teste", cursor))
+        assert "erro" in data
+        assert "expirado" in data["erro"]
+
+
+class TestWorkers:
+    @pytest.fixture
+    def compartilhado(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "2")
+        monkeypatch.setenv("CAPIVARA_CACHE", "sqlite")
+        monkeypatch.setenv("CAPIVARA_CACHE_SQLITE", str(tmp_path / "cache.sqlite3"))
+        _cache._backends.clear()
+        yield
+        _cache._backends.clear()
+
+    def _outro_worker(self):
+        with _paginacao._lock:
+            _paginacao._resultados.clear()
+
+    def test_cursor_served_by_another_worker(self, compartilhado):
+        data = json.loads(paginar("get_teste", {"indice": "X"}, "valores", _df(7), 3))
+        vistos = [r["valor"] for r in data["valores"]]
+        while data["paginacao"]["proximo_cursor"]:
+            self._outro_worker()
+            data = json.loads(continuar("get_teste", data["paginacao"]["proximo_cursor"]))
+            assert data["indice"] == "X"
+            vistos.extend(r["valor"] for r in data["valores"])
+        assert vistos == list(range(7))
+
+    def test_sgs_series_shared(self, compartilhado):
+        serie = make_sgs_serie({"IPCA": 0.4}, 5)
+        cursor = json.loads(paginar("get_teste", {}, "valores", serie, 2))["paginacao"]["proximo_cursor"]
+        self._outro_worker()
+        data = json.loads(continuar("get_teste", cursor))
+        assert data["valores"] == serie.registros(2, 4)
+
+    def test_single_worker_keeps_results_in_memory(self, compartilhado, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "1")
+        cursor = json.loads(paginar("get_teste", {}, "valores", _df(5), 2))["paginacao"]["proximo_cursor"]
+        assert cache_configurado().estatisticas()["entradas"] == 0
+        self._outro_worker()
+        assert "expirado" in json.loads(continuar("get_teste", cursor))["erro"]
+
+    @pytest.mark.parametrize("meta", [b"nao-json", b'{"cabecalho": {}}', b"[1, 2]"])
+    def test_unreadable_shared_entry_is_expired(self, compartilhado, meta):
+        cursor = json.loads(paginar("get_teste", {}, "valores", _df(5), 2))["paginacao"]["proximo_cursor"]
+        self._outro_worker()
+        decodificado = _paginacao._decodificar_cursor(cursor)
+        assert decodificado is not None
+        identificador = decodificado[0]
+        backend = cache_configurado()
+        chave = _paginacao._chave_compartilhada(identificador)
+        backend.set(chave, meta + b"\n" + _cache.serializar(_df(5)), 60)
+        assert "expirado" in json.loads(continuar("get_teste", cursor))["erro"]
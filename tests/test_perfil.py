@@ -0,0 +1,168 @@
+"""Tests for _perfil.py — on-demand profiling of the next N tool calls."""
+
+from __future__ import annotations
+
+import json
+import pstats
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from capivara_mcp.server import mcp
+from capivara_mcp.tools import _perfil
+from tests.conftest import make_sgs_serie
+
+
+@pytest.fixture(autouse=True)
+def perfis(monkeypatch, tmp_path):
+    monkeypatch.setenv("CAPIVARA_PERFIL_DIRETORIO", str(tmp_path))
+    monkeypatch.setenv("CAPIVARA_PERFIL_INTERVALO_MS", "1")
+    _perfil.reiniciar()
+    yield tmp_path
+    _perfil.reiniciar()
+
+
+def _trabalho():
+    fim = time.perf_counter() + 0.03
+    while time.perf_counter() < fim:
+        sum(range(1000))
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: 10.0}, n=5)
+
+
+class TestArmar:
+    def test_env_arms_next_calls_only(self, monkeypatch, perfis):
+        monkeypatch.setenv("CAPIVARA_PERFIL", "get_ptax:2")
+        for i in range(3):
+            with _perfil.perfilando("get_ptax", str(i), {"moeda": "USD"}):
+                _trabalho()
+        with _perfil.perfilando("get_selic", "9", {}):
+            pass
+        assert sorted(p.suffix for p in perfis.iterdir()) == [
+            ".folded",
+            ".folded",
+            ".json",
+            ".json",
+            ".pstats",
+            ".pstats",
+        ]
+        assert _perfil.estado()["armados"] == {}
+
+    @pytest.mark.parametrize("quantidade", ["0", "-2"])
+    def test_env_non_positive_count_not_armed(self, monkeypatch, perfis, quantidade):
+        monkeypatch.setenv("CAPIVARA_PERFIL", f"get_ptax:{quantidade},get_selic:1")
+        for i in range(3):
+            with _perfil.perfilando("get_ptax", str(i), {}):
+                pass
+        assert list(perfis.iterdir()) == []
+        assert _perfil.estado()["armados"] == {"get_selic": {"chamadas": 1, "modo": "deterministico"}}
+
+    def test_profile_files(self, perfis):
+        _perfil.armar({"get_expectativas_top5": 1})
+        with _perfil.perfilando("get_expectativas_top5", "42", {"indicador": "IPCA", "top": 500}):
+            _trabalho()
+        (metadados,) = perfis.glob("get_expectativas_top5-*-42.json")
+        dados = json.loads(metadados.read_text())
+        assert dados["parametros"] == {"indicador": "IPCA", "top": 500}
+        assert dados["modo"] == "deterministico"
+        assert dados["parede_ms"] >= 30 and dados["cpu_ms"] > 0
+        prefixo = str(metadados)[: -len(".json")]
+        assert pstats.Stats(prefixo + ".pstats").get_stats_profile().func_profiles
+        linhas = Path(prefixo + ".folded").read_text().splitlines()
+        assert dados["amostras"] == sum(int(linha.rsplit(" ", 1)[1]) for linha in linhas) > 0
+        assert any("_trabalho (test_perfil.py" in linha for linha in linhas)
+
+    def test_sampling_mode_skips_pstats(self, perfis):
+        _perfil.armar({"get_ptax": 1}, modo="amostragem")
+        with _perfil.perfilando("get_ptax", "1", {}):
+            _trabalho()
+        assert sorted(p.suffix for p in perfis.iterdir()) == [".folded", ".json"]
+
+    def test_concurrent_calls_share_one_cprofile(self, perfis):
+        _perfil.armar({"get_ptax": 2})
+        dentro, sair = threading.Barrier(3), threading.Event()
+        erros = []
+
+        def chamar(requisicao):
+            try:
+                with _perfil.perfilando("get_ptax", requisicao, {}):
+                    dentro.wait(timeout=5)
+                    _trabalho()
+                    sair.wait(timeout=5)
+            except BaseException as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=chamar, args=(str(i),)) for i in range(2)]
+        for t in threads:
+            t.start()
+        dentro.wait(timeout=5)
+        sair.set()
+        for t in threads:
+            t.join(timeout=5)
+        assert not erros
+        modos = sorted(json.loads(p.read_text())["modo"] for p in perfis.glob("*.json"))
+        assert modos == ["amostragem", "deterministico"]
+        assert len(list(perfis.glob("*.pstats"))) == 1
+        assert [t.name for t in threading.enumerate() if t.name == "capivara-perfil"] == []
+        assert not _perfil._cprofile.locked()
+
+    def test_profiler_already_active_falls_back(self, perfis):
+        _perfil.armar({"get_ptax": 1})
+        with (
+            patch.object(_perfil.cProfile.Profile, "enable", side_effect=ValueError("ativo")),
+            _perfil.perfilando("get_ptax", "1", {}),
+        ):
+            _trabalho()
+        (metadados,) = perfis.glob("*.json")
+        assert json.loads(metadados.read_text())["modo"] == "amostragem"
+        assert not _perfil._cprofile.locked()
+
+    def test_unarmed_is_noop(self, perfis):
+        with _perfil.perfilando("get_ptax", "1", {}):
+            pass
+        assert list(perfis.iterdir()) == []
+
+
+class TestToolAdministrativo:
+    def test_arms_tools(self):
+        dados = json.loads(_perfil.perfilar_chamadas("get_expectativas_top5, get_ptax", chamadas=3))
+        armado = {"chamadas": 3, "modo": "deterministico"}
+        assert dados["armados"] == {"get_expectativas_top5": armado, "get_ptax": armado}
+        assert json.loads(_perfil.perfilar_chamadas("get_ptax", chamadas=0))["armados"] == {
+            "get_expectativas_top5": armado
+        }
+
+    def test_mode_kept_per_tool(self, perfis):
+        _perfil.perfilar_chamadas("get_ptax", chamadas=1, modo="amostragem")
+        dados = json.loads(_perfil.perfilar_chamadas("get_selic", chamadas=1))
+        assert dados["armados"]["get_ptax"] == {"chamadas": 1, "modo": "amostragem"}
+        with _perfil.perfilando("get_ptax", "1", {}):
+            _trabalho()
+        (metadados,) = perfis.glob("get_ptax-*.json")
+        assert json.loads(metadados.read_text())["modo"] == "amostragem"
+        assert _perfil.estado()["armados"] == {"get_selic": {"chamadas": 1, "modo": "deterministico"}}
+
+    @pytest.mark.parametrize("kwargs", [{"modo": "rapido"}, {"chamadas": 1000}, {"ferramentas": " , "}])
+    def test_invalid_arguments(self, kwargs):
+        assert "erro" in json.loads(_perfil.perfilar_chamadas(**{"ferramentas": "get_ptax", **kwargs}))
+
+    async def test_not_registered_without_admin(self):
+        async with create_connected_server_and_client_session(mcp) as session:
+            result = await session.list_tools()
+        assert "perfilar_chamadas" not in {t.name for t in result.tools}
+
+
+@patch("capivara_mcp.tools._sgs._buscar_bloco", side_effect=_bloco)
+async def test_tool_call_profiled_through_server(_, perfis):
+    _perfil.armar({"get_selic": 1})
+    async with create_connected_server_and_client_session(mcp) as session:
+        await session.call_tool("get_selic", {"data_inicio": "2025-01-02", "data_fim": "2025-01-10"})
+    (metadados,) = perfis.glob("get_selic-*.json")
+    parametros = json.loads(metadados.read_text())["parametros"]
+    assert parametros["data_inicio"] == "2025-01-02" and parametros["data_fim"] == "2025-01-10"
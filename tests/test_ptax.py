@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import json
+from datetime import date
 from unittest.mock import patch
 
 import httpx
 import pandas as pd
 
+from capivara_mcp.tools._resiliencia import CircuitoAberto
 from capivara_mcp.tools.ptax import get_ptax
+from capivara_mcp.tools.selic import get_selic
 from tests.conftest import make_ptax_df
 
 _PATCH = "capivara_mcp.tools.ptax._fetch_ptax"
@@ -52,6 +55,49 @@ class TestGetPtaxSuccess:
         assert isinstance(result, str)
         json.loads(result)  # should not raise
 
+    @patch(_PATCH)
+    def test_window_snapped_to_business_days(self, mock_fetch):
+        mock_fetch.return_value = make_ptax_df(n=3)
+        result = get_ptax(data_inicio="2025-01-01", data_fim="2025-01-05")
+        mock_fetch.assert_called_once_with("USD", date(2025, 1, 2), date(2025, 1, 3))
+        assert json.loads(result)["periodo"]["dias_uteis"] == 2
+
+    @patch(_PATCH)
+    def test_dias_uteis_sets_start(self, mock_fetch):
+        mock_fetch.return_value = make_ptax_df(n=5)
+        result = get_ptax(data_fim="2025-01-11", dias_uteis=5)
+        data = json.loads(result)
+        assert data["periodo"]["inicio"] == "2025-01-06"
+        assert data["periodo"]["dias_uteis"] == 5
+        mock_fetch.assert_called_once_with("USD", date(2025, 1, 6), date(2025, 1, 10))
+
+    @patch(_PATCH)
+    def test_paginated_first_page(self, mock_fetch):
+        mock_fetch.return_value = make_ptax_df(n=3)
+        result = get_ptax(data_inicio="2025-01-02", data_fim="2025-01-04", tamanho_pagina=2)
+        data = json.loads(result)
+        assert data["moeda"] == "USD"
+        assert len(data["cotacoes"]) == 2
+        proxima = json.loads(get_ptax(cursor=data["paginacao"]["proximo_cursor"]))
+        assert len(proxima["cotacoes"]) == 1
+        assert proxima["paginacao"]["proximo_cursor"] is None
+
+    @patch(_PATCH)
+    def test_cursor_not_accepted_by_another_tool(self, mock_fetch):
+        mock_fetch.return_value = make_ptax_df(n=3)
+        primeira = json.loads(get_ptax(data_inicio="2025-01-02", data_fim="2025-01-04", tamanho_pagina=2))
+        cursor = primeira["paginacao"]["proximo_cursor"]
+        assert "Cursor inválido" in json.loads(get_selic(cursor=cursor))["erro"]
+        assert len(json.loads(get_ptax(cursor=cursor))["cotacoes"]) == 1
+
+    @patch(_PATCH)
+    def test_weekend_window_skips_upstream(self, mock_fetch):
+        result = get_ptax(data_inicio="2025-01-04", data_fim="2025-01-05")
+        data = json.loads(result)
+        assert "erro" in data
+        assert "dia útil" in data["erro"]
+        mock_fetch.assert_not_called()
+
 
 class TestGetPtaxEmptyResponse:
     @patch(_PATCH)
@@ -87,6 +133,18 @@ class TestGetPtaxValidation:
         assert "erro" in data
         assert "365" in data["erro"]
 
+    def test_data_inicio_and_dias_uteis_conflict(self):
+        result = get_ptax(data_inicio="2025-01-02", data_fim="2025-01-10", dias_uteis=3)
+        data = json.loads(result)
+        assert "erro" in data
+        assert "dias_uteis" in data["erro"]
+
+    def test_invalid_dias_uteis(self):
+        result = get_ptax(data_fim="2025-01-10", dias_uteis=0)
+        data = json.loads(result)
+        assert "erro" in data
+        assert "dias_uteis" in data["erro"]
+
 
 class TestGetPtaxErrors:
     @patch(_PATCH, side_effect=httpx.TimeoutException("timeout"))
@@ -103,6 +161,13 @@ class TestGetPtaxErrors:
         assert "erro" in data
         assert "conectar" in data["erro"]
 
+    @patch(_PATCH, side_effect=CircuitoAberto("ptax", 12.0))
+    def test_circuit_open(self, _):
+        result = get_ptax(data_inicio="2025-01-02", data_fim="2025-01-04")
+        data = json.loads(result)
+        assert "indisponível" in data["erro"]
+        assert "12 s" in data["erro"]
+
     @patch(_PATCH, side_effect=RuntimeError("boom"))
     def test_unexpected_error(self, _):
         result = get_ptax(data_inicio="2025-01-02", data_fim="2025-01-04")
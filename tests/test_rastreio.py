@@ -0,0 +1,111 @@
+"""Tests for _rastreio.py — per-call tracing spans and exporters."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from capivara_mcp.server import mcp
+from capivara_mcp.tools import _http, _rastreio, _resiliencia
+from tests.conftest import make_sgs_serie
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: 10.0}, n=5)
+
+
+def _rastros(texto):
+    return [json.loads(linha)["rastro"] for linha in texto.splitlines() if linha.startswith('{"rastro"')]
+
+
+class TestDesligado:
+    def test_spans_are_noops(self, monkeypatch):
+        monkeypatch.delenv("CAPIVARA_RASTREIO", raising=False)
+        with _rastreio.rastrear("get_ptax", "1") as rastro:
+            assert rastro is None
+            with _rastreio.trecho("cache") as trecho:
+                assert trecho is None
+            _rastreio.fase("buscar")
+
+
+class TestFases:
+    def test_phases_sequential_and_spans_nested(self, monkeypatch, capsys):
+        monkeypatch.setenv("CAPIVARA_RASTREIO", "stderr")
+        with _rastreio.rastrear("get_ptax", "7"):
+            _rastreio.fase("buscar")
+            with _rastreio.trecho("cache", namespace="ptax"):
+                _rastreio.fase("ignorada")  # dentro de um trecho aninhado
+            _rastreio.fase("transformar")
+        (rastro,) = _rastros(capsys.readouterr().err)
+        assert rastro["request_id"] == "7"
+        raiz, *filhos = rastro["trechos"]
+        nomes = {t["nome"]: t for t in filhos}
+        assert list(nomes) == ["validar", "buscar", "cache", "transformar"]
+        assert nomes["cache"]["pai"] == nomes["buscar"]["id"]
+        assert all(nomes[f]["pai"] == raiz["id"] for f in ("validar", "buscar", "transformar"))
+
+    def test_error_recorded_on_span(self, monkeypatch, capsys):
+        monkeypatch.setenv("CAPIVARA_RASTREIO", "stderr")
+        with pytest.raises(ValueError), _rastreio.rastrear("get_ptax", "1"), _rastreio.trecho("cache"):
+            raise ValueError
+        (rastro,) = _rastros(capsys.readouterr().err)
+        assert rastro["trechos"][-1]["atributos"] == {"erro": "ValueError"}
+
+
+class TestInstrumentacao:
+    @patch("capivara_mcp.tools._sgs._buscar_bloco", side_effect=_bloco)
+    async def test_tool_call_traced_with_request_id(self, _, monkeypatch, capsys):
+        monkeypatch.setenv("CAPIVARA_RASTREIO", "stderr")
+        async with create_connected_server_and_client_session(mcp) as session:
+            await session.call_tool("get_selic", {"data_inicio": "2025-01-02", "data_fim": "2025-01-10"})
+        (rastro,) = _rastros(capsys.readouterr().err)
+        nomes = [t["nome"] for t in rastro["trechos"]]
+        assert nomes[0] == "get_selic"
+        assert nomes[1:3] == ["validar", "buscar"]
+        assert nomes.count("bloco") == 2
+        assert nomes[-2:] == ["transformar", "serializar"]
+        assert rastro["trechos"][0]["atributos"]["mcp.request_id"] == rastro["request_id"]
+
+    def test_queue_wait_and_each_attempt(self, monkeypatch, capsys):
+        monkeypatch.setenv("CAPIVARA_RASTREIO", "stderr")
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "1")
+        monkeypatch.setattr(_resiliencia, "_backoff", lambda n: 0)
+        _resiliencia.reiniciar()
+        respostas = iter([httpx.Response(503), httpx.Response(200, content=b"[]")])
+        original = httpx.AsyncClient
+
+        def cliente(*args, **kwargs):
+            return original(*args, transport=httpx.MockTransport(lambda request: next(respostas)), **kwargs)
+
+        monkeypatch.setattr(_http.httpx, "AsyncClient", cliente)
+        with _rastreio.rastrear("teste", "1"):
+            _http.obter_json("sgs", "bcdata.sgs.432/dados", {"formato": "json"})
+        _resiliencia.reiniciar()
+        (rastro,) = _rastros(capsys.readouterr().err)
+        tentativas = [t for t in rastro["trechos"] if t["nome"] == "upstream"]
+        assert [t["atributos"]["tentativa"] for t in tentativas] == [1, 2]
+        assert tentativas[0]["atributos"]["erro"] == "HTTPStatusError"
+        assert [t["nome"] for t in rastro["trechos"]].count("fila") == 2
+        assert rastro["trechos"][-1]["nome"] == "decodificar"
+
+
+class TestOtlp:
+    def test_file_exporter_format(self, monkeypatch, tmp_path):
+        arquivo = tmp_path / "rastreio.jsonl"
+        monkeypatch.setenv("CAPIVARA_RASTREIO", "otlp")
+        monkeypatch.setenv("CAPIVARA_RASTREIO_ARQUIVO", str(arquivo))
+        with _rastreio.rastrear("get_ptax", "3"), _rastreio.trecho("cache", namespace="ptax"):
+            pass
+        (linha,) = arquivo.read_text().splitlines()
+        (recurso,) = json.loads(linha)["resourceSpans"]
+        assert recurso["resource"]["attributes"][0]["value"] == {"stringValue": "capivara-mcp"}
+        raiz, validar, cache = recurso["scopeSpans"][0]["spans"]
+        assert len(raiz["traceId"]) == 32 and len(raiz["spanId"]) == 16
+        assert "parentSpanId" not in raiz
+        assert cache["parentSpanId"] == validar["spanId"]
+        assert {"key": "namespace", "value": {"stringValue": "ptax"}} in cache["attributes"]
+        assert int(raiz["endTimeUnixNano"]) >= int(cache["endTimeUnixNano"])
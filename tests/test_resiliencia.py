@@ -0,0 +1,144 @@
+"""Tests for _resiliencia.py — retries with backoff, circuit breaker and fallback."""
+
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from capivara_mcp.tools import _resiliencia
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._resiliencia import ABERTO, FECHADO, MEIO_ABERTO, CircuitoAberto, executar
+
+_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.432/dados"
+
+
+@pytest.fixture(autouse=True)
+def _estado_limpo(monkeypatch):
+    _resiliencia.reiniciar()
+    monkeypatch.setenv("CAPIVARA_BACKOFF_BASE_SEGUNDOS", "0")
+    monkeypatch.setenv("CAPIVARA_DISJUNTOR_FALHAS", "3")
+    yield
+    _resiliencia.reiniciar()
+
+
+def _status(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", _URL)
+    return httpx.HTTPStatusError("erro", request=request, response=httpx.Response(code, request=request))
+
+
+def _sequencia(*resultados):
+    restantes = list(resultados)
+
+    def tentativa():
+        r = restantes.pop(0)
+        if isinstance(r, BaseException):
+            raise r
+        return r
+
+    return tentativa
+
+
+class TestEhTransitorio:
+    @pytest.mark.parametrize("code", [429, 500, 503])
+    def test_retryable_status(self, code):
+        assert _resiliencia.eh_transitorio(_status(code))
+
+    def test_client_error_not_retryable(self):
+        assert not _resiliencia.eh_transitorio(_status(404))
+
+    def test_network_errors_retryable(self):
+        assert _resiliencia.eh_transitorio(httpx.ConnectError("x"))
+        assert _resiliencia.eh_transitorio(httpx.ReadTimeout("x"))
+
+
+class TestRetentativas:
+    def test_retries_transient_then_succeeds(self):
+        assert executar("sgs", _URL, _sequencia(_status(503), httpx.ReadTimeout("x"), b"ok")) == b"ok"
+        resumo = _resiliencia.estado_upstreams()["sgs"]
+        assert resumo["total_retentativas"] == 2
+        assert resumo["estado"] == FECHADO
+        assert resumo["falhas_seguidas"] == 0
+
+    def test_client_error_not_retried(self):
+        with pytest.raises(httpx.HTTPStatusError):
+            executar("sgs", _URL, _sequencia(_status(404), b"nunca"))
+        assert _resiliencia.estado_upstreams()["sgs"]["total_retentativas"] == 0
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "1")
+        with pytest.raises(httpx.ConnectError):
+            executar("sgs", _URL, _sequencia(httpx.ConnectError("a"), httpx.ConnectError("b"), b"nunca"))
+
+    def test_deadline_stops_retries(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_BACKOFF_BASE_SEGUNDOS", "5")
+        chamada = Chamada("get_selic", "1", prazo=time.monotonic() + 0.5)
+        with patch.object(_resiliencia.random, "uniform", return_value=4.0), em_chamada(chamada):
+            inicio = time.monotonic()
+            with pytest.raises(httpx.ConnectError):
+                executar("sgs", _URL, _sequencia(httpx.ConnectError("a"), b"nunca"))
+        assert time.monotonic() - inicio < 1.0
+
+    def test_backoff_bounded(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_BACKOFF_BASE_SEGUNDOS", "1")
+        monkeypatch.setenv("CAPIVARA_BACKOFF_MAX_SEGUNDOS", "3")
+        assert all(0 <= _resiliencia._backoff(10) <= 3 for _ in range(50))
+
+
+class TestDisjuntor:
+    def _abrir(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        for _ in range(3):
+            with pytest.raises(httpx.ConnectError):
+                executar("ptax", _URL, _sequencia(httpx.ConnectError("x")))
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self, monkeypatch):
+        self._abrir(monkeypatch)
+        assert _resiliencia.estado_upstreams()["ptax"]["estado"] == ABERTO
+        chamado = []
+        with pytest.raises(CircuitoAberto):
+            executar("ptax", _URL, lambda: chamado.append(1) or b"")
+        assert not chamado
+
+    def test_other_upstreams_unaffected(self, monkeypatch):
+        self._abrir(monkeypatch)
+        assert executar("sgs", _URL, _sequencia(b"ok")) == b"ok"
+
+    def test_half_open_probe_closes(self, monkeypatch):
+        self._abrir(monkeypatch)
+        monkeypatch.setenv("CAPIVARA_DISJUNTOR_ESPERA_SEGUNDOS", "0")
+        assert executar("ptax", _URL, _sequencia(b"ok")) == b"ok"
+        assert _resiliencia.estado_upstreams()["ptax"]["estado"] == FECHADO
+
+    def test_half_open_probe_failure_reopens(self, monkeypatch):
+        self._abrir(monkeypatch)
+        monkeypatch.setenv("CAPIVARA_DISJUNTOR_ESPERA_SEGUNDOS", "0")
+        disjuntor = _resiliencia.disjuntor("ptax")
+        disjuntor.permitir()
+        assert disjuntor.estado == MEIO_ABERTO
+        disjuntor.falha()
+        assert disjuntor.estado == ABERTO
+
+    def test_falls_back_to_last_good_response(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RETENTATIVAS", "0")
+        executar("ptax", _URL, _sequencia(b"antigo"))
+        chamada = Chamada("get_ptax", "1")
+        with em_chamada(chamada):
+            for _ in range(3):
+                assert executar("ptax", _URL, _sequencia(httpx.ConnectError("x"))) == b"antigo"
+            assert _resiliencia.estado_upstreams()["ptax"]["estado"] == ABERTO
+            assert executar("ptax", _URL, _sequencia(httpx.ConnectError("nunca chamado"))) == b"antigo"
+        assert chamada.avisos and "PTAX" in chamada.avisos[0].upper()
+        assert _resiliencia.estado_upstreams()["ptax"]["total_reservas"] == 4
+
+    def test_fallback_store_capped_by_bytes(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_RESERVA_BYTES", "10")
+        _resiliencia._guardar_reserva("a", b"1234")
+        _resiliencia._guardar_reserva("b", b"5678")
+        _resiliencia._guardar_reserva("a", b"abcd")
+        _resiliencia._guardar_reserva("c", b"xyz")
+        assert list(_resiliencia._reservas) == ["a", "c"] and _resiliencia._reservas_bytes == 7
+        _resiliencia._guardar_reserva("grande", b"x" * 11)
+        assert _resiliencia._reserva("grande") is None and _resiliencia._reservas_bytes == 7
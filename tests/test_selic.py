@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import json
 from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import date
 from unittest.mock import patch
 
-import pandas as pd
-import requests
+import httpx
 
+from capivara_mcp.tools._serie import Serie
 from capivara_mcp.tools.selic import get_selic
-from tests.conftest import make_sgs_df
+from tests.conftest import make_sgs_df, make_sgs_serie
 
 _PATCH = "capivara_mcp.tools.selic._fetch_selic"
 
@@ -18,7 +19,7 @@ _PATCH = "capivara_mcp.tools.selic._fetch_selic"
 class TestGetSelicSuccess:
     @patch(_PATCH)
     def test_success_with_explicit_dates(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4})
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4})
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10")
         data = json.loads(result)
         assert data["periodo"]["inicio"] == "2025-01-02"
@@ -28,7 +29,7 @@ class TestGetSelicSuccess:
 
     @patch(_PATCH)
     def test_records_have_expected_keys(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=1)
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-02")
         data = json.loads(result)
         record = data["selic"][0]
@@ -38,23 +39,86 @@ class TestGetSelicSuccess:
 
     @patch(_PATCH)
     def test_dates_formatted_as_iso(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=1)
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=1)
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-02")
         data = json.loads(result)
         assert data["selic"][0]["data"] == "2025-01-02"
 
     @patch(_PATCH)
     def test_returns_json_string(self, mock_fetch):
-        mock_fetch.return_value = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4})
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4})
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10")
         assert isinstance(result, str)
         json.loads(result)
 
+    @patch(_PATCH)
+    def test_dias_uteis_window(self, mock_fetch):
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4})
+        result = get_selic(data_fim="2025-01-12", dias_uteis=5)
+        data = json.loads(result)
+        assert data["periodo"]["inicio"] == "2025-01-06"
+        assert data["periodo"]["dias_uteis"] == 5
+        mock_fetch.assert_called_once_with(date(2025, 1, 6), date(2025, 1, 10))
+
+    @patch(_PATCH)
+    def test_partial_result_flagged(self, mock_fetch):
+        df = make_sgs_df({"selic_meta": 10.5})
+        df.attrs["parcial"] = True
+        mock_fetch.return_value = Serie.de_dataframe(df)
+        result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10")
+        data = json.loads(result)
+        assert data["parcial"] is True
+        assert "Prazo" in data["aviso"]
+        assert len(data["selic"]) == 5
+
+    @patch(_PATCH)
+    def test_formato_degraus(self, mock_fetch):
+        df = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4})
+        df["selic_meta"] = 10.5
+        mock_fetch.return_value = Serie.de_dataframe(df)
+        result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10", formato="degraus")
+        data = json.loads(result)
+        assert data["formato"] == "degraus"
+        assert data["selic"]["selic_meta"] == [["2025-01-02", "2025-01-08", 10.5]]
+        assert len(data["selic"]["selic_efetiva"]) == 5
+
+    @patch(_PATCH)
+    def test_formato_auto_detects_step_series(self, mock_fetch):
+        df = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=30)
+        df["selic_meta"] = 10.5
+        df["selic_efetiva"] = 10.4
+        mock_fetch.return_value = Serie.de_dataframe(df)
+        result = get_selic(data_inicio="2025-01-02", data_fim="2025-02-14", formato="auto")
+        data = json.loads(result)
+        assert data["formato"] == "degraus"
+        assert len(data["selic"]["selic_meta"]) == 1
+
+    @patch(_PATCH)
+    def test_formato_auto_keeps_records_for_varying_series(self, mock_fetch):
+        mock_fetch.return_value = make_sgs_serie({"selic_meta": 10.5, "selic_efetiva": 10.4})
+        result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10", formato="auto")
+        data = json.loads(result)
+        assert "formato" not in data
+        assert len(data["selic"]) == 5
+
+    def test_invalid_formato(self):
+        result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10", formato="csv")
+        data = json.loads(result)
+        assert "erro" in data
+        assert "csv" in data["erro"]
+
+    @patch(_PATCH)
+    def test_holiday_window_skips_upstream(self, mock_fetch):
+        result = get_selic(data_inicio="2025-03-01", data_fim="2025-03-04")
+        data = json.loads(result)
+        assert "erro" in data
+        mock_fetch.assert_not_called()
+
 
 class TestGetSelicEmptyResponse:
     @patch(_PATCH)
     def test_empty_dataframe(self, mock_fetch):
-        mock_fetch.return_value = pd.DataFrame()
+        mock_fetch.return_value = Serie.vazia()
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10")
         data = json.loads(result)
         assert "erro" in data
@@ -91,7 +155,7 @@ class TestGetSelicErrors:
         assert "erro" in data
         assert "Tempo limite" in data["erro"]
 
-    @patch(_PATCH, side_effect=requests.ConnectionError())
+    @patch(_PATCH, side_effect=httpx.ConnectError("falha"))
     def test_connection_error(self, _):
         result = get_selic(data_inicio="2025-01-02", data_fim="2025-01-10")
         data = json.loads(result)
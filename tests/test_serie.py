@@ -0,0 +1,107 @@
+"""Tests for _serie.py — compact array-backed SGS series."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from capivara_mcp.tools._serie import Serie, data, dia
+from tests.conftest import make_sgs_df, make_sgs_serie
+
+
+class TestConstrucao:
+    def test_from_sgs_json(self):
+        serie = Serie.de_sgs(
+            "selic",
+            [
+                {"data": "03/01/2025", "valor": "12.25"},
+                {"data": "02/01/2025", "valor": "12.15"},
+                {"data": "06/01/2025", "valor": ""},
+            ],
+        )
+        assert serie.datas() == ["2025-01-02", "2025-01-03", "2025-01-06"]
+        assert serie.valores("selic") == [12.15, 12.25, None]
+
+    def test_day_offsets_are_int32_and_values_float64(self):
+        serie = make_sgs_serie({"a": 1.0, "b": 2.0}, n=10)
+        assert isinstance(serie.dias, array) and serie.dias.typecode == "i"
+        assert all(isinstance(v, array) and v.typecode == "d" for v in serie.colunas.values())
+        assert serie.nbytes == 10 * 4 + 2 * 10 * 8
+        assert data(serie.dias[0]) == date(2025, 1, 2)
+        assert dia(date(1970, 1, 1)) == 0
+
+    def test_dataframe_round_trip(self):
+        df = make_sgs_df({"a": 1.0, "b": 2.0})
+        df.attrs["parcial"] = True
+        de_volta = Serie.de_dataframe(df).para_dataframe()
+        pd.testing.assert_frame_equal(df, de_volta, check_freq=False, check_index_type=False)
+        assert de_volta.attrs == {"parcial": True}
+
+    def test_mismatched_lengths_rejected(self):
+        serie = make_sgs_serie({"a": 1.0}, n=3)
+        with pytest.raises(ValueError):
+            Serie(serie.dias, {"a": serie.colunas["a"][:2]})
+
+    def test_no_instance_dict(self):
+        with pytest.raises(AttributeError):
+            make_sgs_serie({"a": 1.0}).extra = 1  # type: ignore[attr-defined]
+
+
+class TestCombinacao:
+    def test_concatenate_blocks(self):
+        df = make_sgs_df({"a": 1.0}, n=6)
+        partes = [Serie.de_dataframe(df.iloc[:3]), Serie.de_dataframe(df.iloc[3:])]
+        assert Serie.concatenar(partes) == Serie.de_dataframe(df)
+
+    def test_outer_join_fills_missing_days_with_nan(self):
+        a = Serie.de_sgs("a", [{"data": "02/01/2025", "valor": "1"}, {"data": "03/01/2025", "valor": "2"}])
+        b = Serie.de_sgs("b", [{"data": "03/01/2025", "valor": "3"}, {"data": "06/01/2025", "valor": "4"}])
+        junta = Serie.juntar([a, b])
+        assert junta.datas() == ["2025-01-02", "2025-01-03", "2025-01-06"]
+        assert junta.valores("a") == [1.0, 2.0, None]
+        assert junta.valores("b") == [None, 3.0, 4.0]
+
+    def test_join_same_days_shares_index(self):
+        a, b = make_sgs_serie({"a": 1.0}), make_sgs_serie({"b": 2.0})
+        assert Serie.juntar([a, b]).dias is a.dias
+
+
+class TestConsulta:
+    def test_slice_by_date(self):
+        serie = make_sgs_serie({"a": 1.0}, n=10)  # dias úteis a partir de 2025-01-02
+        fatia = serie.fatiar(date(2025, 1, 4), date(2025, 1, 8))
+        assert fatia.datas() == ["2025-01-06", "2025-01-07", "2025-01-08"]
+        assert len(serie.fatiar(date(2030, 1, 1))) == 0
+
+    def test_records_match_pandas_output(self):
+        df = make_sgs_df({"selic_meta": 10.5, "selic_efetiva": 10.4}, n=4)
+        esperado = df.rename_axis("data").reset_index()
+        esperado["data"] = esperado["data"].dt.strftime("%Y-%m-%d")
+        assert Serie.de_dataframe(df).registros() == esperado.to_dict(orient="records")
+
+    def test_records_range_and_nan_as_none(self):
+        serie = Serie.de_sgs("a", [{"data": "02/01/2025", "valor": "x"}, {"data": "03/01/2025", "valor": "2"}])
+        assert serie.registros(1) == [{"data": "2025-01-03", "a": 2.0}]
+        assert serie.registros()[0]["a"] is None
+
+
+class TestBinario:
+    def test_round_trip(self):
+        serie = make_sgs_serie({"a": 1.0, "Dívida bruta/PIB": 2.0}, n=7)
+        serie.attrs["parcial"] = False
+        lida = Serie.de_bytes(serie.para_bytes())
+        assert lida == serie
+        assert lida.attrs == {"parcial": False}
+
+    def test_nan_preserved(self):
+        serie = Serie.de_sgs("a", [{"data": "02/01/2025", "valor": None}])
+        assert math.isnan(Serie.de_bytes(serie.para_bytes()).colunas["a"][0])
+
+    def test_truncated_rejected(self):
+        dados = make_sgs_serie({"a": 1.0}).para_bytes()
+        with pytest.raises(ValueError):
+            Serie.de_bytes(dados[:-1])
@@ -0,0 +1,143 @@
+"""Server wiring tests — tools called in-process through an MCP client session."""
+
+from __future__ import annotations
+
+import json
+import os
+from unittest.mock import patch
+
+import mcp.types as types
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+from starlette.testclient import TestClient
+
+from capivara_mcp.server import criar_app_http, main, mcp
+from capivara_mcp.tools._contexto import chamada_atual
+from tests.conftest import make_sgs_serie
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: 10.0}, n=5)
+
+
+def _json(result: types.CallToolResult) -> dict:
+    conteudo = result.content[0]
+    assert isinstance(conteudo, types.TextContent)
+    return json.loads(conteudo.text)
+
+
+@pytest.mark.asyncio
+async def test_context_parameter_hidden_from_schema():
+    async with create_connected_server_and_client_session(mcp) as session:
+        result = await session.list_tools()
+        for tool in result.tools:
+            assert "ctx" not in tool.inputSchema["properties"], tool.name
+
+
+@pytest.mark.asyncio
+async def test_tool_runs_through_wrapper():
+    async with create_connected_server_and_client_session(mcp) as session:
+        result = await session.call_tool("get_ptax", {"data_inicio": "bad"})
+        data = _json(result)
+        assert "data_inicio" in data["erro"]
+
+
+@pytest.mark.asyncio
+@patch("capivara_mcp.tools._sgs._buscar_bloco", side_effect=_bloco)
+async def test_progress_notifications_per_block(_):
+    eventos = []
+
+    async def on_progress(progress, total, message):
+        eventos.append((progress, total, message))
+
+    async with create_connected_server_and_client_session(mcp) as session:
+        result = await session.call_tool(
+            "get_selic",
+            {"data_inicio": "2025-01-02", "data_fim": "2025-01-10"},
+            progress_callback=on_progress,
+        )
+    data = _json(result)
+    assert len(data["selic"]) == 5
+    assert [(p, t) for p, t, _ in eventos] == [(1, 2), (2, 2)]
+
+
+def _bloco_com_aviso(nome, codigo, dt_inicio, dt_fim):
+    chamada = chamada_atual()
+    assert chamada is not None
+    chamada.avisar("Dados servidos da reserva.")
+    return _bloco(nome, codigo, dt_inicio, dt_fim)
+
+
+@pytest.mark.asyncio
+@patch("capivara_mcp.tools._sgs._buscar_bloco", side_effect=_bloco_com_aviso)
+async def test_call_warnings_attached_to_response(_):
+    async with create_connected_server_and_client_session(mcp) as session:
+        result = await session.call_tool("get_selic", {"data_inicio": "2025-01-02", "data_fim": "2025-01-10"})
+    data = _json(result)
+    assert data["avisos"] == ["Dados servidos da reserva."]
+    assert len(data["selic"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_health_resource_lists_upstreams():
+    async with create_connected_server_and_client_session(mcp) as session:
+        result = await session.read_resource(AnyUrl("capivara://saude"))
+    conteudo = result.contents[0]
+    assert isinstance(conteudo, types.TextResourceContents)
+    assert "upstreams" in json.loads(conteudo.text)
+
+
+class TestHttp:
+    def test_single_worker_keeps_sessions(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "1")
+        monkeypatch.setattr(mcp, "_session_manager", None)
+        criar_app_http()
+        assert mcp.settings.stateless_http is False
+
+    def test_multiple_workers_are_stateless(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "4")
+        monkeypatch.setattr(mcp, "_session_manager", None)
+        monkeypatch.setattr(mcp.settings, "stateless_http", False)
+        with TestClient(criar_app_http(), base_url="http://127.0.0.1:8000") as cliente:
+            resposta = cliente.post(
+                "/mcp",
+                json={
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "tools/call",
+                    "params": {"name": "get_ptax", "arguments": {"data_inicio": "bad"}},
+                },
+                headers={"Accept": "application/json, text/event-stream"},
+            )
+        assert resposta.status_code == 200
+        assert "data_inicio" in resposta.text
+        assert mcp.settings.stateless_http is True
+
+    def test_main_http_runs_uvicorn_with_shared_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        monkeypatch.setenv("CAPIVARA_HTTP_HOST", "127.0.0.1")  # main() exporta a configuração aos workers
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "1")
+        monkeypatch.delenv("CAPIVARA_CACHE", raising=False)
+        monkeypatch.delenv("CAPIVARA_CACHE_SQLITE", raising=False)
+        monkeypatch.delenv("CAPIVARA_SERIES_DIRETORIO", raising=False)
+        with patch("uvicorn.run") as run:
+            main(["--transporte", "http", "--porta", "9000", "--workers", "3"])
+        assert run.call_args.kwargs["workers"] == 3
+        assert run.call_args.kwargs["port"] == 9000
+        assert run.call_args.kwargs["factory"] is True
+        assert os.environ["CAPIVARA_CACHE"] == "sqlite"
+        assert (tmp_path / "capivara-mcp" / "cache.sqlite3").exists()
+        assert os.environ["CAPIVARA_SERIES_DIRETORIO"] == str(tmp_path / "capivara-mcp" / "series")
+
+    def test_main_defaults_to_stdio(self):
+        with patch("anyio.run") as run, patch("signal.signal"):
+            main([])
+        assert run.call_args.args[0].__name__ == "_servir_stdio"
+
+    def test_http_app_runs_schedule_in_lifespan(self, monkeypatch):
+        monkeypatch.setenv("CAPIVARA_AGENDA", "1")
+        monkeypatch.setenv("CAPIVARA_HTTP_WORKERS", "2")
+        with patch("capivara_mcp.tools._agenda.rodar") as rodar, TestClient(criar_app_http()):
+            pass
+        rodar.assert_called_once()
@@ -0,0 +1,77 @@
+"""Tests for _sgs.py — fetch planner over mocked SGS blocks."""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._serie import Serie
+from capivara_mcp.tools._sgs import buscar_series, planejar_blocos
+from tests.conftest import make_sgs_serie
+
+_PATCH = "capivara_mcp.tools._sgs._buscar_bloco"
+
+
+def _bloco(nome, codigo, dt_inicio, dt_fim):
+    return make_sgs_serie({nome: float(codigo)}, n=3)
+
+
+class TestPlanejarBlocos:
+    def test_short_window_single_block(self):
+        assert planejar_blocos(date(2024, 1, 1), date(2024, 12, 31)) == [(date(2024, 1, 1), date(2024, 12, 31))]
+
+    def test_long_window_split_contiguously(self):
+        blocos = planejar_blocos(date(2000, 1, 1), date(2024, 6, 30))
+        assert blocos[0] == (date(2000, 1, 1), date(2009, 12, 31))
+        assert blocos[1][0] == date(2010, 1, 1)
+        assert blocos[-1][1] == date(2024, 6, 30)
+        assert len(blocos) == 3
+
+    def test_leap_day_start(self):
+        blocos = planejar_blocos(date(2016, 2, 29), date(2030, 1, 1), max_anos=1)
+        assert blocos[0] == (date(2016, 2, 29), date(2017, 2, 27))
+
+
+class TestBuscarSeries:
+    @patch(_PATCH, side_effect=_bloco)
+    def test_combines_series_as_columns(self, mock_bloco):
+        serie = buscar_series({"a": 1, "b": 2}, date(2025, 1, 2), date(2025, 1, 6))
+        assert list(serie.colunas) == ["a", "b"]
+        assert len(serie) == 3
+        assert serie.attrs["parcial"] is False
+        assert mock_bloco.call_count == 2
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_reports_progress_per_block(self, _):
+        eventos = []
+        with em_chamada(Chamada("get_selic", "1", notificar=lambda *a: eventos.append(a))):
+            buscar_series({"a": 1, "b": 2}, date(2025, 1, 2), date(2025, 1, 6))
+        assert [(feito, total) for feito, total, _ in eventos] == [(1, 2), (2, 2)]
+        assert "6 linhas" in eventos[-1][2]
+
+    @patch(_PATCH)
+    def test_partial_result_when_deadline_reached(self, mock_bloco):
+        chamada = Chamada("get_selic", "1", prazo=time.monotonic() + 60)
+
+        def primeiro_bloco_esgota_prazo(nome, codigo, dt_inicio, dt_fim):
+            chamada.prazo = time.monotonic() - 1
+            return _bloco(nome, codigo, dt_inicio, dt_fim)
+
+        mock_bloco.side_effect = primeiro_bloco_esgota_prazo
+        with em_chamada(chamada):
+            serie = buscar_series({"a": 1, "b": 2}, date(2025, 1, 2), date(2025, 1, 6))
+        assert list(serie.colunas) == ["a"]
+        assert serie.attrs["parcial"] is True
+
+    @patch(_PATCH, side_effect=_bloco)
+    def test_deadline_before_first_block_raises(self, _):
+        with em_chamada(Chamada("get_selic", "1", prazo=time.monotonic() - 1)), pytest.raises(TimeoutError):
+            buscar_series({"a": 1}, date(2025, 1, 2), date(2025, 1, 6))
+
+    @patch(_PATCH, return_value=Serie.vazia(["a"]))
+    def test_empty_block(self, _):
+        assert len(buscar_series({"a": 1}, date(2025, 1, 2), date(2025, 1, 6))) == 0
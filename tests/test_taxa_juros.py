@@ -54,6 +54,25 @@ class TestGetTaxaJurosSuccess:
         assert isinstance(result, str)
         json.loads(result)
 
+    @patch(_PATCH)
+    def test_paginated_walk(self, mock_fetch):
+        mock_fetch.return_value = make_taxa_juros_df(n=5)
+        data = json.loads(get_taxa_juros(mes="Jan-2025", top=5, tamanho_pagina=2))
+        assert data["mes"] == "Jan-2025"
+        assert len(data["taxas"]) == 2
+        assert data["paginacao"]["total"] == 5
+        instituicoes = [t["instituicao"] for t in data["taxas"]]
+        while data["paginacao"]["proximo_cursor"]:
+            data = json.loads(get_taxa_juros(mes="ignorado", cursor=data["paginacao"]["proximo_cursor"]))
+            instituicoes.extend(t["instituicao"] for t in data["taxas"])
+        assert len(instituicoes) == 5
+        mock_fetch.assert_called_once()
+
+    def test_invalid_tamanho_pagina(self):
+        data = json.loads(get_taxa_juros(mes="Jan-2025", tamanho_pagina=0))
+        assert "erro" in data
+        assert "tamanho_pagina" in data["erro"]
+
 
 class TestGetTaxaJurosEmptyResponse:
     @patch(_PATCH)
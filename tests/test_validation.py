@@ -5,7 +5,8 @@ from __future__ import annotations
 import json
 from datetime import date
 
-from capivara_mcp.tools._validation import erro_json, parse_date, validate_date_range
+from capivara_mcp.tools._contexto import Chamada, em_chamada
+from capivara_mcp.tools._validation import erro_json, observacao, parse_date, resposta_json, validate_date_range
 
 
 class TestErroJson:
@@ -24,6 +25,41 @@ class TestErroJson:
     def test_returns_str_type(self):
         assert isinstance(erro_json("test"), str)
 
+    def test_noted_on_current_call(self):
+        chamada = Chamada(ferramenta="get_ptax", id="1")
+        with em_chamada(chamada):
+            erro_json("falhou")
+        assert chamada.erro_resposta == "falhou"
+
+
+class TestRespostaJson:
+    def test_outside_a_call_is_plain_json(self):
+        assert json.loads(resposta_json({"mes": "Jan-2025", "taxas": [1, 2]})) == {"mes": "Jan-2025", "taxas": [1, 2]}
+
+    def test_rows_counted_and_warnings_attached(self):
+        chamada = Chamada(ferramenta="get_selic", id="1")
+        chamada.avisos.append("Série parcial")
+        with em_chamada(chamada):
+            dados = json.loads(resposta_json({"selic": [1, 2, 3], "outros": [4], "periodo": {"inicio": "x"}}))
+        assert dados["avisos"] == ["Série parcial"]
+        assert chamada.linhas == 4 and chamada.erro_resposta is None
+
+
+class TestObservacao:
+    def test_latest_record_without_header(self):
+        resposta = json.dumps(
+            {
+                "moeda": "USD",
+                "periodo": {"inicio": "2024-12-04", "fim": "2025-01-03"},
+                "cotacoes": [{"data_hora": "2025-01-03 13:00:00", "v": 2}, {"data_hora": "2025-01-02", "v": 1}],
+            }
+        )
+        assert json.loads(observacao(resposta)) == {"cotacoes": {"data_hora": "2025-01-03 13:00:00", "v": 2}}
+
+    def test_not_a_response(self):
+        assert observacao("{}") == "{}"
+        assert observacao("texto") == "texto"
+
 
 class TestParseDate:
     def test_valid_iso_date(self):